@@ -7,11 +7,15 @@ import numpy.typing as npt
 
 if TYPE_CHECKING:
     from lattice_mc.lattice_site import Site
+    from lattice_mc.species import Species
 
 
 class Atom:
     """
     Atoms are distinguishable particles, each occupying a specific lattice site.
+
+    Once an Atom has been added to a Species, its displacement, number of hops, and summed squared displacement
+    are stored in the arrays of that Species, and the Atom attributes act as views onto those arrays.
     """
 
     atom_number: int = 0  # counter, so that every Atom instance is distinguishable
@@ -26,6 +30,8 @@ class Atom:
         Returns:
             None
         """
+        self.species: Species | None = None  # the species containing this atom. set in Species.__init__
+        self.species_index: int = -1  # position of this atom in the species arrays. set in Species.__init__
         Atom.atom_number += 1
         self.number: int = Atom.atom_number
         self._site = initial_site
@@ -48,11 +54,59 @@ class Atom:
         Returns:
             None
         """
-        self.number_of_hops: int = 0
-        self.dr: npt.NDArray[np.float64] = np.array([0.0, 0.0, 0.0])
-        self.summed_dr2: float = 0.0
+        self.number_of_hops = 0
+        self.dr = np.array([0.0, 0.0, 0.0])
+        self.summed_dr2 = 0.0
         self.sites_visited: list[int] = [self._site.number]
 
+    @property
+    def number_of_hops(self) -> int:
+        """
+        Get or set the number of hops made by this `Atom`.
+        """
+        if self.species is None:
+            return self._number_of_hops
+        return int(self.species.atom_number_of_hops[self.species_index])
+
+    @number_of_hops.setter
+    def number_of_hops(self, value: int) -> None:
+        if self.species is None:
+            self._number_of_hops = value
+        else:
+            self.species.atom_number_of_hops[self.species_index] = value
+
+    @property
+    def dr(self) -> npt.NDArray[np.float64]:
+        """
+        Get or set the total displacement vector for this `Atom`.
+        """
+        if self.species is None:
+            return self._dr
+        return self.species.atom_dr[self.species_index]
+
+    @dr.setter
+    def dr(self, value: npt.NDArray[np.float64]) -> None:
+        if self.species is None:
+            self._dr = value
+        else:
+            self.species.atom_dr[self.species_index] = value
+
+    @property
+    def summed_dr2(self) -> float:
+        """
+        Get or set the sum of squared individual hop displacements for this `Atom`.
+        """
+        if self.species is None:
+            return self._summed_dr2
+        return float(self.species.atom_summed_dr2[self.species_index])
+
+    @summed_dr2.setter
+    def summed_dr2(self, value: float) -> None:
+        if self.species is None:
+            self._summed_dr2 = value
+        else:
+            self.species.atom_summed_dr2[self.species_index] = value
+
     def dr_squared(self) -> float:
         """
         :math:`|dr|^2`, where :math:`dr` is the total displacement vector for this `Atom`.
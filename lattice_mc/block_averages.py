@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from lattice_mc.species import Species
+
+"""
+Block-averaged estimates, with standard errors, of the transport properties of a simulation.
+"""
+
+QUANTITIES = (
+    "tracer_diffusion_coefficient",
+    "collective_diffusion_coefficient",
+    "tracer_correlation",
+    "collective_correlation",
+)
+
+
+@dataclass(frozen=True)
+class Estimate:
+    """An estimate of a quantity, with its standard error.
+
+    Attributes:
+        mean (float): The mean of the block values.
+        standard_error (float): The standard error of the mean.
+        number_of_blocks (int): The number of blocks averaged over.
+    """
+
+    mean: float
+    standard_error: float
+    number_of_blocks: int
+
+    @property
+    def relative_error(self) -> float:
+        """
+        The standard error relative to the magnitude of the mean.
+        """
+        return self.standard_error / abs(self.mean) if self.mean else math.inf
+
+
+class BlockAverages:
+    """
+    BlockAverages class
+
+    Splits a run into consecutive blocks, and calculates the tracer and collective diffusion coefficients,
+    D* and D_J, and correlation factors, f and f_I, from the atom displacements and elapsed time within each block.
+    For blocks much longer than the time over which successive jumps are correlated, the block values are
+    independent, and their spread gives the standard error of each quantity.
+    """
+
+    def __init__(self, species: Species, time: float) -> None:
+        """
+        Initialise a BlockAverages instance, starting the first block.
+
+        Args:
+            species (Species): The atoms whose displacements are used.
+            time (Float): The simulation time at the start of the first block.
+
+        Returns:
+            None
+        """
+        self.species: Species = species
+        self.start_dr: npt.NDArray[np.float64] = species.atom_dr.copy()
+        self.start_summed_dr2: float = species.summed_dr2()
+        self.start_time: float = time
+        self.values: dict[str, list[float]] = {quantity: [] for quantity in QUANTITIES}
+
+    @property
+    def number_of_blocks(self) -> int:
+        """
+        The number of completed blocks.
+        """
+        return len(self.values[QUANTITIES[0]])
+
+    def end_block(self, time: float) -> None:
+        """
+        Finish the current block, record its values, and start the next block.
+
+        Args:
+            time (Float): The simulation time at the end of the block.
+
+        Returns:
+            None
+        """
+        dr = self.species.atom_dr - self.start_dr
+        summed_dr2 = self.species.summed_dr2() - self.start_summed_dr2
+        elapsed = time - self.start_time
+        sum_dr_squared = float(np.sum(dr * dr))
+        collective_dr_squared = float(np.sum(np.square(dr.sum(axis=0))))
+        self.values["tracer_diffusion_coefficient"].append(sum_dr_squared / (6.0 * len(dr) * elapsed))
+        self.values["collective_diffusion_coefficient"].append(collective_dr_squared / (6.0 * elapsed))
+        self.values["tracer_correlation"].append(sum_dr_squared / summed_dr2)
+        self.values["collective_correlation"].append(collective_dr_squared / summed_dr2)
+        self.start_dr = self.species.atom_dr.copy()
+        self.start_summed_dr2 = self.species.summed_dr2()
+        self.start_time = time
+
+    def estimate(self, quantity: str) -> Estimate:
+        """
+        The block-averaged estimate of one quantity.
+
+        Args:
+            quantity (Str): The quantity, one of `QUANTITIES`.
+
+        Returns:
+            (Estimate): The mean and standard error. The standard error is infinite for fewer than two blocks.
+
+        Raises:
+            ValueError: If `quantity` is not one of `QUANTITIES`.
+        """
+        if quantity not in QUANTITIES:
+            raise ValueError(f"Unsupported quantity {quantity!r}. Expected one of {list(QUANTITIES)!r}.")
+        values = np.array(self.values[quantity])
+        n = len(values)
+        if n == 0:
+            return Estimate(mean=math.nan, standard_error=math.inf, number_of_blocks=0)
+        standard_error = float(np.std(values, ddof=1) / math.sqrt(n)) if n > 1 else math.inf
+        return Estimate(mean=float(np.mean(values)), standard_error=standard_error, number_of_blocks=n)
+
+    @property
+    def estimates(self) -> dict[str, Estimate]:
+        """
+        The block-averaged estimates of every quantity.
+        """
+        return {quantity: self.estimate(quantity) for quantity in QUANTITIES}
+
+    def converged(self, relative_errors: dict[str, float]) -> bool:
+        """
+        Check whether the estimates have reached the target relative standard errors.
+
+        Args:
+            relative_errors (Dict): The target relative standard error for each quantity, e.g.
+                `{"tracer_diffusion_coefficient": 0.01}`.
+
+        Returns:
+            (Bool): True if every quantity has reached its target.
+        """
+        return all(self.estimate(quantity).relative_error <= target for quantity, target in relative_errors.items())
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import numpy.typing as npt
+
+from lattice_mc import event_catalogue
+
+if TYPE_CHECKING:
+    from lattice_mc.simulation import Simulation
+
+"""
+Compact binary checkpoints, for restarting interrupted simulations exactly.
+"""
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """The complete dynamic state of a simulation, as NumPy arrays.
+
+    A checkpoint holds the site occupations, the site occupied by each atom, the per-atom displacement,
+    summed squared displacement, and number of hops, the lattice time, the site occupation times,
+    the state of the random-number stream, and the progress of the current run. If the lattice has an event
+    catalogue, its slot layout is also saved, so a restored simulation selects exactly the same jumps as an
+    uninterrupted one. If a trajectory is being recorded, the point reached in the trajectory file is saved,
+    so a resumed run continues the trajectory from there, and if mean squared displacements are being
+    accumulated, the state of the MSD accumulator is saved. The lattice topology and energies are not saved, and are set up again before a
+    checkpoint is restored, as for the original simulation.
+    """
+
+    occupied: npt.NDArray[np.int8]
+    atom_site: npt.NDArray[np.int64]
+    atom_dr: npt.NDArray[np.float64]
+    atom_summed_dr2: npt.NDArray[np.float64]
+    atom_number_of_hops: npt.NDArray[np.int64]
+    time: float
+    time_occupied: npt.NDArray[np.float64]
+    occupied_since: npt.NDArray[np.float64]
+    rng_state: dict[str, Any]
+    equilibration_jumps_completed: int = 0
+    jumps_completed: int = 0
+    event_slots: npt.NDArray[np.int64] | None = None
+    free_slots: npt.NDArray[np.int64] | None = None
+    selection_classes: list[tuple[Any, list[int]]] | None = None
+    trajectory_position: tuple[int, int] | None = None
+    msd_state: dict[str, Any] | None = None
+
+    @classmethod
+    def from_simulation(cls, simulation: Simulation) -> Checkpoint:
+        """
+        Create a checkpoint of the current state of a simulation.
+
+        Args:
+            simulation (Simulation): The simulation.
+
+        Returns:
+            (Checkpoint): A copy of the simulation state.
+        """
+        lattice = simulation.lattice
+        atoms = simulation.atoms
+        assert lattice is not None
+        assert atoms is not None
+        catalogue = lattice.event_catalogue
+        trajectory = lattice.trajectory
+        return cls(
+            occupied=lattice.occupied.copy(),
+            atom_site=np.array([atom.site.lattice_index for atom in atoms.atoms], dtype=np.int64),
+            atom_dr=atoms.atom_dr.copy(),
+            atom_summed_dr2=atoms.atom_summed_dr2.copy(),
+            atom_number_of_hops=atoms.atom_number_of_hops.copy(),
+            time=float(lattice.time),
+            time_occupied=lattice.time_occupied.copy(),
+            occupied_since=lattice.occupied_since.copy(),
+            rng_state=simulation.rng.state,
+            equilibration_jumps_completed=simulation.equilibration_jumps_completed,
+            jumps_completed=simulation.jumps_completed,
+            event_slots=None if catalogue is None else catalogue.slot_events[: catalogue.number_of_slots].copy(),
+            free_slots=None if catalogue is None else np.array(catalogue.free_slots, dtype=np.int64),
+            selection_classes=None if catalogue is None else catalogue.selection_classes,
+            trajectory_position=None if trajectory is None else trajectory.position(),
+            msd_state=None if lattice.msd is None else lattice.msd.state,
+        )
+
+    def restore(self, simulation: Simulation) -> None:
+        """
+        Restore the state of a simulation from this checkpoint.
+        The simulation lattice and atoms must have been set up as for the simulation the checkpoint was taken from.
+
+        Args:
+            simulation (Simulation): The simulation.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the numbers of sites or atoms do not match this checkpoint.
+        """
+        lattice = simulation.lattice
+        atoms = simulation.atoms
+        assert lattice is not None
+        assert atoms is not None
+        if len(self.occupied) != lattice.number_of_sites or len(self.atom_site) != len(atoms.atoms):
+            raise ValueError(
+                f"Checkpoint has {len(self.atom_site)} atoms on {len(self.occupied)} sites; "
+                f"the simulation has {len(atoms.atoms)} atoms on {lattice.number_of_sites} sites."
+            )
+        lattice.place_atoms(atoms.atoms, self.atom_site)
+        lattice.time = self.time
+        lattice.time_occupied[:] = self.time_occupied
+        lattice.occupied_since[:] = self.occupied_since
+        atoms.atom_dr[:] = self.atom_dr
+        atoms.atom_summed_dr2[:] = self.atom_summed_dr2
+        atoms.atom_number_of_hops[:] = self.atom_number_of_hops
+        simulation.rng.state = self.rng_state
+        simulation.equilibration_jumps_completed = self.equilibration_jumps_completed
+        simulation.jumps_completed = self.jumps_completed
+        simulation.resuming = True
+        simulation.trajectory_position = self.trajectory_position
+        simulation.msd_state = self.msd_state
+        if self.event_slots is not None:
+            assert self.free_slots is not None
+            assert self.selection_classes is not None
+            lattice.params = simulation.params
+            lattice.event_catalogue = event_catalogue.EventCatalogue(lattice)
+            lattice.event_catalogue.restore(self.event_slots, self.free_slots.tolist(), self.selection_classes)
+
+    def save(self, filename: str) -> None:
+        """
+        Write this checkpoint to a NumPy `.npz` file.
+        The file is written under a temporary name and then renamed, so an interrupted write
+        never replaces an existing checkpoint with an incomplete one.
+
+        Args:
+            filename (Str): The checkpoint filename.
+
+        Returns:
+            None
+        """
+        arrays = {
+            "occupied": self.occupied,
+            "atom_site": self.atom_site,
+            "atom_dr": self.atom_dr,
+            "atom_summed_dr2": self.atom_summed_dr2,
+            "atom_number_of_hops": self.atom_number_of_hops,
+            "time": np.array(self.time),
+            "time_occupied": self.time_occupied,
+            "occupied_since": self.occupied_since,
+            # the bit generator state holds integers too large for NumPy arrays, so it is stored as JSON.
+            "rng_bit_generator": np.array(json.dumps(self.rng_state["bit_generator"])),
+            "rng_block": self.rng_state["block"],
+            "rng_position": np.array(self.rng_state["position"]),
+            "equilibration_jumps_completed": np.array(self.equilibration_jumps_completed),
+            "jumps_completed": np.array(self.jumps_completed),
+        }
+        if self.event_slots is not None:
+            arrays.update(
+                {
+                    "event_slots": self.event_slots,
+                    "free_slots": self.free_slots,
+                    "selection_classes": np.array(json.dumps(self.selection_classes)),
+                }
+            )
+        if self.trajectory_position is not None:
+            arrays["trajectory_position"] = np.array(self.trajectory_position, dtype=np.int64)
+        if self.msd_state is not None:
+            arrays.update({f"msd_{key}": np.asarray(value) for key, value in self.msd_state.items()})
+        temporary = f"{filename}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename: str) -> Checkpoint:
+        """
+        Read a checkpoint written by `save()`.
+
+        Args:
+            filename (Str): The checkpoint filename.
+
+        Returns:
+            (Checkpoint): The checkpoint.
+        """
+        with np.load(filename) as data:
+            has_catalogue = "event_slots" in data.files
+            return cls(
+                occupied=data["occupied"],
+                atom_site=data["atom_site"],
+                atom_dr=data["atom_dr"],
+                atom_summed_dr2=data["atom_summed_dr2"],
+                atom_number_of_hops=data["atom_number_of_hops"],
+                time=float(data["time"]),
+                time_occupied=data["time_occupied"],
+                occupied_since=data["occupied_since"],
+                rng_state={
+                    "bit_generator": json.loads(str(data["rng_bit_generator"])),
+                    "block": data["rng_block"],
+                    "position": int(data["rng_position"]),
+                },
+                equilibration_jumps_completed=int(data["equilibration_jumps_completed"]),
+                jumps_completed=int(data["jumps_completed"]),
+                event_slots=data["event_slots"] if has_catalogue else None,
+                free_slots=data["free_slots"] if has_catalogue else None,
+                selection_classes=(
+                    [(restore_key(key), slots) for key, slots in json.loads(str(data["selection_classes"]))]
+                    if has_catalogue
+                    else None
+                ),
+                trajectory_position=(
+                    (int(data["trajectory_position"][0]), int(data["trajectory_position"][1]))
+                    if "trajectory_position" in data.files
+                    else None
+                ),
+                msd_state=({name[len("msd_") :]: data[name] for name in data.files if name.startswith("msd_")} or None),
+            )
+
+
+def restore_key(key: Any) -> Any:
+    """
+    Convert an event class key read from JSON back to its original type, since JSON stores tuples as lists.
+
+    Args:
+        key: The key, as read from JSON.
+
+    Returns:
+        The key, with lists (including nested lists) converted to tuples.
+    """
+    return tuple(restore_key(k) for k in key) if isinstance(key, list) else key
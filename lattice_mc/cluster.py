@@ -1,12 +1,72 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Iterable, Sequence
 from typing import TYPE_CHECKING
 
+import numpy as np
+import numpy.typing as npt
+
 if TYPE_CHECKING:
     from lattice_mc.lattice_site import Site
 
 
+def connected_components(sites: Sequence[Site]) -> list[list[Site]]:
+    """
+    Partitions a set of sites into groups that are connected through their neighbour lists,
+    using a disjoint-set forest with path halving.
+    Neighbouring sites that are not in `sites` do not connect anything.
+
+    Args:
+        sites (List(Site)): The sites to partition.
+
+    Returns:
+        (List(List(Site))): Groups of connected sites, ordered by the first site of each group in `sites`.
+    """
+    index = {site: i for i, site in enumerate(sites)}
+    parent = list(range(len(sites)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, site in enumerate(sites):
+        assert site.p_neighbours is not None
+        for neighbour in site.p_neighbours:
+            j = index.get(neighbour)
+            if j is None:
+                continue
+            root_i, root_j = find(i), find(j)
+            if root_i < root_j:
+                parent[root_j] = root_i
+            elif root_j < root_i:
+                parent[root_i] = root_j
+    groups: dict[int, list[Site]] = {}
+    for i, site in enumerate(sites):
+        groups.setdefault(find(i), []).append(site)
+    return list(groups.values())
+
+
+def image_shift(dr: float, cell_length: float) -> int:
+    """
+    Change in periodic image along one axis when following the minimum-image bond between two sites,
+    using the same convention as `lattice.bond_vectors()`.
+
+    Args:
+        dr (Float): The difference between the coordinates of the two sites along this axis.
+        cell_length (Float): The cell length along this axis.
+
+    Returns:
+        (Int): -1 or +1 if the bond crosses the upper or lower cell boundary, otherwise 0.
+    """
+    if dr > cell_length / 2.0:
+        return -1
+    if dr < -cell_length / 2.0:
+        return 1
+    return 0
+
+
 class Cluster:
     """
     Clusters are sets of sites.
@@ -108,6 +168,74 @@ class Cluster:
         along_z = any([s2 in (s1.p_neighbours or []) for s1 in edges[4] for s2 in edges[5]])
         return (along_x, along_y, along_z)
 
+    def windings(self, cell_lengths: npt.ArrayLike) -> list[tuple[int, int, int]]:
+        """
+        Finds the periodic images of itself that this cluster is connected to.
+        The cluster is traversed from site to site, following the minimum-image bond to each neighbour
+        and tracking which periodic image of the cell each site is reached in.
+        A site that is reached again in a different image closes a loop that winds round the periodic
+        boundaries, and the lattice translation between the two images is a winding of the cluster.
+
+        Bonds are taken to be minimum-image bonds, so a bond spanning exactly half of the cell is not
+        assigned to either periodic image.
+
+        Args:
+            cell_lengths (np.array(x,y,z)): The cell lengths.
+
+        Returns:
+            (List(Tuple(Int,Int,Int))): The distinct windings, as numbers of cell lengths along x, y, and z.
+                A winding and its inverse are reported once, with the first non-zero component positive.
+        """
+        lengths = np.asarray(cell_lengths, dtype=np.float64).tolist()
+        coordinates = {site: site.r.tolist() for site in self.sites}
+        images: dict[Site, tuple[int, int, int]] = {}
+        windings: set[tuple[int, int, int]] = set()
+        for root in self.sites:
+            if root in images:
+                continue
+            images[root] = (0, 0, 0)
+            queue = [root]
+            for site in queue:
+                r = coordinates[site]
+                image = images[site]
+                assert site.p_neighbours is not None
+                for neighbour in site.p_neighbours:
+                    neighbour_r = coordinates.get(neighbour)
+                    if neighbour_r is None:
+                        continue
+                    reached = (
+                        image[0] + image_shift(neighbour_r[0] - r[0], lengths[0]),
+                        image[1] + image_shift(neighbour_r[1] - r[1], lengths[1]),
+                        image[2] + image_shift(neighbour_r[2] - r[2], lengths[2]),
+                    )
+                    previous = images.get(neighbour)
+                    if previous is None:
+                        images[neighbour] = reached
+                        queue.append(neighbour)
+                    elif previous != reached:
+                        winding = (reached[0] - previous[0], reached[1] - previous[1], reached[2] - previous[2])
+                        if next(n for n in winding if n != 0) < 0:
+                            winding = (-winding[0], -winding[1], -winding[2])
+                        windings.add(winding)
+        return sorted(windings)
+
+    def is_percolating(self, cell_lengths: npt.ArrayLike) -> tuple[bool, bool, bool]:
+        """
+        Check whether this cluster percolates through the periodic boundaries along each axis,
+        i.e. whether any of its windings has a component along that axis.
+
+        Args:
+            cell_lengths (np.array(x,y,z)): The cell lengths.
+
+        Returns:
+            (Bool, Bool, Bool): Percolation along the x, y, and z coordinate axes.
+        """
+        windings = self.windings(cell_lengths)
+        along_x = any(w[0] != 0 for w in windings)
+        along_y = any(w[1] != 0 for w in windings)
+        along_z = any(w[2] != 0 for w in windings)
+        return (along_x, along_y, along_z)
+
     def remove_sites_from_neighbours(self, remove_labels: list[str] | set[str] | str) -> None:
         """
         Removes sites from the set of neighbouring sites if these have labels in remove_labels.
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Protocol
+
+import numpy as np
+import numpy.typing as npt
+
+from lattice_mc import jump, rate_classes, rate_tree
+
+if TYPE_CHECKING:
+    from lattice_mc.jump import Jump
+    from lattice_mc.lattice import Lattice
+
+
+class EventSelector(Protocol):
+    """
+    Interface for selecting catalogued events with probabilities proportional to their rates.
+    """
+
+    @property
+    def total(self) -> float: ...
+
+    def __getitem__(self, index: int) -> float: ...
+
+    def update(self, index: int, rate: float, key: Hashable = None) -> None: ...
+
+    def select(self, u: float) -> int: ...
+
+
+class EventCatalogue:
+    """
+    EventCatalogue class
+
+    A persistent catalogue of all possible jumps for a lattice.
+    After each accepted jump only the events whose rates can have changed are rebuilt,
+    so the cost of keeping the catalogue up to date scales with the local coordination
+    rather than with the size of the lattice.
+
+    Each event occupies a slot in an event selector, so selecting a jump and the time to the
+    next jump do not need a pass over every possible jump. The selector is chosen by
+    `lattice.event_selection`: either a RateTree of relative probabilities, or a RateClassSelector
+    that groups events by their lookup-table entry (or, without a lookup table, by their relative probability).
+
+    Events are stored as pairs of indices of their initial and final sites in the lattice arrays,
+    with their relative probabilities held by the selector. Jump objects are only created on request,
+    by `make_jump()`, `random()`, or `jumps`.
+
+    A site can list the same neighbour more than once, e.g. in a cell only two sites wide, where both
+    periodic images of a neighbour are the same site. Each bond is a separate jump, so an event stands for
+    every bond between its two sites, and its rate is the relative probability for one bond multiplied by
+    the number of bonds.
+
+    Notes:
+        Neighbour lists are assumed to be symmetric, i.e. if site `i` lists site `j` as
+        a neighbour `n` times, then site `j` also lists site `i` `n` times.
+    """
+
+    def __init__(self, lattice: Lattice) -> None:
+        """
+        Initialise an EventCatalogue instance, and populate it from a full search of the lattice.
+
+        Args:
+            lattice (Lattice): The lattice whose possible jumps are catalogued.
+
+        Returns:
+            None
+        """
+        self.lattice: Lattice = lattice
+        # Nearest-neighbour and site energies only depend on the occupations of the two sites
+        # involved in a jump and their neighbours. Coordination-number energies also depend
+        # on the occupations of the neighbours of those neighbours.
+        self.shell_depth: int = 2 if lattice.cn_energies else 1
+        self.events: dict[tuple[int, int], int] = {}
+        self.slot_events: npt.NDArray[np.int64] = np.full((0, 2), -1, dtype=np.int64)
+        self.number_of_slots: int = 0
+        self.free_slots: list[int] = []
+        self.selector: EventSelector = rate_tree.RateTree()
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """
+        Repopulate the catalogue from a full search of the lattice.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        lattice = self.lattice
+        if lattice.params is None:
+            raise RuntimeError("Lattice.params must be set before computing jumps")
+        occupied = lattice.occupied.astype(bool)
+        initial = np.repeat(np.arange(lattice.number_of_sites), np.diff(lattice.neighbour_offsets))
+        final = lattice.neighbour_indices
+        possible = occupied[initial] & ~occupied[final]
+        # bonds between the same pair of sites share one event, in the order each pair first appears
+        pairs = initial[possible] * lattice.number_of_sites + final[possible]
+        _, first, bonds = np.unique(pairs, return_index=True, return_counts=True)
+        order = np.argsort(first)
+        keys = list(zip(initial[possible][first[order]].tolist(), final[possible][first[order]].tolist()))
+        self.events = {key: slot for slot, key in enumerate(keys)}
+        self.slot_events = np.array(keys, dtype=np.int64).reshape(-1, 2)
+        self.number_of_slots = len(keys)
+        self.free_slots = []
+        probabilities = [self.event_rate(i, j, n) for (i, j), n in zip(keys, bonds[order].tolist())]
+        if lattice.event_selection == "rate-class":
+            self.selector = rate_classes.RateClassSelector()
+            for slot, (p, rate_class) in enumerate(probabilities):
+                self.selector.update(slot, p, rate_class)
+        else:
+            self.selector = rate_tree.RateTree([p for p, _ in probabilities])
+
+    def number_of_bonds(self, initial_index: int, final_index: int) -> int:
+        """
+        The number of bonds between two sites, i.e. the number of times the initial site lists the final site
+        as a neighbour.
+
+        Args:
+            initial_index (Int): Index of the site the jump starts from.
+            final_index (Int): Index of the site the jump finishes at.
+
+        Returns:
+            (Int): The number of bonds between the two sites.
+        """
+        return int(np.count_nonzero(self.lattice.neighbours_of(initial_index) == final_index))
+
+    def event_rate(self, initial_index: int, final_index: int, bonds: int | None = None) -> tuple[float, Hashable]:
+        """
+        Relative probability for an event, summed over every bond between its two sites.
+
+        Args:
+            initial_index (Int): Index of the occupied site the jump starts from.
+            final_index (Int): Index of the vacant site the jump finishes at.
+            bonds (:obj:Int, optional): The number of bonds between the two sites.
+                Defaults to None, in which case the bonds are counted from the neighbour list of the initial site.
+
+        Returns:
+            (Float, Hashable): The relative probability for this event, and its rate class.
+                Events with more than one bond have the class `(rate_class, bonds)`, so every event
+                in a class has the same rate.
+        """
+        if bonds is None:
+            bonds = self.number_of_bonds(initial_index, final_index)
+        p, rate_class = self.lattice.jump_relative_probability(initial_index, final_index)
+        if bonds == 1:
+            return p, rate_class
+        return p * bonds, None if rate_class is None else (rate_class, bonds)
+
+    @property
+    def selection_classes(self) -> list[tuple[Hashable, list[int]]]:
+        """
+        The occupied slots, grouped so that adding them one at a time rebuilds an identical event selector.
+        For a RateClassSelector these are its classes, with their keys and the slots in each class in order.
+        A RateTree only depends on which slots are occupied, which are returned as a single group with the key None.
+        """
+        if isinstance(self.selector, rate_classes.RateClassSelector):
+            return [(key, list(bucket)) for key, bucket in self.selector.buckets.items()]
+        return [(None, sorted(self.events.values()))]
+
+    def restore(
+        self,
+        slot_events: npt.NDArray[np.int64],
+        free_slots: list[int],
+        selection_classes: list[tuple[Hashable, list[int]]],
+    ) -> None:
+        """
+        Repopulate the catalogue with events in fixed slots, e.g. when restoring a checkpoint.
+        The relative probabilities are recalculated for the current lattice, and the selector is rebuilt
+        so that it selects the same events for the same random numbers as the catalogue the slots were taken from.
+
+        Args:
+            slot_events (np.array): The initial and final site indices for the event in each slot, or -1 for free slots.
+            free_slots (List(Int)): The free slots, in the order they are stored in `self.free_slots`.
+            selection_classes (List(Tuple(Hashable,List(Int)))): The occupied slots, grouped as `selection_classes`.
+
+        Returns:
+            None
+        """
+        lattice = self.lattice
+        self.slot_events = np.array(slot_events, dtype=np.int64).reshape(-1, 2)
+        self.number_of_slots = len(self.slot_events)
+        self.free_slots = list(free_slots)
+        self.events = {(i, j): slot for slot, (i, j) in enumerate(self.slot_events.tolist()) if i >= 0}
+        if lattice.event_selection == "rate-class":
+            self.selector = rate_classes.RateClassSelector()
+        else:
+            self.selector = rate_tree.RateTree(np.zeros(self.number_of_slots))
+        # events keep the class they were stored in, which can differ from the class of a new event with the same
+        # rate, since `refresh()` only moves events whose rates have changed.
+        for key, slots in selection_classes:
+            for slot in slots:
+                p, _ = self.event_rate(*self.slot_events[slot].tolist())
+                self.selector.update(slot, p, key)
+
+    def make_jump(self, initial_index: int, final_index: int) -> Jump:
+        """
+        Create a Jump object for an event, e.g. for introspection.
+
+        Args:
+            initial_index (Int): Index of the occupied site the jump starts from.
+            final_index (Int): Index of the vacant site the jump finishes at.
+
+        Returns:
+            (Jump): The Jump between these two sites.
+        """
+        lattice = self.lattice
+        assert lattice.params is not None
+        return jump.Jump(
+            lattice.sites[initial_index],
+            lattice.sites[final_index],
+            lattice.nn_energy,
+            lattice.cn_energies,
+            lattice.jump_lookup_table,
+            params=lattice.params,
+        )
+
+    @property
+    def jumps(self) -> list[Jump]:
+        """
+        All possible jumps currently in the catalogue, as newly created Jump objects, with one jump for each bond.
+        """
+        return [self.make_jump(i, j) for i, j in self.events for _ in range(self.number_of_bonds(i, j))]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def select(self) -> tuple[int, int]:
+        """
+        Select a jump at random with appropriate relative probabilities.
+
+        Args:
+            None
+
+        Returns:
+            (Int, Int): The indices of the initial and final sites for the randomly selected jump.
+        """
+        initial_index, final_index = self.slot_events[self.selector.select(self.lattice.rng.random())].tolist()
+        return initial_index, final_index
+
+    def random(self) -> Jump:
+        """
+        Select a jump at random with appropriate relative probabilities.
+
+        Args:
+            None
+
+        Returns:
+            (Jump): The randomly selected Jump.
+        """
+        return self.make_jump(*self.select())
+
+    def time_to_jump(self) -> float:
+        """
+        The timestep until the next jump.
+
+        Args:
+            None
+
+        Returns:
+            (Float): The timestep until the next jump.
+        """
+        assert self.lattice.params is not None
+        k_tot = self.lattice.params.rate_prefactor * self.selector.total
+        return -(1.0 / k_tot) * math.log(self.lattice.rng.random())
+
+    def affected_sites(self, initial_index: int, final_index: int) -> set[int]:
+        """
+        Sites whose possible jumps can have changed after a jump between two sites has been accepted.
+
+        Args:
+            initial_index (Int): Index of the site the accepted jump started from.
+            final_index (Int): Index of the site the accepted jump finished at.
+
+        Returns:
+            (Set(Int)): Indices of the initial and final sites of the jump, plus their neighbour shells.
+        """
+        lattice = self.lattice
+        affected = {initial_index, final_index}
+        shell = set(affected)
+        for _ in range(self.shell_depth):
+            next_shell: set[int] = set()
+            for i in shell:
+                next_shell.update(lattice.neighbours_of(i).tolist())
+            shell = next_shell - affected
+            affected |= shell
+        return affected
+
+    def update(self, initial_index: int, final_index: int) -> None:
+        """
+        Update the catalogue after a jump has been accepted and the lattice occupations changed.
+        Every event with at least one end in the affected sites is recalculated for the new lattice
+        occupations: events that are no longer possible are removed, new events are added, and
+        events that are still possible keep their slot, with their rate updated only if it has changed.
+
+        Args:
+            initial_index (Int): Index of the site the accepted jump started from.
+            final_index (Int): Index of the site the accepted jump finished at.
+
+        Returns:
+            None
+        """
+        lattice = self.lattice
+        occupied = lattice.occupied
+        events = self.events
+        old_keys: set[tuple[int, int]] = set()
+        new_keys: set[tuple[int, int]] = set()
+        for i in self.affected_sites(initial_index, final_index):
+            for j in lattice.neighbours_of(i).tolist():
+                for key in ((i, j), (j, i)):
+                    if key in events:
+                        old_keys.add(key)
+                if occupied[i] and not occupied[j]:
+                    new_keys.add((i, j))
+                elif occupied[j] and not occupied[i]:
+                    new_keys.add((j, i))
+        for key in old_keys - new_keys:
+            self.remove(key)
+        for key in new_keys:
+            if key in events:
+                self.refresh(key)
+            else:
+                self.add(*key)
+
+    def add(self, initial_index: int, final_index: int) -> None:
+        """
+        Add a jump between two sites to the catalogue, unless it is already present.
+
+        Args:
+            initial_index (Int): Index of the occupied site the jump starts from.
+            final_index (Int): Index of the vacant site the jump finishes at.
+
+        Returns:
+            None
+        """
+        key = (initial_index, final_index)
+        if key in self.events:
+            return
+        p, rate_class = self.event_rate(initial_index, final_index)
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = self.number_of_slots
+            self.number_of_slots += 1
+            if slot >= len(self.slot_events):
+                self.slot_events = np.concatenate([self.slot_events, np.full((max(slot, 1), 2), -1, dtype=np.int64)])
+        self.slot_events[slot] = key
+        self.events[key] = slot
+        self.selector.update(slot, p, rate_class)
+
+    def refresh(self, key: tuple[int, int]) -> None:
+        """
+        Recalculate the rate for a jump that is already in the catalogue.
+
+        Args:
+            key (Tuple(Int,Int)): The initial and final site indices for the jump.
+
+        Returns:
+            None
+        """
+        slot = self.events[key]
+        p, rate_class = self.event_rate(*key)
+        if p != self.selector[slot]:
+            self.selector.update(slot, p, rate_class)
+
+    def remove(self, key: tuple[int, int]) -> None:
+        """
+        Remove a jump from the catalogue, if it is present.
+
+        Args:
+            key (Tuple(Int,Int)): The initial and final site indices for the jump.
+
+        Returns:
+            None
+        """
+        slot = self.events.pop(key, None)
+        if slot is not None:
+            self.slot_events[slot] = -1
+            self.selector.update(slot, 0.0)
+            self.free_slots.append(slot)
+
+    def verify(self) -> None:
+        """
+        Check the catalogue against a full rebuild of all possible jumps.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError: If the catalogued jumps, or their relative probabilities, differ from a full rebuild.
+        """
+        potential_jumps = self.lattice.potential_jumps()
+        expected: dict[tuple[int, int], list[Jump]] = {}
+        for j in potential_jumps:
+            expected.setdefault((j.initial_site.lattice_index, j.final_site.lattice_index), []).append(j)
+        if expected.keys() != self.events.keys():
+            raise RuntimeError(
+                f"Event catalogue is out of date: "
+                f"missing {sorted(expected.keys() - self.events.keys())!r}, "
+                f"unexpected {sorted(self.events.keys() - expected.keys())!r}."
+            )
+        for key, expected_jumps in expected.items():
+            slot = self.events[key]
+            if tuple(self.slot_events[slot].tolist()) != key:
+                raise RuntimeError(f"Event catalogue slot {slot} does not hold jump {key!r}.")
+            if not math.isclose(self.selector[slot], sum(j.relative_probability for j in expected_jumps)):
+                raise RuntimeError(f"Event catalogue has an out of date relative probability for jump {key!r}.")
+        if not math.isclose(self.selector.total, sum(j.relative_probability for j in potential_jumps)):
+            raise RuntimeError("Event catalogue total rate does not match the catalogued jumps.")
@@ -1,17 +1,93 @@
 from __future__ import annotations
 
-import re
 from math import sqrt
 
 import numpy as np
+import numpy.typing as npt
 
-from lattice_mc import lattice, lattice_site
+from lattice_mc import lattice, sites_file, topology
 
 """
 Functions for constructing lattices.
 """
 
 
+def periodic_grid_neighbours(shape: tuple[int, ...]) -> npt.NDArray[np.int64]:
+    """
+    Find the nearest neighbours of every point on a periodic grid, with points numbered in Fortran order.
+
+    Args:
+        shape (Tuple(Int)): The number of grid points along each axis.
+
+    Returns:
+        (np.array): The index of each neighbour of each point, with shape (number of points, 2 * number of axes).
+            For each axis in turn, the neighbours are at -1 then +1 along that axis.
+    """
+    grid = np.arange(int(np.prod(shape)), dtype=np.int64).reshape(shape, order="F")
+    return np.stack(
+        [np.roll(grid, shift, axis=axis).ravel(order="F") for axis in range(len(shape)) for shift in (+1, -1)], axis=1
+    )
+
+
+def uniform_topology(
+    coordinates: npt.NDArray[np.float64],
+    neighbours: npt.NDArray[np.int64],
+    label_names: tuple[str, ...],
+    label_ids: npt.NDArray[np.int32],
+    cell_lengths: npt.NDArray[np.float64],
+) -> topology.LatticeTopology:
+    """
+    Create a LatticeTopology where every site has the same number of neighbours, with sites numbered from 1.
+
+    Args:
+        coordinates (np.array): The coordinates of each site.
+        neighbours (np.array): The index of each neighbour of each site, with shape (sites, neighbours per site).
+        label_names (Tuple(Str)): The site labels, in sorted order.
+        label_ids (np.array): The index in `label_names` of the label of each site.
+        cell_lengths (np.array(x,y,z)): The cell lengths.
+
+    Returns:
+        (LatticeTopology): The topology.
+    """
+    number_of_sites, coordination_number = neighbours.shape
+    return topology.LatticeTopology.from_arrays(
+        numbers=np.arange(1, number_of_sites + 1, dtype=np.int64),
+        coordinates=coordinates,
+        neighbour_offsets=np.arange(0, number_of_sites * coordination_number + 1, coordination_number, dtype=np.int64),
+        neighbour_indices=neighbours.ravel(),
+        label_names=label_names,
+        label_ids=label_ids,
+        site_energy=np.zeros(number_of_sites, dtype=np.float64),
+        cell_lengths=cell_lengths,
+    )
+
+
+def square_topology(a: int, b: int, spacing: float) -> topology.LatticeTopology:
+    """
+    Generate the topology of a square lattice.
+
+    Args:
+        a (Int):         Number of lattice repeat units along x.
+        b (Int):         Number of lattice repeat units along y.
+        spacing (Float): Distance between lattice sites.
+
+    Returns:
+        (LatticeTopology): The topology of the new lattice.
+
+    Notes:
+        See `square_lattice()`.
+    """
+    x, y = np.unravel_index(np.arange(a * b), (a, b), order="F")
+    coordinates = np.stack([x * spacing, y * spacing, np.zeros(a * b)], axis=1)
+    return uniform_topology(
+        coordinates,
+        periodic_grid_neighbours((a, b)),
+        ("L",),
+        np.zeros(a * b, dtype=np.int32),
+        np.array([a, b, 0.0]) * spacing,
+    )
+
+
 def square_lattice(a: int, b: int, spacing: float) -> lattice.Lattice:
     """
     Generate a square lattice.
@@ -27,21 +103,53 @@ def square_lattice(a: int, b: int, spacing: float) -> lattice.Lattice:
     Notes:
         The returned lattice is 3D periodic, but all sites and edges lie in the xy plane.
     """
-    grid = np.array(list(range(1, a * b + 1))).reshape(a, b, order="F")
-    it = np.nditer(grid, flags=["multi_index"])
-    sites: list[lattice_site.Site] = []
-    while not it.finished:
-        x, y = it.multi_index
-        r = np.array([x * spacing, y * spacing, 0.0])
-        neighbours = [
-            np.roll(grid, +1, axis=0)[x, y],
-            np.roll(grid, -1, axis=0)[x, y],
-            np.roll(grid, +1, axis=1)[x, y],
-            np.roll(grid, -1, axis=1)[x, y],
-        ]
-        sites.append(lattice_site.Site(int(it[0]), r, neighbours, 0.0, "L"))
-        it.iternext()
-    return lattice.Lattice(sites, cell_lengths=np.array([a, b, 0.0]) * spacing)
+    return square_topology(a, b, spacing).to_lattice()
+
+
+def honeycomb_topology(a: int, b: int, spacing: float, alternating_sites: bool = False) -> topology.LatticeTopology:
+    """
+    Generate the topology of a honeycomb lattice.
+
+    Args:
+        a (Int):         Number of lattice repeat units along x.
+        b (Int):         Number of lattice repeat units along y.
+        spacing (Float): Distance between lattice sites.
+        alternating_sites (Bool, optional): Label alternating sites with 'A' and 'B'. Defaults to False.
+
+    Returns:
+        (LatticeTopology): The topology of the new lattice.
+
+    Notes:
+        See `honeycomb_lattice()`.
+    """
+    unit_cell_lengths = np.array([sqrt(3), 3.0, 0.0]) * spacing
+    cell_lengths = unit_cell_lengths * np.array([a, b, 1.0])
+    # each rectangular unit cell holds four sites, with these offsets in units of `spacing`.
+    dx = np.array([0.0, sqrt(3) / 2, sqrt(3) / 2, 0.0])
+    dy = np.array([0.0, 0.5, 1.5, 2.0])
+    i, j = np.meshgrid(np.arange(a), np.arange(b), indexing="ij")
+    x = i[:, :, np.newaxis] * sqrt(3) * spacing + dx * spacing
+    y = (j[:, :, np.newaxis] * 3 + dy) * spacing
+    coordinates = np.stack([x.ravel(), y.ravel(), np.zeros(x.size)], axis=1)
+    grid = np.arange(a * b * 4, dtype=np.int64).reshape(a, b, 4)
+    up_x, down_x = np.roll(grid, +1, axis=0), np.roll(grid, -1, axis=0)
+    up_y, down_y = np.roll(grid, +1, axis=1), np.roll(grid, -1, axis=1)
+    neighbours = np.stack(
+        [
+            np.stack([grid[..., 1], up_x[..., 1], up_y[..., 3]], axis=-1),
+            np.stack([grid[..., 0], grid[..., 2], down_x[..., 0]], axis=-1),
+            np.stack([grid[..., 1], grid[..., 3], down_x[..., 3]], axis=-1),
+            np.stack([grid[..., 2], up_x[..., 2], down_y[..., 0]], axis=-1),
+        ],
+        axis=2,
+    ).reshape(-1, 3)
+    if alternating_sites:
+        label_names: tuple[str, ...] = ("A", "B")
+        label_ids = np.tile(np.array([0, 1, 0, 1], dtype=np.int32), a * b)
+    else:
+        label_names = ("L",)
+        label_ids = np.zeros(a * b * 4, dtype=np.int32)
+    return uniform_topology(coordinates, neighbours, label_names, label_ids, cell_lengths)
 
 
 def honeycomb_lattice(a: int, b: int, spacing: float, alternating_sites: bool = False) -> lattice.Lattice:
@@ -60,33 +168,31 @@ def honeycomb_lattice(a: int, b: int, spacing: float, alternating_sites: bool =
     Notes:
         The returned lattice is 3D periodic, but all sites and edges lie in the xy plane.
     """
-    if alternating_sites:
-        site_labels = ["A", "B", "A", "B"]
-    else:
-        site_labels = ["L", "L", "L", "L"]
-    unit_cell_lengths = np.array([sqrt(3), 3.0, 0.0]) * spacing
-    cell_lengths = unit_cell_lengths * np.array([a, b, 1.0])
-    grid = np.array(list(range(1, int(a * b * 4 + 1)))).reshape(a, b, 4, order="C")
-    sites: list[lattice_site.Site] = []
-    for i in range(a):
-        for j in range(b):
-            # site 1
-            r = np.array([i * sqrt(3) * spacing, j * 3 * spacing, 0.0])
-            neighbours = [grid[i, j, 1], np.roll(grid, +1, axis=0)[i, j, 1], np.roll(grid, +1, axis=1)[i, j, 3]]
-            sites.append(lattice_site.Site(grid[i, j, 0], r, neighbours, 0.0, site_labels[0]))
-            # site 2
-            r = np.array([i * sqrt(3) * spacing + sqrt(3) / 2 * spacing, (j * 3 + 0.5) * spacing, 0.0])
-            neighbours = [grid[i, j, 0], grid[i, j, 2], np.roll(grid, -1, axis=0)[i, j, 0]]
-            sites.append(lattice_site.Site(grid[i, j, 1], r, neighbours, 0.0, site_labels[1]))
-            # site 3
-            r = np.array([i * sqrt(3) * spacing + sqrt(3) / 2 * spacing, (j * 3 + 1.5) * spacing, 0.0])
-            neighbours = [grid[i, j, 1], grid[i, j, 3], np.roll(grid, -1, axis=0)[i, j, 3]]
-            sites.append(lattice_site.Site(grid[i, j, 2], r, neighbours, 0.0, site_labels[2]))
-            # site 4
-            r = np.array([i * sqrt(3) * spacing, (j * 3 + 2) * spacing, 0.0])
-            neighbours = [grid[i, j, 2], np.roll(grid, +1, axis=0)[i, j, 2], np.roll(grid, -1, axis=1)[i, j, 0]]
-            sites.append(lattice_site.Site(grid[i, j, 3], r, neighbours, 0.0, site_labels[3]))
-    return lattice.Lattice(sites, cell_lengths=cell_lengths)
+    return honeycomb_topology(a, b, spacing, alternating_sites=alternating_sites).to_lattice()
+
+
+def cubic_topology(a: int, b: int, c: int, spacing: float) -> topology.LatticeTopology:
+    """
+    Generate the topology of a cubic lattice.
+
+    Args:
+        a (Int):         Number of lattice repeat units along x.
+        b (Int):         Number of lattice repeat units along y.
+        c (Int):         Number of lattice repeat units along z.
+        spacing (Float): Distance between lattice sites.
+
+    Returns:
+        (LatticeTopology): The topology of the new lattice.
+    """
+    x, y, z = np.unravel_index(np.arange(a * b * c), (a, b, c), order="F")
+    coordinates = np.stack([x * spacing, y * spacing, z * spacing], axis=1)
+    return uniform_topology(
+        coordinates,
+        periodic_grid_neighbours((a, b, c)),
+        ("L",),
+        np.zeros(a * b * c, dtype=np.int32),
+        np.array([a, b, c]) * spacing,
+    )
 
 
 def cubic_lattice(a: int, b: int, c: int, spacing: float) -> lattice.Lattice:
@@ -102,36 +208,26 @@ def cubic_lattice(a: int, b: int, c: int, spacing: float) -> lattice.Lattice:
     Returns:
         (Lattice): The new lattice
     """
-    grid = np.array(list(range(1, a * b * c + 1))).reshape(a, b, c, order="F")
-    it = np.nditer(grid, flags=["multi_index"])
-    sites: list[lattice_site.Site] = []
-    while not it.finished:
-        x, y, z = it.multi_index
-        r = np.array([x, y, z]) * spacing
-        neighbours = [
-            np.roll(grid, +1, axis=0)[x, y, z],
-            np.roll(grid, -1, axis=0)[x, y, z],
-            np.roll(grid, +1, axis=1)[x, y, z],
-            np.roll(grid, -1, axis=1)[x, y, z],
-            np.roll(grid, +1, axis=2)[x, y, z],
-            np.roll(grid, -1, axis=2)[x, y, z],
-        ]
-        sites.append(lattice_site.Site(int(it[0]), r, neighbours, 0.0, "L"))
-        it.iternext()
-    return lattice.Lattice(sites, cell_lengths=np.array([a, b, c]) * spacing)
-
-
-def lattice_from_sites_file(site_file: str, cell_lengths: list[float]) -> lattice.Lattice:
+    return cubic_topology(a, b, c, spacing).to_lattice()
+
+
+def lattice_from_sites_file(site_file: str, cell_lengths: list[float], cache: bool = True) -> lattice.Lattice:
     """
     Generate a lattice from a sites file.
 
     Args:
         site_file (Str): Filename for the file containing the site information.
         cell_lengths (List(Float,Float,Float)): A list containing the [ x, y, z ] cell lengths.
+        cache (:obj:Bool, optional): If True, the parsed lattice topology is cached in binary form in a
+            `.lattice_mc_cache` directory next to the sites file, and read from there while the file is unchanged.
+            Defaults to True.
 
     Returns:
         (Lattice): The new lattice
 
+    Raises:
+        ValueError: If the file does not follow the format below.
+
     Notes:
         | The site information file format is:
         |     <number_of_sites> (Int).
@@ -144,24 +240,9 @@ def lattice_from_sites_file(site_file: str, cell_lengths: list[float]) -> lattic
         | The energy is optional, and will be set to 0.0 if not included.
         | Line order within each block is not meaningful.
         | British and American English spellings for centre|center and neighbour|neighbor are accepted.
+        | Lines with any other key are ignored.
         | An example file can be found in the examples directory.
     """
-    sites: list[lattice_site.Site] = []
-    site_re = re.compile(r"site:\s+([-+]?\d+)")
-    r_re = re.compile(r"cent(?:er|re):\s+([-\d\.e]+)\s+([-\d\.e]+)\s+([-\d\.e]+)")
-    r_neighbours = re.compile(r"neighbou{0,1}rs:((\s+[-+]?\d+)+)")
-    r_label = re.compile(r"label:\s+(\S+)")
-    r_energy = re.compile(r"energy:\s([-+\d\.]+)")
-    with open(site_file) as f:
-        filein = f.read().split("\n\n")
-    number_of_sites = int(filein[0])
-    for i in range(number_of_sites):
-        block = filein[i + 1]
-        number = int(site_re.findall(block)[0])
-        r = np.array([float(s) for s in r_re.findall(block)[0]])
-        neighbours = [int(s) for s in r_neighbours.findall(block)[0][0].split()]
-        label = r_label.findall(block)[0]
-        energy_match = r_energy.findall(block)
-        energy: float = float(energy_match[0]) if energy_match else 0.0
-        sites.append(lattice_site.Site(number, r, neighbours, energy, label))
-    return lattice.Lattice(sites, cell_lengths=np.array(cell_lengths))
+    if cache:
+        return sites_file.read_cached_sites_file(site_file, cell_lengths).to_lattice()
+    return sites_file.read_sites_file(site_file, cell_lengths).to_lattice()
@@ -48,6 +48,7 @@ class Jump:
         self.nearest_neighbour_energy: float | None = nearest_neighbour_energy
         self.coordination_number_energy: dict[str, dict[str, dict[int, float]]] | None = coordination_number_energy
         self.params: SimulationParameters = params
+        self.rate_class: tuple[str, str, int, int] | None = None
         if jump_lookup_table:
             self._relative_probability: float = self.relative_probability_from_lookup_table(jump_lookup_table)
         else:
@@ -167,6 +168,7 @@ class Jump:
     def relative_probability_from_lookup_table(self, jump_lookup_table: LookupTable) -> float:
         """
         Relative probability of accepting this jump from a lookup-table.
+        The lookup-table entry for this jump is stored as `self.rate_class`.
 
         Args:
             jump_lookup_table (LookupTable): the lookup table to be used for this jump.
@@ -178,6 +180,7 @@ class Jump:
         l2 = self.final_site.label
         c1 = self.initial_site.nn_occupation()
         c2 = self.final_site.nn_occupation()
+        self.rate_class = (l1, l2, c1, c2)
         return jump_lookup_table.jump_probability[l1][l2][c1][c2]
 
     @property
@@ -0,0 +1,560 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, TypeVar, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from lattice_mc.error import BlockedLatticeError
+
+try:
+    import numba
+
+    NUMBA_AVAILABLE: bool = True
+except ImportError:  # pragma: no cover
+    NUMBA_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from lattice_mc.lattice import Lattice
+    from lattice_mc.species import Species
+
+"""
+A compiled kinetic Monte Carlo kernel that runs directly on the array-backed lattice and species state.
+The kernel is compiled with Numba if it is installed, and otherwise runs as ordinary Python.
+"""
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def jit(function: F) -> F:
+    """
+    Compile a function with `numba.njit` if Numba is installed. Otherwise return the function unchanged.
+
+    Args:
+        function (Callable): The function to compile.
+
+    Returns:
+        (Callable): The compiled function, or the original function.
+    """
+    if not NUMBA_AVAILABLE:  # pragma: no cover
+        return function
+    return cast(F, numba.njit(cache=True)(function))
+
+
+@jit
+def jump_probability(
+    i: int,
+    j: int,
+    nn_occupied: npt.NDArray[np.int64],
+    label_ids: npt.NDArray[np.int32],
+    site_energy: npt.NDArray[np.float64],
+    rate_table: npt.NDArray[np.float64],
+    use_rate_table: bool,
+    nn_energy: float,
+    kT: float,
+) -> float:
+    """
+    Relative probability for an atom to jump from site `i` to site `j`, as `Lattice.jump_relative_probability()`.
+
+    Args:
+        i (Int): Index of the occupied initial site.
+        j (Int): Index of the vacant final site.
+        nn_occupied (np.array): Number of occupied neighbours for each site.
+        label_ids (np.array): Label id for each site.
+        site_energy (np.array): On-site energy for each site.
+        rate_table (np.array): Lookup table of relative probabilities, indexed by [l1, l2, c1, c2].
+        use_rate_table (Bool): Whether to use `rate_table`, rather than calculating probabilities from the energies.
+        nn_energy (Float): Nearest-neighbour interaction energy.
+        kT (Float): Thermal energy kT in eV.
+
+    Returns:
+        (Float): The relative probability for this jump.
+    """
+    if use_rate_table:
+        return float(rate_table[label_ids[i], label_ids[j], nn_occupied[i], nn_occupied[j]])
+    delta_E = site_energy[j] - site_energy[i]
+    if nn_energy != 0.0:
+        # -1 because the hopping ion is not counted in the final site occupation number
+        delta_E += (nn_occupied[j] - nn_occupied[i] - 1) * nn_energy
+    if delta_E <= 0.0:
+        return 1.0
+    return math.exp(-delta_E / kT)
+
+
+@jit
+def bond_rate(
+    b: int,
+    bond_rows: npt.NDArray[np.int64],
+    neighbour_indices: npt.NDArray[np.int64],
+    occupied: npt.NDArray[np.int8],
+    nn_occupied: npt.NDArray[np.int64],
+    label_ids: npt.NDArray[np.int32],
+    site_energy: npt.NDArray[np.float64],
+    rate_table: npt.NDArray[np.float64],
+    use_rate_table: bool,
+    nn_energy: float,
+    kT: float,
+) -> float:
+    """
+    Relative probability for a jump along a bond, or zero if the jump is blocked.
+
+    Args:
+        b (Int): The bond index, i.e. the position in the CSR neighbour list.
+        bond_rows (np.array): The initial site for each bond.
+        neighbour_indices (np.array): The final site for each bond.
+        occupied, nn_occupied, label_ids, site_energy, rate_table, use_rate_table, nn_energy, kT: As `jump_probability()`.
+
+    Returns:
+        (Float): The relative probability for a jump along this bond.
+    """
+    i = bond_rows[b]
+    j = neighbour_indices[b]
+    if occupied[i] == 0 or occupied[j] != 0:
+        return 0.0
+    return jump_probability(i, j, nn_occupied, label_ids, site_energy, rate_table, use_rate_table, nn_energy, kT)
+
+
+@jit
+def fill_bond_rates(
+    rates: npt.NDArray[np.float64],
+    bond_rows: npt.NDArray[np.int64],
+    neighbour_indices: npt.NDArray[np.int64],
+    occupied: npt.NDArray[np.int8],
+    nn_occupied: npt.NDArray[np.int64],
+    label_ids: npt.NDArray[np.int32],
+    site_energy: npt.NDArray[np.float64],
+    rate_table: npt.NDArray[np.float64],
+    use_rate_table: bool,
+    nn_energy: float,
+    kT: float,
+) -> None:
+    """
+    Calculate the relative probability for a jump along every bond, as `bond_rate()`.
+
+    Args:
+        rates (np.array): Filled in place with the rate for each bond.
+        bond_rows, neighbour_indices, occupied, nn_occupied, label_ids, site_energy, rate_table, use_rate_table,
+            nn_energy, kT: As `bond_rate()`.
+
+    Returns:
+        None
+    """
+    # the blocked-jump check is inlined, as in `kmc_steps()`, since calls that pass many arrays are expensive
+    for b in range(len(bond_rows)):
+        i = bond_rows[b]
+        j = neighbour_indices[b]
+        if occupied[i] == 0 or occupied[j] != 0:
+            rates[b] = 0.0
+        else:
+            rates[b] = jump_probability(
+                i, j, nn_occupied, label_ids, site_energy, rate_table, use_rate_table, nn_energy, kT
+            )
+
+
+@jit
+def set_tree_rate(tree: npt.NDArray[np.float64], capacity: int, index: int, rate: float) -> None:
+    """
+    Set one leaf of a flat binary sum tree, and recompute its ancestors, as `RateTree.update()`.
+
+    Args:
+        tree (np.array): The flat tree array, of length 2 * `capacity`.
+        capacity (Int): The number of leaves.
+        index (Int): The leaf to set.
+        rate (Float): The new rate.
+
+    Returns:
+        None
+    """
+    i = capacity + index
+    tree[i] = rate
+    i //= 2
+    while i >= 1:
+        tree[i] = tree[2 * i] + tree[2 * i + 1]
+        i //= 2
+
+
+@jit
+def select_from_tree(tree: npt.NDArray[np.float64], capacity: int, u: float) -> int:
+    """
+    Select a leaf of a flat binary sum tree with probability proportional to its rate, as `RateTree.select()`.
+
+    Args:
+        tree (np.array): The flat tree array, of length 2 * `capacity`.
+        capacity (Int): The number of leaves.
+        u (Float): A uniform random number in [0, 1).
+
+    Returns:
+        (Int): The selected leaf.
+    """
+    target = u * tree[1]
+    i = 1
+    while i < capacity:
+        left = tree[2 * i]
+        if (target < left or tree[2 * i + 1] == 0.0) and left > 0.0:
+            i = 2 * i
+        else:
+            target -= left
+            i = 2 * i + 1
+    return i - capacity
+
+
+@jit
+def kmc_steps(
+    max_jumps: int,
+    for_time: float,
+    time: float,
+    uniforms: npt.NDArray[np.float64],
+    tree: npt.NDArray[np.float64],
+    capacity: int,
+    neighbour_offsets: npt.NDArray[np.int64],
+    neighbour_indices: npt.NDArray[np.int64],
+    bond_rows: npt.NDArray[np.int64],
+    bond_reverse: npt.NDArray[np.int64],
+    bond_vectors: npt.NDArray[np.float64],
+    bond_lengths_squared: npt.NDArray[np.float64],
+    occupied: npt.NDArray[np.int8],
+    nn_occupied: npt.NDArray[np.int64],
+    label_ids: npt.NDArray[np.int32],
+    label_nn_occupied: npt.NDArray[np.int64],
+    site_energy: npt.NDArray[np.float64],
+    time_occupied: npt.NDArray[np.float64],
+    occupied_since: npt.NDArray[np.float64],
+    site_atom: npt.NDArray[np.int64],
+    atom_site: npt.NDArray[np.int64],
+    atom_dr: npt.NDArray[np.float64],
+    atom_number_of_hops: npt.NDArray[np.int64],
+    atom_summed_dr2: npt.NDArray[np.float64],
+    event_atoms: npt.NDArray[np.int64],
+    event_bonds: npt.NDArray[np.int64],
+    event_dt: npt.NDArray[np.float64],
+    rate_table: npt.NDArray[np.float64],
+    use_rate_table: bool,
+    nn_energy: float,
+    kT: float,
+    rate_prefactor: float,
+) -> tuple[int, float, bool]:
+    """
+    Run kinetic Monte Carlo steps: select a jump, advance the time, move the atom, update the neighbour counts,
+    occupation times and atom displacements, and recalculate the rates for every bond touching the affected sites.
+    All arrays are updated in place, and the atom, bond, and timestep for jump `n` are stored in
+    `event_atoms[n]`, `event_bonds[n]`, and `event_dt[n]`.
+
+    Args:
+        max_jumps (Int): The maximum number of jumps.
+        for_time (Float): Stop once the simulation time reaches this value.
+        time (Float): The simulation time at the start of these steps.
+        uniforms (np.array): Uniform random numbers, two for each jump.
+        tree (np.array): Flat binary sum tree of bond rates, with `capacity` leaves.
+        capacity (Int): The number of leaves in `tree`.
+        (remaining arguments): The lattice and species arrays of the same names, plus
+            `bond_rows` (the initial site of each bond), `bond_reverse` (the index of the reverse bond),
+            `site_atom` (the species index of the atom on each site, or -1), `atom_site` (the site index for each atom),
+            and the `event_atoms`, `event_bonds`, and `event_dt` arrays, which hold at least `max_jumps` entries.
+
+    Returns:
+        (Int, Float, Bool): The number of jumps made, the simulation time, and whether the lattice was blocked.
+    """
+    n = 0
+    while n < max_jumps and time < for_time:
+        if tree[1] <= 0.0:
+            return n, time, True
+        b = select_from_tree(tree, capacity, uniforms[2 * n])
+        dt = -(1.0 / (rate_prefactor * tree[1])) * math.log(uniforms[2 * n + 1])
+        time += dt
+        i = bond_rows[b]
+        j = neighbour_indices[b]
+        # move the atom
+        k = site_atom[i]
+        event_atoms[n] = k
+        event_bonds[n] = b
+        event_dt[n] = dt
+        site_atom[j] = k
+        site_atom[i] = -1
+        atom_site[k] = j
+        for d in range(3):
+            atom_dr[k, d] += bond_vectors[b, d]
+        atom_number_of_hops[k] += 1
+        atom_summed_dr2[k] += bond_lengths_squared[b]
+        # update occupations, occupation times, and neighbour counts
+        occupied_since[j] = time
+        occupied[j] = 1
+        for c in range(neighbour_offsets[j], neighbour_offsets[j + 1]):
+            nn_occupied[neighbour_indices[c]] += 1
+            label_nn_occupied[neighbour_indices[c], label_ids[j]] += 1
+        time_occupied[i] += time - occupied_since[i]
+        occupied_since[i] = time
+        occupied[i] = 0
+        for c in range(neighbour_offsets[i], neighbour_offsets[i + 1]):
+            nn_occupied[neighbour_indices[c]] -= 1
+            label_nn_occupied[neighbour_indices[c], label_ids[i]] -= 1
+        # recalculate every rate that depends on the occupations or neighbour counts of i or j,
+        # i.e. the rates for every jump into or out of i, j, or one of their neighbours.
+        # Bond rates are evaluated inline, since calls that pass many arrays are expensive in compiled code.
+        for centre in (i, j):
+            for c in range(neighbour_offsets[centre] - 1, neighbour_offsets[centre + 1]):
+                site = centre if c < neighbour_offsets[centre] else neighbour_indices[c]
+                for a in range(neighbour_offsets[site], neighbour_offsets[site + 1]):
+                    for b in (a, bond_reverse[a]):
+                        initial = bond_rows[b]
+                        final = neighbour_indices[b]
+                        rate = 0.0
+                        if occupied[initial] != 0 and occupied[final] == 0:
+                            rate = jump_probability(
+                                initial,
+                                final,
+                                nn_occupied,
+                                label_ids,
+                                site_energy,
+                                rate_table,
+                                use_rate_table,
+                                nn_energy,
+                                kT,
+                            )
+                        if tree[capacity + b] != rate:
+                            set_tree_rate(tree, capacity, b, rate)
+        n += 1
+    return n, time, False
+
+
+def bond_tables(lattice: Lattice) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    The initial site, and the index of the reverse bond, for each bond in the CSR neighbour list of a lattice.
+    If a site lists the same neighbour more than once, the k-th bond from site i to site j is paired with
+    the k-th bond from site j to site i.
+
+    Args:
+        lattice (Lattice): The lattice.
+
+    Returns:
+        (np.array, np.array): The initial site for each bond, and the index of the bond in the opposite direction.
+
+    Raises:
+        ValueError: If the neighbour lists are not symmetric.
+    """
+    bond_rows = np.repeat(np.arange(lattice.number_of_sites), np.diff(lattice.neighbour_offsets))
+    bond_columns = lattice.neighbour_indices
+    # both sorts are stable, so repeated bonds between the same sites keep their order
+    forward = np.lexsort((bond_columns, bond_rows))
+    backward = np.lexsort((bond_rows, bond_columns))
+    if np.any(bond_rows[forward] != bond_columns[backward]) or np.any(bond_columns[forward] != bond_rows[backward]):
+        raise ValueError("Neighbour lists must be symmetric, with each bond listed by the sites at both of its ends.")
+    bond_reverse = np.empty(len(bond_rows), dtype=np.int64)
+    bond_reverse[forward] = backward
+    return bond_rows, bond_reverse
+
+
+def dense_rate_table(lattice: Lattice) -> npt.NDArray[np.float64]:
+    """
+    The jump-probability lookup table of a lattice as a dense array, indexed by
+    [initial label id, final label id, initial coordination, final coordination].
+
+    Args:
+        lattice (Lattice): The lattice.
+
+    Returns:
+        (np.array): The dense lookup table. This is empty if the lattice has no lookup table.
+    """
+    if lattice.jump_lookup_table is None:
+        return np.zeros((0, 0, 0, 0))
+    n_labels = len(lattice.label_names)
+    max_coordination = int(np.diff(lattice.neighbour_offsets).max(initial=0))
+    table = np.zeros((n_labels, n_labels, max_coordination + 1, max_coordination + 1))
+    for l1, by_l2 in lattice.jump_lookup_table.jump_probability.items():
+        for l2, by_c1 in by_l2.items():
+            for c1, by_c2 in by_c1.items():
+                for c2, p in by_c2.items():
+                    table[lattice.label_names.index(l1), lattice.label_names.index(l2), c1, c2] = p
+    return table
+
+
+class KMCKernel:
+    """
+    KMCKernel class
+
+    Runs kinetic Monte Carlo jumps for a lattice and its atoms as a single compiled loop over
+    the array-backed lattice and species state, instead of calling `Lattice.jump()` for each step.
+    Jump rates are held in a binary sum tree with one leaf per bond of the CSR neighbour list.
+    Supports site energies, nearest-neighbour energies, and nearest-neighbour lookup tables.
+
+    Notes:
+        The kernel consumes random numbers from the lattice random-number stream in the same way
+        as `Lattice.jump()`, but selects events from a differently ordered tree, so the two engines
+        give statistically equivalent, but not identical, trajectories.
+    """
+
+    def __init__(self, lattice: Lattice, species: Species) -> None:
+        """
+        Initialise a KMCKernel instance.
+
+        Args:
+            lattice (Lattice): The lattice to run jumps on.
+            species (Species): The atoms occupying the lattice.
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError: If `lattice.params` has not been set.
+            ValueError: If the lattice uses coordination-number energies, or has atoms that are not in `species`.
+        """
+        if lattice.params is None:
+            raise RuntimeError("Lattice.params must be set before computing jumps")
+        if lattice.cn_energies:
+            raise ValueError("The compiled kernel does not support coordination-number energies.")
+        self.lattice: Lattice = lattice
+        self.species: Species = species
+        n_sites = lattice.number_of_sites
+        n_bonds = len(lattice.neighbour_indices)
+        self.bond_rows: npt.NDArray[np.int64]
+        self.bond_reverse: npt.NDArray[np.int64]
+        self.bond_rows, self.bond_reverse = bond_tables(lattice)
+        self.site_atom: npt.NDArray[np.int64] = np.full(n_sites, -1, dtype=np.int64)
+        self.atom_site: npt.NDArray[np.int64] = np.array(
+            [atom.site.lattice_index for atom in species.atoms], dtype=np.int64
+        )
+        self.site_atom[self.atom_site] = np.arange(len(species.atoms))
+        if np.any((self.site_atom >= 0) != lattice.occupied.astype(bool)):
+            raise ValueError("Every occupied site must hold an atom from this species.")
+        # the atom objects and numbers for each species index, with a final entry for vacant sites (index -1)
+        self.atom_objects: npt.NDArray[np.object_] = np.empty(len(species.atoms) + 1, dtype=object)
+        self.atom_objects[:-1] = species.atoms
+        self.atom_numbers: npt.NDArray[np.int64] = np.array(
+            [atom.number for atom in species.atoms] + [0], dtype=np.int64
+        )
+        # the atom sites that the Atom objects currently hold
+        self.synchronised_atom_site: npt.NDArray[np.int64] = self.atom_site.copy()
+        self.use_rate_table: bool = lattice.jump_lookup_table is not None
+        self.rate_table: npt.NDArray[np.float64] = dense_rate_table(lattice)
+        self.nn_energy: float = lattice.nn_energy if lattice.nn_energy else 0.0
+        self.capacity: int = 1
+        while self.capacity < n_bonds:
+            self.capacity *= 2
+        self.tree: npt.NDArray[np.float64] = np.zeros(2 * self.capacity)
+        fill_bond_rates(
+            self.tree[self.capacity : self.capacity + n_bonds],
+            self.bond_rows,
+            lattice.neighbour_indices,
+            lattice.occupied,
+            lattice.nn_occupied,
+            lattice.label_ids,
+            lattice.site_energy,
+            self.rate_table,
+            self.use_rate_table,
+            self.nn_energy,
+            lattice.params.kT,
+        )
+        n = self.capacity
+        while n > 1:
+            self.tree[n // 2 : n] = self.tree[n : 2 * n : 2] + self.tree[n + 1 : 2 * n : 2]
+            n //= 2
+
+    def run(self, n_jumps: int | None = None, for_time: float | None = None, chunk_size: int = 65536) -> int:
+        """
+        Run jumps until either a number of jumps have been made, or the simulation time reaches `for_time`,
+        then update the Site and Atom objects to match the lattice and species arrays.
+        If `lattice.trajectory` is set, the jumps are recorded by this trajectory writer after each chunk,
+        and if `lattice.msd` is set, each chunk is replayed by this MSD accumulator.
+
+        Args:
+            n_jumps (:obj:Int, optional): The number of jumps. Defaults to None (no limit).
+            for_time (:obj:Float, optional): Stop once the simulation time reaches this value. Defaults to None (no limit).
+            chunk_size (:obj:Int, optional): The maximum number of jumps made per call to the compiled loop. Defaults to 65536.
+
+        Returns:
+            (Int): The number of jumps made.
+
+        Raises:
+            ValueError: If neither `n_jumps` nor `for_time` is set.
+            BlockedLatticeError: If no jumps are possible.
+        """
+        if n_jumps is None and for_time is None:
+            raise ValueError("Running the kernel needs n_jumps or for_time to be set.")
+        lattice = self.lattice
+        species = self.species
+        assert lattice.params is not None
+        max_jumps = n_jumps if n_jumps is not None else np.iinfo(np.int64).max
+        end_time = for_time if for_time is not None else math.inf
+        jumps_made = 0
+        blocked = False
+        event_atoms = np.empty(chunk_size, dtype=np.int64)
+        event_bonds = np.empty(chunk_size, dtype=np.int64)
+        event_dt = np.empty(chunk_size, dtype=np.float64)
+        try:
+            while jumps_made < max_jumps and lattice.time < end_time and not blocked:
+                chunk = min(chunk_size, max_jumps - jumps_made)
+                start_time = lattice.time
+                if lattice.msd is not None:
+                    start_dr = species.atom_dr.copy()
+                n, lattice.time, blocked = kmc_steps(
+                    chunk,
+                    end_time,
+                    lattice.time,
+                    lattice.rng.peek(2 * chunk),
+                    self.tree,
+                    self.capacity,
+                    lattice.neighbour_offsets,
+                    lattice.neighbour_indices,
+                    self.bond_rows,
+                    self.bond_reverse,
+                    lattice.bond_vectors,
+                    lattice.bond_lengths_squared,
+                    lattice.occupied,
+                    lattice.nn_occupied,
+                    lattice.label_ids,
+                    lattice.label_nn_occupied,
+                    lattice.site_energy,
+                    lattice.time_occupied,
+                    lattice.occupied_since,
+                    self.site_atom,
+                    self.atom_site,
+                    species.atom_dr,
+                    species.atom_number_of_hops,
+                    species.atom_summed_dr2,
+                    event_atoms,
+                    event_bonds,
+                    event_dt,
+                    self.rate_table,
+                    self.use_rate_table,
+                    self.nn_energy,
+                    lattice.params.kT,
+                    lattice.params.rate_prefactor,
+                )
+                lattice.rng.advance(2 * n)
+                jumps_made += n
+                if lattice.trajectory is not None:
+                    bonds = event_bonds[:n]
+                    lattice.trajectory.record_many(
+                        event_atoms[:n], self.bond_rows[bonds], lattice.neighbour_indices[bonds], event_dt[:n]
+                    )
+                if lattice.msd is not None:
+                    # cumsum adds one timestep at a time, so the jump times match those in the kernel
+                    times = np.cumsum(np.concatenate([[start_time], event_dt[:n]]))[1:]
+                    lattice.msd.advance_events(start_dr, event_atoms[:n], lattice.bond_vectors[event_bonds[:n]], times)
+        finally:
+            self.synchronise()
+        if blocked:
+            raise BlockedLatticeError("No moves are possible in this lattice")
+        return jumps_made
+
+    def synchronise(self) -> None:
+        """
+        Update the Site and Atom objects, and the lattice atom and occupation records, to match the kernel state.
+        Only the Atom objects that have moved since the last update are changed.
+        The event catalogue of the lattice is discarded, since it no longer matches the lattice occupations.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        lattice = self.lattice
+        lattice.occupation[:] = self.atom_numbers[self.site_atom]
+        lattice.site_atoms = self.atom_objects[self.site_atom].tolist()
+        sites = lattice.sites
+        for k in np.flatnonzero(self.atom_site != self.synchronised_atom_site).tolist():
+            self.atom_objects[k].site = sites[self.atom_site[k]]
+        self.synchronised_atom_site[:] = self.atom_site
+        lattice.event_catalogue = None
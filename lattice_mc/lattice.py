@@ -1,15 +1,14 @@
 from __future__ import annotations
 
 import itertools
-import random
 from collections import Counter
-from collections.abc import Iterator
+from collections.abc import Iterator, Sequence
 from typing import TYPE_CHECKING
 
 import numpy as np
 import numpy.typing as npt
 
-from lattice_mc import atom, cluster, jump, transitions
+from lattice_mc import atom, cluster, event_catalogue, jump, lattice_site, lookup_table, random_stream, topology
 from lattice_mc.error import BlockedLatticeError
 
 if TYPE_CHECKING:
@@ -17,7 +16,84 @@ if TYPE_CHECKING:
     from lattice_mc.jump import Jump
     from lattice_mc.lattice_site import Site
     from lattice_mc.lookup_table import LookupTable
+    from lattice_mc.msd import MSDAccumulator
     from lattice_mc.simulation import SimulationParameters
+    from lattice_mc.trajectory import TrajectoryWriter
+
+
+def bond_vectors(
+    coordinates: npt.NDArray[np.float64],
+    neighbour_offsets: npt.NDArray[np.int64],
+    neighbour_indices: npt.NDArray[np.int64],
+    cell_lengths: npt.NDArray[np.float64],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Calculate the minimum-image displacement vector for every bond in a CSR neighbour list.
+
+    Args:
+        coordinates (np.array): The coordinates of each site.
+        neighbour_offsets (np.array): The CSR offsets of the neighbours of each site.
+        neighbour_indices (np.array): The index of each neighbour.
+        cell_lengths (np.array(x,y,z)): The cell lengths.
+
+    Returns:
+        (np.array, np.array): The displacement vector from each site to each of its neighbours,
+            and its squared length.
+    """
+    rows = np.repeat(np.arange(len(coordinates)), np.diff(neighbour_offsets))
+    dr: npt.NDArray[np.float64] = coordinates[neighbour_indices]
+    # work one axis at a time and in place, since for large lattices a temporary array the size of `dr`
+    # would dominate the memory used.
+    for axis in range(3):
+        dr[:, axis] -= coordinates[rows, axis]
+    np.subtract(dr, cell_lengths, out=dr, where=dr > cell_lengths / 2.0)
+    np.add(dr, cell_lengths, out=dr, where=dr < -cell_lengths / 2.0)
+    return dr, dr[:, 0] * dr[:, 0] + dr[:, 1] * dr[:, 1] + dr[:, 2] * dr[:, 2]
+
+
+def site_indices(numbers: npt.NDArray[np.int64], query: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+    """
+    Find the index of each of a set of site numbers in an array of the numbers of every site.
+
+    Args:
+        numbers (np.array): The identifying number of each site.
+        query (np.array): The site numbers to find.
+
+    Returns:
+        (np.array): The index in `numbers` of each number in `query`.
+
+    Raises:
+        ValueError: If site numbers are repeated, or a queried number is not one of the sites.
+    """
+    order = np.argsort(numbers, kind="stable")
+    sorted_numbers = numbers[order]
+    repeated = np.diff(sorted_numbers) == 0
+    if np.any(repeated):
+        raise ValueError(f"Site numbers must be unique; got repeated number {sorted_numbers[np.argmax(repeated)]}.")
+    position = np.minimum(np.searchsorted(sorted_numbers, query), len(numbers) - 1)
+    unknown = sorted_numbers[position] != query if len(numbers) else np.ones(len(query), dtype=bool)
+    if np.any(unknown):
+        raise ValueError(f"Unknown site number {query[np.argmax(unknown)]}.")
+    indices: npt.NDArray[np.int64] = order[position]
+    return indices
+
+
+def wrap_coordinates(
+    coordinates: npt.NDArray[np.float64], cell_lengths: npt.NDArray[np.float64]
+) -> npt.NDArray[np.float64]:
+    """
+    Map site coordinates that lie outside the central periodic image of the simulation cell back into this cell,
+    as `Lattice.enforce_periodic_boundary_conditions()` does for Site objects.
+
+    Args:
+        coordinates (np.array): The coordinates of each site.
+        cell_lengths (np.array(x,y,z)): The cell lengths.
+
+    Returns:
+        (np.array): The wrapped coordinates.
+    """
+    wrapped = np.where(coordinates < 0.0, coordinates + cell_lengths, coordinates)
+    return np.where(wrapped > cell_lengths, wrapped - cell_lengths, wrapped)
 
 
 class Lattice:
@@ -37,21 +113,154 @@ class Lattice:
             None
         """
         self.cell_lengths: npt.NDArray[np.float64] = cell_lengths
-        self.sites: list[Site] = sites
+        self.sites: Sequence[Site] = sites
         self.number_of_sites: int = len(self.sites)
-        self.site_labels: set[str] = set([site.label for site in self.sites])
-        self.site_populations: Counter[str] = Counter([site.label for site in self.sites])
-        self.enforce_periodic_boundary_conditions()
-        self.initialise_site_lookup_table()
-        self.params: SimulationParameters | None = None
+        self.initialise_state()
+        self.initialise_site_arrays()
+        self.reset()
+
+    @classmethod
+    def from_arrays(
+        cls,
+        numbers: npt.ArrayLike,
+        coordinates: npt.ArrayLike,
+        neighbour_offsets: npt.ArrayLike,
+        neighbours: npt.ArrayLike,
+        labels: npt.ArrayLike,
+        cell_lengths: npt.ArrayLike,
+        site_energy: npt.ArrayLike | None = None,
+    ) -> Lattice:
+        """
+        Create a new, unoccupied lattice directly from site arrays. Wrapping the coordinates, counting labels,
+        and converting neighbour site numbers to site indices are each done in a single pass over the arrays,
+        and the Site objects are created as views onto the lattice arrays, so this is much faster than
+        creating a Site for each site and passing these to `Lattice()`.
+
+        Args:
+            numbers (np.array): The identifying number of each site.
+            coordinates (np.array): The coordinates of each site.
+            neighbour_offsets (np.array): The CSR offsets of the neighbours of each site: the neighbours of site `i`
+                are `neighbours[neighbour_offsets[i]:neighbour_offsets[i+1]]`.
+            neighbours (np.array): The site number of each neighbour.
+            labels (np.array): The label of each site.
+            cell_lengths (np.array(x,y,z)): Vector of cell lengths for the simulation cell.
+            site_energy (:obj:np.array, optional): The on-site occupation energy of each site. Defaults to 0.0.
+
+        Returns:
+            (Lattice): The new lattice.
+
+        Raises:
+            ValueError: If site numbers are repeated, or a neighbour is not one of the sites.
+        """
+        site_numbers = np.asarray(numbers, dtype=np.int64)
+        new = cls.__new__(cls)
+        new.cell_lengths = np.array(cell_lengths, dtype=np.float64)
+        new.number_of_sites = len(site_numbers)
+        new.initialise_state()
+        label_names, label_ids = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        new.set_topology(
+            numbers=site_numbers,
+            coordinates=np.asarray(coordinates, dtype=np.float64),
+            neighbour_offsets=np.asarray(neighbour_offsets, dtype=np.int64),
+            neighbour_indices=site_indices(site_numbers, np.asarray(neighbours, dtype=np.int64)),
+            label_names=label_names.tolist(),
+            label_ids=label_ids.astype(np.int32),
+            site_energy=np.zeros(len(site_numbers)) if site_energy is None else np.asarray(site_energy),
+        )
+        new.initialise_vacant_sites()
+        return new
+
+    @classmethod
+    def from_topology(cls, source: topology.LatticeTopology, share_arrays: bool = False) -> Lattice:
+        """
+        Create a new, unoccupied lattice from a LatticeTopology. The topology arrays are already wrapped,
+        indexed, and labelled, so they are used as they are, without recalculating the neighbour indices
+        or bond vectors.
+
+        Args:
+            source (LatticeTopology): The topology.
+            share_arrays (:obj:Bool, optional): If True, the lattice uses the topology arrays themselves,
+                rather than its own copies, and the site energies are copied only when they are first changed.
+                Defaults to False.
+
+        Returns:
+            (Lattice): The new lattice.
+        """
+        arrays = {name: getattr(source, name) for name in topology.ARRAY_FIELDS}
+        if share_arrays:
+            # a read-only view, so that changing the site energies of this lattice never changes the topology.
+            arrays["site_energy"] = arrays["site_energy"].view()
+            arrays["site_energy"].flags.writeable = False
+        else:
+            arrays = {name: np.array(array) for name, array in arrays.items()}
+        new = cls.__new__(cls)
+        new.cell_lengths = arrays["cell_lengths"]
+        new.number_of_sites = source.number_of_sites
+        new.initialise_state()
+        new.numbers = arrays["numbers"]
+        new.coordinates = arrays["coordinates"]
+        new.neighbour_offsets = arrays["neighbour_offsets"]
+        new.neighbour_indices = arrays["neighbour_indices"]
+        new.bond_vectors = arrays["bond_vectors"]
+        new.bond_lengths_squared = arrays["bond_lengths_squared"]
+        new.label_names = list(source.label_names)
+        new.label_ids = arrays["label_ids"]
+        new.site_energy = arrays["site_energy"]
+        new.count_site_populations()
+        new.initialise_vacant_sites()
+        return new
+
+    def initialise_state(self) -> None:
+        """
+        Set up the simulation settings and helpers of a new lattice, which do not depend on its sites.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.site_lookup: dict[int, Site] | None = None
+        self.event_catalogue: event_catalogue.EventCatalogue | None = None
+        self.verify_event_catalogue: bool = False
+        self.event_selection: str = "rate-tree"
+        self.rng: random_stream.RandomStream = random_stream.RandomStream()
+        self.trajectory: TrajectoryWriter | None = None
+        self.msd: MSDAccumulator | None = None
+        self._params: SimulationParameters | None = None
         self.nn_energy: float | None = None
         self.cn_energies: dict[str, dict[str, dict[int, float]]] | None = None
         self.site_energies: dict[str, float] | None = None
-        self.jump_lookup_table: LookupTable | None = None
+        self._jump_lookup_table: LookupTable | None = None
         self.number_of_occupied_sites: int = 0
-        for site in self.sites:
-            site.p_neighbours = [self.site_with_id(i) for i in site.neighbours]
-        self.reset()
+
+    @property
+    def params(self) -> SimulationParameters | None:
+        """
+        Get or set the simulation parameters used to calculate jump rates for this lattice.
+        Setting new parameters invalidates the event catalogue.
+        """
+        return self._params
+
+    @params.setter
+    def params(self, value: SimulationParameters | None) -> None:
+        if value is not self._params:
+            self.event_catalogue = None
+        self._params = value
+
+    @property
+    def jump_lookup_table(self) -> LookupTable | None:
+        """
+        Get or set the jump-probability lookup table for this lattice.
+        Setting a new lookup table invalidates the event catalogue.
+        """
+        return self._jump_lookup_table
+
+    @jump_lookup_table.setter
+    def jump_lookup_table(self, value: LookupTable | None) -> None:
+        if value is not self._jump_lookup_table:
+            self.event_catalogue = None
+        self._jump_lookup_table = value
 
     def enforce_periodic_boundary_conditions(self) -> None:
         """
@@ -71,6 +280,379 @@ class Lattice:
                 if s.r[i] > self.cell_lengths[i]:
                     s.r[i] -= self.cell_lengths[i]
 
+    def initialise_site_arrays(self) -> None:
+        """
+        Create the array-backed storage for the state of this lattice, and attach every site to it.
+        Neighbours are stored in compressed sparse row (CSR) form: the neighbours of the site at index `i`
+        are `self.neighbour_indices[self.neighbour_offsets[i]:self.neighbour_offsets[i+1]]`.
+        After this, each Site attribute that describes the lattice state is a view onto these arrays.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        sites = self.sites
+        n_sites = len(sites)
+        neighbour_offsets = np.zeros(n_sites + 1, dtype=np.int64)
+        neighbour_offsets[1:] = np.cumsum([len(site.neighbours) for site in sites])
+        neighbour_numbers = itertools.chain.from_iterable(site.neighbours for site in sites)
+        neighbours = np.fromiter(neighbour_numbers, dtype=np.int64, count=neighbour_offsets[-1])
+        numbers = np.fromiter((site.number for site in sites), dtype=np.int64, count=n_sites)
+        labels = [site.label for site in sites]
+        label_names = sorted(set(labels))
+        label_id = {label: i for i, label in enumerate(label_names)}
+        self.set_topology(
+            numbers=numbers,
+            coordinates=np.array([site.r for site in sites], dtype=np.float64).reshape(-1, 3),
+            neighbour_offsets=neighbour_offsets,
+            neighbour_indices=site_indices(numbers, neighbours),
+            label_names=label_names,
+            label_ids=np.fromiter((label_id[label] for label in labels), dtype=np.int32, count=n_sites),
+            site_energy=np.array([site.energy for site in sites], dtype=np.float64),
+        )
+        self.occupied: npt.NDArray[np.int8] = np.array([site.is_occupied for site in sites], dtype=np.int8)
+        self.occupation: npt.NDArray[np.int64] = np.array([site.occupation for site in sites], dtype=np.int64)
+        self.site_atoms: list[Atom | None] = [site.atom for site in sites]
+        self.time_occupied: npt.NDArray[np.float64] = np.array([site.time_occupied for site in sites], dtype=np.float64)
+        # occupation times are accumulated lazily: time_occupied holds the time up to occupied_since,
+        # and occupied sites have also been occupied from occupied_since until the current lattice time.
+        self.occupied_since: npt.NDArray[np.float64] = np.zeros(len(sites), dtype=np.float64)
+        for i, site in enumerate(sites):
+            site.lattice = self
+            site.lattice_index = i
+        self.count_occupied_neighbours()
+
+    def initialise_vacant_sites(self) -> None:
+        """
+        Create the occupation arrays of a new lattice whose topology arrays have been set, with every site vacant,
+        and the Site objects as views onto the lattice arrays.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.occupied = np.zeros(self.number_of_sites, dtype=np.int8)
+        self.occupation = np.zeros(self.number_of_sites, dtype=np.int64)
+        self.site_atoms = [None] * self.number_of_sites
+        self.time_occupied = np.zeros(self.number_of_sites, dtype=np.float64)
+        self.occupied_since = np.zeros(self.number_of_sites, dtype=np.float64)
+        self.sites = lattice_site.SiteViews(self)
+        self.count_occupied_neighbours()
+        self.reset()
+
+    def set_topology(
+        self,
+        numbers: npt.NDArray[np.int64],
+        coordinates: npt.NDArray[np.floating],
+        neighbour_offsets: npt.NDArray[np.int64],
+        neighbour_indices: npt.NDArray[np.int64],
+        label_names: list[str],
+        label_ids: npt.NDArray[np.int32],
+        site_energy: npt.NDArray[np.floating],
+    ) -> None:
+        """
+        Set the arrays describing the sites and connectivity of this lattice, mapping the sites into
+        the central periodic image of the simulation cell, and calculating the site populations and bond vectors.
+
+        Args:
+            numbers (np.array): The identifying number of each site.
+            coordinates (np.array): The coordinates of each site.
+            neighbour_offsets (np.array): The CSR offsets of the neighbours of each site.
+            neighbour_indices (np.array): The index of each neighbour.
+            label_names (List(Str)): The site labels, in sorted order.
+            label_ids (np.array): The index in `label_names` of the label of each site.
+            site_energy (np.array): The on-site occupation energy of each site.
+
+        Returns:
+            None
+        """
+        self.numbers: npt.NDArray[np.int64] = numbers
+        coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+        self.coordinates: npt.NDArray[np.float64] = wrap_coordinates(coordinates, self.cell_lengths)
+        self.neighbour_offsets: npt.NDArray[np.int64] = neighbour_offsets
+        self.neighbour_indices: npt.NDArray[np.int64] = neighbour_indices
+        self.label_names: list[str] = label_names
+        self.label_ids: npt.NDArray[np.int32] = label_ids
+        self.site_energy: npt.NDArray[np.float64] = np.array(site_energy, dtype=np.float64)
+        self.count_site_populations()
+        self.compute_bond_vectors()
+
+    def count_site_populations(self) -> None:
+        """
+        Find the set of site labels, and count the sites with each label.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.site_labels: set[str] = set(self.label_names)
+        populations = np.bincount(self.label_ids, minlength=len(self.label_names)).tolist()
+        self.site_populations: Counter[str] = Counter(dict(zip(self.label_names, populations)))
+
+    def compute_bond_vectors(self) -> None:
+        """
+        Precompute the minimum-image displacement vector for every bond, i.e. every entry in the CSR neighbour list.
+        `self.bond_vectors[b]` is the displacement from site `i` to its neighbour `self.neighbour_indices[b]`,
+        where `b` lies between `self.neighbour_offsets[i]` and `self.neighbour_offsets[i+1]`,
+        and `self.bond_lengths_squared[b]` is its squared length.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Notes:
+            This should be called again if site coordinates or cell lengths are changed after the lattice has been created.
+        """
+        self.bond_vectors: npt.NDArray[np.float64]
+        self.bond_lengths_squared: npt.NDArray[np.float64]
+        self.bond_vectors, self.bond_lengths_squared = bond_vectors(
+            self.coordinates, self.neighbour_offsets, self.neighbour_indices, self.cell_lengths
+        )
+
+    def bond_index(self, initial_index: int, final_index: int) -> int:
+        """
+        The position of a bond in the CSR neighbour list, and in the bond-vector table.
+
+        Args:
+            initial_index (Int): Index of the site the bond starts from.
+            final_index (Int): Index of the neighbouring site the bond finishes at.
+
+        Returns:
+            (Int): The bond index.
+
+        Raises:
+            ValueError: If the two sites are not neighbours.
+        """
+        neighbours: list[int] = self.neighbours_of(initial_index).tolist()
+        return int(self.neighbour_offsets[initial_index]) + neighbours.index(final_index)
+
+    def count_occupied_neighbours(self) -> None:
+        """
+        Recompute the occupied-neighbour counts for every site from the current occupations and labels.
+        `self.nn_occupied[i]` is the number of occupied neighbours of site `i`, and
+        `self.label_nn_occupied[i, k]` is the number of occupied neighbours of site `i` with label id `k`.
+        `self.label_neighbours[i, k]` is the number of neighbours of site `i` with label id `k`, whether occupied or not.
+        These counts are subsequently maintained by `set_occupied()` and `set_label()`.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        n_sites = self.number_of_sites
+        n_labels = len(self.label_names)
+        rows = np.repeat(np.arange(n_sites), np.diff(self.neighbour_offsets))
+        neighbour_labels = self.label_ids[self.neighbour_indices]
+        neighbour_occupied = self.occupied[self.neighbour_indices].astype(np.int64)
+        self.nn_occupied: npt.NDArray[np.int64] = np.bincount(rows, weights=neighbour_occupied, minlength=n_sites).astype(
+            np.int64
+        )
+        pairs = rows * n_labels + neighbour_labels
+        self.label_neighbours: npt.NDArray[np.int64] = np.bincount(pairs, minlength=n_sites * n_labels).reshape(
+            n_sites, n_labels
+        )
+        self.label_nn_occupied: npt.NDArray[np.int64] = (
+            np.bincount(pairs, weights=neighbour_occupied, minlength=n_sites * n_labels)
+            .astype(np.int64)
+            .reshape(n_sites, n_labels)
+        )
+
+    def set_occupied(self, index: int, occupied: bool) -> None:
+        """
+        Set whether a site is occupied, and update the occupied-neighbour counts for its neighbours.
+        If the site is being vacated, the time it has been occupied since it last changed is added to its occupation time.
+
+        Args:
+            index (Int): The index of the site in `self.sites`.
+            occupied (Bool): Whether this site is occupied.
+
+        Returns:
+            None
+        """
+        if bool(self.occupied[index]) == occupied:
+            return
+        if not occupied:
+            self.time_occupied[index] += self.time - self.occupied_since[index]
+        self.occupied_since[index] = self.time
+        self.occupied[index] = occupied
+        delta = 1 if occupied else -1
+        label_id = self.label_ids[index]
+        # neighbour lists can contain repeated sites for small periodic cells, so the updates are unbuffered.
+        neighbours = self.neighbours_of(index)
+        np.add.at(self.nn_occupied, neighbours, delta)
+        np.add.at(self.label_nn_occupied[:, label_id], neighbours, delta)
+
+    def set_label(self, index: int, label: str) -> None:
+        """
+        Set the label of a site, and update the label-resolved neighbour counts for its neighbours.
+
+        Args:
+            index (Int): The index of the site in `self.sites`.
+            label (Str): The new label for this site.
+
+        Returns:
+            None
+        """
+        old_id = self.label_ids[index]
+        new_id = self.label_id(label)
+        if new_id >= self.label_neighbours.shape[1]:
+            padding = ((0, 0), (0, new_id + 1 - self.label_neighbours.shape[1]))
+            self.label_neighbours = np.pad(self.label_neighbours, padding)
+            self.label_nn_occupied = np.pad(self.label_nn_occupied, padding)
+        self.label_ids[index] = new_id
+        neighbours = self.neighbours_of(index)
+        np.add.at(self.label_neighbours[:, old_id], neighbours, -1)
+        np.add.at(self.label_neighbours[:, new_id], neighbours, 1)
+        if self.occupied[index]:
+            np.add.at(self.label_nn_occupied[:, old_id], neighbours, -1)
+            np.add.at(self.label_nn_occupied[:, new_id], neighbours, 1)
+
+    def label_id(self, label: str) -> int:
+        """
+        The integer id used to store a site label in `self.label_ids`.
+        Labels that have not been seen before are given a new id.
+
+        Args:
+            label (Str): The site label.
+
+        Returns:
+            (Int): The id for this label.
+        """
+        if label not in self.label_names:
+            self.label_names.append(label)
+        return self.label_names.index(label)
+
+    def neighbours_of(self, index: int) -> npt.NDArray[np.int64]:
+        """
+        Indices of the neighbours of a site.
+
+        Args:
+            index (Int): The index of the site in `self.sites`.
+
+        Returns:
+            (np.array): The indices of the neighbouring sites.
+        """
+        return self.neighbour_indices[self.neighbour_offsets[index] : self.neighbour_offsets[index + 1]]
+
+    def nn_occupation(self, index: int) -> int:
+        """
+        The number of occupied nearest-neighbour sites for a site.
+
+        Args:
+            index (Int): The index of the site in `self.sites`.
+
+        Returns:
+            (Int): The number of occupied nearest-neighbour sites.
+        """
+        return int(self.nn_occupied[index])
+
+    def site_specific_nn_occupation(self, index: int) -> dict[str, int]:
+        """
+        The number of occupied nearest-neighbour sites for a site, classified by site label.
+
+        Args:
+            index (Int): The index of the site in `self.sites`.
+
+        Returns:
+            (Dict(Str:Int)): Dictionary of nearest-neighbour occupied site numbers, classified by site label, e.g. { 'A' : 2, 'B' : 1 }.
+        """
+        label_nn_occupied = self.label_nn_occupied[index].tolist()
+        return {
+            self.label_names[label_id]: label_nn_occupied[label_id]
+            for label_id, n in enumerate(self.label_neighbours[index].tolist())
+            if n
+        }
+
+    def cn_occupation_energy(self, index: int, delta_label_id: int = -1, delta: int = 0) -> float:
+        """
+        The coordination-number dependent energy for a site, as `Site.cn_occupation_energy()`.
+
+        Args:
+            index (Int): The index of the site in `self.sites`.
+            delta_label_id (:obj:Int, optional): The label id of a neighbour-site type whose occupation is changed by `delta`. Defaults to -1 (no change).
+            delta (:obj:Int, optional): The change in the number of occupied neighbours with label id `delta_label_id`. Defaults to 0.
+
+        Returns:
+            (Float): The coordination-number dependent energy for this site.
+        """
+        cn_occupation_energies = self.sites[index].cn_occupation_energies
+        assert cn_occupation_energies is not None
+        label_nn_occupied = self.label_nn_occupied[index].tolist()
+        energies = []
+        for label_id, n in enumerate(self.label_neighbours[index].tolist()):
+            if n:
+                c = label_nn_occupied[label_id] + delta if label_id == delta_label_id else label_nn_occupied[label_id]
+                energies.append(cn_occupation_energies[self.label_names[label_id]][c])
+        return float(sum(energies))
+
+    def coordination_number_delta_E(self, initial_index: int, final_index: int) -> float:
+        """
+        Coordination-number dependent energy contribution to the change in system energy if an atom jumped between two sites,
+        as `Jump.coordination_number_delta_E()`.
+
+        Args:
+            initial_index (Int): Index of the occupied site the jump starts from.
+            final_index (Int): Index of the vacant site the jump finishes at.
+
+        Returns:
+            (Float): delta E (coordination-number)
+        """
+        occupied = self.occupied
+        initial_neighbours = [k for k in self.neighbours_of(initial_index).tolist() if occupied[k]]
+        final_neighbours = [k for k in self.neighbours_of(final_index).tolist() if occupied[k] and k != initial_index]
+        initial_label_id = int(self.label_ids[initial_index])
+        final_label_id = int(self.label_ids[final_index])
+        initial_cn_occupation_energy = (
+            self.cn_occupation_energy(initial_index)
+            + sum([self.cn_occupation_energy(k) for k in initial_neighbours])
+            + sum([self.cn_occupation_energy(k) for k in final_neighbours])
+        )
+        final_cn_occupation_energy = (
+            self.cn_occupation_energy(final_index, initial_label_id, -1)
+            + sum([self.cn_occupation_energy(k, initial_label_id, -1) for k in initial_neighbours])
+            + sum([self.cn_occupation_energy(k, final_label_id, +1) for k in final_neighbours])
+        )
+        return final_cn_occupation_energy - initial_cn_occupation_energy
+
+    def jump_relative_probability(
+        self, initial_index: int, final_index: int
+    ) -> tuple[float, tuple[str, str, int, int] | None]:
+        """
+        Relative probability for an atom to jump between two sites, without constructing a Jump.
+        This gives the same result as `Jump.relative_probability` for the same sites.
+
+        Args:
+            initial_index (Int): Index of the occupied site the jump starts from.
+            final_index (Int): Index of the vacant site the jump finishes at.
+
+        Returns:
+            (Float, Tuple|None): The relative probability for this jump, and its lookup-table entry (as `Jump.rate_class`),
+                or None if there is no lookup table.
+        """
+        if self.jump_lookup_table:
+            l1 = self.label_names[self.label_ids[initial_index]]
+            l2 = self.label_names[self.label_ids[final_index]]
+            c1 = int(self.nn_occupied[initial_index])
+            c2 = int(self.nn_occupied[final_index])
+            return self.jump_lookup_table.jump_probability[l1][l2][c1][c2], (l1, l2, c1, c2)
+        assert self.params is not None
+        delta_E = float(self.site_energy[final_index]) - float(self.site_energy[initial_index])
+        if self.nn_energy:
+            # -1 because the hopping ion is not counted in the final site occupation number
+            delta_E += int(self.nn_occupied[final_index] - self.nn_occupied[initial_index] - 1) * self.nn_energy
+        if self.cn_energies:
+            delta_E += self.coordination_number_delta_E(initial_index, final_index)
+        return lookup_table.metropolis(delta_E, self.params.kT), None
+
     def reset(self) -> None:
         """
         Reset all time-dependent counters for this lattice and its constituent sites
@@ -82,12 +664,13 @@ class Lattice:
             None
         """
         self.time: float = 0.0
-        for site in self.sites:
-            site.time_occupied = 0.0
+        self.time_occupied[:] = 0.0
+        self.occupied_since[:] = 0.0
 
     def initialise_site_lookup_table(self) -> None:
         """
         Create a lookup table allowing sites in this lattice to be queried using `self.site_lookup[n]` where `n` is the identifying site numbe.
+        This is called by `site_with_id()` the first time a site is looked up.
 
         Args:
             None
@@ -95,9 +678,7 @@ class Lattice:
         Returns:
             None
         """
-        self.site_lookup: dict[int, Site] = {}
-        for site in self.sites:
-            self.site_lookup[site.number] = site
+        self.site_lookup = {site.number: site for site in self.sites}
 
     def site_with_id(self, number: int) -> Site:
         """
@@ -109,6 +690,9 @@ class Lattice:
         Returns:
             (Site): The site with id number equal to `number`
         """
+        if self.site_lookup is None:
+            self.initialise_site_lookup_table()
+            assert self.site_lookup is not None
         return self.site_lookup[number]
 
     def vacant_sites(self) -> Iterator[Site]:
@@ -209,20 +793,35 @@ class Lattice:
         Returns:
             None.
         """
-        jumping_atom = accepted_jump.initial_site.atom
+        self.move_atom(accepted_jump.initial_site.lattice_index, accepted_jump.final_site.lattice_index)
+
+    def move_atom(self, initial_index: int, final_index: int) -> None:
+        """
+        Update the lattice state by moving the atom on one site to a neighbouring vacant site.
+
+        Args:
+            initial_index (Int): Index of the occupied site the jump starts from.
+            final_index (Int): Index of the vacant site the jump finishes at.
+
+        Returns:
+            None.
+        """
+        jumping_atom = self.site_atoms[initial_index]
         assert jumping_atom is not None
-        dr = accepted_jump.dr(self.cell_lengths)
-        accepted_jump.final_site.occupation = jumping_atom.number
-        accepted_jump.final_site.atom = jumping_atom
-        accepted_jump.final_site.is_occupied = True
-        accepted_jump.initial_site.occupation = 0
-        accepted_jump.initial_site.atom = None
-        accepted_jump.initial_site.is_occupied = False
+        bond = self.bond_index(initial_index, final_index)
+        self.occupation[final_index] = jumping_atom.number
+        self.site_atoms[final_index] = jumping_atom
+        self.set_occupied(final_index, True)
+        self.occupation[initial_index] = 0
+        self.site_atoms[initial_index] = None
+        self.set_occupied(initial_index, False)
         # TODO: updating atom counters could be contained in an atom.move_to( site ) method
-        jumping_atom.site = accepted_jump.final_site
+        jumping_atom.site = self.sites[final_index]
         jumping_atom.number_of_hops += 1
-        jumping_atom.dr += dr
-        jumping_atom.summed_dr2 += np.dot(dr, dr)
+        jumping_atom.dr += self.bond_vectors[bond]
+        jumping_atom.summed_dr2 += self.bond_lengths_squared[bond]
+        if self.event_catalogue is not None:
+            self.event_catalogue.update(initial_index, final_index)
 
     def populate_sites(self, number_of_atoms: int, selected_sites: list[str] | None = None) -> list[Atom]:
         """
@@ -240,16 +839,48 @@ class Lattice:
         if selected_sites:
             atoms = [
                 atom.Atom(initial_site=site)
-                for site in random.sample([s for s in self.sites if s.label in selected_sites], number_of_atoms)
+                for site in self.rng.sample([s for s in self.sites if s.label in selected_sites], number_of_atoms)
             ]
         else:
-            atoms = [atom.Atom(initial_site=site) for site in random.sample(self.sites, number_of_atoms)]
+            atoms = [atom.Atom(initial_site=site) for site in self.rng.sample(self.sites, number_of_atoms)]
         self.number_of_occupied_sites = number_of_atoms
+        self.event_catalogue = None
         return atoms
 
+    def place_atoms(self, atoms: list[Atom], atom_site: npt.NDArray[np.integer]) -> None:
+        """
+        Replace the current occupations by placing each atom on a given site, e.g. to restore a saved state.
+        Atom displacements and hop counts are not changed, and the event catalogue is rebuilt on the next jump.
+
+        Args:
+            atoms (List(Atom)): The atoms to place.
+            atom_site (np.array): The index of the site for each atom.
+
+        Returns:
+            None
+        """
+        self.occupied[:] = False
+        self.occupation[:] = 0
+        site_atoms: list[Atom | None] = [None] * self.number_of_sites
+        self.site_atoms = site_atoms
+        for placed_atom, i in zip(atoms, np.asarray(atom_site).tolist()):
+            self.occupied[i] = True
+            self.occupation[i] = placed_atom.number
+            self.site_atoms[i] = placed_atom
+            placed_atom.site = self.sites[i]
+        self.number_of_occupied_sites = len(atoms)
+        self.count_occupied_neighbours()
+        self.event_catalogue = None
+
     def jump(self) -> None:
         """
         Select a jump at random from all potential jumps, then update the lattice state.
+        Potential jumps are taken from the event catalogue, which is built on the first call and
+        then updated locally after each jump, and selected using its event selector. Events are handled as pairs of
+        site indices, so no Jump objects are created. If `self.verify_event_catalogue` is True the
+        catalogue is checked against a full rebuild before every jump. If `self.trajectory` is set,
+        each jump is recorded by this trajectory writer. If `self.msd` is set, the atom displacements are
+        sampled by this MSD accumulator up to the time of each jump.
 
         Args:
             None
@@ -257,16 +888,22 @@ class Lattice:
         Returns:
             None
         """
-        potential_jumps = self.potential_jumps()
-        if not potential_jumps:
+        if self.event_catalogue is None:
+            self.event_catalogue = event_catalogue.EventCatalogue(self)
+        elif self.verify_event_catalogue:
+            self.event_catalogue.verify()
+        if not len(self.event_catalogue):
             raise BlockedLatticeError("No moves are possible in this lattice")
-        assert self.params is not None
-        all_transitions = transitions.Transitions(potential_jumps, params=self.params)
-        random_jump = all_transitions.random()
-        delta_t = all_transitions.time_to_jump()
+        initial_index, final_index = self.event_catalogue.select()
+        delta_t = self.event_catalogue.time_to_jump()
         self.time += delta_t
-        self.update_site_occupation_times(delta_t)
-        self.update(random_jump)
+        if self.trajectory is not None:
+            jumping_atom = self.site_atoms[initial_index]
+            assert jumping_atom is not None
+            self.trajectory.record(jumping_atom.species_index, initial_index, final_index, delta_t)
+        if self.msd is not None:
+            self.msd.advance(self.time)
+        self.move_atom(initial_index, final_index)
 
     def update_site_occupation_times(self, delta_t: float) -> None:
         """
@@ -277,9 +914,25 @@ class Lattice:
 
         Returns:
             None
+
+        Notes:
+            `jump()` does not call this: occupation times are accumulated lazily from
+            `self.time` when a site is vacated, or by `accumulate_occupation_times()`.
         """
-        for site in self.occupied_sites():
-            site.time_occupied += delta_t
+        self.time_occupied += delta_t * self.occupied
+
+    def accumulate_occupation_times(self) -> None:
+        """
+        Bring the stored occupation times for all sites up to the current lattice time.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.time_occupied += (self.time - self.occupied_since) * self.occupied
+        self.occupied_since[:] = self.time
 
     def site_occupation_statistics(self) -> dict[str, float] | None:
         """
@@ -295,12 +948,9 @@ class Lattice:
         """
         if self.time == 0.0:
             return None
-        occupation_stats = {label: 0.0 for label in self.site_labels}
-        for site in self.sites:
-            occupation_stats[site.label] += site.time_occupied
-        for label in self.site_labels:
-            occupation_stats[label] /= self.time
-        return occupation_stats
+        self.accumulate_occupation_times()
+        time_occupied = np.bincount(self.label_ids, weights=self.time_occupied, minlength=len(self.label_names))
+        return {label: float(time_occupied[self.label_names.index(label)]) / self.time for label in self.site_labels}
 
     def set_site_energies(self, energies: dict[str, float]) -> None:
         """
@@ -315,10 +965,26 @@ class Lattice:
             None
         """
         self.site_energies = energies
-        for site_label in energies:
-            for site in self.sites:
-                if site.label == site_label:
-                    site.energy = energies[site_label]
+        self.event_catalogue = None
+        site_energy = self.writeable_site_energy()
+        for site_label, energy in energies.items():
+            if site_label in self.label_names:
+                site_energy[self.label_ids == self.label_names.index(site_label)] = energy
+
+    def writeable_site_energy(self) -> npt.NDArray[np.float64]:
+        """
+        The on-site energy of each site, as an array that can be changed. Site energies that are shared read-only
+        with a LatticeTopology are first copied, so that changes only affect this lattice.
+
+        Args:
+            None
+
+        Returns:
+            (np.array): The on-site energy of each site.
+        """
+        if not self.site_energy.flags.writeable:
+            self.site_energy = self.site_energy.copy()
+        return self.site_energy
 
     def set_nn_energy(self, delta_E: float) -> None:
         """
@@ -331,6 +997,28 @@ class Lattice:
             None
         """
         self.nn_energy = delta_E
+        self.event_catalogue = None
+
+    def set_event_selection(self, method: str) -> None:
+        """
+        Set the method used to select jumps from the event catalogue.
+
+        Args:
+            method (Str): The event selection method. Allowed values are
+                `rate-tree` (binary sum tree over every jump) and
+                `rate-class` (n-fold way selection over classes of jumps with equal rates).
+
+        Returns:
+            None
+        """
+        expected_event_selection_values = ["rate-tree", "rate-class"]
+        if method not in expected_event_selection_values:
+            raise ValueError(
+                f"Unsupported event selection method {method!r}. "
+                f"Expected one of {expected_event_selection_values!r}."
+            )
+        self.event_selection = method
+        self.event_catalogue = None
 
     def set_cn_energies(self, cn_energies: dict[str, dict[str, dict[int, float]]]) -> None:
         """
@@ -347,6 +1035,7 @@ class Lattice:
         for site in self.sites:
             site.set_cn_occupation_energies(cn_energies[site.label])
         self.cn_energies = cn_energies
+        self.event_catalogue = None
 
     def site_coordination_numbers(self) -> dict[str, set[int]]:
         """
@@ -435,9 +1124,10 @@ class Lattice:
             None
         """
         selected_sites = self.select_sites(old_site_label)
-        for site in random.sample(selected_sites, n_sites_to_change):
+        for site in self.rng.sample(selected_sites, n_sites_to_change):
             site.label = new_site_label
         self.site_labels = set([site.label for site in self.sites])
+        self.event_catalogue = None
 
     def connected_sites(self, site_labels: list[str] | set[str] | str | None = None) -> list[cluster.Cluster]:
         """
@@ -461,25 +1151,17 @@ class Lattice:
         Returns:
             (List(Cluster)): List of Cluster objects for groups of contiguous sites.
         """
+        selected_sites: Sequence[Site]
         if site_labels:
             selected_sites = self.select_sites(site_labels)
         else:
             selected_sites = self.sites
-        initial_clusters = [cluster.Cluster([site]) for site in selected_sites]
+        clusters = [cluster.Cluster(sites) for sites in cluster.connected_components(selected_sites)]
         if site_labels:
             blocking_sites = self.site_labels - set(site_labels)
-            for c in initial_clusters:
+            for c in clusters:
                 c.remove_sites_from_neighbours(blocking_sites)
-        final_clusters = []
-        while initial_clusters:  # loop until initial_clusters is empty
-            this_cluster = initial_clusters.pop(0)
-            while this_cluster.neighbours:
-                neighbouring_clusters = [c for c in initial_clusters if this_cluster.is_neighbouring(c)]
-                for nc in neighbouring_clusters:
-                    initial_clusters.remove(nc)
-                    this_cluster = this_cluster.merge(nc)
-            final_clusters.append(this_cluster)
-        return final_clusters
+        return clusters
 
     def select_sites(self, site_labels: list[str] | set[str] | str) -> list[Site]:
         """
@@ -505,7 +1187,7 @@ class Lattice:
         Returns all sites in the lattice (optionally from the set of sites with specific labels)
         that are not part of a percolating network.
         This is determined from clusters of connected sites that do not wrap round to
-        themselves through a periodic boundary.
+        themselves through a periodic boundary (see `Cluster.windings()`).
 
         Args:
             site_labels (String or List(String)): Lables of sites to be considered.
@@ -514,7 +1196,7 @@ class Lattice:
             (List(Site)): List of sites not in a periodic percolating network.
         """
         clusters = self.connected_sites(site_labels=site_labels)
-        island_clusters = [c for c in clusters if not any(c.is_periodically_contiguous())]
+        island_clusters = [c for c in clusters if not any(c.is_percolating(self.cell_lengths))]
         return list(itertools.chain.from_iterable((c.sites for c in island_clusters)))
 
     def is_blocked(self) -> bool:
@@ -531,3 +1213,40 @@ class Lattice:
             return True
         else:
             return False
+
+    def save(self, directory: str) -> None:
+        """
+        Write the topology of this lattice (site coordinates, CSR neighbours, labels, energies, and cell lengths)
+        to a binary topology directory. Occupations are not saved.
+
+        Args:
+            directory (Str): The topology directory.
+
+        Returns:
+            None
+
+        Raises:
+            FileExistsError: If the directory already exists, is not empty, and does not hold a topology.
+
+        Notes:
+            See `topology.LatticeTopology.save()` for the format.
+        """
+        topology.LatticeTopology.from_lattice(self).save(directory)
+
+    @classmethod
+    def load(cls, directory: str, share_arrays: bool = False) -> Lattice:
+        """
+        Create a new, unoccupied lattice from a topology directory written by `save()`.
+        The arrays are read as memory maps, so large topologies open immediately.
+
+        Args:
+            directory (Str): The topology directory.
+            share_arrays (:obj:Bool, optional): If True, the lattice uses the read-only memory-mapped arrays
+                without copying them, so processes that load the same topology share these pages, but its sites
+                cannot be moved or relabelled.
+                Defaults to False.
+
+        Returns:
+            (Lattice): The new lattice.
+        """
+        return topology.LatticeTopology.load(directory).to_lattice(share_arrays=share_arrays)
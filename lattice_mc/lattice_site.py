@@ -1,18 +1,23 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import TYPE_CHECKING
+from collections.abc import Iterator, Sequence
+from typing import TYPE_CHECKING, overload
 
 import numpy as np
 import numpy.typing as npt
 
 if TYPE_CHECKING:
     from lattice_mc.atom import Atom
+    from lattice_mc.lattice import Lattice
 
 
 class Site:
     """
     Site class
+
+    Once a Site has been added to a Lattice, its occupation state, energy, label, and coordinates
+    are stored in the arrays of that Lattice, and the Site attributes act as views onto those arrays.
     """
 
     index: int = 0
@@ -43,20 +48,184 @@ class Site:
         Notes:
             There should be a 1:1 mapping between sites and site numbers.
         """
+        self.lattice: Lattice | None = None  # the lattice containing this site. set in Lattice.__init__
+        self.lattice_index: int = -1  # position of this site in the lattice arrays. set in Lattice.__init__
         self.number: int = number
         self.index: int = Site.index
         Site.index += 1
-        self.r: npt.NDArray[np.float64] = coordinates
-        self.neighbours: list[int] = neighbours
-        self.p_neighbours: list[Site] | None = None  # pointer to neighbouring sites. initialised in Lattice.__init__
-        self.energy: float = energy
-        self.occupation: int = 0
-        self.atom: Atom | None = None
-        self.is_occupied: bool = False
-        self.label: str = label
-        self.time_occupied: float = 0.0
+        self.r = coordinates
+        self.neighbours = neighbours
+        self.p_neighbours = None  # pointer to neighbouring sites. provided by the lattice once this site is added
+        self.energy = energy
+        self.occupation = 0
+        self.atom = None
+        self.is_occupied = False
+        self.label = label
+        self.time_occupied = 0.0
         self.cn_occupation_energies: dict[str, dict[int, float]] | None = cn_energies
 
+    @classmethod
+    def views(cls, lattice: Lattice) -> list[Site]:
+        """
+        Create a Site for every site of a lattice whose arrays have already been set up,
+        as a view onto those arrays, without initialising the state of each site in turn.
+
+        Args:
+            lattice (Lattice): The lattice.
+
+        Returns:
+            (List(Site)): The sites, in lattice index order.
+        """
+        return list(SiteViews(lattice))
+
+    @property
+    def neighbours(self) -> list[int]:
+        """
+        Get or set the id numbers of the neighbouring sites.
+        The neighbours of a site in a lattice are read from the lattice neighbour list, and cannot be set.
+        """
+        if self.lattice is None:
+            return self._neighbours
+        return self.lattice.numbers[self.lattice.neighbours_of(self.lattice_index)].tolist()
+
+    @neighbours.setter
+    def neighbours(self, value: list[int]) -> None:
+        if self.lattice is not None:
+            raise AttributeError("The neighbours of a site in a lattice cannot be changed.")
+        self._neighbours = value
+
+    @property
+    def p_neighbours(self) -> list[Site] | None:
+        """
+        Get or set the neighbouring Site objects.
+        The neighbours of a site in a lattice are read from the lattice neighbour list, and cannot be set.
+        """
+        if self.lattice is None:
+            return self._p_neighbours
+        sites = self.lattice.sites
+        return [sites[j] for j in self.lattice.neighbours_of(self.lattice_index).tolist()]
+
+    @p_neighbours.setter
+    def p_neighbours(self, value: list[Site] | None) -> None:
+        if self.lattice is not None:
+            raise AttributeError("The neighbours of a site in a lattice cannot be changed.")
+        self._p_neighbours = value
+
+    @property
+    def r(self) -> npt.NDArray[np.float64]:
+        """
+        Get or set the coordinates of this site.
+        """
+        if self.lattice is None:
+            return self._r
+        return self.lattice.coordinates[self.lattice_index]
+
+    @r.setter
+    def r(self, value: npt.NDArray[np.float64]) -> None:
+        if self.lattice is None:
+            self._r = value
+        else:
+            self.lattice.coordinates[self.lattice_index] = value
+
+    @property
+    def energy(self) -> float:
+        """
+        Get or set the on-site occupation energy for this site.
+        """
+        if self.lattice is None:
+            return self._energy
+        return float(self.lattice.site_energy[self.lattice_index])
+
+    @energy.setter
+    def energy(self, value: float) -> None:
+        if self.lattice is None:
+            self._energy = value
+        else:
+            self.lattice.writeable_site_energy()[self.lattice_index] = value
+
+    @property
+    def occupation(self) -> int:
+        """
+        Get or set the number of the atom occupying this site. Vacant sites have occupation 0.
+        """
+        if self.lattice is None:
+            return self._occupation
+        return int(self.lattice.occupation[self.lattice_index])
+
+    @occupation.setter
+    def occupation(self, value: int) -> None:
+        if self.lattice is None:
+            self._occupation = value
+        else:
+            self.lattice.occupation[self.lattice_index] = value
+
+    @property
+    def atom(self) -> Atom | None:
+        """
+        Get or set the atom occupying this site.
+        """
+        if self.lattice is None:
+            return self._atom
+        return self.lattice.site_atoms[self.lattice_index]
+
+    @atom.setter
+    def atom(self, value: Atom | None) -> None:
+        if self.lattice is None:
+            self._atom = value
+        else:
+            self.lattice.site_atoms[self.lattice_index] = value
+
+    @property
+    def is_occupied(self) -> bool:
+        """
+        Get or set whether this site is occupied.
+        """
+        if self.lattice is None:
+            return self._is_occupied
+        return bool(self.lattice.occupied[self.lattice_index])
+
+    @is_occupied.setter
+    def is_occupied(self, value: bool) -> None:
+        if self.lattice is None:
+            self._is_occupied = value
+        else:
+            self.lattice.set_occupied(self.lattice_index, value)
+
+    @property
+    def label(self) -> str:
+        """
+        Get or set the label for this site.
+        """
+        if self.lattice is None:
+            return self._label
+        return self.lattice.label_names[self.lattice.label_ids[self.lattice_index]]
+
+    @label.setter
+    def label(self, value: str) -> None:
+        if self.lattice is None:
+            self._label = value
+        else:
+            self.lattice.set_label(self.lattice_index, value)
+
+    @property
+    def time_occupied(self) -> float:
+        """
+        Get or set the total time this site has been occupied.
+        """
+        if self.lattice is None:
+            return self._time_occupied
+        lattice = self.lattice
+        i = self.lattice_index
+        return float(lattice.time_occupied[i] + (lattice.time - lattice.occupied_since[i]) * lattice.occupied[i])
+
+    @time_occupied.setter
+    def time_occupied(self, value: float) -> None:
+        if self.lattice is None:
+            self._time_occupied = value
+        else:
+            self.lattice.time_occupied[self.lattice_index] = value
+            self.lattice.occupied_since[self.lattice_index] = self.lattice.time
+
     def nn_occupation(self) -> int:
         """
         The number of occupied nearest-neighbour sites.
@@ -67,6 +236,8 @@ class Site:
         Returns:
             (Int): The number of occupied nearest-neighbour sites.
         """
+        if self.lattice is not None:
+            return self.lattice.nn_occupation(self.lattice_index)
         assert self.p_neighbours is not None
         return sum([site.is_occupied for site in self.p_neighbours])
 
@@ -80,6 +251,8 @@ class Site:
         Returns:
             (Dict(Str:Int)): Dictionary of nearest-neighbour occupied site numbers, classified by site label, e.g. { 'A' : 2, 'B' : 1 }.
         """
+        if self.lattice is not None:
+            return self.lattice.site_specific_nn_occupation(self.lattice_index)
         assert self.p_neighbours is not None
         to_return = {label: 0 for label in set((site.label for site in self.p_neighbours))}
         for site in self.p_neighbours:
@@ -130,3 +303,59 @@ class Site:
                 nn_occupations[site] += delta_occupation[site]
         assert self.cn_occupation_energies is not None
         return float(sum([self.cn_occupation_energies[s][n] for s, n in nn_occupations.items()]))
+
+
+class SiteViews(Sequence[Site]):
+    """
+    SiteViews class
+
+    The sites of a lattice whose arrays have already been set up, as a sequence of Site views onto those arrays.
+    Each Site is created the first time it is used, so a lattice that is only simulated through its arrays,
+    e.g. by the compiled kernel, does not pay for a Site object per site.
+    """
+
+    def __init__(self, lattice: Lattice) -> None:
+        """
+        Initialise a SiteViews sequence. The Site index numbers are reserved for every site up front,
+        so each Site has the same index whenever it is created.
+
+        Args:
+            lattice (Lattice): The lattice.
+
+        Returns:
+            None
+        """
+        self.lattice: Lattice = lattice
+        self.first_index: int = Site.index
+        Site.index += lattice.number_of_sites
+        self.sites: list[Site | None] = [None] * lattice.number_of_sites
+
+    def __len__(self) -> int:
+        return len(self.sites)
+
+    @overload
+    def __getitem__(self, index: int) -> Site: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Site]: ...
+
+    def __getitem__(self, index: int | slice) -> Site | list[Site]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.sites)))]
+        site = self.sites[index]
+        if site is None:
+            i = range(len(self.sites))[index]
+            site = Site.__new__(Site)
+            site.__dict__.update(
+                lattice=self.lattice,
+                lattice_index=i,
+                number=int(self.lattice.numbers[i]),
+                index=self.first_index + i,
+                cn_occupation_energies=None,
+            )
+            self.sites[i] = site
+        return site
+
+    def __iter__(self) -> Iterator[Site]:
+        for i in range(len(self.sites)):
+            yield self[i]
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from lattice_mc.species import Species
+
+"""
+On-the-fly mean squared displacements, averaged over many time origins.
+"""
+
+
+@dataclass(frozen=True)
+class MSDCurves:
+    """Mean squared displacement curves from an MSDAccumulator.
+
+    Attributes:
+        lag_time (np.array): The lag times.
+        tracer (np.array): The tracer MSD, the mean over atoms and time origins of the squared atom displacement.
+            The tracer diffusion coefficient, D*, is the gradient of this curve divided by 6.
+        collective (np.array): The collective MSD, the mean over time origins of the squared summed displacement of
+            all atoms. The collective diffusion coefficient, D_J, is the gradient of this curve divided by 6.
+        number_of_origins (np.array): The number of time origins averaged over for each lag time.
+    """
+
+    lag_time: npt.NDArray[np.float64]
+    tracer: npt.NDArray[np.float64]
+    collective: npt.NDArray[np.float64]
+    number_of_origins: npt.NDArray[np.int64]
+
+
+class MSDAccumulator:
+    """
+    MSDAccumulator class
+
+    Samples the total displacements of a Species on a regular grid of simulation times, and accumulates tracer and
+    collective mean squared displacements, averaged over every sample as a time origin.
+
+    Lag times are spaced using a multiple-tau scheme. Level 0 keeps the most recent `points_per_level` samples,
+    and each higher level keeps every `coarsening`-th sample of the level below, so memory use is fixed while
+    the longest lag time grows geometrically with the number of levels.
+    """
+
+    def __init__(
+        self,
+        species: Species,
+        sample_interval: float,
+        points_per_level: int = 16,
+        coarsening: int = 2,
+        n_levels: int = 20,
+        start_time: float = 0.0,
+    ) -> None:
+        """
+        Initialise an MSDAccumulator.
+
+        Args:
+            species (Species): The atoms whose displacements are sampled.
+            sample_interval (Float): The simulation time between samples.
+            points_per_level (:obj:Int, optional): The number of samples kept at each level. Defaults to 16.
+            coarsening (:obj:Int, optional): The ratio of the sample intervals of consecutive levels. Defaults to 2.
+            n_levels (:obj:Int, optional): The maximum number of levels. Defaults to 20.
+            start_time (:obj:Float, optional): The simulation time of the first sample. Defaults to 0.0.
+
+        Returns:
+            None
+        """
+        if sample_interval <= 0.0:
+            raise ValueError(f"sample_interval must be positive; got {sample_interval!r}.")
+        if coarsening < 2 or points_per_level <= coarsening:
+            raise ValueError(
+                f"Expected 2 <= coarsening < points_per_level; got coarsening={coarsening!r}, "
+                f"points_per_level={points_per_level!r}."
+            )
+        self.species: Species = species
+        self.sample_interval: float = sample_interval
+        self.points_per_level: int = points_per_level
+        self.coarsening: int = coarsening
+        self.n_levels: int = n_levels
+        self.start_time: float = start_time
+        self.number_of_samples: int = 0
+        # buffers are allocated as each level is first reached
+        self.buffers: list[npt.NDArray[np.float64]] = []
+        self.level_samples: list[int] = []
+        self.tracer_sum: npt.NDArray[np.float64] = np.zeros((n_levels, points_per_level))
+        self.collective_sum: npt.NDArray[np.float64] = np.zeros((n_levels, points_per_level))
+        self.counts: npt.NDArray[np.int64] = np.zeros((n_levels, points_per_level), dtype=np.int64)
+
+    @property
+    def state(self) -> dict[str, Any]:
+        """
+        Get or set the complete state of this accumulator, e.g. to save in a checkpoint.
+        The state can only be set for an accumulator with the same sample interval, levels, and number of atoms.
+        """
+        n_atoms = len(self.species.atom_dr)
+        return {
+            "sample_interval": self.sample_interval,
+            "start_time": self.start_time,
+            "number_of_samples": self.number_of_samples,
+            "level_samples": np.array(self.level_samples, dtype=np.int64),
+            "buffers": np.array(self.buffers).reshape(-1, self.points_per_level, n_atoms, 3),
+            "tracer_sum": self.tracer_sum.copy(),
+            "collective_sum": self.collective_sum.copy(),
+            "counts": self.counts.copy(),
+        }
+
+    @state.setter
+    def state(self, value: dict[str, Any]) -> None:
+        n_atoms = len(self.species.atom_dr)
+        buffers = np.asarray(value["buffers"], dtype=np.float64)
+        if (
+            float(value["sample_interval"]) != self.sample_interval
+            or np.shape(value["counts"]) != self.counts.shape
+            or buffers.shape[1:] != (self.points_per_level, n_atoms, 3)
+        ):
+            raise ValueError(
+                f"Expected an MSD state with sample_interval={self.sample_interval!r}, {self.n_levels} levels of "
+                f"{self.points_per_level} points, and {n_atoms} atoms."
+            )
+        self.start_time = float(value["start_time"])
+        self.number_of_samples = int(value["number_of_samples"])
+        self.level_samples = [int(n) for n in value["level_samples"]]
+        self.buffers = list(buffers.copy())
+        self.tracer_sum = np.array(value["tracer_sum"], dtype=np.float64)
+        self.collective_sum = np.array(value["collective_sum"], dtype=np.float64)
+        self.counts = np.array(value["counts"], dtype=np.int64)
+
+    @property
+    def next_sample_time(self) -> float:
+        """
+        The simulation time of the next sample.
+        """
+        return self.start_time + self.number_of_samples * self.sample_interval
+
+    def advance(self, time: float) -> None:
+        """
+        Sample the current displacements at every sample time before `time`.
+        Call this before each jump, with the simulation time at which the jump happens.
+
+        Args:
+            time (Float): The simulation time.
+
+        Returns:
+            None
+        """
+        while self.next_sample_time < time:
+            self.sample(self.species.atom_dr)
+
+    def advance_events(
+        self,
+        atom_dr: npt.NDArray[np.float64],
+        atoms: npt.NDArray[np.integer],
+        displacements: npt.NDArray[np.float64],
+        times: npt.NDArray[np.float64],
+    ) -> None:
+        """
+        Sample the displacements at every sample time before the last of a sequence of jumps,
+        by replaying the jumps from the displacements before the first, e.g. after a chunk of compiled-kernel jumps.
+
+        Args:
+            atom_dr (np.array): The total displacement of each atom before the first jump.
+            atoms (np.array): The index of the atom that made each jump.
+            displacements (np.array): The displacement vector of each jump.
+            times (np.array): The simulation time at which each jump happens.
+
+        Returns:
+            None
+        """
+        if not len(times):
+            return
+        current = atom_dr.copy()
+        replayed = 0
+        while self.next_sample_time < times[-1]:
+            k = int(np.searchsorted(times, self.next_sample_time, side="right"))
+            np.add.at(current, atoms[replayed:k], displacements[replayed:k])
+            replayed = k
+            self.sample(current)
+
+    def sample(self, atom_dr: npt.NDArray[np.float64]) -> None:
+        """
+        Add one sample of the displacements, and accumulate its squared displacements from the earlier samples
+        at each level it reaches.
+
+        Args:
+            atom_dr (np.array): The total displacement of each atom.
+
+        Returns:
+            None
+        """
+        n = self.number_of_samples
+        level = 0
+        while level < self.n_levels:
+            self.add_to_level(level, atom_dr)
+            level += 1
+            if n % self.coarsening**level:
+                break
+        self.number_of_samples += 1
+
+    def add_to_level(self, level: int, atom_dr: npt.NDArray[np.float64]) -> None:
+        """
+        Add one sample to one level.
+
+        Args:
+            level (Int): The level.
+            atom_dr (np.array): The total displacement of each atom.
+
+        Returns:
+            None
+        """
+        p = self.points_per_level
+        if level == len(self.buffers):
+            self.buffers.append(np.empty((p, len(atom_dr), 3)))
+            self.level_samples.append(0)
+        buffer = self.buffers[level]
+        count = self.level_samples[level]
+        position = count % p
+        n_back = min(count, p - 1)
+        if n_back:
+            dr = atom_dr[np.newaxis] - buffer[(position - np.arange(1, n_back + 1)) % p]
+            self.tracer_sum[level, 1 : n_back + 1] += np.einsum("jka,jka->j", dr, dr) / len(atom_dr)
+            self.collective_sum[level, 1 : n_back + 1] += np.sum(np.square(dr.sum(axis=1)), axis=1)
+            self.counts[level, 1 : n_back + 1] += 1
+        buffer[position] = atom_dr
+        self.level_samples[level] = count + 1
+
+    def curves(self) -> MSDCurves:
+        """
+        The MSD curves accumulated so far. Each level contributes the lag times longer than those of the level below.
+
+        Args:
+            None
+
+        Returns:
+            (MSDCurves): The lag times, tracer and collective MSDs, and numbers of time origins.
+        """
+        p = self.points_per_level
+        j_min = -(-p // self.coarsening)
+        levels = [np.zeros(0, dtype=np.int64)]
+        steps = [np.zeros(0, dtype=np.int64)]
+        for level in range(len(self.buffers)):
+            j = np.arange(1 if level == 0 else j_min, p)
+            j = j[self.counts[level, j] > 0]
+            levels.append(np.full(len(j), level))
+            steps.append(j)
+        level_index = np.concatenate(levels)
+        j_index = np.concatenate(steps)
+        counts = self.counts[level_index, j_index]
+        return MSDCurves(
+            lag_time=(j_index * self.coarsening**level_index).astype(np.float64) * self.sample_interval,
+            tracer=self.tracer_sum[level_index, j_index] / counts,
+            collective=self.collective_sum[level_index, j_index] / counts,
+            number_of_origins=counts,
+        )
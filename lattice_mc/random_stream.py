@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+
+"""
+Seedable, block-buffered random-number streams for the kinetic Monte Carlo loop.
+"""
+
+T = TypeVar("T")
+
+
+class RandomStream:
+    """
+    RandomStream class
+
+    Wraps a `numpy.random.Generator`, and hands out uniform random numbers one at a time
+    from pre-filled blocks, which avoids the per-call overhead of drawing single values.
+    The complete state of the stream, including the unused part of the current block,
+    can be saved and restored, so runs are bit-reproducible. Independent streams,
+    e.g. for parallel workers, are created with `spawn()`.
+    """
+
+    def __init__(self, seed: int | np.random.SeedSequence | None = None, block_size: int = 4096) -> None:
+        """
+        Initialise a RandomStream instance.
+
+        Args:
+            seed (:obj:Int|SeedSequence, optional): Seed for the underlying generator. Defaults to None,
+                in which case fresh entropy is taken from the operating system.
+            block_size (:obj:Int, optional): The number of uniform random numbers drawn at a time. Defaults to 4096.
+
+        Returns:
+            None
+        """
+        if block_size < 1:
+            raise ValueError(f"block_size must be positive; got {block_size!r}.")
+        self.generator: np.random.Generator = np.random.default_rng(seed)
+        self.block_size: int = block_size
+        self.block: npt.NDArray[np.float64] = np.empty(0)
+        self.position: int = 0
+
+    def random(self) -> float:
+        """
+        A uniform random number in [0, 1).
+
+        Args:
+            None
+
+        Returns:
+            (Float): The next random number in this stream.
+        """
+        if self.position == len(self.block):
+            self.block = self.generator.random(self.block_size)
+            self.position = 0
+        u = self.block[self.position]
+        self.position += 1
+        return float(u)
+
+    def peek(self, n: int) -> npt.NDArray[np.float64]:
+        """
+        The next `n` uniform random numbers in this stream, without consuming them.
+        Use `advance()` to consume numbers once they have been used.
+
+        Args:
+            n (Int): The number of random numbers.
+
+        Returns:
+            (np.array): The next `n` random numbers, i.e. those the next `n` calls to `random()` would return.
+        """
+        remaining = len(self.block) - self.position
+        if remaining < n:
+            n_blocks = -(-(n - remaining) // self.block_size)
+            self.block = np.concatenate(
+                [self.block[self.position :], self.generator.random(n_blocks * self.block_size)]
+            )
+            self.position = 0
+        return self.block[self.position : self.position + n]
+
+    def advance(self, n: int) -> None:
+        """
+        Consume the next `n` uniform random numbers in this stream, after reading them with `peek()`.
+
+        Args:
+            n (Int): The number of random numbers.
+
+        Returns:
+            None
+        """
+        self.peek(n)
+        self.position += n
+
+    def sample(self, population: Sequence[T], k: int) -> list[T]:
+        """
+        Choose `k` unique items from a sequence, as `random.sample()`.
+
+        Args:
+            population (Sequence): The items to choose from.
+            k (Int): The number of items to choose.
+
+        Returns:
+            (List): The chosen items, in selection order.
+
+        Raises:
+            ValueError: If `k` is larger than the population.
+        """
+        if k > len(population):
+            raise ValueError("Sample larger than population.")
+        return [population[i] for i in self.generator.choice(len(population), size=k, replace=False).tolist()]
+
+    def spawn(self, n: int) -> list[RandomStream]:
+        """
+        Create statistically independent child streams, e.g. one for each parallel worker.
+
+        Args:
+            n (Int): The number of streams to create.
+
+        Returns:
+            (List(RandomStream)): The new streams.
+        """
+        streams = []
+        for generator in self.generator.spawn(n):
+            stream = RandomStream(block_size=self.block_size)
+            stream.generator = generator
+            streams.append(stream)
+        return streams
+
+    @property
+    def state(self) -> dict[str, Any]:
+        """
+        Get or set the complete state of this stream.
+        """
+        return {
+            "bit_generator": self.generator.bit_generator.state,
+            "block": self.block.copy(),
+            "position": self.position,
+        }
+
+    @state.setter
+    def state(self, value: dict[str, Any]) -> None:
+        self.generator.bit_generator.state = value["bit_generator"]
+        self.block = np.array(value["block"], dtype=np.float64)
+        self.position = int(value["position"])
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections.abc import Hashable
+
+"""
+Rate-class (BKL / n-fold way) event selection.
+"""
+
+
+class RateClassSelector:
+    """
+    RateClassSelector class
+
+    Groups events into classes that share a single rate, e.g. the entries of a jump-probability
+    lookup table. An event is selected by first choosing a class with probability proportional
+    to its total rate, then choosing uniformly from the events in that class.
+    Selection is O(K) for K classes, independent of the number of events,
+    and events move between classes in O(1).
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialise a RateClassSelector instance.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.buckets: dict[Hashable, list[int]] = {}
+        self.class_rates: dict[Hashable, float] = {}
+        self.positions: dict[int, tuple[Hashable, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index: int) -> float:
+        if index not in self.positions:
+            return 0.0
+        return self.class_rates[self.positions[index][0]]
+
+    @property
+    def total(self) -> float:
+        """
+        The sum of the rates for every event in every class.
+        """
+        return sum(self.class_rates[key] * len(bucket) for key, bucket in self.buckets.items())
+
+    def update(self, index: int, rate: float, key: Hashable = None) -> None:
+        """
+        Set the rate and class for a single event.
+        An event with zero rate is removed from its class.
+
+        Args:
+            index (Int): The index of the event.
+            rate (Float): The new rate for this event.
+            key (:obj:Hashable, optional): The class for this event. Every event in a class must have the same rate.
+                Defaults to None, in which case events are classed by their rate.
+
+        Returns:
+            None
+        """
+        self.remove(index)
+        if rate <= 0.0:
+            return
+        if key is None:
+            key = rate
+        bucket = self.buckets.setdefault(key, [])
+        self.class_rates[key] = rate
+        self.positions[index] = (key, len(bucket))
+        bucket.append(index)
+
+    def remove(self, index: int) -> None:
+        """
+        Remove a single event from its class, by swapping it with the last event in that class.
+
+        Args:
+            index (Int): The index of the event.
+
+        Returns:
+            None
+        """
+        if index not in self.positions:
+            return
+        key, position = self.positions.pop(index)
+        bucket = self.buckets[key]
+        last = bucket.pop()
+        if last != index:
+            bucket[position] = last
+            self.positions[last] = (key, position)
+        if not bucket:
+            del self.buckets[key]
+            del self.class_rates[key]
+
+    def select(self, u: float) -> int:
+        """
+        Select an event with probability proportional to its rate.
+
+        Args:
+            u (Float): A uniform random number in [0, 1).
+
+        Returns:
+            (Int): The index of the selected event.
+
+        Raises:
+            ValueError: If there are no events with non-zero rate.
+        """
+        if not self.buckets:
+            raise ValueError("Cannot select an event when every rate is zero.")
+        target = u * self.total
+        for key, bucket in self.buckets.items():
+            rate = self.class_rates[key]
+            class_total = rate * len(bucket)
+            if target < class_total:
+                # the remainder of the target is reused to select uniformly within the class
+                return bucket[min(int(target / rate), len(bucket) - 1)]
+            target -= class_total
+        return bucket[-1]
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from collections.abc import Hashable
+
+import numpy as np
+import numpy.typing as npt
+
+"""
+A binary sum tree over event rates, for selecting events with probabilities proportional to their rates.
+"""
+
+
+class RateTree:
+    """
+    RateTree class
+
+    A complete binary tree stored as a flat array. The leaves hold the rates for each event
+    and every internal node holds the sum of its two children, so the root holds the total rate.
+    Selecting an event and updating a single rate are both O(log M) for M events,
+    and the total rate is available in O(1).
+
+    Notes:
+        Internal nodes are always recomputed from their children rather than incremented,
+        so the tree contents depend only on the current leaf values.
+    """
+
+    def __init__(self, rates: npt.ArrayLike = ()) -> None:
+        """
+        Initialise a RateTree instance.
+
+        Args:
+            rates (:obj:np.array, optional): Initial rates for events 0 to M-1. Defaults to no events.
+
+        Returns:
+            None
+        """
+        rates = np.asarray(rates, dtype=np.float64)
+        self.capacity: int = 1
+        while self.capacity < len(rates):
+            self.capacity *= 2
+        self.tree: npt.NDArray[np.float64] = np.zeros(2 * self.capacity)
+        self.tree[self.capacity : self.capacity + len(rates)] = rates
+        self._sum_internal_nodes()
+
+    def _sum_internal_nodes(self) -> None:
+        """
+        Recompute every internal node from the leaf values, one tree level at a time.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        n = self.capacity
+        while n > 1:
+            self.tree[n // 2 : n] = self.tree[n : 2 * n : 2] + self.tree[n + 1 : 2 * n : 2]
+            n //= 2
+
+    def __len__(self) -> int:
+        return self.capacity
+
+    def __getitem__(self, index: int) -> float:
+        return float(self.tree[self.capacity + index])
+
+    @property
+    def rates(self) -> npt.NDArray[np.float64]:
+        """
+        The rates for every event slot in this tree.
+        """
+        return self.tree[self.capacity :]
+
+    @property
+    def total(self) -> float:
+        """
+        The sum of the rates for every event in this tree.
+        """
+        return float(self.tree[1])
+
+    def update(self, index: int, rate: float, key: Hashable = None) -> None:
+        """
+        Set the rate for a single event, growing the tree if necessary.
+
+        Args:
+            index (Int): The index of the event.
+            rate (Float): The new rate for this event.
+            key (:obj:Hashable, optional): Ignored. Accepted so that RateTree and RateClassSelector are interchangeable.
+
+        Returns:
+            None
+        """
+        if index >= self.capacity:
+            self._grow(index + 1)
+        tree = self.tree
+        i = self.capacity + index
+        tree[i] = rate
+        i //= 2
+        while i >= 1:
+            tree[i] = tree[2 * i] + tree[2 * i + 1]
+            i //= 2
+
+    def _grow(self, size: int) -> None:
+        """
+        Increase the number of leaves until there are at least `size` event slots.
+
+        Args:
+            size (Int): The minimum number of event slots.
+
+        Returns:
+            None
+        """
+        rates = self.rates.copy()
+        while self.capacity < size:
+            self.capacity *= 2
+        self.tree = np.zeros(2 * self.capacity)
+        self.tree[self.capacity : self.capacity + len(rates)] = rates
+        self._sum_internal_nodes()
+
+    def select(self, u: float) -> int:
+        """
+        Select an event with probability proportional to its rate.
+
+        Args:
+            u (Float): A uniform random number in [0, 1).
+
+        Returns:
+            (Int): The index of the selected event.
+
+        Raises:
+            ValueError: If every event has zero rate.
+        """
+        tree = self.tree
+        if tree[1] <= 0.0:
+            raise ValueError("Cannot select an event when every rate is zero.")
+        target = u * tree[1]
+        i = 1
+        while i < self.capacity:
+            left = tree[2 * i]
+            # Never descend into a branch with zero total rate, even if rounding pushes the target past it.
+            if (target < left or tree[2 * i + 1] == 0.0) and left > 0.0:
+                i = 2 * i
+            else:
+                target -= left
+                i = 2 * i + 1
+        return i - self.capacity
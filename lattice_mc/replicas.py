@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from lattice_mc import kernel
+from lattice_mc.error import BlockedLatticeError
+
+if TYPE_CHECKING:
+    from lattice_mc.lattice import Lattice
+
+"""
+Lock-step kinetic Monte Carlo for many independent replicas of one lattice.
+"""
+
+
+def padded_table(offsets: npt.NDArray[np.int64], values: npt.NDArray[np.int64], pad: int) -> npt.NDArray[np.int64]:
+    """
+    Convert a CSR list into a dense table with one row per entry, padding short rows.
+
+    Args:
+        offsets (np.array): CSR row offsets, of length (number of rows + 1).
+        values (np.array): CSR values.
+        pad (Int): The value used to fill short rows.
+
+    Returns:
+        (np.array): The dense table, with as many columns as the longest row.
+    """
+    lengths = np.diff(offsets)
+    table = np.full((len(lengths), int(lengths.max(initial=0))), pad, dtype=np.int64)
+    columns = np.arange(len(values)) - np.repeat(offsets[:-1], lengths)
+    table[np.repeat(np.arange(len(lengths)), lengths), columns] = values
+    return table
+
+
+class ReplicaEnsemble:
+    """
+    ReplicaEnsemble class
+
+    Holds the occupations, neighbour counts, jump rates, and atom displacements for many independent replicas
+    of one lattice as two-dimensional arrays, indexed by [replica, site], [replica, bond], or [replica, atom],
+    and shares the neighbour topology, bond vectors, and energies between them. Each iteration of `run()`
+    makes one jump in every replica using vectorised NumPy operations, so the per-jump Python overhead
+    is spread over all the replicas.
+
+    Jump rates for each replica are stored in blocks of bonds, with a running total for each block,
+    so selecting a jump and updating the rates after a jump need work proportional to the square root of the
+    number of bonds. Supports site energies, nearest-neighbour energies, and nearest-neighbour lookup tables.
+    """
+
+    def __init__(
+        self, lattice: Lattice, n_replicas: int, number_of_atoms: int, selected_sites: list[str] | None = None
+    ) -> None:
+        """
+        Initialise a ReplicaEnsemble instance, and populate each replica with atoms on randomly chosen sites.
+
+        Args:
+            lattice (Lattice): The lattice, with `params` and any energies or lookup table set.
+                Random numbers are drawn from `lattice.rng`.
+            n_replicas (Int): The number of replicas.
+            number_of_atoms (Int): The number of atoms in each replica.
+            selected_sites (:obj:List, optional): List of site labels if only some sites are to be occupied. Defaults to None.
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError: If `lattice.params` has not been set.
+            ValueError: If the lattice uses coordination-number energies, or there are too few sites for the atoms.
+        """
+        if lattice.params is None:
+            raise RuntimeError("Lattice.params must be set before computing jumps")
+        if lattice.cn_energies:
+            raise ValueError("The replica engine does not support coordination-number energies.")
+        if n_replicas < 1:
+            raise ValueError(f"n_replicas must be positive; got {n_replicas!r}.")
+        self.lattice: Lattice = lattice
+        self.n_replicas: int = n_replicas
+        self.number_of_atoms: int = number_of_atoms
+        n_sites = lattice.number_of_sites
+        n_bonds = len(lattice.neighbour_indices)
+        self.n_bonds: int = n_bonds
+        bond_rows, bond_reverse = kernel.bond_tables(lattice)
+        # Bonds are stored in square-root-sized blocks. Padding bonds, including one dummy bond
+        # (index n_bonds) used to pad short rows of the tables below, join site 0 to itself and have zero rate.
+        self.block_size: int = max(1, math.isqrt(n_bonds + 1))
+        self.n_blocks: int = -(-(n_bonds + 1) // self.block_size)
+        capacity = self.n_blocks * self.block_size
+        self.bond_initial: npt.NDArray[np.int64] = np.zeros(capacity, dtype=np.int64)
+        self.bond_final: npt.NDArray[np.int64] = np.zeros(capacity, dtype=np.int64)
+        self.bond_initial[:n_bonds] = bond_rows
+        self.bond_final[:n_bonds] = lattice.neighbour_indices
+        # Neighbour lists padded with a dummy site (index n_sites), which has no bonds.
+        self.neighbour_table: npt.NDArray[np.int64] = padded_table(
+            lattice.neighbour_offsets, lattice.neighbour_indices, n_sites
+        )
+        # Neighbour counts can be updated without np.add.at if no neighbour list repeats a site.
+        sorted_neighbours = np.sort(self.neighbour_table, axis=1)
+        repeats = (sorted_neighbours[:, 1:] == sorted_neighbours[:, :-1]) & (sorted_neighbours[:, 1:] != n_sites)
+        self.unique_neighbours: bool = not np.any(repeats)
+        # The bonds whose rates can change when the occupation of a site changes:
+        # every jump into or out of the site, or one of its neighbours.
+        out_bonds = padded_table(lattice.neighbour_offsets, np.arange(n_bonds), n_bonds)
+        out_bonds = np.vstack([out_bonds, np.full((1, out_bonds.shape[1]), n_bonds, dtype=np.int64)])
+        reverse = np.append(bond_reverse, n_bonds)
+        shell = np.hstack([np.arange(n_sites)[:, np.newaxis], self.neighbour_table])
+        bonds = out_bonds[shell].reshape(n_sites, -1)
+        self.affected_bonds: npt.NDArray[np.int64] = self.unique_rows(np.hstack([bonds, reverse[bonds]]), n_bonds)
+        self.use_rate_table: bool = lattice.jump_lookup_table is not None
+        self.rate_table: npt.NDArray[np.float64] = kernel.dense_rate_table(lattice)
+        self.nn_energy: float = lattice.nn_energy if lattice.nn_energy else 0.0
+        # Per-bond constants for evaluating rates: the offset of the [initial label, final label]
+        # entry in the flattened lookup table, and the change in site energy.
+        self.flat_rate_table: npt.NDArray[np.float64] = self.rate_table.reshape(-1)
+        l1 = lattice.label_ids[self.bond_initial].astype(np.int64)
+        l2 = lattice.label_ids[self.bond_final].astype(np.int64)
+        self.bond_rate_table_offset: npt.NDArray[np.int64] = (
+            (l1 * self.rate_table.shape[1] + l2) * self.rate_table.shape[2] * self.rate_table.shape[3]
+        )
+        self.bond_site_energy_change: npt.NDArray[np.float64] = (
+            lattice.site_energy[self.bond_final] - lattice.site_energy[self.bond_initial]
+        )
+        # Per-replica state. Site arrays have an extra column for the dummy site.
+        self.occupied: npt.NDArray[np.int8] = np.zeros((n_replicas, n_sites + 1), dtype=np.int8)
+        self.site_atom: npt.NDArray[np.int64] = np.full((n_replicas, n_sites + 1), -1, dtype=np.int64)
+        self.atom_site: npt.NDArray[np.int64] = np.zeros((n_replicas, number_of_atoms), dtype=np.int64)
+        if selected_sites:
+            candidates = [i for i, site in enumerate(lattice.sites) if site.label in selected_sites]
+        else:
+            candidates = list(range(n_sites))
+        if number_of_atoms > len(candidates):
+            raise ValueError(f"Cannot place {number_of_atoms} atoms on {len(candidates)} sites.")
+        for r in range(n_replicas):
+            self.atom_site[r] = lattice.rng.sample(candidates, number_of_atoms)
+        replica_index = np.arange(n_replicas)[:, np.newaxis]
+        self.occupied[replica_index, self.atom_site] = 1
+        self.site_atom[replica_index, self.atom_site] = np.arange(number_of_atoms)
+        self.nn_occupied: npt.NDArray[np.int64] = np.zeros((n_replicas, n_sites + 1), dtype=np.int64)
+        self.nn_occupied[:, :n_sites] = self.occupied[:, self.neighbour_table].sum(axis=2)
+        self.time: npt.NDArray[np.float64] = np.zeros(n_replicas)
+        self.time_occupied: npt.NDArray[np.float64] = np.zeros((n_replicas, n_sites))
+        self.occupied_since: npt.NDArray[np.float64] = np.zeros((n_replicas, n_sites))
+        self.atom_dr: npt.NDArray[np.float64] = np.zeros((n_replicas, number_of_atoms, 3))
+        self.atom_number_of_hops: npt.NDArray[np.int64] = np.zeros((n_replicas, number_of_atoms), dtype=np.int64)
+        self.atom_summed_dr2: npt.NDArray[np.float64] = np.zeros((n_replicas, number_of_atoms))
+        self.rates: npt.NDArray[np.float64] = np.zeros((n_replicas, capacity))
+        self.block_rates: npt.NDArray[np.float64] = np.zeros((n_replicas, self.n_blocks))
+        all_bonds = np.broadcast_to(np.arange(n_bonds), (n_replicas, n_bonds))
+        self.rates[:, :n_bonds] = self.bond_rates(np.arange(n_replicas), all_bonds)
+        self.sum_block_rates()
+
+    @staticmethod
+    def unique_rows(table: npt.NDArray[np.int64], pad: int) -> npt.NDArray[np.int64]:
+        """
+        Remove repeated values from each row of a table of non-negative integers, padding short rows.
+
+        Args:
+            table (np.array): The table.
+            pad (Int): The value used to fill short rows. This must be larger than any value in the table.
+
+        Returns:
+            (np.array): The sorted unique values of each row, followed by padding, trimmed to the longest row.
+        """
+        table = np.sort(table, axis=1)
+        table[:, 1:][table[:, 1:] == table[:, :-1]] = pad
+        table = np.sort(table, axis=1)
+        width = int(np.count_nonzero(table != pad, axis=1).max(initial=0)) + 1
+        return table[:, :width]
+
+    def bond_rates(self, replicas: npt.NDArray[np.int64], bonds: npt.NDArray[np.int64]) -> npt.NDArray[np.float64]:
+        """
+        Relative probabilities for jumps along bonds, or zero for blocked jumps, as `Lattice.jump_relative_probability()`.
+
+        Args:
+            replicas (np.array): Replica indices, of shape (k,).
+            bonds (np.array): Bond indices for each replica, of shape (k, m).
+
+        Returns:
+            (np.array): The relative probabilities, of shape (k, m).
+        """
+        lattice = self.lattice
+        assert lattice.params is not None
+        # indices into the flattened per-replica site arrays
+        offsets = replicas[:, np.newaxis] * self.occupied.shape[1]
+        i = self.bond_initial[bonds] + offsets
+        j = self.bond_final[bonds] + offsets
+        occupied = self.occupied.reshape(-1)
+        nn_occupied = self.nn_occupied.reshape(-1)
+        possible = occupied[i] > occupied[j]
+        if self.use_rate_table:
+            coordinations = self.rate_table.shape[3]
+            p = self.flat_rate_table[
+                self.bond_rate_table_offset[bonds] + nn_occupied[i] * coordinations + nn_occupied[j]
+            ]
+        else:
+            delta_E = self.bond_site_energy_change[bonds]
+            if self.nn_energy:
+                # -1 because the hopping ion is not counted in the final site occupation number
+                delta_E = delta_E + (nn_occupied[j] - nn_occupied[i] - 1) * self.nn_energy
+            p = np.exp(-np.maximum(delta_E, 0.0) / lattice.params.kT)
+        rates: npt.NDArray[np.float64] = np.where(possible, p, 0.0)
+        return rates
+
+    def sum_block_rates(self) -> None:
+        """
+        Recalculate the total rate for each block of bonds from the individual bond rates.
+        This removes rounding errors accumulated by incremental updates.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.block_rates = self.rates.reshape(self.n_replicas, self.n_blocks, self.block_size).sum(axis=2)
+
+    @staticmethod
+    def select(rates: npt.NDArray[np.float64], targets: npt.NDArray[np.float64]) -> npt.NDArray[np.int64]:
+        """
+        For each row of rates, the first entry whose cumulative rate exceeds the target for that row.
+        If rounding errors put a target beyond the total rate, the last entry with a non-zero rate is selected.
+
+        Args:
+            rates (np.array): Rates, of shape (k, m).
+            targets (np.array): Targets, of shape (k,), in [0, total rate).
+
+        Returns:
+            (np.array): The selected entry for each row.
+        """
+        rows = np.arange(len(rates))
+        selected = np.minimum(
+            np.count_nonzero(np.cumsum(rates, axis=1) <= targets[:, np.newaxis], axis=1), rates.shape[1] - 1
+        )
+        overshot = rows[rates[rows, selected] <= 0.0]
+        if len(overshot):
+            selected[overshot] = rates.shape[1] - 1 - np.argmax(rates[overshot, ::-1] > 0.0, axis=1)
+        chosen: npt.NDArray[np.int64] = selected
+        return chosen
+
+    def step(self, replicas: npt.NDArray[np.int64]) -> None:
+        """
+        Make one jump in each of a set of replicas.
+
+        Args:
+            replicas (np.array): Indices of the replicas to advance.
+
+        Returns:
+            None
+
+        Raises:
+            BlockedLatticeError: If no jumps are possible in one of the replicas.
+        """
+        lattice = self.lattice
+        assert lattice.params is not None
+        k = len(replicas)
+        r = replicas[:, np.newaxis]
+        u = lattice.rng.peek(2 * k).reshape(2, k)
+        lattice.rng.advance(2 * k)
+        block_rates = self.block_rates[replicas]
+        totals = block_rates.sum(axis=1)
+        if np.any(totals <= 0.0):
+            raise BlockedLatticeError("No moves are possible in this lattice")
+        # select a block, then a bond within that block
+        targets = u[0] * totals
+        blocks = self.select(block_rates, targets)
+        targets -= np.cumsum(block_rates, axis=1)[np.arange(k), blocks] - block_rates[np.arange(k), blocks]
+        rates = self.rates.reshape(self.n_replicas, self.n_blocks, self.block_size)
+        b = blocks * self.block_size + self.select(rates[replicas, blocks], targets)
+        time = self.time[replicas] - np.log(u[1]) / (lattice.params.rate_prefactor * totals)
+        self.time[replicas] = time
+        i = self.bond_initial[b]
+        j = self.bond_final[b]
+        # occupation times
+        self.time_occupied[replicas, i] += time - self.occupied_since[replicas, i]
+        self.occupied_since[replicas, i] = time
+        self.occupied_since[replicas, j] = time
+        # move the atoms
+        atoms = self.site_atom[replicas, i]
+        self.site_atom[replicas, j] = atoms
+        self.site_atom[replicas, i] = -1
+        self.atom_site[replicas, atoms] = j
+        self.atom_dr[replicas, atoms] += lattice.bond_vectors[b]
+        self.atom_number_of_hops[replicas, atoms] += 1
+        self.atom_summed_dr2[replicas, atoms] += lattice.bond_lengths_squared[b]
+        # occupations and neighbour counts
+        self.occupied[replicas, i] = 0
+        self.occupied[replicas, j] = 1
+        if self.unique_neighbours:
+            self.nn_occupied[r, self.neighbour_table[i]] -= 1
+            self.nn_occupied[r, self.neighbour_table[j]] += 1
+        else:
+            np.add.at(self.nn_occupied, (r, self.neighbour_table[i]), -1)
+            np.add.at(self.nn_occupied, (r, self.neighbour_table[j]), 1)
+        # rates: each affected bond is updated once, with repeats replaced by the dummy bond
+        bonds = np.sort(np.hstack([self.affected_bonds[i], self.affected_bonds[j]]), axis=1)
+        bonds[:, 1:][bonds[:, 1:] == bonds[:, :-1]] = self.n_bonds
+        new_rates = self.bond_rates(replicas, bonds)
+        changes = np.bincount(
+            (np.arange(k)[:, np.newaxis] * self.n_blocks + bonds // self.block_size).reshape(-1),
+            weights=(new_rates - self.rates[r, bonds]).reshape(-1),
+            minlength=k * self.n_blocks,
+        )
+        self.block_rates[replicas] += changes.reshape(k, self.n_blocks)
+        self.rates[r, bonds] = new_rates
+
+    def run(self, n_jumps: int | None = None, for_time: float | None = None, resum_interval: int = 1024) -> int:
+        """
+        Run jumps in lock-step in every replica, until either each replica has made a number of jumps,
+        or the simulation time for each replica reaches `for_time`.
+
+        Args:
+            n_jumps (:obj:Int, optional): The number of jumps per replica. Defaults to None (no limit).
+            for_time (:obj:Float, optional): Stop each replica once its simulation time reaches this value. Defaults to None (no limit).
+            resum_interval (:obj:Int, optional): The number of iterations between recalculating the block totals
+                from the individual bond rates. Defaults to 1024.
+
+        Returns:
+            (Int): The number of iterations.
+
+        Raises:
+            ValueError: If neither `n_jumps` nor `for_time` is set.
+            BlockedLatticeError: If no jumps are possible in one of the replicas.
+        """
+        if n_jumps is None and for_time is None:
+            raise ValueError("Running the replicas needs n_jumps or for_time to be set.")
+        all_replicas = np.arange(self.n_replicas)
+        iterations = 0
+        while n_jumps is None or iterations < n_jumps:
+            replicas = all_replicas if for_time is None else all_replicas[self.time < for_time]
+            if not len(replicas):
+                break
+            self.step(replicas)
+            iterations += 1
+            if iterations % resum_interval == 0:
+                self.sum_block_rates()
+        return iterations
+
+    def reset(self) -> None:
+        """
+        Reset the times, occupation times, and atom displacements for every replica.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.time[:] = 0.0
+        self.time_occupied[:] = 0.0
+        self.occupied_since[:] = 0.0
+        self.atom_dr[:] = 0.0
+        self.atom_number_of_hops[:] = 0
+        self.atom_summed_dr2[:] = 0.0
+
+    @property
+    def sum_dr_squared(self) -> npt.NDArray[np.float64]:
+        """
+        Sum of squared total displacements of the atoms in each replica.
+        """
+        sum_dr_squared: npt.NDArray[np.float64] = np.sum(self.atom_dr * self.atom_dr, axis=(1, 2))
+        return sum_dr_squared
+
+    @property
+    def collective_dr_squared(self) -> npt.NDArray[np.float64]:
+        """
+        Squared sum of total displacements of the atoms in each replica.
+        """
+        collective_dr_squared: npt.NDArray[np.float64] = np.sum(np.square(self.atom_dr.sum(axis=1)), axis=1)
+        return collective_dr_squared
+
+    @property
+    def tracer_correlation(self) -> npt.NDArray[np.float64]:
+        """
+        Tracer correlation factor, f, for each replica.
+        """
+        summed_dr2: npt.NDArray[np.float64] = self.atom_summed_dr2.sum(axis=1)
+        return self.sum_dr_squared / summed_dr2
+
+    @property
+    def collective_correlation(self) -> npt.NDArray[np.float64]:
+        """
+        Collective correlation factor, f_I, for each replica.
+        """
+        summed_dr2: npt.NDArray[np.float64] = self.atom_summed_dr2.sum(axis=1)
+        return self.collective_dr_squared / summed_dr2
+
+    @property
+    def tracer_diffusion_coefficient(self) -> npt.NDArray[np.float64]:
+        """
+        Tracer diffusion coefficient, D*, for each replica.
+        """
+        return self.sum_dr_squared / (6.0 * float(self.number_of_atoms) * self.time)
+
+    @property
+    def collective_diffusion_coefficient(self) -> npt.NDArray[np.float64]:
+        """
+        Collective or "jump" diffusion coefficient, D_J, for each replica.
+        """
+        return self.collective_dr_squared / (6.0 * self.time)
+
+    @property
+    def collective_diffusion_coefficient_per_atom(self) -> npt.NDArray[np.float64]:
+        """
+        The collective diffusion coefficient per atom, D_J / n_atoms, for each replica.
+        """
+        return self.collective_diffusion_coefficient / float(self.number_of_atoms)
+
+    @property
+    def average_site_occupations(self) -> list[dict[str, float]]:
+        """
+        Average site occupation numbers for each site label, for each replica,
+        e.g. [{ 'A' : 12.4, 'B' : 231.2 }, { 'A' : 11.9, 'B' : 232.1 }]
+        """
+        lattice = self.lattice
+        n_sites = lattice.number_of_sites
+        time_occupied = (
+            self.time_occupied + (self.time[:, np.newaxis] - self.occupied_since) * self.occupied[:, :n_sites]
+        )
+        by_label = time_occupied @ np.eye(len(lattice.label_names))[lattice.label_ids]
+        return [
+            {
+                label: float(by_label[r, lattice.label_names.index(label)] / self.time[r])
+                for label in lattice.site_labels
+            }
+            for r in range(self.n_replicas)
+        ]
@@ -1,18 +1,37 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
-
-from lattice_mc import init_lattice, lookup_table, species
+from typing import Any
+
+import numpy as np
+
+from lattice_mc import (
+    block_averages,
+    checkpoint,
+    init_lattice,
+    kernel,
+    lookup_table,
+    msd,
+    random_stream,
+    replicas,
+    species,
+    trajectory,
+)
 from lattice_mc.constants import k_boltzmann
 from lattice_mc.lattice import Lattice
 
 
 @dataclass(frozen=True)
 class SimulationParameters:
-    """Immutable container for the physical parameters of a simulation."""
+    """Immutable container for the physical parameters of a simulation.
+
+    `seed` optionally seeds the random-number stream of a Simulation created with these parameters.
+    """
 
     temperature: float
     rate_prefactor: float
+    seed: int | None = None
 
     def __post_init__(self) -> None:
         if self.temperature <= 0:
@@ -47,13 +66,50 @@ class Simulation:
             None
         """
         self.params: SimulationParameters = params
-        self.lattice: Lattice | None = None
+        self.rng: random_stream.RandomStream = random_stream.RandomStream(params.seed)
+        self._lattice: Lattice | None = None
         self.number_of_atoms: int | None = None
+        self.selected_sites: list[str] | None = None
         self.number_of_jumps: int | None = None
         self.for_time: float | None = None
         self.number_of_equilibration_jumps: int = 0
         self.atoms: species.Species | None = None
         self.has_run: bool = False
+        # progress through the current run, saved in checkpoints.
+        self.equilibration_jumps_completed: int = 0
+        self.jumps_completed: int = 0
+        self.resuming: bool = False
+        self.trajectory_position: tuple[int, int] | None = None
+        self.msd_state: dict[str, Any] | None = None
+        self.msd: msd.MSDAccumulator | None = None
+        self.block_averages: block_averages.BlockAverages | None = None
+
+    @property
+    def lattice(self) -> Lattice | None:
+        """
+        Get or set the simulation lattice. Setting the lattice makes it use the random-number stream of this simulation.
+        """
+        return self._lattice
+
+    @lattice.setter
+    def lattice(self, value: Lattice | None) -> None:
+        if value is not None:
+            value.rng = self.rng
+        self._lattice = value
+
+    def seed(self, seed: int | np.random.SeedSequence | None) -> None:
+        """
+        Replace the random-number stream for this simulation (and its lattice) with a newly seeded stream.
+
+        Args:
+            seed (Int|SeedSequence|None): Seed for the new stream. None takes fresh entropy from the operating system.
+
+        Returns:
+            None
+        """
+        self.rng = random_stream.RandomStream(seed)
+        if self._lattice is not None:
+            self._lattice.rng = self.rng
 
     def reset(self) -> None:
         """
@@ -84,6 +140,7 @@ class Simulation:
         """
         assert self.lattice is not None
         self.number_of_atoms = n
+        self.selected_sites = selected_sites
         self.atoms = species.Species(self.lattice.populate_sites(self.number_of_atoms, selected_sites=selected_sites))
 
     def set_number_of_jumps(self, n: int) -> None:
@@ -168,6 +225,20 @@ class Simulation:
         if site_energies is not None:
             self.lattice.set_site_energies(site_energies)
 
+    def set_event_selection(self, method: str) -> None:
+        """
+        Set the method used to select jumps for this simulation.
+
+        Args:
+            method (Str): The event selection method, `rate-tree` (default) or `rate-class`.
+                `rate-class` is most efficient when used with a jump-probability lookup table.
+
+        Returns:
+            None
+        """
+        assert self.lattice is not None
+        self.lattice.set_event_selection(method)
+
     def is_initialised(self) -> None:
         """
         Check whether the simulation has been initialised.
@@ -185,35 +256,285 @@ class Simulation:
         if not self.number_of_jumps and not self.for_time:
             raise AttributeError("Running a simulation needs number_of_jumps or for_time to be set")
 
-    def run(self, for_time: float | None = None) -> None:
+    def run(
+        self,
+        for_time: float | None = None,
+        seed: int | np.random.SeedSequence | None = None,
+        engine: str = "python",
+        checkpoint_file: str | None = None,
+        checkpoint_interval: int = 100000,
+        trajectory_file: str | None = None,
+        msd_interval: float | None = None,
+    ) -> None:
         """
         Run the simulation.
 
         Args:
             for_time (:obj:Float, optional): If `for_time` is set, then run the simulation until a set amount of time has passed. Otherwise, run the simulation for a set number of jumps. Defaults to None.
+            seed (:obj:Int|SeedSequence, optional): If set, reseed the random-number stream before running. Defaults to None, which continues the current stream.
+            engine (:obj:Str, optional): The engine used to run jumps. Valid values are 'python' (default), which calls
+                `Lattice.jump()` for each step, and 'kernel', which runs the compiled `kernel.KMCKernel` loop.
+                The kernel is compiled with Numba if it is installed, and supports site energies,
+                nearest-neighbour energies, and lookup tables, but not coordination-number energies.
+            checkpoint_file (:obj:Str, optional): If set, a checkpoint is written to this file every `checkpoint_interval`
+                jumps, and at the end of the equilibration and of the run. Defaults to None.
+            checkpoint_interval (:obj:Int, optional): The number of jumps between checkpoints. Defaults to 100000.
+            trajectory_file (:obj:Str, optional): If set, every jump after the equilibration is recorded in this file
+                by a `trajectory.TrajectoryWriter`, starting with a keyframe of the atom sites. When resuming from a
+                checkpoint written while recording a trajectory, the existing file is continued from the point
+                reached at the checkpoint. Defaults to None.
+            msd_interval (:obj:Float, optional): If set, the atom displacements after the equilibration are sampled
+                at this interval of simulation time by a `msd.MSDAccumulator`, stored as `self.msd`,
+                which gives MSD curves averaged over many time origins. When resuming from a checkpoint, the
+                accumulator continues from the state saved in the checkpoint, which must have been written with the
+                same `msd_interval`. Defaults to None.
 
         Returns:
             None
+
+        Notes:
+            After `load_checkpoint()`, the run continues from the point the checkpoint was written,
+            and gives exactly the same results as an uninterrupted run, provided `seed` is not set.
         """
+        expected_engine_values = ["python", "kernel"]
+        if engine not in expected_engine_values:
+            raise ValueError(f"Unsupported engine {engine!r}. Expected one of {expected_engine_values!r}.")
         self.for_time = for_time
         self.is_initialised()
         assert self.lattice is not None
         assert self.atoms is not None
+        if seed is not None:
+            self.seed(seed)
+        self.lattice.rng = self.rng
         self.lattice.params = self.params
-        if self.number_of_equilibration_jumps > 0:
-            for step in range(self.number_of_equilibration_jumps):
+        if not self.resuming:
+            self.equilibration_jumps_completed = 0
+            self.jumps_completed = 0
+            self.trajectory_position = None
+            self.msd_state = None
+        elif msd_interval is not None and self.msd_state is None and self.jumps_completed:
+            raise ValueError(
+                "msd_interval cannot be set when resuming from a checkpoint written without an MSD accumulator."
+            )
+        self.resuming = False
+        self.block_averages = None
+        runner = kernel.KMCKernel(self.lattice, self.atoms) if engine == "kernel" else None
+        interval = checkpoint_interval if checkpoint_file is not None else None
+        while self.equilibration_jumps_completed < self.number_of_equilibration_jumps:
+            remaining = self.number_of_equilibration_jumps - self.equilibration_jumps_completed
+            self.equilibration_jumps_completed += self.run_jumps(runner, n_jumps=min(remaining, interval or remaining))
+            if self.equilibration_jumps_completed == self.number_of_equilibration_jumps:
+                self.reset()
+            if checkpoint_file is not None:
+                self.save_checkpoint(checkpoint_file)
+        if msd_interval is not None:
+            self.msd = msd.MSDAccumulator(self.atoms, msd_interval, start_time=self.lattice.time)
+            if self.msd_state is not None:
+                self.msd.state = self.msd_state
+        writer = None
+        if trajectory_file is not None:
+            writer = trajectory.TrajectoryWriter(trajectory_file, resume_at=self.trajectory_position)
+            writer.write_keyframe(
+                np.array([atom.site.lattice_index for atom in self.atoms.atoms], dtype=np.int64), self.lattice.time
+            )
+            self.lattice.trajectory = writer
+        if msd_interval is not None:
+            self.lattice.msd = self.msd
+        try:
+            if self.for_time:
+                while True:
+                    self.jumps_completed += self.run_jumps(runner, n_jumps=interval, for_time=self.for_time)
+                    if checkpoint_file is not None:
+                        self.save_checkpoint(checkpoint_file)
+                    if interval is None or self.lattice.time >= self.for_time:
+                        break
+                self.number_of_jumps = self.jumps_completed
+            else:
+                assert self.number_of_jumps is not None
+                while self.jumps_completed < self.number_of_jumps:
+                    remaining = self.number_of_jumps - self.jumps_completed
+                    self.jumps_completed += self.run_jumps(runner, n_jumps=min(remaining, interval or remaining))
+                    if checkpoint_file is not None:
+                        self.save_checkpoint(checkpoint_file)
+        finally:
+            if writer is not None:
+                writer.close()
+                self.lattice.trajectory = None
+            self.lattice.msd = None
+        self.has_run = True
+
+    def run_jumps(
+        self, runner: kernel.KMCKernel | None, n_jumps: int | None = None, for_time: float | None = None
+    ) -> int:
+        """
+        Run jumps until either a number of jumps have been made, or the simulation time reaches `for_time`.
+
+        Args:
+            runner (KMCKernel|None): The compiled kernel used to run jumps, or None to call `Lattice.jump()` for each step.
+            n_jumps (:obj:Int, optional): The number of jumps. Defaults to None (no limit).
+            for_time (:obj:Float, optional): Stop once the simulation time reaches this value. Defaults to None (no limit).
+
+        Returns:
+            (Int): The number of jumps made.
+        """
+        assert self.lattice is not None
+        if runner is not None:
+            if for_time is None:
+                runner.run(n_jumps=n_jumps)
+                assert n_jumps is not None
+                return n_jumps
+            if n_jumps is None:
+                return runner.run(for_time=for_time)
+            return runner.run(n_jumps=n_jumps, for_time=for_time)
+        if for_time is None:
+            assert n_jumps is not None
+            for step in range(n_jumps):
                 self.lattice.jump()
+            return n_jumps
+        jumps = 0
+        while self.lattice.time < for_time and (n_jumps is None or jumps < n_jumps):
+            self.lattice.jump()
+            jumps += 1
+        return jumps
+
+    def run_until_converged(
+        self,
+        relative_errors: dict[str, float],
+        block_jumps: int = 10000,
+        min_blocks: int = 10,
+        max_jumps: int | None = None,
+        max_wall_time: float | None = None,
+        seed: int | np.random.SeedSequence | None = None,
+        engine: str = "python",
+    ) -> block_averages.BlockAverages:
+        """
+        Run the simulation in blocks of jumps until the block-averaged estimates of the transport properties
+        reach target relative standard errors, or a budget of jumps or wall-clock time is used up.
+        The equilibration jumps are run first. Afterwards the usual properties, such as
+        `tracer_diffusion_coefficient`, are calculated from the whole run, and `standard_errors` gives
+        their standard errors from the block averages.
+
+        Args:
+            relative_errors (Dict): The target relative standard error for each quantity. Valid quantities are
+                'tracer_diffusion_coefficient', 'collective_diffusion_coefficient', 'tracer_correlation',
+                and 'collective_correlation', e.g. `{"tracer_diffusion_coefficient": 0.01}`.
+            block_jumps (:obj:Int, optional): The number of jumps in each block. Blocks should be long compared with
+                the number of jumps over which atom motion is correlated. Defaults to 10000.
+            min_blocks (:obj:Int, optional): The minimum number of blocks before the run can stop as converged.
+                Defaults to 10.
+            max_jumps (:obj:Int, optional): Stop once no further block fits within this number of jumps.
+                Defaults to None (no limit).
+            max_wall_time (:obj:Float, optional): Stop after the block during which this wall-clock time, in seconds,
+                is exceeded. Defaults to None (no limit).
+            seed (:obj:Int|SeedSequence, optional): If set, reseed the random-number stream before running. Defaults to None, which continues the current stream.
+            engine (:obj:Str, optional): The engine used to run jumps, 'python' (default) or 'kernel'. See `run()`.
+
+        Returns:
+            (BlockAverages): The block values, and estimates of each quantity, also stored as `self.block_averages`.
+        """
+        expected_engine_values = ["python", "kernel"]
+        if engine not in expected_engine_values:
+            raise ValueError(f"Unsupported engine {engine!r}. Expected one of {expected_engine_values!r}.")
+        for quantity in relative_errors:
+            if quantity not in block_averages.QUANTITIES:
+                raise ValueError(
+                    f"Unsupported quantity {quantity!r}. Expected one of {list(block_averages.QUANTITIES)!r}."
+                )
+        if block_jumps < 1:
+            raise ValueError(f"block_jumps must be positive; got {block_jumps!r}.")
+        start_time = time.perf_counter()
+        self.for_time = None
+        self.number_of_jumps = block_jumps
+        self.is_initialised()
+        assert self.lattice is not None
+        assert self.atoms is not None
+        if seed is not None:
+            self.seed(seed)
+        self.lattice.rng = self.rng
+        self.lattice.params = self.params
+        runner = kernel.KMCKernel(self.lattice, self.atoms) if engine == "kernel" else None
+        if self.number_of_equilibration_jumps > 0:
+            self.run_jumps(runner, n_jumps=self.number_of_equilibration_jumps)
             self.reset()
+        averages = block_averages.BlockAverages(self.atoms, self.lattice.time)
+        self.block_averages = averages
+        self.jumps_completed = 0
+        while True:
+            self.jumps_completed += self.run_jumps(runner, n_jumps=block_jumps)
+            averages.end_block(self.lattice.time)
+            if averages.number_of_blocks >= min_blocks and averages.converged(relative_errors):
+                break
+            if max_jumps is not None and self.jumps_completed + block_jumps > max_jumps:
+                break
+            if max_wall_time is not None and time.perf_counter() - start_time >= max_wall_time:
+                break
+        self.number_of_jumps = self.jumps_completed
+        self.has_run = True
+        return averages
+
+    def save_checkpoint(self, filename: str) -> None:
+        """
+        Write a checkpoint of the current simulation state, from which an interrupted run can be restarted exactly.
+
+        Args:
+            filename (Str): The checkpoint filename.
+
+        Returns:
+            None
+        """
+        checkpoint.Checkpoint.from_simulation(self).save(filename)
+
+    def load_checkpoint(self, filename: str) -> None:
+        """
+        Restore the simulation state from a checkpoint written by `save_checkpoint()`, or during `run()`.
+        The lattice, energies, and number of atoms must have been set up as for the simulation
+        the checkpoint was written from. The next call to `run()` continues the interrupted run.
+
+        Args:
+            filename (Str): The checkpoint filename.
+
+        Returns:
+            None
+        """
+        checkpoint.Checkpoint.load(filename).restore(self)
+
+    def run_replicas(
+        self, n_replicas: int, for_time: float | None = None, seed: int | np.random.SeedSequence | None = None
+    ) -> replicas.ReplicaEnsemble:
+        """
+        Run independent replicas of the simulation in lock-step, using `replicas.ReplicaEnsemble`.
+        Each replica is populated with `number_of_atoms` atoms on randomly chosen sites of the simulation lattice,
+        then run for the equilibration jumps and either `number_of_jumps` jumps or until `for_time`.
+        The lattice itself is not changed.
+
+        Args:
+            n_replicas (Int): The number of replicas.
+            for_time (:obj:Float, optional): If `for_time` is set, then run each replica until a set amount of time has passed. Otherwise, run each replica for a set number of jumps. Defaults to None.
+            seed (:obj:Int|SeedSequence, optional): If set, reseed the random-number stream before running. Defaults to None, which continues the current stream.
+
+        Returns:
+            (ReplicaEnsemble): The replicas, with per-replica results such as `tracer_correlation`
+                and `collective_diffusion_coefficient`.
+        """
+        self.for_time = for_time
+        self.is_initialised()
+        assert self.lattice is not None
+        assert self.number_of_atoms is not None
+        if seed is not None:
+            self.seed(seed)
+        self.lattice.rng = self.rng
+        self.lattice.params = self.params
+        ensemble = replicas.ReplicaEnsemble(
+            self.lattice, n_replicas, self.number_of_atoms, selected_sites=self.selected_sites
+        )
+        if self.number_of_equilibration_jumps > 0:
+            ensemble.run(n_jumps=self.number_of_equilibration_jumps)
+            ensemble.reset()
         if self.for_time:
-            self.number_of_jumps = 0
-            while self.lattice.time < self.for_time:
-                self.lattice.jump()
-                self.number_of_jumps += 1
+            ensemble.run(for_time=self.for_time)
         else:
-            assert self.number_of_jumps is not None
-            for step in range(self.number_of_jumps):
-                self.lattice.jump()
-        self.has_run = True
+            ensemble.run(n_jumps=self.number_of_jumps)
+        return ensemble
 
     @property
     def tracer_correlation(self) -> float | None:
@@ -304,6 +625,24 @@ class Simulation:
         else:
             return None
 
+    @property
+    def standard_errors(self) -> dict[str, float] | None:
+        """
+        Standard errors of the tracer and collective diffusion coefficients and correlation factors,
+        estimated from block averages by `run_until_converged()`.
+
+        Args:
+            None
+
+        Returns:
+            (Dict): The standard error of each quantity, keyed by property name, or None if
+                the simulation was not run by `run_until_converged()`.
+        """
+        if self.has_run and self.block_averages is not None:
+            return {quantity: estimate.standard_error for quantity, estimate in self.block_averages.estimates.items()}
+        else:
+            return None
+
     @property
     def average_site_occupations(self) -> dict[str, float] | None:
         """
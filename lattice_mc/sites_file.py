@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import warnings
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from lattice_mc import lattice, topology
+
+"""
+Fast, streaming reader for sites files.
+
+The file is read in chunks of whole site blocks. Each chunk is tokenised with NumPy operations on its bytes:
+lines are identified by their key, and the values for each key are gathered from every line
+in the chunk and converted in a single call, directly into arrays preallocated for the number of sites.
+"""
+
+NEWLINE = ord("\n")
+COLON = ord(":")
+WHITESPACE = np.frombuffer(b" \t\r\n", dtype=np.uint8)
+SITE, CENTRE, NEIGHBOURS, LABEL, ENERGY = range(5)
+KEY_NAMES = ("site", "centre", "neighbours", "label", "energy")
+KEYS = {
+    b"site": SITE,
+    b"centre": CENTRE,
+    b"center": CENTRE,
+    b"neighbours": NEIGHBOURS,
+    b"neighbors": NEIGHBOURS,
+    b"label": LABEL,
+    b"energy": ENERGY,
+}
+
+CACHE_DIRECTORY = ".lattice_mc_cache"
+
+
+def read_sites_file(site_file: str, cell_lengths: list[float], chunk_size: int = 1 << 24) -> topology.LatticeTopology:
+    """
+    Read the sites and connectivity of a lattice from a sites file.
+
+    Args:
+        site_file (Str): Filename for the file containing the site information.
+        cell_lengths (List(Float,Float,Float)): A list containing the [ x, y, z ] cell lengths.
+        chunk_size (:obj:Int, optional): The number of bytes read from the file at a time. Defaults to 16 MiB.
+
+    Returns:
+        (LatticeTopology): The topology of the lattice.
+
+    Raises:
+        ValueError: If the file does not follow the sites file format.
+
+    Notes:
+        See `init_lattice.lattice_from_sites_file()` for a description of the file format.
+        Lines with any other key are ignored.
+    """
+    with open(site_file, "rb") as f:
+        parser = SitesFileParser(int(f.readline()))
+        remainder = b""
+        while chunk := f.read(chunk_size):
+            data = remainder + chunk
+            # split after the last complete site block, so that every block is parsed in one piece
+            cut = data.rfind(b"\n\n") + 1
+            parser.parse(data[:cut])
+            remainder = data[cut:]
+        parser.parse(remainder)
+    return parser.topology(cell_lengths)
+
+
+def cache_key(site_file: str, cell_lengths: list[float], chunk_size: int = 1 << 24) -> str:
+    """
+    A key identifying the topology read from a sites file: a SHA-256 hash of the file contents,
+    the cell lengths, and the version of the topology format.
+
+    Args:
+        site_file (Str): Filename for the file containing the site information.
+        cell_lengths (List(Float,Float,Float)): A list containing the [ x, y, z ] cell lengths.
+        chunk_size (:obj:Int, optional): The number of bytes read from the file at a time. Defaults to 16 MiB.
+
+    Returns:
+        (Str): The key, as a hexadecimal string.
+    """
+    key = hashlib.sha256(f"{topology.FORMAT}:{topology.FORMAT_VERSION}".encode())
+    key.update(np.array(cell_lengths, dtype=np.float64).tobytes())
+    with open(site_file, "rb") as f:
+        while chunk := f.read(chunk_size):
+            key.update(chunk)
+    return key.hexdigest()
+
+
+def read_cached_sites_file(site_file: str, cell_lengths: list[float]) -> topology.LatticeTopology:
+    """
+    Read the sites and connectivity of a lattice from a sites file, using a cache of binary topologies
+    in a `.lattice_mc_cache` directory next to the file. Cached topologies are keyed by `cache_key()`,
+    so editing the file, or reading it with different cell lengths, never returns a stale topology.
+    If the cache cannot be written, e.g. because the directory is read-only, the file is read as usual.
+
+    Args:
+        site_file (Str): Filename for the file containing the site information.
+        cell_lengths (List(Float,Float,Float)): A list containing the [ x, y, z ] cell lengths.
+
+    Returns:
+        (LatticeTopology): The topology of the lattice, with memory-mapped arrays if read from the cache.
+
+    Raises:
+        ValueError: If the file does not follow the sites file format.
+    """
+    cache = os.path.join(os.path.dirname(os.path.abspath(site_file)), CACHE_DIRECTORY)
+    directory = os.path.join(cache, cache_key(site_file, cell_lengths))
+    try:
+        return topology.LatticeTopology.load(directory)
+    except (OSError, ValueError):
+        # not cached yet, or written by an incompatible version.
+        pass
+    lattice_topology = read_sites_file(site_file, cell_lengths)
+    try:
+        # the cache owns its entries, so an unreadable entry is removed rather than left blocking `save()`.
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(cache, exist_ok=True)
+        lattice_topology.save(directory)
+    except OSError:
+        pass
+    return lattice_topology
+
+
+def count_tokens(values: npt.NDArray[np.uint8], number_of_lines: int) -> npt.NDArray[np.int64]:
+    """
+    Count the whitespace-separated tokens on each of a sequence of newline-terminated lines.
+
+    Args:
+        values (np.array): The bytes of the lines.
+        number_of_lines (Int): The number of lines.
+
+    Returns:
+        (np.array): The number of tokens on each line.
+    """
+    token = ~np.isin(values, WHITESPACE)
+    token_starts = token & ~np.concatenate([[False], token[:-1]])
+    newline = values == NEWLINE
+    line = np.cumsum(newline) - newline
+    return np.bincount(line[token_starts], minlength=number_of_lines)
+
+
+def parse_numbers(values: npt.NDArray[np.uint8], dtype: type[np.generic], key: str) -> npt.NDArray[Any]:
+    """
+    Convert whitespace-separated numbers.
+
+    Args:
+        values (np.array): The bytes of the numbers.
+        dtype (Type): The NumPy type of the numbers.
+        key (Str): The key the values belong to, for error messages.
+
+    Returns:
+        (np.array): The numbers.
+
+    Raises:
+        ValueError: If the values cannot all be converted.
+    """
+    with warnings.catch_warnings():
+        # older versions of NumPy warn, rather than raise, when they cannot convert every value.
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(values.tobytes(), dtype=dtype, sep=" ")
+        except (ValueError, DeprecationWarning) as error:
+            raise ValueError(f"Invalid {key} values in sites file.") from error
+
+
+class SitesFileParser:
+    """
+    SitesFileParser class
+
+    Collects the site data from a sequence of chunks of a sites file, each containing whole site blocks,
+    into arrays preallocated for the number of sites given in the file header.
+    """
+
+    def __init__(self, number_of_sites: int) -> None:
+        """
+        Initialise a SitesFileParser.
+
+        Args:
+            number_of_sites (Int): The number of sites.
+
+        Returns:
+            None
+        """
+        self.number_of_sites: int = number_of_sites
+        self.count: int = 0
+        self.numbers: npt.NDArray[np.int64] = np.empty(number_of_sites, dtype=np.int64)
+        self.coordinates: npt.NDArray[np.float64] = np.empty((number_of_sites, 3), dtype=np.float64)
+        self.neighbour_counts: npt.NDArray[np.int64] = np.empty(number_of_sites, dtype=np.int64)
+        self.neighbour_numbers: list[npt.NDArray[np.int64]] = []
+        self.label_ids: npt.NDArray[np.int32] = np.empty(number_of_sites, dtype=np.int32)
+        self.labels: dict[str, int] = {}
+        self.site_energy: npt.NDArray[np.float64] = np.zeros(number_of_sites, dtype=np.float64)
+
+    def parse(self, chunk: bytes) -> None:
+        """
+        Parse a chunk of a sites file, containing whole site blocks separated by blank lines.
+
+        Args:
+            chunk (Bytes): The chunk.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the chunk does not follow the sites file format, or holds more sites than expected.
+        """
+        if not chunk.endswith(b"\n"):
+            chunk += b"\n"
+        buffer = np.frombuffer(chunk, dtype=np.uint8)
+        ends = np.flatnonzero(buffer == NEWLINE)
+        starts = np.concatenate([[0], ends[:-1] + 1])
+        key_starts = starts.copy()
+        blank = starts == ends
+        for i in np.flatnonzero(~blank & np.isin(buffer[starts], WHITESPACE)).tolist():
+            line = chunk[starts[i] : ends[i]]
+            stripped = line.lstrip()
+            key_starts[i] += len(line) - len(stripped)
+            blank[i] = not stripped
+        lines = np.flatnonzero(~blank)
+        colons = np.flatnonzero(buffer == COLON)
+        first_colon = np.full(len(starts), -1, dtype=np.int64)
+        # assign in reverse, so the first colon on each line is kept
+        first_colon[np.searchsorted(ends, colons)[::-1]] = colons[::-1]
+        key_lengths = first_colon[lines] - key_starts[lines]
+        kinds = np.full(len(lines), -1, dtype=np.int64)
+        for key, kind in KEYS.items():
+            candidates = np.flatnonzero(key_lengths == len(key))
+            key_bytes = buffer[key_starts[lines[candidates]][:, np.newaxis] + np.arange(len(key))]
+            kinds[candidates[np.all(key_bytes == np.frombuffer(key, dtype=np.uint8), axis=1)]] = kind
+        # lines with other keys are ignored
+        lines = lines[kinds >= 0]
+        kinds = kinds[kinds >= 0]
+        blocks = np.cumsum(blank)[lines]
+        site_blocks = blocks[kinds == SITE]
+        if len(np.unique(blocks)) != len(site_blocks) or np.any(np.diff(site_blocks) == 0):
+            raise ValueError("Each site block in a sites file needs exactly one site line.")
+        n = len(site_blocks)
+        first, last = self.count, self.count + n
+        if last > self.number_of_sites:
+            raise ValueError(f"Sites file has more than the expected {self.number_of_sites} sites.")
+
+        def values(kind: int) -> tuple[npt.NDArray[np.uint8], npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+            selected = lines[kinds == kind]
+            value_starts = first_colon[selected] + 1
+            lengths = ends[selected] + 1 - value_starts
+            index = np.repeat(value_starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            line_values = buffer[index]
+            return line_values, blocks[kinds == kind], count_tokens(line_values, len(selected))
+
+        for kind in (CENTRE, NEIGHBOURS, LABEL):
+            if not np.array_equal(blocks[kinds == kind], site_blocks):
+                raise ValueError(f"Each site block in a sites file needs exactly one {KEY_NAMES[kind]} line.")
+        site_values, _, counts = values(SITE)
+        if np.any(counts != 1):
+            raise ValueError("Invalid site values in sites file.")
+        self.numbers[first:last] = parse_numbers(site_values, np.int64, "site")
+        centre_values, _, counts = values(CENTRE)
+        if np.any(counts != 3):
+            raise ValueError("Invalid centre values in sites file.")
+        self.coordinates[first:last] = parse_numbers(centre_values, np.float64, "centre").reshape(n, 3)
+        neighbour_values, _, counts = values(NEIGHBOURS)
+        self.neighbour_counts[first:last] = counts
+        self.neighbour_numbers.append(parse_numbers(neighbour_values, np.int64, "neighbours"))
+        label_values, _, counts = values(LABEL)
+        if np.any(counts != 1):
+            raise ValueError("Invalid label values in sites file.")
+        names, inverse = np.unique(np.array(label_values.tobytes().split()), return_inverse=True)
+        ids = np.array([self.labels.setdefault(name.decode(), len(self.labels)) for name in names], dtype=np.int32)
+        self.label_ids[first:last] = ids[inverse]
+        energy_values, energy_blocks, counts = values(ENERGY)
+        if np.any(counts != 1) or np.any(np.diff(energy_blocks) == 0):
+            raise ValueError("Invalid energy values in sites file.")
+        energies = parse_numbers(energy_values, np.float64, "energy")
+        self.site_energy[first + np.searchsorted(site_blocks, energy_blocks)] = energies
+        self.count = last
+
+    def topology(self, cell_lengths: list[float]) -> topology.LatticeTopology:
+        """
+        Create a LatticeTopology from the parsed sites, converting neighbour site numbers to site indices.
+
+        Args:
+            cell_lengths (List(Float,Float,Float)): A list containing the [ x, y, z ] cell lengths.
+
+        Returns:
+            (LatticeTopology): The topology of the lattice.
+
+        Raises:
+            ValueError: If the number of sites does not match the file header, site numbers are repeated,
+                or a neighbour is not one of the sites.
+        """
+        if self.count != self.number_of_sites:
+            raise ValueError(f"Sites file has {self.count} sites; expected {self.number_of_sites}.")
+        neighbour_numbers = np.concatenate([np.zeros(0, dtype=np.int64), *self.neighbour_numbers])
+        neighbour_indices = lattice.site_indices(self.numbers, neighbour_numbers)
+        neighbour_offsets = np.zeros(self.count + 1, dtype=np.int64)
+        neighbour_offsets[1:] = np.cumsum(self.neighbour_counts)
+        label_names = tuple(sorted(self.labels))
+        sorted_ids = np.array([label_names.index(name) for name in self.labels], dtype=np.int32)
+        return topology.LatticeTopology.from_arrays(
+            numbers=self.numbers,
+            coordinates=self.coordinates,
+            neighbour_offsets=neighbour_offsets,
+            neighbour_indices=neighbour_indices,
+            label_names=label_names,
+            label_ids=sorted_ids[self.label_ids],
+            site_energy=self.site_energy,
+            cell_lengths=np.array(cell_lengths, dtype=np.float64),
+        )
@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 import numpy as np
+import numpy.typing as npt
 
 if TYPE_CHECKING:
     from lattice_mc.atom import Atom
@@ -12,7 +13,9 @@ class Species:
     """
     Species class.
 
-    Contains methods that operate on sets of Atom objects
+    Contains methods that operate on sets of Atom objects.
+    The displacement, number of hops, and summed squared displacement for each atom are stored in
+    contiguous arrays, with the corresponding Atom attributes acting as views onto these arrays.
     """
 
     def __init__(self, atoms: list[Atom]) -> None:
@@ -26,6 +29,14 @@ class Species:
             None
         """
         self.atoms: list[Atom] = atoms
+        self.atom_dr: npt.NDArray[np.float64] = np.array([atom.dr for atom in atoms], dtype=np.float64).reshape(-1, 3)
+        self.atom_number_of_hops: npt.NDArray[np.int64] = np.array(
+            [atom.number_of_hops for atom in atoms], dtype=np.int64
+        )
+        self.atom_summed_dr2: npt.NDArray[np.float64] = np.array([atom.summed_dr2 for atom in atoms], dtype=np.float64)
+        for i, atom in enumerate(atoms):
+            atom.species = self
+            atom.species_index = i
 
     def sites_occupied(self) -> list[int]:
         """
@@ -49,7 +60,7 @@ class Species:
         Returns:
             (Float): The sum of squared total displacements for these atoms.
         """
-        return float(sum([atom.dr_squared() for atom in self.atoms]))
+        return float(np.sum(self.atom_dr * self.atom_dr))
 
     def collective_dr_squared(self) -> float:
         """
@@ -63,7 +74,7 @@ class Species:
         """
         if not self.atoms:
             raise ValueError("Cannot compute collective displacement for empty Species.")
-        return float(sum(np.square(sum([atom.dr for atom in self.atoms]))))
+        return float(np.sum(np.square(self.atom_dr.sum(axis=0))))
 
     def occupations(self, site_label: str) -> int:
         """
@@ -87,7 +98,7 @@ class Species:
         Returns:
             (Float): The sum of squared individual displacements for these atoms.
         """
-        return float(sum([atom.summed_dr2 for atom in self.atoms]))
+        return float(self.atom_summed_dr2.sum())
 
     def tracer_correlation(self) -> float:
         """
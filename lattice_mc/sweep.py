@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import itertools
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from lattice_mc import lattice, simulation, topology
+
+"""
+Parameter sweeps over many independent simulations, run in a pool of worker processes.
+"""
+
+
+@dataclass(frozen=True)
+class SweepSettings:
+    """Settings shared by every simulation in a parameter sweep.
+
+    Each simulation runs for `number_of_jumps` jumps, or until `for_time` if that is set,
+    after `number_of_equilibration_jumps` equilibration jumps. If `lookup_table` is True, a
+    nearest-neighbour jump-probability lookup table is used. `engine` is passed to `Simulation.run()`.
+    """
+
+    rate_prefactor: float
+    number_of_jumps: int | None = None
+    for_time: float | None = None
+    number_of_equilibration_jumps: int = 0
+    selected_sites: tuple[str, ...] | None = None
+    lookup_table: bool = False
+    engine: str = "python"
+
+    def __post_init__(self) -> None:
+        if not self.number_of_jumps and not self.for_time:
+            raise ValueError("A parameter sweep needs number_of_jumps or for_time to be set.")
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    """The parameters for one simulation in a parameter sweep, with its own random-number seed."""
+
+    index: int
+    temperature: float
+    concentration: float
+    number_of_atoms: int
+    nn_energy: float
+    site_energies: dict[str, float] | None
+    replica: int
+    seed: np.random.SeedSequence
+
+
+# Set in each worker process by initialise_worker().
+_worker_topology: topology.LatticeTopology | topology.SharedLatticeTopology | None = None
+_worker_settings: SweepSettings | None = None
+
+
+def initialise_worker(
+    lattice_topology: topology.LatticeTopology | topology.SharedLatticeTopology, settings: SweepSettings
+) -> None:
+    """
+    Store the lattice topology and sweep settings for the simulations run in this process.
+    Used as the initializer for worker processes, so the topology is sent once to each worker rather than with every task.
+
+    Args:
+        lattice_topology (LatticeTopology|SharedLatticeTopology): The topology of the lattice to simulate.
+        settings (SweepSettings): The settings shared by every simulation.
+
+    Returns:
+        None
+    """
+    global _worker_topology, _worker_settings
+    _worker_topology = lattice_topology
+    _worker_settings = settings
+
+
+def run_point(point: SweepPoint) -> dict[str, Any]:
+    """
+    Run one simulation in a parameter sweep, on a new lattice built from the topology stored by `initialise_worker()`.
+
+    Args:
+        point (SweepPoint): The parameters for this simulation.
+
+    Returns:
+        (Dict): The parameters and results for this simulation, as one row of the sweep results.
+    """
+    assert _worker_topology is not None
+    assert _worker_settings is not None
+    settings = _worker_settings
+    params = simulation.SimulationParameters(temperature=point.temperature, rate_prefactor=settings.rate_prefactor)
+    s = simulation.Simulation(params)
+    s.seed(point.seed)
+    s.lattice = _worker_topology.to_lattice()
+    s.set_number_of_atoms(
+        point.number_of_atoms, selected_sites=list(settings.selected_sites) if settings.selected_sites else None
+    )
+    s.set_nn_energy(point.nn_energy)
+    s.set_site_energies(point.site_energies)
+    if settings.lookup_table:
+        s.setup_lookup_table()
+    if settings.number_of_jumps:
+        s.set_number_of_jumps(settings.number_of_jumps)
+    s.set_number_of_equilibration_jumps(settings.number_of_equilibration_jumps)
+    s.run(for_time=settings.for_time, engine=settings.engine)
+    assert s.lattice is not None
+    row: dict[str, Any] = {
+        "temperature": point.temperature,
+        "concentration": point.concentration,
+        "number_of_atoms": point.number_of_atoms,
+        "nn_energy": point.nn_energy,
+    }
+    for label, energy in (point.site_energies or {}).items():
+        row[f"site_energy_{label}"] = energy
+    row.update(
+        {
+            "replica": point.replica,
+            "number_of_jumps": s.number_of_jumps,
+            "time": s.lattice.time,
+            "tracer_correlation": s.tracer_correlation,
+            "tracer_diffusion_coefficient": s.tracer_diffusion_coefficient,
+            "collective_correlation": s.collective_correlation,
+            "collective_diffusion_coefficient": s.collective_diffusion_coefficient,
+            "collective_diffusion_coefficient_per_atom": s.collective_diffusion_coefficient_per_atom,
+        }
+    )
+    for label, occupation in (s.average_site_occupations or {}).items():
+        row[f"occupation_{label}"] = occupation
+    return row
+
+
+def sweep_points(
+    lattice_topology: topology.LatticeTopology,
+    settings: SweepSettings,
+    temperatures: Sequence[float],
+    concentrations: Sequence[float],
+    nn_energies: Sequence[float] = (0.0,),
+    site_energies: Sequence[dict[str, float] | None] = (None,),
+    n_runs: int = 1,
+    seed: int | np.random.SeedSequence | None = None,
+) -> list[SweepPoint]:
+    """
+    The simulations for every combination of parameters in a sweep, each with an independent random-number seed.
+
+    Args:
+        lattice_topology (LatticeTopology): The topology of the lattice to simulate.
+        settings (SweepSettings): The settings shared by every simulation.
+        temperatures, concentrations, nn_energies, site_energies, n_runs, seed: As `run_sweep()`.
+
+    Returns:
+        (List(SweepPoint)): The simulations in the sweep.
+
+    Raises:
+        ValueError: If a concentration does not give between one atom and the number of available sites.
+    """
+    if settings.selected_sites:
+        selected = [i for i, label in enumerate(lattice_topology.label_names) if label in settings.selected_sites]
+        available = int(np.isin(lattice_topology.label_ids, selected).sum())
+    else:
+        available = lattice_topology.number_of_sites
+    numbers_of_atoms = {}
+    for concentration in concentrations:
+        n = round(concentration * available)
+        if not 0 < n <= available:
+            raise ValueError(f"Concentration {concentration!r} gives {n} atoms on {available} available sites.")
+        numbers_of_atoms[concentration] = n
+    grid = list(itertools.product(temperatures, concentrations, nn_energies, site_energies, range(n_runs)))
+    seeds = (seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)).spawn(len(grid))
+    return [
+        SweepPoint(index, temperature, c, numbers_of_atoms[c], nn_energy, energies, replica, point_seed)
+        for index, ((temperature, c, nn_energy, energies, replica), point_seed) in enumerate(zip(grid, seeds))
+    ]
+
+
+def run_sweep(
+    source: lattice.Lattice | topology.LatticeTopology,
+    settings: SweepSettings,
+    temperatures: Sequence[float],
+    concentrations: Sequence[float],
+    nn_energies: Sequence[float] = (0.0,),
+    site_energies: Sequence[dict[str, float] | None] = (None,),
+    n_runs: int = 1,
+    seed: int | np.random.SeedSequence | None = None,
+    max_workers: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> pd.DataFrame:
+    """
+    Run independent simulations for every combination of temperature, concentration, nearest-neighbour energy,
+    and set of site energies, `n_runs` times each, in a pool of worker processes.
+
+    The lattice topology is placed in shared memory, which each worker process attaches to without copying,
+    and each worker builds a new lattice for each simulation on top of the shared arrays.
+    Every simulation has its own random-number stream, spawned from `seed`, so a sweep with a fixed seed gives
+    the same results regardless of the number of workers or the order in which simulations finish.
+
+    Args:
+        source (Lattice|LatticeTopology): The lattice to simulate. Only its topology is used; any atoms are ignored.
+        settings (SweepSettings): The settings shared by every simulation.
+        temperatures (List(Float)): Temperatures.
+        concentrations (List(Float)): Fractions of the available sites (all sites, or those with `settings.selected_sites`
+            labels) to populate with atoms.
+        nn_energies (:obj:List(Float), optional): Nearest-neighbour energies. Defaults to (0.0,).
+        site_energies (:obj:List(Dict(Str:Float)|None), optional): Sets of on-site energies for each site label.
+            Defaults to (None,), which keeps the site energies of the lattice.
+        n_runs (:obj:Int, optional): The number of independent simulations for each combination of parameters. Defaults to 1.
+        seed (:obj:Int|SeedSequence, optional): Seed for the random-number streams. Defaults to None,
+            in which case fresh entropy is taken from the operating system.
+        max_workers (:obj:Int, optional): The number of worker processes. Defaults to None (the number of CPUs).
+        progress (:obj:Callable, optional): Called as `progress(completed, total)` each time a simulation finishes.
+            Defaults to None.
+
+    Returns:
+        (pandas.DataFrame): One row per simulation, in grid order, with columns for its parameters
+            and the results from the corresponding `Simulation` properties.
+    """
+    lattice_topology = (
+        source if isinstance(source, topology.LatticeTopology) else topology.LatticeTopology.from_lattice(source)
+    )
+    points = sweep_points(
+        lattice_topology, settings, temperatures, concentrations, nn_energies, site_energies, n_runs, seed
+    )
+    rows: list[dict[str, Any]] = [{} for _ in points]
+    with (
+        topology.SharedLatticeTopology(lattice_topology) as shared,
+        ProcessPoolExecutor(
+            max_workers=max_workers, initializer=initialise_worker, initargs=(shared, settings)
+        ) as executor,
+    ):
+        futures = {executor.submit(run_point, point): point.index for point in points}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            rows[futures[future]] = future.result()
+            if progress is not None:
+                progress(completed, len(points))
+    return pd.DataFrame(rows)
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from types import TracebackType
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from lattice_mc import lattice
+
+"""
+Compact, picklable descriptions of lattice topologies.
+"""
+
+FORMAT = "lattice_mc.LatticeTopology"
+FORMAT_VERSION = 1
+ARRAY_FIELDS = (
+    "numbers",
+    "coordinates",
+    "neighbour_offsets",
+    "neighbour_indices",
+    "bond_vectors",
+    "bond_lengths_squared",
+    "label_ids",
+    "site_energy",
+    "cell_lengths",
+)
+
+
+def is_topology_directory(directory: str) -> bool:
+    """
+    Check whether a directory holds a topology written by `LatticeTopology.save()`, of any version.
+
+    Args:
+        directory (Str): The directory.
+
+    Returns:
+        (Bool): True if the directory has a `metadata.json` file with the LatticeTopology format.
+    """
+    try:
+        with open(os.path.join(directory, "metadata.json")) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return isinstance(metadata, dict) and metadata.get("format") == FORMAT
+
+
+@dataclass(frozen=True)
+class LatticeTopology:
+    """Immutable description of the sites and connectivity of a lattice, held as NumPy arrays.
+
+    A LatticeTopology carries no occupation or simulation state, and pickles as a handful of arrays
+    rather than a graph of Site objects, so it can be sent cheaply to worker processes, which call
+    `to_lattice()` to build their own Lattice. Site `i` has the neighbours
+    `neighbour_indices[neighbour_offsets[i]:neighbour_offsets[i+1]]`, as in `Lattice`, and `bond_vectors`
+    and `bond_lengths_squared` follow the same bond order.
+    """
+
+    numbers: npt.NDArray[np.int64]
+    coordinates: npt.NDArray[np.float64]
+    neighbour_offsets: npt.NDArray[np.int64]
+    neighbour_indices: npt.NDArray[np.int64]
+    bond_vectors: npt.NDArray[np.float64]
+    bond_lengths_squared: npt.NDArray[np.float64]
+    label_names: tuple[str, ...]
+    label_ids: npt.NDArray[np.int32]
+    site_energy: npt.NDArray[np.float64]
+    cell_lengths: npt.NDArray[np.float64]
+
+    @classmethod
+    def from_lattice(cls, source: lattice.Lattice) -> LatticeTopology:
+        """
+        Create a LatticeTopology describing an existing lattice.
+
+        Args:
+            source (Lattice): The lattice.
+
+        Returns:
+            (LatticeTopology): The topology of the lattice.
+        """
+        return cls(
+            numbers=source.numbers.copy(),
+            coordinates=source.coordinates.copy(),
+            neighbour_offsets=source.neighbour_offsets.copy(),
+            neighbour_indices=source.neighbour_indices.copy(),
+            bond_vectors=source.bond_vectors.copy(),
+            bond_lengths_squared=source.bond_lengths_squared.copy(),
+            label_names=tuple(source.label_names),
+            label_ids=source.label_ids.copy(),
+            site_energy=source.site_energy.copy(),
+            cell_lengths=np.array(source.cell_lengths, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        numbers: npt.NDArray[np.int64],
+        coordinates: npt.NDArray[np.float64],
+        neighbour_offsets: npt.NDArray[np.int64],
+        neighbour_indices: npt.NDArray[np.int64],
+        label_names: tuple[str, ...],
+        label_ids: npt.NDArray[np.int32],
+        site_energy: npt.NDArray[np.float64],
+        cell_lengths: npt.NDArray[np.float64],
+    ) -> LatticeTopology:
+        """
+        Create a LatticeTopology from site arrays, wrapping the coordinates into the central periodic image of the
+        simulation cell and calculating the bond vectors, as `Lattice` does.
+
+        Args:
+            numbers (np.array): The number of each site.
+            coordinates (np.array): The coordinates of each site.
+            neighbour_offsets (np.array): The CSR offsets of the neighbours of each site.
+            neighbour_indices (np.array): The index of each neighbour.
+            label_names (Tuple(Str)): The site labels, in sorted order.
+            label_ids (np.array): The index in `label_names` of the label of each site.
+            site_energy (np.array): The energy of each site.
+            cell_lengths (np.array(x,y,z)): The cell lengths.
+
+        Returns:
+            (LatticeTopology): The new topology.
+        """
+        cell_lengths = np.array(cell_lengths, dtype=np.float64)
+        wrapped = lattice.wrap_coordinates(np.asarray(coordinates, dtype=np.float64), cell_lengths)
+        bond_vectors, bond_lengths_squared = lattice.bond_vectors(
+            wrapped, neighbour_offsets, neighbour_indices, cell_lengths
+        )
+        return cls(
+            numbers=numbers,
+            coordinates=wrapped,
+            neighbour_offsets=neighbour_offsets,
+            neighbour_indices=neighbour_indices,
+            bond_vectors=bond_vectors,
+            bond_lengths_squared=bond_lengths_squared,
+            label_names=label_names,
+            label_ids=label_ids,
+            site_energy=site_energy,
+            cell_lengths=cell_lengths,
+        )
+
+    @property
+    def number_of_sites(self) -> int:
+        """
+        The number of sites in this topology.
+        """
+        return len(self.numbers)
+
+    def to_lattice(self, share_arrays: bool = False) -> lattice.Lattice:
+        """
+        Create a new, unoccupied Lattice with this topology.
+
+        Args:
+            share_arrays (:obj:Bool, optional): If True, the new lattice uses the arrays of this topology,
+                rather than its own copies, and copies the site energies only when they are first changed.
+                Defaults to False.
+
+        Returns:
+            (Lattice): The new lattice.
+        """
+        return lattice.Lattice.from_topology(self, share_arrays=share_arrays)
+
+    def save(self, directory: str) -> None:
+        """
+        Write this topology to a directory of NumPy `.npy` files, one per array, with a `metadata.json` file
+        holding the format version and label names. An existing topology in the directory is replaced,
+        but any other existing directory must be empty.
+        The files are written to a temporary directory that is then renamed, so an interrupted write never
+        leaves an incomplete topology behind.
+
+        Args:
+            directory (Str): The topology directory.
+
+        Returns:
+            None
+
+        Raises:
+            FileExistsError: If the directory already exists, is not empty, and does not hold a topology.
+        """
+        directory = os.path.abspath(directory)
+        replace = os.path.isdir(directory) and is_topology_directory(directory)
+        if os.path.lexists(directory) and not replace and (not os.path.isdir(directory) or os.listdir(directory)):
+            raise FileExistsError(f"{directory!r} already exists and does not hold a lattice topology.")
+        temporary = tempfile.mkdtemp(prefix=f"{os.path.basename(directory)}.", dir=os.path.dirname(directory))
+        try:
+            for name in ARRAY_FIELDS:
+                np.save(os.path.join(temporary, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+            metadata = {"format": FORMAT, "version": FORMAT_VERSION, "label_names": list(self.label_names)}
+            with open(os.path.join(temporary, "metadata.json"), "w") as f:
+                json.dump(metadata, f)
+            if replace:
+                shutil.rmtree(directory)
+            os.replace(temporary, directory)
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> LatticeTopology:
+        """
+        Read a topology written by `save()`.
+
+        Args:
+            directory (Str): The topology directory.
+            mmap (:obj:Bool, optional): If True, the arrays are read-only memory maps of the files, so large
+                topologies open immediately, and processes that load the same topology share its pages.
+                Defaults to True.
+
+        Returns:
+            (LatticeTopology): The topology.
+
+        Raises:
+            ValueError: If the directory holds a different format or version.
+        """
+        with open(os.path.join(directory, "metadata.json")) as f:
+            metadata = json.load(f)
+        if metadata.get("format") != FORMAT or metadata.get("version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported lattice topology format {metadata.get('format')!r} version {metadata.get('version')!r}. "
+                f"Expected {FORMAT!r} version {FORMAT_VERSION}."
+            )
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in ARRAY_FIELDS
+        }
+        return cls(label_names=tuple(metadata["label_names"]), **arrays)
+
+
+class SharedLatticeTopology:
+    """
+    SharedLatticeTopology class
+
+    Holds the arrays of a LatticeTopology in a single `multiprocessing.shared_memory` block, so that
+    worker processes can attach to them without copying. Pickling a SharedLatticeTopology sends only the
+    name and layout of the block, and unpickling it attaches to the existing block.
+
+    `topology` is a LatticeTopology whose arrays are read-only views of the shared block. `to_lattice()`
+    builds a Lattice that uses these views for its topology arrays, so each process only holds its own
+    occupation and atom arrays, and its own site energies once these are changed.
+    Sites of such a lattice cannot be moved or relabelled.
+
+    The process that creates the block owns it, and should call `unlink()` once every process has finished
+    with it. Used as a context manager, a SharedLatticeTopology is closed, and unlinked by its owner, on exit.
+    """
+
+    fields = ARRAY_FIELDS
+    alignment = 64
+
+    def __init__(self, lattice_topology: LatticeTopology) -> None:
+        """
+        Copy the arrays of a lattice topology into a new shared memory block.
+
+        Args:
+            lattice_topology (LatticeTopology): The topology to share.
+
+        Returns:
+            None
+        """
+        arrays = {name: np.ascontiguousarray(getattr(lattice_topology, name)) for name in self.fields}
+        layout = []
+        size = 0
+        for name, array in arrays.items():
+            offset = -(-size // self.alignment) * self.alignment
+            layout.append((name, array.dtype.str, array.shape, offset))
+            size = offset + array.nbytes
+        self.layout: tuple[tuple[str, str, tuple[int, ...], int], ...] = tuple(layout)
+        self.label_names: tuple[str, ...] = lattice_topology.label_names
+        self.shared_memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.owner = True
+        views = self.views()
+        for name, array in arrays.items():
+            views[name][...] = array
+        self.topology: LatticeTopology | None = self.read_only_topology(views)
+
+    def views(self) -> dict[str, npt.NDArray[Any]]:
+        """
+        Writeable NumPy views of each array in the shared memory block.
+
+        Args:
+            None
+
+        Returns:
+            (Dict(Str:np.array)): The array views, keyed by LatticeTopology field name.
+        """
+        buffer = self.shared_memory.buf
+        assert buffer is not None
+        # np.frombuffer keeps the buffer exported, so the block cannot be closed while a view is still in use.
+        return {
+            name: np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+            for name, dtype, shape, offset in self.layout
+        }
+
+    def read_only_topology(self, views: dict[str, npt.NDArray[Any]]) -> LatticeTopology:
+        """
+        Create a LatticeTopology from views of the shared memory block, marking them read-only.
+
+        Args:
+            views (Dict(Str:np.array)): The array views, as returned by `views()`.
+
+        Returns:
+            (LatticeTopology): The shared topology.
+        """
+        for view in views.values():
+            view.flags.writeable = False
+        return LatticeTopology(label_names=self.label_names, **views)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"name": self.shared_memory.name, "layout": self.layout, "label_names": self.label_names}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.layout = state["layout"]
+        self.label_names = state["label_names"]
+        self.shared_memory = shared_memory.SharedMemory(name=state["name"])
+        self.owner = False
+        self.topology = self.read_only_topology(self.views())
+
+    def __enter__(self) -> SharedLatticeTopology:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc_value: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def to_lattice(self) -> lattice.Lattice:
+        """
+        Create a new, unoccupied Lattice that uses the shared arrays, without copying them.
+
+        Args:
+            None
+
+        Returns:
+            (Lattice): The new lattice.
+
+        Raises:
+            RuntimeError: If this SharedLatticeTopology has been closed.
+        """
+        if self.topology is None:
+            raise RuntimeError("This SharedLatticeTopology has been closed.")
+        return self.topology.to_lattice(share_arrays=True)
+
+    def close(self) -> None:
+        """
+        Detach this process from the shared memory block.
+        Any lattices built by `to_lattice()` must have been discarded first.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            BufferError: If views of the shared arrays are still in use.
+        """
+        self.topology = None
+        self.shared_memory.close()
+
+    def unlink(self) -> None:
+        """
+        Free the shared memory block once every process has closed it. Only the owning process should call this.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.shared_memory.unlink()
@@ -0,0 +1,527 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Iterator
+from types import TracebackType
+from typing import TYPE_CHECKING, BinaryIO
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from lattice_mc.lattice import Lattice
+    from lattice_mc.species import Species
+
+"""
+Streaming, compressed on-disk logs of jump events.
+
+A trajectory file starts with `MAGIC`, followed by a sequence of blocks. Each block has a `BLOCK_HEADER`
+giving its kind, the index of the first event it covers, its number of records, the simulation time at its start,
+and the size of its zlib-compressed payload. Event blocks (`EVENTS`) hold columns of atom indices, initial sites,
+final sites (as int32), and timesteps (as float64). Keyframe blocks (`KEYFRAME`) hold the site index of every atom
+(as int64) before the event with the given index.
+
+`TrajectoryReader` memory-maps a trajectory file for random access: events can be read lazily from any index
+or time, and the occupations at any point are reconstructed by replaying events from the nearest keyframe.
+"""
+
+MAGIC = b"LMCTRJ01"
+BLOCK_HEADER = struct.Struct("<1s7xqqdq")
+EVENTS = b"E"
+KEYFRAME = b"K"
+EVENT_DTYPE = np.dtype(
+    [("atom", np.int32), ("initial_site", np.int32), ("final_site", np.int32), ("dt", np.float64), ("time", np.float64)]
+)
+BLOCK_INDEX_DTYPE = np.dtype(
+    [("index", np.int64), ("count", np.int64), ("time", np.float64), ("offset", np.int64), ("nbytes", np.int64)]
+)
+
+
+def apply_jumps(
+    atom_site: npt.NDArray[np.int64], atoms: npt.NDArray[np.integer], final_sites: npt.NDArray[np.integer]
+) -> None:
+    """
+    Update a set of atom sites in place by applying a sequence of jumps.
+
+    Args:
+        atom_site (np.array): The site index for each atom.
+        atoms (np.array): The index of the atom that made each jump.
+        final_sites (np.array): The index of the site each jump finished at.
+
+    Returns:
+        None
+    """
+    # only the last jump made by each atom determines where it finishes
+    jumped, last = np.unique(atoms[::-1], return_index=True)
+    atom_site[jumped] = final_sites[::-1][last]
+
+
+class TrajectoryWriter:
+    """
+    TrajectoryWriter class
+
+    Appends jump events, as (atom, initial site, final site, timestep) records, to a trajectory file.
+    Events are collected in a fixed-size buffer, which is compressed and written as one block whenever it fills,
+    so memory use does not grow with the length of a run. Atoms are identified by their index in the
+    simulation Species, and sites by their index in the lattice arrays.
+
+    Once a keyframe has been written, the writer follows the atom sites from the recorded events,
+    and writes a further keyframe after every `keyframe_interval` events, so a reader never has to replay
+    more than this many events to reconstruct the occupations at any point.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        buffer_size: int = 65536,
+        compression_level: int = 1,
+        keyframe_interval: int = 1048576,
+        resume_at: tuple[int, int] | None = None,
+    ) -> None:
+        """
+        Initialise a TrajectoryWriter, creating (or replacing) the trajectory file,
+        or continuing an existing trajectory file from a point given by `position()`.
+
+        Args:
+            filename (Str): The trajectory filename.
+            buffer_size (:obj:Int, optional): The number of events in each block. Defaults to 65536.
+            compression_level (:obj:Int, optional): The zlib compression level, from 0 (none) to 9 (smallest).
+                Defaults to 1 (fastest).
+            keyframe_interval (:obj:Int, optional): The minimum number of events between keyframes.
+                Keyframes are written at block boundaries. Defaults to 1048576.
+            resume_at (:obj:Tuple(Int,Int), optional): The byte offset and number of events returned by `position()`
+                for an existing trajectory file, e.g. as saved in a checkpoint. Anything written to the file after
+                this point is discarded, and new events follow on from it. A keyframe should be written before
+                any new events. Defaults to None, which creates a new file.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If `resume_at` is set, and the file is not a trajectory file or is shorter than the offset.
+        """
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size must be positive; got {buffer_size!r}.")
+        self.buffer_size: int = buffer_size
+        self.compression_level: int = compression_level
+        self.keyframe_interval: int = keyframe_interval
+        self.atom_site: npt.NDArray[np.int64] | None = None
+        self.last_keyframe: int = 0
+        self.atoms: npt.NDArray[np.int32] = np.empty(buffer_size, dtype=np.int32)
+        self.initial_sites: npt.NDArray[np.int32] = np.empty(buffer_size, dtype=np.int32)
+        self.final_sites: npt.NDArray[np.int32] = np.empty(buffer_size, dtype=np.int32)
+        self.dt: npt.NDArray[np.float64] = np.empty(buffer_size, dtype=np.float64)
+        self.buffered: int = 0
+        self.number_of_events: int = 0
+        self.time: float = 0.0
+        self.block_time: float = 0.0
+        self.file: BinaryIO
+        if resume_at is None:
+            self.file = open(filename, "wb")
+            self.file.write(MAGIC)
+            return
+        offset, self.number_of_events = resume_at
+        self.last_keyframe = self.number_of_events
+        self.file = open(filename, "r+b")
+        if self.file.read(len(MAGIC)) != MAGIC or os.fstat(self.file.fileno()).st_size < offset:
+            self.file.close()
+            raise ValueError(f"{filename!r} is not a trajectory file that can be continued from byte {offset}.")
+        self.file.truncate(offset)
+        self.file.seek(offset)
+
+    def __enter__(self) -> TrajectoryWriter:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc_value: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+    def record(self, atom: int, initial_site: int, final_site: int, dt: float) -> None:
+        """
+        Add a single jump event to the trajectory.
+
+        Args:
+            atom (Int): The index of the atom that jumped.
+            initial_site (Int): The index of the site the jump started from.
+            final_site (Int): The index of the site the jump finished at.
+            dt (Float): The timestep before this jump.
+
+        Returns:
+            None
+        """
+        n = self.buffered
+        self.atoms[n] = atom
+        self.initial_sites[n] = initial_site
+        self.final_sites[n] = final_site
+        self.dt[n] = dt
+        self.time += dt
+        self.buffered = n + 1
+        if self.buffered == self.buffer_size:
+            self.flush()
+
+    def record_many(
+        self,
+        atoms: npt.NDArray[np.integer],
+        initial_sites: npt.NDArray[np.integer],
+        final_sites: npt.NDArray[np.integer],
+        dt: npt.NDArray[np.float64],
+    ) -> None:
+        """
+        Add a sequence of jump events to the trajectory, e.g. from a compiled kernel.
+
+        Args:
+            atoms (np.array): The index of the atom that made each jump.
+            initial_sites (np.array): The index of the site each jump started from.
+            final_sites (np.array): The index of the site each jump finished at.
+            dt (np.array): The timestep before each jump.
+
+        Returns:
+            None
+        """
+        start = 0
+        while start < len(dt):
+            n = min(len(dt) - start, self.buffer_size - self.buffered)
+            end = self.buffered + n
+            self.atoms[self.buffered : end] = atoms[start : start + n]
+            self.initial_sites[self.buffered : end] = initial_sites[start : start + n]
+            self.final_sites[self.buffered : end] = final_sites[start : start + n]
+            self.dt[self.buffered : end] = dt[start : start + n]
+            # cumsum adds one timestep at a time, so the time matches the sum kept by the simulation
+            self.time = float(np.cumsum(np.concatenate([[self.time], dt[start : start + n]]))[-1])
+            self.buffered = end
+            start += n
+            if self.buffered == self.buffer_size:
+                self.flush()
+
+    def write_keyframe(self, atom_site: npt.NDArray[np.integer], time: float) -> None:
+        """
+        Write the site of every atom at the current point in the trajectory, e.g. at the start of a run,
+        so the occupations at any later event can be reconstructed by replaying the events that follow.
+        Any buffered events are written first.
+
+        Args:
+            atom_site (np.array): The site index for each atom.
+            time (Float): The simulation time. Subsequent event times are accumulated from this.
+
+        Returns:
+            None
+        """
+        self.flush()
+        self.atom_site = np.array(atom_site, dtype=np.int64)
+        self.last_keyframe = self.number_of_events
+        self.time = time
+        self.block_time = time
+        self.write_block(KEYFRAME, len(self.atom_site), self.atom_site.tobytes())
+
+    def flush(self) -> None:
+        """
+        Compress and write any buffered events as one block.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        n = self.buffered
+        if n == 0:
+            return
+        payload = b"".join(
+            [
+                self.atoms[:n].tobytes(),
+                self.initial_sites[:n].tobytes(),
+                self.final_sites[:n].tobytes(),
+                self.dt[:n].tobytes(),
+            ]
+        )
+        self.write_block(EVENTS, n, payload)
+        self.number_of_events += n
+        self.buffered = 0
+        self.block_time = self.time
+        if self.atom_site is not None:
+            apply_jumps(self.atom_site, self.atoms[:n], self.final_sites[:n])
+            if self.number_of_events - self.last_keyframe >= self.keyframe_interval:
+                self.write_keyframe(self.atom_site, self.time)
+
+    def position(self) -> tuple[int, int]:
+        """
+        Write any buffered events to disk, and return the current point in the trajectory file,
+        from which a new writer can continue the trajectory using `resume_at`.
+
+        Args:
+            None
+
+        Returns:
+            (Int, Int): The byte offset of the end of the file, and the number of events written.
+        """
+        self.flush()
+        self.file.flush()
+        return self.file.tell(), self.number_of_events
+
+    def write_block(self, kind: bytes, count: int, payload: bytes) -> None:
+        """
+        Compress and write one block, with its header.
+
+        Args:
+            kind (Bytes): The block kind, `EVENTS` or `KEYFRAME`.
+            count (Int): The number of records in the block.
+            payload (Bytes): The uncompressed block contents.
+
+        Returns:
+            None
+        """
+        data = zlib.compress(payload, self.compression_level)
+        self.file.write(BLOCK_HEADER.pack(kind, self.number_of_events, count, self.block_time, len(data)))
+        self.file.write(data)
+
+    def close(self) -> None:
+        """
+        Write any buffered events and close the trajectory file.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class TrajectoryReader:
+    """
+    TrajectoryReader class
+
+    Reads a trajectory file written by TrajectoryWriter. The file is memory-mapped and indexed by reading only the
+    block headers, so opening a trajectory takes the same time however many events it holds, and each block is
+    only decompressed when its events are needed. A block left incomplete by an interrupted run is ignored.
+    """
+
+    def __init__(self, filename: str) -> None:
+        """
+        Initialise a TrajectoryReader, and index the blocks in the trajectory file.
+
+        Args:
+            filename (Str): The trajectory filename.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the file is not a trajectory file.
+        """
+        self.file = open(filename, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{filename!r} is not a trajectory file.")
+        blocks: dict[bytes, list[tuple[int, int, float, int, int]]] = {EVENTS: [], KEYFRAME: []}
+        position = len(MAGIC)
+        while position + BLOCK_HEADER.size <= len(self.data):
+            kind, index, count, time, nbytes = BLOCK_HEADER.unpack_from(self.data, position)
+            position += BLOCK_HEADER.size
+            if position + nbytes > len(self.data):
+                break
+            blocks[kind].append((index, count, time, position, nbytes))
+            position += nbytes
+        self.blocks: npt.NDArray[np.void] = np.array(blocks[EVENTS], dtype=BLOCK_INDEX_DTYPE)
+        self.keyframes: npt.NDArray[np.void] = np.array(blocks[KEYFRAME], dtype=BLOCK_INDEX_DTYPE)
+        self.number_of_events: int = int(self.blocks["index"][-1] + self.blocks["count"][-1]) if len(self.blocks) else 0
+        self.cached_block: tuple[int, npt.NDArray[np.void] | None] = (-1, None)
+
+    def __enter__(self) -> TrajectoryReader:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc_value: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.number_of_events
+
+    def __iter__(self) -> Iterator[tuple[int, int, int, float, float]]:
+        """
+        Iterate over every event, as (atom, initial site, final site, timestep, time) tuples.
+        """
+        for events in self.events():
+            yield from events.tolist()
+
+    def payload(self, block: npt.NDArray[np.void]) -> bytes:
+        """
+        Decompress the contents of one block.
+
+        Args:
+            block (np.void): The entry for this block in `self.blocks` or `self.keyframes`.
+
+        Returns:
+            (Bytes): The uncompressed block contents.
+        """
+        offset = int(block["offset"])
+        return zlib.decompress(self.data[offset : offset + int(block["nbytes"])])
+
+    def block(self, b: int) -> npt.NDArray[np.void]:
+        """
+        The events in one event block. The most recently read block is cached.
+
+        Args:
+            b (Int): The position of the block in `self.blocks`.
+
+        Returns:
+            (np.array): The events, as an array with dtype `EVENT_DTYPE`.
+                The `time` field is the simulation time after each event.
+        """
+        if self.cached_block[0] == b:
+            assert self.cached_block[1] is not None
+            return self.cached_block[1]
+        count = int(self.blocks["count"][b])
+        payload = self.payload(self.blocks[b])
+        events = np.empty(count, dtype=EVENT_DTYPE)
+        events["atom"] = np.frombuffer(payload, dtype=np.int32, count=count, offset=0)
+        events["initial_site"] = np.frombuffer(payload, dtype=np.int32, count=count, offset=4 * count)
+        events["final_site"] = np.frombuffer(payload, dtype=np.int32, count=count, offset=8 * count)
+        events["dt"] = np.frombuffer(payload, dtype=np.float64, count=count, offset=12 * count)
+        # cumsum adds one timestep at a time, so the times match those seen by the simulation
+        events["time"] = np.cumsum(np.concatenate([[self.blocks["time"][b]], events["dt"]]))[1:]
+        self.cached_block = (b, events)
+        return events
+
+    def check_index(self, index: int) -> None:
+        """
+        Check that an event index lies within this trajectory.
+
+        Args:
+            index (Int): The number of events from the start of the trajectory.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the index is negative or greater than the number of events.
+        """
+        if not 0 <= index <= self.number_of_events:
+            raise ValueError(f"index must be between 0 and {self.number_of_events}; got {index!r}.")
+
+    def events(self, start: int = 0, stop: int | None = None) -> Iterator[npt.NDArray[np.void]]:
+        """
+        Lazily read a range of events, one block at a time.
+
+        Args:
+            start (:obj:Int, optional): The index of the first event. Defaults to 0.
+            stop (:obj:Int, optional): The index after the last event. Defaults to the end of the trajectory.
+
+        Returns:
+            (Iterator(np.array)): Arrays of consecutive events, with dtype `EVENT_DTYPE`.
+        """
+        if stop is None:
+            stop = self.number_of_events
+        self.check_index(start)
+        self.check_index(stop)
+        b = int(np.searchsorted(self.blocks["index"], start, side="right")) - 1
+        while start < stop:
+            first = int(self.blocks["index"][b])
+            events = self.block(b)
+            yield events[start - first : stop - first]
+            start = first + len(events)
+            b += 1
+
+    def index_at_time(self, time: float) -> int:
+        """
+        Find the number of events that occurred at or before a given simulation time.
+
+        Args:
+            time (Float): The simulation time.
+
+        Returns:
+            (Int): The index of the first event after this time.
+        """
+        b = int(np.searchsorted(self.blocks["time"], time, side="right")) - 1
+        if b < 0:
+            return 0
+        return int(self.blocks["index"][b]) + int(np.searchsorted(self.block(b)["time"], time, side="right"))
+
+    def time_at(self, index: int) -> float:
+        """
+        The simulation time after a given number of events.
+
+        Args:
+            index (Int): The number of events from the start of the trajectory.
+
+        Returns:
+            (Float): The simulation time.
+        """
+        self.check_index(index)
+        if not len(self.blocks):
+            return float(self.keyframes["time"][-1]) if len(self.keyframes) else 0.0
+        b = int(np.searchsorted(self.blocks["index"], index, side="right")) - 1
+        if index == int(self.blocks["index"][b]):
+            return float(self.blocks["time"][b])
+        return float(self.block(b)["time"][index - int(self.blocks["index"][b]) - 1])
+
+    def atom_sites(self, index: int) -> npt.NDArray[np.int64]:
+        """
+        Reconstruct the site of every atom after a given number of events,
+        by replaying events from the last keyframe at or before this point.
+
+        Args:
+            index (Int): The number of events from the start of the trajectory.
+
+        Returns:
+            (np.array): The site index for each atom.
+
+        Raises:
+            ValueError: If there is no keyframe at or before this event.
+        """
+        self.check_index(index)
+        k = int(np.searchsorted(self.keyframes["index"], index, side="right")) - 1
+        if k < 0:
+            raise ValueError(f"No keyframe at or before event {index}.")
+        keyframe = self.keyframes[k]
+        atom_site = np.frombuffer(self.payload(keyframe), dtype=np.int64).copy()
+        for events in self.events(int(keyframe["index"]), index):
+            apply_jumps(atom_site, events["atom"], events["final_site"])
+        return atom_site
+
+    def restore(self, lattice: Lattice, atoms: Species, index: int) -> None:
+        """
+        Set a lattice to its state after a given number of events: the atoms are placed on their reconstructed sites,
+        and the lattice time is set to the simulation time at this point. Occupation times, and atom displacements
+        and hop counts, are not reconstructed: occupation times are reset, so they accumulate from this point.
+
+        Args:
+            lattice (Lattice): The lattice the trajectory was recorded from.
+            atoms (Species): The atoms the trajectory was recorded from.
+            index (Int): The number of events from the start of the trajectory.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the number of atoms does not match the trajectory.
+        """
+        atom_site = self.atom_sites(index)
+        if len(atom_site) != len(atoms.atoms):
+            raise ValueError(f"Trajectory has {len(atom_site)} atoms; got {len(atoms.atoms)} atoms.")
+        lattice.place_atoms(atoms.atoms, atom_site)
+        lattice.time = self.time_at(index)
+        lattice.time_occupied[:] = 0.0
+        lattice.occupied_since[:] = lattice.time
+
+    def close(self) -> None:
+        """
+        Close the trajectory file.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.cached_block = (-1, None)
+        self.data.close()
+        self.file.close()
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import math
-import random
 from typing import TYPE_CHECKING
 
 import numpy as np
 import numpy.typing as npt
 
+from lattice_mc import random_stream
+
 if TYPE_CHECKING:
     from lattice_mc.jump import Jump
     from lattice_mc.simulation import SimulationParameters
@@ -19,19 +20,23 @@ class Transitions:
     Contains methods that operate on sets of Jumps.
     """
 
-    def __init__(self, jumps: list[Jump], *, params: SimulationParameters) -> None:
+    def __init__(
+        self, jumps: list[Jump], *, params: SimulationParameters, rng: random_stream.RandomStream | None = None
+    ) -> None:
         """
         Initialise a Transitions object.
 
         Args:
             jumps (List(Jump)): List of jumps to be contained in this Transitions object.
             params (SimulationParameters): Simulation parameters (temperature, rate prefactor).
+            rng (:obj:RandomStream, optional): Source of random numbers. Defaults to None, in which case a new, unseeded stream is used.
 
         Returns:
             None
         """
         self.jumps: list[Jump] = jumps
         self.params: SimulationParameters = params
+        self.rng: random_stream.RandomStream = rng if rng is not None else random_stream.RandomStream()
         self.p: npt.NDArray[np.float64] = np.array([jump.relative_probability for jump in self.jumps])
 
     def cumulative_probabilities(self) -> npt.NDArray[np.float64]:
@@ -57,7 +62,7 @@ class Transitions:
         Returns:
             (Jump): The randomly selected Jump.
         """
-        j = np.searchsorted(self.cumulative_probabilities(), random.random())
+        j = np.searchsorted(self.cumulative_probabilities(), self.rng.random())
         return self.jumps[j]
 
     def time_to_jump(self) -> float:
@@ -71,4 +76,4 @@ class Transitions:
             (Float): The timestep until the next jump.
         """
         k_tot = self.params.rate_prefactor * np.sum(self.p)
-        return -(1.0 / k_tot) * math.log(random.random())
+        return -(1.0 / k_tot) * math.log(self.rng.random())
@@ -23,6 +23,8 @@ class AtomTestCase(unittest.TestCase):
         self.assertEqual(self.mock_site.is_occupied, True)
         self.assertEqual(self.mock_site.occupation, atom.number)
         self.assertIs(self.mock_site.atom, atom)
+        self.assertIsNone(atom.species)
+        self.assertEqual(atom.species_index, -1)
         assert mock_reset.called
 
     @patch("lattice_mc.atom.Atom.reset")
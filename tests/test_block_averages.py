@@ -0,0 +1,121 @@
+import math
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+import lattice_mc
+from lattice_mc import init_lattice
+from lattice_mc.block_averages import QUANTITIES, BlockAverages, Estimate
+from lattice_mc.species import Species
+
+
+class EstimateTestCase(unittest.TestCase):
+    """Tests for Estimate class"""
+
+    def test_relative_error(self):
+        self.assertEqual(Estimate(mean=-4.0, standard_error=0.5, number_of_blocks=3).relative_error, 0.125)
+        self.assertEqual(Estimate(mean=0.0, standard_error=0.5, number_of_blocks=3).relative_error, math.inf)
+
+
+class BlockAveragesTestCase(unittest.TestCase):
+    """Tests for BlockAverages class"""
+
+    def setUp(self):
+        self.species = Mock(spec=Species)
+        self.species.atom_dr = np.zeros((2, 3))
+        self.species.summed_dr2 = Mock(return_value=0.0)
+        self.averages = BlockAverages(self.species, 1.0)
+
+    def test_end_block(self):
+        self.species.atom_dr = np.array([[1.0, 0.0, 0.0], [0.0, 2.0, 0.0]])
+        self.species.summed_dr2.return_value = 10.0
+        self.averages.end_block(3.0)
+        self.species.atom_dr = np.array([[2.0, 0.0, 0.0], [0.0, 2.0, 0.0]])
+        self.species.summed_dr2.return_value = 12.0
+        self.averages.end_block(4.0)
+        self.assertEqual(self.averages.number_of_blocks, 2)
+        self.assertEqual(self.averages.values["tracer_diffusion_coefficient"], [5.0 / 24.0, 1.0 / 12.0])
+        self.assertEqual(self.averages.values["collective_diffusion_coefficient"], [5.0 / 12.0, 1.0 / 6.0])
+        self.assertEqual(self.averages.values["tracer_correlation"], [0.5, 0.5])
+        self.assertEqual(self.averages.values["collective_correlation"], [0.5, 0.5])
+
+    def test_estimate(self):
+        self.averages.values["tracer_correlation"] = [0.4, 0.6, 0.5, 0.7]
+        estimate = self.averages.estimate("tracer_correlation")
+        self.assertAlmostEqual(estimate.mean, 0.55)
+        self.assertAlmostEqual(estimate.standard_error, np.std([0.4, 0.6, 0.5, 0.7], ddof=1) / 2.0)
+        self.assertEqual(estimate.number_of_blocks, 4)
+        self.assertEqual(set(self.averages.estimates), set(QUANTITIES))
+
+    def test_estimate_with_too_few_blocks(self):
+        estimate = self.averages.estimate("tracer_correlation")
+        self.assertTrue(math.isnan(estimate.mean))
+        self.assertEqual(estimate.standard_error, math.inf)
+        self.averages.values["tracer_correlation"] = [0.4]
+        self.assertEqual(self.averages.estimate("tracer_correlation").standard_error, math.inf)
+
+    def test_estimate_raises_ValueError_for_invalid_quantity(self):
+        with self.assertRaises(ValueError):
+            self.averages.estimate("foo")
+
+    def test_converged(self):
+        self.averages.values["tracer_correlation"] = [0.9, 1.1]
+        self.averages.values["collective_correlation"] = [1.0, 1.0]
+        self.assertTrue(self.averages.converged({"collective_correlation": 0.01}))
+        self.assertTrue(self.averages.converged({"tracer_correlation": 0.1}))
+        self.assertFalse(self.averages.converged({"tracer_correlation": 0.01, "collective_correlation": 0.01}))
+
+
+class RunUntilConvergedTestCase(unittest.TestCase):
+    """Check run_until_converged() on a small lattice"""
+
+    def simulation(self):
+        params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=9)
+        s = lattice_mc.Simulation(params)
+        s.lattice = init_lattice.cubic_lattice(5, 5, 5, 1.0)
+        s.set_number_of_atoms(30)
+        s.set_number_of_equilibration_jumps(100)
+        return s
+
+    def test_run_until_converged(self):
+        for engine in ["python", "kernel"]:
+            s = self.simulation()
+            averages = s.run_until_converged({"tracer_correlation": 0.05}, block_jumps=200, min_blocks=4, engine=engine)
+            self.assertIs(s.block_averages, averages)
+            self.assertTrue(averages.converged({"tracer_correlation": 0.05}))
+            self.assertGreaterEqual(averages.number_of_blocks, 4)
+            self.assertEqual(s.number_of_jumps, 200 * averages.number_of_blocks)
+            self.assertTrue(s.has_run)
+            self.assertEqual(s.atoms.atom_number_of_hops.sum(), s.number_of_jumps)
+            self.assertLess(abs(s.tracer_correlation - averages.estimate("tracer_correlation").mean), 0.1)
+            self.assertEqual(
+                s.standard_errors["tracer_correlation"], averages.estimate("tracer_correlation").standard_error
+            )
+            s.set_number_of_jumps(10)
+            s.run()
+            self.assertIsNone(s.standard_errors)
+
+    def test_run_until_converged_stops_at_jump_budget(self):
+        s = self.simulation()
+        averages = s.run_until_converged({"collective_correlation": 1e-6}, block_jumps=100, max_jumps=550)
+        self.assertEqual(averages.number_of_blocks, 5)
+        self.assertEqual(s.number_of_jumps, 500)
+
+    def test_run_until_converged_stops_at_wall_time(self):
+        s = self.simulation()
+        averages = s.run_until_converged({"collective_correlation": 1e-6}, block_jumps=50, max_wall_time=0.0)
+        self.assertEqual(averages.number_of_blocks, 1)
+
+    def test_run_until_converged_raises_ValueError_for_invalid_arguments(self):
+        s = self.simulation()
+        with self.assertRaises(ValueError):
+            s.run_until_converged({"foo": 0.1})
+        with self.assertRaises(ValueError):
+            s.run_until_converged({"tracer_correlation": 0.1}, engine="foo")
+        with self.assertRaises(ValueError):
+            s.run_until_converged({"tracer_correlation": 0.1}, block_jumps=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import lattice_mc
+from lattice_mc import init_lattice
+from lattice_mc.checkpoint import Checkpoint, restore_key
+
+
+def simulation(event_selection="rate-tree", lookup_table=False, n_atoms=30, shape=(4, 4, 4)):
+    params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=3)
+    s = lattice_mc.Simulation(params)
+    s.lattice = init_lattice.cubic_lattice(*shape, 1.0)
+    s.lattice.transmute_sites("L", "X", 16)
+    s.set_nn_energy(0.05)
+    s.set_site_energies({"L": 0.0, "X": 0.1})
+    if lookup_table:
+        s.setup_lookup_table()
+    s.set_event_selection(event_selection)
+    s.set_number_of_atoms(n_atoms)
+    s.set_number_of_equilibration_jumps(50)
+    return s
+
+
+class CheckpointTestCase(unittest.TestCase):
+    """Tests for Checkpoint class"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "checkpoint.npz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_same_state(self, s1, s2):
+        self.assertEqual(s1.lattice.time, s2.lattice.time)
+        np.testing.assert_array_equal(s1.lattice.occupied, s2.lattice.occupied)
+        np.testing.assert_array_equal(s1.atoms.atom_dr, s2.atoms.atom_dr)
+        np.testing.assert_array_equal(s1.atoms.atom_summed_dr2, s2.atoms.atom_summed_dr2)
+        np.testing.assert_array_equal(s1.atoms.atom_number_of_hops, s2.atoms.atom_number_of_hops)
+        np.testing.assert_array_equal(s1.lattice.time_occupied, s2.lattice.time_occupied)
+        self.assertEqual(s1.rng.random(), s2.rng.random())
+
+    def test_save_and_load(self):
+        s = simulation(event_selection="rate-class", lookup_table=True)
+        s.set_number_of_jumps(100)
+        s.run()
+        checkpoint = Checkpoint.from_simulation(s)
+        checkpoint.save(self.filename)
+        self.assertEqual(os.listdir(self.directory.name), ["checkpoint.npz"])
+        loaded = Checkpoint.load(self.filename)
+        for name in [
+            "occupied",
+            "atom_site",
+            "atom_dr",
+            "atom_summed_dr2",
+            "atom_number_of_hops",
+            "time_occupied",
+            "occupied_since",
+            "event_slots",
+            "free_slots",
+        ]:
+            np.testing.assert_array_equal(getattr(loaded, name), getattr(checkpoint, name))
+        self.assertEqual(loaded.time, s.lattice.time)
+        self.assertEqual(loaded.rng_state["bit_generator"], checkpoint.rng_state["bit_generator"])
+        np.testing.assert_array_equal(loaded.rng_state["block"], checkpoint.rng_state["block"])
+        self.assertEqual(loaded.rng_state["position"], checkpoint.rng_state["position"])
+        self.assertEqual((loaded.equilibration_jumps_completed, loaded.jumps_completed), (50, 100))
+        self.assertEqual(loaded.selection_classes, checkpoint.selection_classes)
+
+    def test_save_and_load_without_event_catalogue(self):
+        s = simulation()
+        s.lattice.params = s.params
+        checkpoint = Checkpoint.from_simulation(s)
+        checkpoint.save(self.filename)
+        loaded = Checkpoint.load(self.filename)
+        self.assertIsNone(loaded.event_slots)
+        self.assertIsNone(loaded.selection_classes)
+        other = simulation(n_atoms=30)
+        loaded.restore(other)
+        self.assertIsNone(other.lattice.event_catalogue)
+        np.testing.assert_array_equal(other.lattice.occupied, s.lattice.occupied)
+
+    def test_restore_sets_atom_sites(self):
+        s = simulation()
+        s.set_number_of_jumps(100)
+        s.run()
+        checkpoint = Checkpoint.from_simulation(s)
+        other = simulation()
+        checkpoint.restore(other)
+        self.assertTrue(other.resuming)
+        self.assertEqual([atom.site.number for atom in other.atoms.atoms], [atom.site.number for atom in s.atoms.atoms])
+        for atom in other.atoms.atoms:
+            self.assertIs(other.lattice.site_atoms[atom.site.lattice_index], atom)
+            self.assertEqual(atom.site.occupation, atom.number)
+        self.assertEqual(other.lattice.occupation.astype(bool).sum(), 30)
+        np.testing.assert_array_equal(other.lattice.nn_occupied, s.lattice.nn_occupied)
+        np.testing.assert_array_equal(other.lattice.label_nn_occupied, s.lattice.label_nn_occupied)
+        other.lattice.event_catalogue.verify()
+
+    def test_restore_raises_ValueError_for_mismatched_simulation(self):
+        s = simulation()
+        s.lattice.params = s.params
+        checkpoint = Checkpoint.from_simulation(s)
+        with self.assertRaises(ValueError):
+            checkpoint.restore(simulation(n_atoms=20))
+
+    def test_resumed_run_is_identical(self):
+        for event_selection, lookup_table, engine in [
+            ("rate-tree", False, "python"),
+            ("rate-class", True, "python"),
+            ("rate-tree", False, "kernel"),
+        ]:
+            uninterrupted = simulation(event_selection, lookup_table)
+            uninterrupted.set_number_of_jumps(600)
+            uninterrupted.run(engine=engine)
+            interrupted = simulation(event_selection, lookup_table)
+            interrupted.set_number_of_jumps(250)
+            interrupted.run(engine=engine, checkpoint_file=self.filename, checkpoint_interval=40)
+            resumed = simulation(event_selection, lookup_table)
+            resumed.set_number_of_jumps(600)
+            resumed.load_checkpoint(self.filename)
+            resumed.run(engine=engine)
+            self.assertEqual(resumed.jumps_completed, 600)
+            self.assert_same_state(resumed, uninterrupted)
+            self.assertEqual(resumed.tracer_correlation, uninterrupted.tracer_correlation)
+
+    def test_resumed_run_with_repeated_neighbours_is_identical(self):
+        uninterrupted = simulation("rate-class", True, n_atoms=12, shape=(2, 4, 4))
+        uninterrupted.set_number_of_jumps(300)
+        uninterrupted.run()
+        interrupted = simulation("rate-class", True, n_atoms=12, shape=(2, 4, 4))
+        interrupted.set_number_of_jumps(120)
+        interrupted.run(checkpoint_file=self.filename, checkpoint_interval=40)
+        resumed = simulation("rate-class", True, n_atoms=12, shape=(2, 4, 4))
+        resumed.set_number_of_jumps(300)
+        resumed.load_checkpoint(self.filename)
+        resumed.run()
+        self.assert_same_state(resumed, uninterrupted)
+
+    def test_resumed_run_for_time_is_identical(self):
+        uninterrupted = simulation()
+        uninterrupted.run(for_time=2e-11)
+        interrupted = simulation()
+        interrupted.run(for_time=1e-11, checkpoint_file=self.filename, checkpoint_interval=30)
+        resumed = simulation()
+        resumed.load_checkpoint(self.filename)
+        resumed.run(for_time=2e-11)
+        self.assertEqual(resumed.number_of_jumps, uninterrupted.number_of_jumps)
+        self.assert_same_state(resumed, uninterrupted)
+
+    def test_resumed_run_continues_msd(self):
+        for engine in ["python", "kernel"]:
+            uninterrupted = simulation()
+            uninterrupted.set_number_of_jumps(600)
+            uninterrupted.run(engine=engine, msd_interval=2e-13)
+            interrupted = simulation()
+            interrupted.set_number_of_jumps(250)
+            interrupted.run(engine=engine, checkpoint_file=self.filename, checkpoint_interval=40, msd_interval=2e-13)
+            resumed = simulation()
+            resumed.set_number_of_jumps(600)
+            resumed.load_checkpoint(self.filename)
+            resumed.run(engine=engine, msd_interval=2e-13)
+            self.assertEqual(resumed.msd.number_of_samples, uninterrupted.msd.number_of_samples)
+            expected, curves = uninterrupted.msd.curves(), resumed.msd.curves()
+            np.testing.assert_array_equal(curves.lag_time, expected.lag_time)
+            np.testing.assert_allclose(curves.tracer, expected.tracer)
+            np.testing.assert_allclose(curves.collective, expected.collective)
+            np.testing.assert_array_equal(curves.number_of_origins, expected.number_of_origins)
+
+    def test_resume_raises_ValueError_for_msd_without_saved_state(self):
+        interrupted = simulation()
+        interrupted.set_number_of_jumps(100)
+        interrupted.run(checkpoint_file=self.filename, checkpoint_interval=40)
+        resumed = simulation()
+        resumed.set_number_of_jumps(200)
+        resumed.load_checkpoint(self.filename)
+        with self.assertRaises(ValueError):
+            resumed.run(msd_interval=2e-13)
+
+    def test_resume_during_equilibration(self):
+        uninterrupted = simulation()
+        uninterrupted.set_number_of_jumps(100)
+        uninterrupted.run()
+        interrupted = simulation()
+        interrupted.set_number_of_jumps(100)
+        save_checkpoint = interrupted.save_checkpoint
+
+        def save_checkpoint_and_stop(filename):
+            save_checkpoint(filename)
+            raise KeyboardInterrupt
+
+        interrupted.save_checkpoint = save_checkpoint_and_stop
+        with self.assertRaises(KeyboardInterrupt):
+            interrupted.run(checkpoint_file=self.filename, checkpoint_interval=30)
+        resumed = simulation()
+        resumed.set_number_of_jumps(100)
+        resumed.load_checkpoint(self.filename)
+        self.assertEqual((resumed.equilibration_jumps_completed, resumed.jumps_completed), (30, 0))
+        resumed.run()
+        self.assert_same_state(resumed, uninterrupted)
+
+
+class CheckpointFunctionsTestCase(unittest.TestCase):
+    """Tests for checkpoint module functions"""
+
+    def test_restore_key(self):
+        self.assertEqual(restore_key(["L", "X", 1, 2]), ("L", "X", 1, 2))
+        self.assertEqual(restore_key([["L", "X", 1, 2], 2]), (("L", "X", 1, 2), 2))
+        self.assertEqual(restore_key(0.5), 0.5)
+        self.assertIsNone(restore_key(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,7 @@ from unittest.mock import Mock
 
 import numpy as np
 
-from lattice_mc.cluster import Cluster
+from lattice_mc.cluster import Cluster, connected_components, image_shift
 from lattice_mc.lattice_site import Site
 
 
@@ -116,6 +116,53 @@ class ClusterTestCase(unittest.TestCase):
         cluster = Cluster(sites)
         self.assertEqual(cluster.is_periodically_contiguous()[0], False)
 
+    def chain(self, *r):
+        sites = [Mock(spec=Site) for _ in r]
+        for site, position in zip(sites, r):
+            site.r = np.array(position)
+        return sites
+
+    def test_cluster_windings(self):
+        sites = self.chain([0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0])
+        sites[0].p_neighbours = [sites[1], sites[2]]
+        sites[1].p_neighbours = [sites[0], sites[2]]
+        sites[2].p_neighbours = [sites[1], sites[0]]
+        cluster = Cluster(sites)
+        self.assertEqual(cluster.windings(np.array([3.0, 3.0, 3.0])), [(1, 0, 0)])
+        self.assertEqual(cluster.is_percolating([3.0, 3.0, 3.0]), (True, False, False))
+        self.assertEqual(cluster.windings(np.array([10.0, 10.0, 10.0])), [])
+        self.assertEqual(cluster.is_percolating([10.0, 10.0, 10.0]), (False, False, False))
+
+    def test_cluster_windings_along_a_diagonal(self):
+        sites = self.chain([0.0, 0.0, 0.0], [1.0, 1.0, 0.0], [2.0, 2.0, 0.0], [3.0, 3.0, 0.0])
+        for i, site in enumerate(sites):
+            site.p_neighbours = [sites[(i + 1) % 4], sites[i - 1]]
+        cluster = Cluster(sites)
+        self.assertEqual(cluster.windings([4.0, 4.0, 4.0]), [(1, 1, 0)])
+        self.assertEqual(cluster.is_percolating([4.0, 4.0, 4.0]), (True, True, False))
+        sites[1].r = np.array([1.0, 3.0, 0.0])
+        sites[2].r = np.array([2.0, 2.0, 0.0])
+        sites[3].r = np.array([3.0, 1.0, 0.0])
+        self.assertEqual(Cluster(sites).windings([4.0, 4.0, 4.0]), [(1, -1, 0)])
+
+    def test_cluster_windings_ignore_sites_outside_the_cluster(self):
+        sites = self.chain([0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [2.0, 0.0, 0.0])
+        sites[0].p_neighbours = [sites[1], sites[2]]
+        sites[1].p_neighbours = [sites[0], sites[2]]
+        self.assertEqual(Cluster(sites[:2]).windings([3.0, 3.0, 3.0]), [])
+
+    def test_cluster_windings_of_disconnected_sites(self):
+        sites = self.chain([0.0, 0.0, 0.0], [0.0, 0.0, 1.0])
+        sites[0].p_neighbours = [sites[0]]
+        sites[1].p_neighbours = []
+        self.assertEqual(Cluster(sites).windings([3.0, 3.0, 3.0]), [])
+
+    def test_image_shift(self):
+        self.assertEqual(image_shift(2.0, 3.0), -1)
+        self.assertEqual(image_shift(-2.0, 3.0), 1)
+        self.assertEqual(image_shift(1.0, 3.0), 0)
+        self.assertEqual(image_shift(1.5, 3.0), 0)
+
     def test_cluster_remove_sites_from_neighbours(self):
         sites = [Mock(spec=Site), Mock(spec=Site), Mock(spec=Site)]
         sites[0].p_neighbours = [sites[1], sites[2]]
@@ -128,5 +175,23 @@ class ClusterTestCase(unittest.TestCase):
         self.assertEqual(cluster.neighbours, set())
 
 
+class ConnectedComponentsTestCase(unittest.TestCase):
+    """Tests for connected_components function"""
+
+    def test_connected_components(self):
+        sites = [Mock(spec=Site) for _ in range(6)]
+        outside = Mock(spec=Site)
+        sites[0].p_neighbours = [sites[4]]
+        sites[1].p_neighbours = [outside]
+        sites[2].p_neighbours = [sites[3]]
+        sites[3].p_neighbours = [sites[2], sites[5]]
+        sites[4].p_neighbours = [sites[0], outside]
+        sites[5].p_neighbours = [sites[0]]
+        self.assertEqual(connected_components(sites), [[sites[0], sites[2], sites[3], sites[4], sites[5]], [sites[1]]])
+
+    def test_connected_components_of_no_sites(self):
+        self.assertEqual(connected_components([]), [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -26,6 +26,11 @@ class SimulationParametersTestCase(unittest.TestCase):
         with self.assertRaises(AttributeError):
             params.temperature = 500.0
 
+    def test_seed_defaults_to_None(self):
+        params = SimulationParameters(temperature=298.0, rate_prefactor=1e13)
+        self.assertIsNone(params.seed)
+        self.assertEqual(SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=7).seed, 7)
+
     def test_negative_temperature_raises_ValueError(self):
         with self.assertRaises(ValueError):
             SimulationParameters(temperature=-100.0, rate_prefactor=1e13)
@@ -0,0 +1,274 @@
+import math
+import unittest
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from lattice_mc import init_lattice
+from lattice_mc.event_catalogue import EventCatalogue
+from lattice_mc.lattice import Lattice
+from lattice_mc.lattice_site import Site
+from lattice_mc.lookup_table import LookupTable
+from lattice_mc.random_stream import RandomStream
+from lattice_mc.rate_classes import RateClassSelector
+from lattice_mc.rate_tree import RateTree
+from lattice_mc.simulation import SimulationParameters
+
+PARAMS = SimulationParameters(temperature=298.0, rate_prefactor=1e13)
+
+
+def cubic_lattice_with_atoms(n_atoms):
+    lattice = init_lattice.cubic_lattice(4, 4, 4, 1.0)
+    lattice.populate_sites(n_atoms)
+    lattice.params = PARAMS
+    return lattice
+
+
+def thin_cubic_lattice_with_atoms(n_atoms):
+    # a cell two sites wide lists each neighbour along x twice, once for each periodic image
+    lattice = init_lattice.cubic_lattice(2, 4, 4, 1.0)
+    lattice.populate_sites(n_atoms)
+    lattice.params = PARAMS
+    return lattice
+
+
+class EventCatalogueTestCase(unittest.TestCase):
+    """Tests for EventCatalogue class"""
+
+    def test_event_catalogue_is_initialised(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        self.assertIs(catalogue.lattice, lattice)
+        self.assertEqual(catalogue.shell_depth, 1)
+        expected = {(j.initial_site.lattice_index, j.final_site.lattice_index) for j in lattice.potential_jumps()}
+        self.assertEqual(set(catalogue.events.keys()), expected)
+        self.assertEqual(len(catalogue.jumps), len(expected))
+        self.assertIsInstance(catalogue.selector, RateTree)
+
+    def test_event_catalogue_with_rate_classes(self):
+        lattice = cubic_lattice_with_atoms(10)
+        lattice.set_nn_energy(0.1)
+        lattice.jump_lookup_table = LookupTable(lattice, "nearest-neighbour")
+        lattice.set_event_selection("rate-class")
+        catalogue = EventCatalogue(lattice)
+        self.assertIsInstance(catalogue.selector, RateClassSelector)
+        self.assertEqual(set(catalogue.selector.buckets), {j.rate_class for j in catalogue.jumps})
+        catalogue.verify()
+
+    def test_repeated_neighbours_are_separate_jumps(self):
+        lattice = thin_cubic_lattice_with_atoms(8)
+        lattice.set_nn_energy(0.05)
+        catalogue = EventCatalogue(lattice)
+        potential_jumps = lattice.potential_jumps()
+        self.assertEqual(len(catalogue.jumps), len(potential_jumps))
+        self.assertLess(len(catalogue), len(potential_jumps))
+        self.assertAlmostEqual(catalogue.selector.total, sum(j.relative_probability for j in potential_jumps))
+        (i, j), slot = next(
+            (key, slot) for key, slot in catalogue.events.items() if catalogue.number_of_bonds(*key) == 2
+        )
+        p, _ = lattice.jump_relative_probability(i, j)
+        self.assertAlmostEqual(catalogue.selector[slot], 2.0 * p)
+        catalogue.verify()
+        catalogue.selector.update(slot, p)
+        with self.assertRaises(RuntimeError):
+            catalogue.verify()
+
+    def test_event_rate(self):
+        lattice = thin_cubic_lattice_with_atoms(8)
+        lattice.set_nn_energy(0.05)
+        lattice.jump_lookup_table = LookupTable(lattice, "nearest-neighbour")
+        catalogue = EventCatalogue(lattice)
+        i, j = next(key for key in catalogue.events if catalogue.number_of_bonds(*key) == 2)
+        p, rate_class = lattice.jump_relative_probability(i, j)
+        self.assertEqual(catalogue.event_rate(i, j), (2.0 * p, (rate_class, 2)))
+        self.assertEqual(catalogue.event_rate(i, j, 1), (p, rate_class))
+
+    def test_shell_depth_with_cn_energies(self):
+        lattice = cubic_lattice_with_atoms(10)
+        lattice.set_cn_energies({"L": {"L": {n: 0.1 * n for n in range(7)}}})
+        self.assertEqual(EventCatalogue(lattice).shell_depth, 2)
+
+    def test_affected_sites(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        i, j = next(iter(catalogue.events))
+        affected = catalogue.affected_sites(i, j)
+        expected = {i, j} | set(lattice.neighbours_of(i).tolist()) | set(lattice.neighbours_of(j).tolist())
+        self.assertEqual(affected, expected)
+
+    def test_make_jump(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        (i, j), slot = next(iter(catalogue.events.items()))
+        new_jump = catalogue.make_jump(i, j)
+        self.assertIs(new_jump.initial_site, lattice.sites[i])
+        self.assertIs(new_jump.final_site, lattice.sites[j])
+        self.assertEqual(new_jump.relative_probability, catalogue.selector[slot])
+
+    def test_slot_events(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        self.assertEqual(catalogue.number_of_slots, len(catalogue))
+        for key, slot in catalogue.events.items():
+            self.assertEqual(tuple(catalogue.slot_events[slot]), key)
+
+    def test_verify_passes_for_current_catalogue(self):
+        lattice = cubic_lattice_with_atoms(10)
+        EventCatalogue(lattice).verify()
+
+    def test_verify_raises_RuntimeError_for_missing_events(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        catalogue.events.popitem()
+        with self.assertRaises(RuntimeError):
+            catalogue.verify()
+
+    def test_verify_raises_RuntimeError_for_stale_probabilities(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        catalogue.selector.update(next(iter(catalogue.events.values())), 123.0)
+        with self.assertRaises(RuntimeError):
+            catalogue.verify()
+
+    def test_verify_raises_RuntimeError_for_orphaned_rates(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        catalogue.selector.update(catalogue.number_of_slots + 3, 1.0)
+        with self.assertRaises(RuntimeError):
+            catalogue.verify()
+
+    def test_add_and_remove_reuse_slots(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        n_events = len(catalogue)
+        key, slot = next(iter(catalogue.events.items()))
+        catalogue.remove(key)
+        self.assertEqual(len(catalogue), n_events - 1)
+        self.assertEqual(catalogue.selector[slot], 0.0)
+        self.assertEqual(catalogue.free_slots, [slot])
+        catalogue.add(*key)
+        catalogue.add(*key)
+        self.assertEqual(len(catalogue), n_events)
+        self.assertEqual(catalogue.events[key], slot)
+        self.assertEqual(catalogue.free_slots, [])
+        catalogue.verify()
+
+    def test_restore_rebuilds_identical_selector(self):
+        for method in ["rate-tree", "rate-class"]:
+            lattice = cubic_lattice_with_atoms(20)
+            lattice.set_nn_energy(0.1)
+            lattice.jump_lookup_table = LookupTable(lattice, "nearest-neighbour")
+            lattice.set_event_selection(method)
+            for _ in range(50):
+                lattice.jump()
+            catalogue = lattice.event_catalogue
+            restored = EventCatalogue(lattice)
+            restored.restore(
+                catalogue.slot_events[: catalogue.number_of_slots], catalogue.free_slots, catalogue.selection_classes
+            )
+            self.assertEqual(restored.events, catalogue.events)
+            self.assertEqual(restored.free_slots, catalogue.free_slots)
+            self.assertEqual(restored.selection_classes, catalogue.selection_classes)
+            self.assertEqual(restored.selector.total, catalogue.selector.total)
+            for u in np.linspace(0.0, 0.99, 23):
+                self.assertEqual(restored.selector.select(u), catalogue.selector.select(u))
+            restored.verify()
+
+    def test_refresh(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        key, slot = next(iter(catalogue.events.items()))
+        catalogue.selector.update(slot, 123.0)
+        catalogue.refresh(key)
+        self.assertEqual(catalogue.events[key], slot)
+        catalogue.verify()
+
+    @patch.object(RandomStream, "random")
+    def test_select(self, mock_random):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        mock_random.return_value = 0.0
+        self.assertEqual(catalogue.select(), tuple(catalogue.slot_events[0]))
+        mock_random.return_value = 0.999999
+        self.assertEqual(catalogue.select(), tuple(catalogue.slot_events[catalogue.number_of_slots - 1]))
+
+    def test_random(self):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        catalogue.select = Mock(return_value=(1, 2))
+        random_jump = catalogue.random()
+        self.assertIs(random_jump.initial_site, lattice.sites[1])
+        self.assertIs(random_jump.final_site, lattice.sites[2])
+
+    @patch.object(RandomStream, "random")
+    def test_time_to_jump(self, mock_random):
+        lattice = cubic_lattice_with_atoms(10)
+        catalogue = EventCatalogue(lattice)
+        mock_random.return_value = 0.15
+        k_tot = PARAMS.rate_prefactor * sum(j.relative_probability for j in catalogue.jumps)
+        self.assertAlmostEqual(catalogue.time_to_jump(), -math.log(0.15) / k_tot)
+
+
+class EventCatalogueIntegrationTestCase(unittest.TestCase):
+    """Check that the incrementally updated event catalogue matches a full rebuild"""
+
+    def run_verified_jumps(self, lattice, n_jumps=200):
+        lattice.verify_event_catalogue = True
+        for _ in range(n_jumps):
+            lattice.jump()
+        lattice.event_catalogue.verify()
+
+    def test_nearest_neighbour_energies(self):
+        lattice = cubic_lattice_with_atoms(20)
+        lattice.set_nn_energy(0.1)
+        self.run_verified_jumps(lattice)
+
+    def test_mostly_filled_lattice(self):
+        lattice = cubic_lattice_with_atoms(50)
+        lattice.set_nn_energy(-0.05)
+        self.run_verified_jumps(lattice)
+
+    def test_lookup_table(self):
+        lattice = cubic_lattice_with_atoms(20)
+        lattice.set_nn_energy(0.1)
+        lattice.jump_lookup_table = LookupTable(lattice, "nearest-neighbour")
+        self.run_verified_jumps(lattice)
+
+    def test_rate_classes_with_lookup_table(self):
+        lattice = cubic_lattice_with_atoms(20)
+        lattice.set_nn_energy(0.1)
+        lattice.jump_lookup_table = LookupTable(lattice, "nearest-neighbour")
+        lattice.set_event_selection("rate-class")
+        self.run_verified_jumps(lattice)
+
+    def test_rate_classes_without_lookup_table(self):
+        lattice = cubic_lattice_with_atoms(20)
+        lattice.set_nn_energy(0.1)
+        lattice.set_event_selection("rate-class")
+        self.run_verified_jumps(lattice)
+
+    def test_repeated_neighbours(self):
+        lattice = thin_cubic_lattice_with_atoms(8)
+        lattice.set_nn_energy(0.05)
+        self.run_verified_jumps(lattice)
+
+    def test_rate_classes_with_repeated_neighbours(self):
+        lattice = thin_cubic_lattice_with_atoms(8)
+        lattice.set_nn_energy(0.05)
+        lattice.jump_lookup_table = LookupTable(lattice, "nearest-neighbour")
+        lattice.set_event_selection("rate-class")
+        self.run_verified_jumps(lattice)
+
+    def test_cn_energies(self):
+        sites = [
+            Site(i + 1, np.array([float(i), 0.0, 0.0]), [(i - 1) % 8 + 1, (i + 1) % 8 + 1], 0.0, "A") for i in range(8)
+        ]
+        lattice = Lattice(sites, cell_lengths=np.array([8.0, 10.0, 10.0]))
+        lattice.set_cn_energies({"A": {"A": {0: 0.0, 1: -0.1, 2: -0.3}}})
+        lattice.populate_sites(3)
+        lattice.params = PARAMS
+        self.run_verified_jumps(lattice)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import mock_open, patch
 
@@ -11,16 +13,24 @@ from lattice_mc import init_lattice
 class InitLatticeTestCase(unittest.TestCase):
     """Test for Specific Lattice initialisation routines"""
 
-    @patch("lattice_mc.lattice_site.Site")
-    @patch("lattice_mc.lattice.Lattice")
-    def test_square_lattice(self, mock_lattice, mock_site):
-        mock_site.side_effect = range(2 * 3)
-        mock_lattice.return_value = "foo"
+    def assertSitesEqual(self, lattice, expected_sites, sort_neighbours=False):
+        self.assertEqual(len(lattice.sites), len(expected_sites))
+        for site, e in zip(lattice.sites, expected_sites):
+            self.assertEqual(site.number, e[0])  # site number
+            np.testing.assert_array_almost_equal(site.r, e[1])  # site coordinates
+            if sort_neighbours:
+                self.assertEqual(sorted(site.neighbours), sorted(e[2]))  # neighbour lists
+            else:
+                self.assertEqual(site.neighbours, e[2])  # neighbour lists
+            self.assertEqual(site.energy, e[3])  # site energy
+            self.assertEqual(site.label, e[4])  # site label
+
+    def test_square_lattice(self):
         a = 2
         b = 3
         spacing = 1.0
         lattice = init_lattice.square_lattice(a, b, spacing)
-        expected_site_calls = [
+        expected_sites = [
             [1, np.array([0.0, 0.0, 0.0]), [2, 2, 5, 3], 0.0, "L"],
             [2, np.array([1.0, 0.0, 0.0]), [1, 1, 6, 4], 0.0, "L"],
             [3, np.array([0.0, 1.0, 0.0]), [4, 4, 1, 5], 0.0, "L"],
@@ -28,25 +38,14 @@ class InitLatticeTestCase(unittest.TestCase):
             [5, np.array([0.0, 2.0, 0.0]), [6, 6, 3, 1], 0.0, "L"],
             [6, np.array([1.0, 2.0, 0.0]), [5, 5, 4, 2], 0.0, "L"],
         ]
-        for c, e in zip(mock_site.mock_calls, expected_site_calls):
-            self.assertEqual(c[1][0], e[0])  # site number
-            np.testing.assert_array_equal(c[1][1], e[1])  # site coordinates
-            self.assertEqual(c[1][2], e[2])  # neighbour lists
-            self.assertEqual(c[1][3], e[3])  # ?
-            self.assertEqual(c[1][4], e[4])  # site label
-        self.assertEqual(mock_lattice.mock_calls[0][1][0], list(range(2 * 3)))
-        self.assertEqual(lattice, "foo")
-        np.testing.assert_array_equal(mock_lattice.mock_calls[0][2]["cell_lengths"], np.array([2.0, 3.0, 0.0]))
-
-    @patch("lattice_mc.lattice_site.Site")
-    @patch("lattice_mc.lattice.Lattice")
-    def test_honeycomb_lattice(self, mock_lattice, mock_site):
+        self.assertSitesEqual(lattice, expected_sites)
+        np.testing.assert_array_equal(lattice.cell_lengths, np.array([2.0, 3.0, 0.0]))
+
+    def test_honeycomb_lattice(self):
         a, b = 2, 1
-        mock_site.side_effect = range(a * b * 4)
-        mock_lattice.return_value = "foo"
         spacing = 1.0
         lattice = init_lattice.honeycomb_lattice(a, b, spacing)
-        expected_site_calls = [
+        expected_sites = [
             [1, np.array([0.0, 0.0, 0.0]), [2, 4, 6], 0.0, "L"],
             [2, np.array([0.8660254, 0.5, 0.0]), [1, 3, 5], 0.0, "L"],
             [3, np.array([0.8660254, 1.5, 0.0]), [2, 4, 8], 0.0, "L"],
@@ -56,57 +55,26 @@ class InitLatticeTestCase(unittest.TestCase):
             [7, np.array([2.59807621, 1.5, 0.0]), [8, 6, 4], 0.0, "L"],
             [8, np.array([1.73205081, 2.0, 0.0]), [3, 5, 7], 0.0, "L"],
         ]
-        for c, e in zip(mock_site.mock_calls, expected_site_calls):
-            self.assertEqual(c[1][0], e[0])  # site number
-            np.testing.assert_array_almost_equal(c[1][1], e[1])  # site coordinates
-            self.assertEqual(c[1][2].sort(), e[2].sort())  # neighbour lists
-            self.assertEqual(c[1][3], e[3])  # ?
-            self.assertEqual(c[1][4], e[4])  # site label
-        self.assertEqual(mock_lattice.mock_calls[0][1][0], list(range(2 * 1 * 4)))
-        self.assertEqual(lattice, "foo")
-        np.testing.assert_array_almost_equal(
-            mock_lattice.mock_calls[0][2]["cell_lengths"], np.array([3.464102, 3.0, 0.0])
-        )
-
-    @patch("lattice_mc.lattice_site.Site")
-    @patch("lattice_mc.lattice.Lattice")
-    def test_honeycomb_lattice_periodic_boundaries(self, mock_lattice, mock_site):
-        a, b = 3, 3
-        mock_site.side_effect = range(a * b * 4)
-        mock_lattice.return_value = "foo"
-        spacing = 1.0
-        init_lattice.honeycomb_lattice(a, b, spacing)
+        self.assertSitesEqual(lattice, expected_sites, sort_neighbours=True)
+        np.testing.assert_array_almost_equal(lattice.cell_lengths, np.array([3.464102, 3.0, 0.0]))
+
+    def test_honeycomb_lattice_periodic_boundaries(self):
+        lattice = init_lattice.honeycomb_lattice(3, 3, 1.0)
         expected_neighbours = {1: [2, 26, 12], 12: [1, 35, 11], 35: [36, 34, 12], 26: [27, 25, 1]}
-        for c in mock_site.mock_calls:
-            site_number = c[1][0]
-            if site_number in expected_neighbours:
-                site_neighbours = c[1][2]
-                self.assertEqual(site_neighbours.sort(), expected_neighbours[site_number].sort())
-
-    @patch("lattice_mc.lattice_site.Site")
-    @patch("lattice_mc.lattice.Lattice")
-    def test_honeycomb_lattice_alternating_sites(self, mock_lattice, mock_site):
-        a, b = 3, 3
-        mock_site.side_effect = range(a * b * 4)
-        mock_lattice.return_value = "foo"
-        spacing = 1.0
-        init_lattice.honeycomb_lattice(a, b, spacing, alternating_sites=True)
-        for c in mock_site.mock_calls:
-            site_label = c[1][4]
-            site_neighbours = c[1][2]
-            for n in site_neighbours:
-                neighbour_label = mock_site.mock_calls[n - 1][1][4]
-                self.assertEqual(set([site_label, neighbour_label]), set(["A", "B"]))
-
-    @patch("lattice_mc.lattice_site.Site")
-    @patch("lattice_mc.lattice.Lattice")
-    def test_cubic_lattice(self, mock_lattice, mock_site):
+        for site_number, neighbours in expected_neighbours.items():
+            self.assertEqual(sorted(lattice.site_with_id(site_number).neighbours), sorted(neighbours))
+
+    def test_honeycomb_lattice_alternating_sites(self):
+        lattice = init_lattice.honeycomb_lattice(3, 3, 1.0, alternating_sites=True)
+        for site in lattice.sites:
+            for n in site.neighbours:
+                self.assertEqual(set([site.label, lattice.site_with_id(n).label]), set(["A", "B"]))
+
+    def test_cubic_lattice(self):
         a, b, c = 2, 2, 2
         spacing = 1.0
-        mock_site.side_effect = range(2 * 2 * 2)
-        mock_lattice.return_value = "bar"
         lattice = init_lattice.cubic_lattice(a, b, c, spacing)
-        expected_site_calls = [
+        expected_sites = [
             [1, np.array([0.0, 0.0, 0.0]), [2, 2, 3, 3, 5, 5], 0.0, "L"],
             [2, np.array([1.0, 0.0, 0.0]), [1, 1, 4, 4, 6, 6], 0.0, "L"],
             [3, np.array([0.0, 1.0, 0.0]), [4, 4, 1, 1, 7, 7], 0.0, "L"],
@@ -116,64 +84,109 @@ class InitLatticeTestCase(unittest.TestCase):
             [7, np.array([0.0, 1.0, 1.0]), [8, 8, 5, 5, 3, 3], 0.0, "L"],
             [8, np.array([1.0, 1.0, 1.0]), [7, 7, 6, 6, 4, 4], 0.0, "L"],
         ]
-        for call, e in zip(mock_site.mock_calls, expected_site_calls):
-            self.assertEqual(call[1][0], e[0])  # site number
-            np.testing.assert_array_equal(call[1][1], e[1])  # site coordinates
-            self.assertEqual(call[1][2], e[2])  # neighbour lists
-            self.assertEqual(call[1][3], e[3])  # ?
-            self.assertEqual(call[1][4], e[4])  # site label
-        self.assertEqual(mock_lattice.mock_calls[0][1][0], list(range(2 * 2 * 2)))
-        self.assertEqual(lattice, "bar")
-        np.testing.assert_array_equal(mock_lattice.mock_calls[0][2]["cell_lengths"], np.array([a, b, c]))
-
-    @patch("lattice_mc.lattice_site.Site")
-    @patch("lattice_mc.lattice.Lattice")
-    def test_lattice_from_file(self, mock_lattice, mock_site):
-        cell_lengths = np.array([2.0, 3.0, 4.0])
-        example_file = """1\n
+        self.assertSitesEqual(lattice, expected_sites)
+        np.testing.assert_array_equal(lattice.cell_lengths, np.array([a, b, c]))
+
+    def test_periodic_grid_neighbours(self):
+        neighbours = init_lattice.periodic_grid_neighbours((3, 2))
+        np.testing.assert_array_equal(neighbours[0], [2, 1, 3, 3])
+        np.testing.assert_array_equal(neighbours[4], [3, 5, 1, 1])
+
+    def test_cubic_topology(self):
+        topology = init_lattice.cubic_topology(2, 3, 4, 1.5)
+        self.assertEqual(topology.number_of_sites, 24)
+        np.testing.assert_array_equal(topology.numbers, np.arange(1, 25))
+        np.testing.assert_array_equal(topology.coordinates[7], [1.5, 0.0, 1.5])
+        np.testing.assert_array_equal(topology.neighbour_offsets, np.arange(0, 24 * 6 + 1, 6))
+        np.testing.assert_array_equal(topology.neighbour_indices[42:48], [6, 6, 11, 9, 1, 13])
+        np.testing.assert_array_equal(topology.bond_lengths_squared, np.full(24 * 6, 2.25))
+        np.testing.assert_array_equal(topology.cell_lengths, [3.0, 4.5, 6.0])
+        self.assertEqual(topology.label_names, ("L",))
+
+    def test_honeycomb_topology(self):
+        topology = init_lattice.honeycomb_topology(3, 2, 1.0, alternating_sites=True)
+        self.assertEqual(topology.number_of_sites, 24)
+        self.assertEqual(topology.label_names, ("A", "B"))
+        np.testing.assert_array_almost_equal(topology.bond_lengths_squared, np.ones(24 * 3))
+        sites = np.repeat(np.arange(24), 3)
+        self.assertTrue(np.all(topology.label_ids[sites] != topology.label_ids[topology.neighbour_indices]))
+
+    def test_square_topology(self):
+        topology = init_lattice.square_topology(4, 3, 2.0)
+        np.testing.assert_array_equal(topology.neighbour_indices[:4], [3, 1, 8, 4])
+        np.testing.assert_array_equal(topology.bond_lengths_squared, np.full(12 * 4, 4.0))
+        np.testing.assert_array_equal(topology.cell_lengths, [8.0, 6.0, 0.0])
+
+    def test_lattice_from_file(self):
+        cell_lengths = np.array([25.0, 25.0, 25.0])
+        example_file = b"""3\n
                           site: 2
                           centre: 21.4669 -1.37 6.1334
                           vertices: 1 315 435 649
-                          neighbours: 4 5 6
-                          label: H"""
-        mock_site.return_value = "site"
-        mock_lattice.return_value = "lattice"
+                          neighbours: 4 5
+                          label: H
+
+                          site: 4
+                          centre: 1.0 1.0 1.0
+                          neighbours: 2
+                          label: L
+
+                          site: 5
+                          centre: 2.0 1.0 1.0
+                          neighbours: 2
+                          label: L"""
         with patch("builtins.open", mock_open(read_data=example_file), create=True):
-            lattice = init_lattice.lattice_from_sites_file("filename", cell_lengths)
-        site_calls = mock_site.mock_calls[0][1]
-        self.assertEqual(site_calls[0], 2)  # site number
-        np.testing.assert_array_equal(site_calls[1], np.array([21.4669, -1.37, 6.1334]))  # r
-        self.assertEqual(site_calls[2], [4, 5, 6])  # neighbour list
-        self.assertEqual(site_calls[3], 0.0)  # ?
-        self.assertEqual(site_calls[4], "H")  # site label
-        self.assertEqual(mock_lattice.mock_calls[0][1][0], ["site"])
-        np.testing.assert_array_equal(mock_lattice.mock_calls[0][2]["cell_lengths"], cell_lengths)
-        self.assertEqual(lattice, "lattice")
-
-    @patch("lattice_mc.lattice_site.Site")
-    @patch("lattice_mc.lattice.Lattice")
-    def test_lattice_from_file_with_energy(self, mock_lattice, mock_site):
-        cell_lengths = np.array([2.0, 3.0, 4.0])
-        example_file = """1\n
+            lattice = init_lattice.lattice_from_sites_file("filename", cell_lengths, cache=False)
+        site = lattice.sites[0]
+        self.assertEqual(site.number, 2)  # site number
+        np.testing.assert_array_almost_equal(site.r, np.array([21.4669, 23.63, 6.1334]))  # wrapped r
+        self.assertEqual(site.neighbours, [4, 5])  # neighbour list
+        self.assertEqual(site.energy, 0.0)  # site energy
+        self.assertEqual(site.label, "H")  # site label
+        self.assertEqual([s.number for s in lattice.sites], [2, 4, 5])
+        np.testing.assert_array_equal(lattice.cell_lengths, cell_lengths)
+
+    def test_lattice_from_file_with_energy(self):
+        cell_lengths = np.array([25.0, 25.0, 25.0])
+        example_file = b"""3\n
                           site: 2
                           centre: 21.4669 -1.37 6.1334
                           vertices: 1 315 435 649
-                          neighbours: 4 5 6
+                          neighbours: 4 5
                           energy: -1.0
-                          label: H"""
-        mock_site.return_value = "site"
-        mock_lattice.return_value = "lattice"
+                          label: H
+
+                          site: 4
+                          centre: 1.0 1.0 1.0
+                          neighbours: 2
+                          label: L
+
+                          site: 5
+                          centre: 2.0 1.0 1.0
+                          neighbours: 2
+                          label: L"""
         with patch("builtins.open", mock_open(read_data=example_file), create=True):
-            lattice = init_lattice.lattice_from_sites_file("filename", cell_lengths)
-        site_calls = mock_site.mock_calls[0][1]
-        self.assertEqual(site_calls[0], 2)  # site number
-        np.testing.assert_array_equal(site_calls[1], np.array([21.4669, -1.37, 6.1334]))  # r
-        self.assertEqual(site_calls[2], [4, 5, 6])  # neighbour list
-        self.assertEqual(site_calls[3], -1.0)  # site energy
-        self.assertEqual(site_calls[4], "H")  # site label
-        self.assertEqual(mock_lattice.mock_calls[0][1][0], ["site"])
-        np.testing.assert_array_equal(mock_lattice.mock_calls[0][2]["cell_lengths"], cell_lengths)
-        self.assertEqual(lattice, "lattice")
+            lattice = init_lattice.lattice_from_sites_file("filename", cell_lengths, cache=False)
+        site = lattice.sites[0]
+        self.assertEqual(site.number, 2)  # site number
+        np.testing.assert_array_almost_equal(site.r, np.array([21.4669, 23.63, 6.1334]))  # wrapped r
+        self.assertEqual(site.neighbours, [4, 5])  # neighbour list
+        self.assertEqual(site.energy, -1.0)  # site energy
+        self.assertEqual(site.label, "H")  # site label
+        self.assertEqual([s.number for s in lattice.sites], [2, 4, 5])
+        np.testing.assert_array_equal(lattice.cell_lengths, cell_lengths)
+
+    def test_lattice_from_file_uses_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "sites.dat")
+            with open(filename, "w") as f:
+                f.write("2\n\nsite: 1\ncentre: 0.0 0.0 0.0\nneighbours: 2\nlabel: A\n\n")
+                f.write("site: 2\ncentre: 1.0 0.0 0.0\nneighbours: 1\nlabel: A\n")
+            lattices = [init_lattice.lattice_from_sites_file(filename, [2.0, 2.0, 2.0]) for _ in range(2)]
+            self.assertEqual(len(os.listdir(os.path.join(directory, ".lattice_mc_cache"))), 1)
+        for lattice in lattices:
+            self.assertEqual([s.neighbours for s in lattice.sites], [[2], [1]])
+            np.testing.assert_array_equal(lattice.coordinates, [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
 
 
 if __name__ == "__main__":
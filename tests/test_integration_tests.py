@@ -33,6 +33,21 @@ class IntegrationTestCase(unittest.TestCase):
         self.assertNotEqual(s.collective_diffusion_coefficient_per_atom, None)
         self.assertNotEqual(s.average_site_occupations, None)
 
+    def test_seeded_simulations_are_reproducible(self):
+        def run(seed):
+            params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=seed)
+            s = lattice_mc.Simulation(params)
+            s.lattice = lattice_mc.init_lattice.cubic_lattice(4, 4, 4, 1.0)
+            s.lattice.transmute_sites("L", "X", 8)
+            s.set_number_of_atoms(16)
+            s.set_nn_energy(0.1)
+            s.set_number_of_jumps(50)
+            s.run()
+            return s.lattice.time, s.lattice.occupied_site_numbers(), s.tracer_correlation
+
+        self.assertEqual(run(3), run(3))
+        self.assertNotEqual(run(3), run(4))
+
     def test_simulation_runs_with_cn_energies(self):
         s = lattice_mc.Simulation(PARAMS)
         site_data = [
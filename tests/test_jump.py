@@ -159,6 +159,7 @@ class JumpTestCase(unittest.TestCase):
         jump_lookup_table = Mock(spec=LookupTable)
         jump_lookup_table.jump_probability = {"A": {"B": {2: {1: 0.5}}}}
         self.assertEqual(self.jump.relative_probability_from_lookup_table(jump_lookup_table), 0.5)
+        self.assertEqual(self.jump.rate_class, ("A", "B", 2, 1))
 
     def test_relative_probability_getter(self):
         self.assertEqual(self.jump.relative_probability, self.jump._relative_probability)
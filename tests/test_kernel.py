@@ -0,0 +1,221 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import lattice_mc
+from lattice_mc import kernel
+from lattice_mc.error import BlockedLatticeError
+from lattice_mc.rate_tree import RateTree
+from lattice_mc.species import Species
+
+PARAMS = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=7)
+
+
+def cubic_simulation(n_atoms=16, nn_energy=0.1, lookup_table=False, seed=7, shape=(4, 4, 4)):
+    params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=seed)
+    s = lattice_mc.Simulation(params)
+    s.lattice = lattice_mc.init_lattice.cubic_lattice(*shape, 1.0)
+    s.set_number_of_atoms(n_atoms)
+    s.set_nn_energy(nn_energy)
+    if lookup_table:
+        s.setup_lookup_table()
+    s.lattice.params = params
+    return s
+
+
+class KernelFunctionsTestCase(unittest.TestCase):
+    """Tests for the compiled kernel functions"""
+
+    def test_jit_returns_a_callable(self):
+        def double(x):
+            return 2 * x
+
+        self.assertEqual(kernel.jit(double)(3), 6)
+
+    def test_tree_functions_match_RateTree(self):
+        rates = [0.5, 0.0, 2.0, 1.0, 0.25]
+        tree = np.zeros(16)
+        for i, rate in enumerate(rates):
+            kernel.set_tree_rate(tree, 8, i, rate)
+        expected = RateTree(rates)
+        self.assertAlmostEqual(tree[1], expected.total)
+        for u in [0.0, 0.1, 0.3, 0.5, 0.7, 0.99]:
+            self.assertEqual(kernel.select_from_tree(tree, 8, u), expected.select(u))
+
+    def test_jump_probability(self):
+        nn_occupied = np.array([1, 3], dtype=np.int64)
+        label_ids = np.array([0, 0], dtype=np.int32)
+        site_energy = np.array([0.0, 0.0])
+        rate_table = np.zeros((0, 0, 0, 0))
+        # delta_E = (3 - 1 - 1) * 0.1
+        self.assertAlmostEqual(
+            kernel.jump_probability(0, 1, nn_occupied, label_ids, site_energy, rate_table, False, 0.1, 0.025),
+            np.exp(-0.1 / 0.025),
+        )
+        self.assertEqual(
+            kernel.jump_probability(1, 0, nn_occupied, label_ids, site_energy, rate_table, False, 0.1, 0.025), 1.0
+        )
+        rate_table = np.full((1, 1, 4, 4), 0.5)
+        self.assertEqual(
+            kernel.jump_probability(0, 1, nn_occupied, label_ids, site_energy, rate_table, True, 0.1, 0.025), 0.5
+        )
+
+    def test_fill_bond_rates(self):
+        s = cubic_simulation()
+        lattice = s.lattice
+        bond_rows, _ = kernel.bond_tables(lattice)
+        rate_table = np.zeros((0, 0, 0, 0))
+        arrays = (
+            lattice.neighbour_indices,
+            lattice.occupied,
+            lattice.nn_occupied,
+            lattice.label_ids,
+            lattice.site_energy,
+        )
+        rates = np.full(len(bond_rows), -1.0)
+        kernel.fill_bond_rates(rates, bond_rows, *arrays, rate_table, False, 0.1, lattice.params.kT)
+        expected = [
+            kernel.bond_rate(b, bond_rows, *arrays, rate_table, False, 0.1, lattice.params.kT)
+            for b in range(len(bond_rows))
+        ]
+        np.testing.assert_array_equal(rates, expected)
+        self.assertGreater(np.count_nonzero(rates), 0)
+
+    def test_bond_tables(self):
+        lattice = lattice_mc.init_lattice.cubic_lattice(2, 4, 4, 1.0)
+        bond_rows, bond_reverse = kernel.bond_tables(lattice)
+        np.testing.assert_array_equal(bond_rows[bond_reverse], lattice.neighbour_indices)
+        np.testing.assert_array_equal(bond_reverse[bond_reverse], np.arange(len(bond_rows)))
+        # both bonds from site 0 to its neighbour along x are reversed by different bonds
+        self.assertEqual(lattice.neighbour_indices[0], lattice.neighbour_indices[1])
+        self.assertNotEqual(bond_reverse[0], bond_reverse[1])
+
+    def test_bond_tables_raises_ValueError_for_asymmetric_neighbours(self):
+        lattice = lattice_mc.init_lattice.cubic_lattice(3, 3, 3, 1.0)
+        lattice.neighbour_indices = lattice.neighbour_indices.copy()
+        lattice.neighbour_indices[0] = 13
+        with self.assertRaises(ValueError):
+            kernel.bond_tables(lattice)
+
+
+class KMCKernelTestCase(unittest.TestCase):
+    """Tests for KMCKernel class"""
+
+    def test_kernel_is_initialised(self):
+        s = cubic_simulation()
+        runner = kernel.KMCKernel(s.lattice, s.atoms)
+        n_bonds = len(s.lattice.neighbour_indices)
+        self.assertEqual(runner.capacity, 512)
+        np.testing.assert_array_equal(s.lattice.neighbour_indices[runner.bond_reverse], runner.bond_rows)
+        for i, k in enumerate(runner.site_atom.tolist()):
+            self.assertEqual(k >= 0, bool(s.lattice.occupied[i]))
+        expected = sum(j.relative_probability for j in s.lattice.potential_jumps())
+        self.assertAlmostEqual(runner.tree[1], expected)
+        self.assertEqual(np.count_nonzero(runner.tree[runner.capacity + n_bonds :]), 0)
+
+    def test_kernel_raises_ValueError_for_cn_energies(self):
+        s = cubic_simulation()
+        s.set_cn_energies({"L": {"L": {0: 0.0, 1: -0.1}}})
+        with self.assertRaises(ValueError):
+            kernel.KMCKernel(s.lattice, s.atoms)
+
+    def test_kernel_raises_ValueError_for_atoms_missing_from_species(self):
+        s = cubic_simulation()
+        with self.assertRaises(ValueError):
+            kernel.KMCKernel(s.lattice, Species(s.atoms.atoms[1:]))
+
+    def test_kernel_raises_RuntimeError_without_params(self):
+        s = cubic_simulation()
+        s.lattice.params = None
+        with self.assertRaises(RuntimeError):
+            kernel.KMCKernel(s.lattice, s.atoms)
+
+    def test_run_raises_ValueError_without_limits(self):
+        s = cubic_simulation()
+        with self.assertRaises(ValueError):
+            kernel.KMCKernel(s.lattice, s.atoms).run()
+
+    def test_run_keeps_lattice_state_consistent(self):
+        s = cubic_simulation(lookup_table=True)
+        lattice = s.lattice
+        n = kernel.KMCKernel(lattice, s.atoms).run(n_jumps=500, chunk_size=64)
+        self.assertEqual(n, 500)
+        self.assertGreater(lattice.time, 0.0)
+        self.assertEqual(int(s.atoms.atom_number_of_hops.sum()), 500)
+        nn_occupied, label_nn_occupied = lattice.nn_occupied.copy(), lattice.label_nn_occupied.copy()
+        lattice.count_occupied_neighbours()
+        np.testing.assert_array_equal(nn_occupied, lattice.nn_occupied)
+        np.testing.assert_array_equal(label_nn_occupied, lattice.label_nn_occupied)
+        for atom in s.atoms.atoms:
+            self.assertIs(lattice.site_atoms[atom.site.lattice_index], atom)
+            self.assertTrue(atom.site.is_occupied)
+        self.assertEqual(sorted(lattice.occupied_site_numbers()), sorted(s.atoms.sites_occupied()))
+        self.assertIsNone(lattice.event_catalogue)
+        self.assertAlmostEqual(lattice.site_occupation_statistics()["L"], 16.0)
+
+    def test_run_keeps_rates_current_for_repeated_neighbours(self):
+        for shape in [(2, 4, 4), (2, 2, 4)]:
+            s = cubic_simulation(n_atoms=8, nn_energy=0.05, shape=shape)
+            lattice = s.lattice
+            runner = kernel.KMCKernel(lattice, s.atoms)
+            runner.run(n_jumps=2000)
+            n_bonds = len(lattice.neighbour_indices)
+            occupied = lattice.occupied.astype(bool)
+            expected = [
+                lattice.jump_relative_probability(i, j)[0] if occupied[i] and not occupied[j] else 0.0
+                for i, j in zip(runner.bond_rows.tolist(), lattice.neighbour_indices.tolist())
+            ]
+            np.testing.assert_allclose(runner.tree[runner.capacity : runner.capacity + n_bonds], expected)
+            self.assertAlmostEqual(runner.tree[1], sum(j.relative_probability for j in lattice.potential_jumps()))
+
+    def test_run_for_time(self):
+        s = cubic_simulation()
+        runner = kernel.KMCKernel(s.lattice, s.atoms)
+        end_time = 1e-10
+        n = runner.run(for_time=end_time, chunk_size=16)
+        self.assertGreater(n, 16)
+        self.assertGreaterEqual(s.lattice.time, end_time)
+        self.assertEqual(int(s.atoms.atom_number_of_hops.sum()), n)
+
+    def test_run_consumes_two_random_numbers_per_jump(self):
+        s = cubic_simulation()
+        expected = lattice_mc.random_stream.RandomStream()
+        expected.state = s.lattice.rng.state
+        expected.advance(200)
+        kernel.KMCKernel(s.lattice, s.atoms).run(n_jumps=100)
+        self.assertEqual(s.lattice.rng.random(), expected.random())
+
+    def test_run_raises_BlockedLatticeError(self):
+        s = cubic_simulation(n_atoms=64)
+        with self.assertRaises(BlockedLatticeError):
+            kernel.KMCKernel(s.lattice, s.atoms).run(n_jumps=1)
+
+    def test_uncompiled_kernel_matches_compiled_kernel(self):
+        compiled = cubic_simulation()
+        kernel.KMCKernel(compiled.lattice, compiled.atoms).run(n_jumps=200)
+        uncompiled = cubic_simulation()
+        names = ["jump_probability", "bond_rate", "set_tree_rate", "select_from_tree", "kmc_steps"]
+        with patch.multiple(
+            kernel, **{name: getattr(getattr(kernel, name), "py_func", getattr(kernel, name)) for name in names}
+        ):
+            kernel.KMCKernel(uncompiled.lattice, uncompiled.atoms).run(n_jumps=200)
+        self.assertAlmostEqual(uncompiled.lattice.time, compiled.lattice.time, delta=1e-9 * compiled.lattice.time)
+        np.testing.assert_array_equal(uncompiled.lattice.occupied, compiled.lattice.occupied)
+        np.testing.assert_allclose(uncompiled.atoms.atom_dr, compiled.atoms.atom_dr)
+
+    def test_kernel_and_python_engines_agree_statistically(self):
+        def mean_correlation(engine):
+            correlations = []
+            for seed in range(4):
+                s = cubic_simulation(n_atoms=32, nn_energy=0.0, seed=seed)
+                s.set_number_of_jumps(2000)
+                s.run(engine=engine)
+                correlations.append(s.tracer_correlation)
+            return np.mean(correlations)
+
+        self.assertAlmostEqual(mean_correlation("kernel"), mean_correlation("python"), delta=0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
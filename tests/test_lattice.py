@@ -1,16 +1,19 @@
+import math
+import tempfile
 import unittest
-from unittest.mock import Mock, call, patch
+from unittest.mock import MagicMock, Mock, call, patch
 
 import numpy as np
 
 from lattice_mc.atom import Atom
 from lattice_mc.cluster import Cluster
 from lattice_mc.error import BlockedLatticeError
+from lattice_mc.event_catalogue import EventCatalogue
 from lattice_mc.jump import Jump
-from lattice_mc.lattice import Lattice
+from lattice_mc.lattice import Lattice, site_indices
 from lattice_mc.lattice_site import Site
 from lattice_mc.simulation import SimulationParameters
-from lattice_mc.transitions import Transitions
+from lattice_mc.topology import LatticeTopology, SharedLatticeTopology
 
 PARAMS = SimulationParameters(temperature=298.0, rate_prefactor=1e13)
 
@@ -18,30 +21,112 @@ PARAMS = SimulationParameters(temperature=298.0, rate_prefactor=1e13)
 class LatticeTestCase(unittest.TestCase):
     """Tests for Lattice class"""
 
-    @patch("lattice_mc.lattice.Lattice.site_with_id")
-    @patch("lattice_mc.lattice.Lattice.initialise_site_lookup_table")
-    @patch("lattice_mc.lattice.Lattice.enforce_periodic_boundary_conditions")
-    def setUp(self, pbc, islt, site_id):
-        site_id.side_effect = (1, 2, 3, 4, 5, 6, 7, 8)
-        self.site_id = site_id
+    def setUp(self):
         site_labels = ["A", "B", "A", "B", "C"]
         site_neighbours = [[2, 3], [1, 3], [1, 2], [5], [4]]
-        self.mock_sites = [Mock(spec=Site, label=label, neighbours=n) for label, n in zip(site_labels, site_neighbours)]
+        self.sites = [
+            Site(i + 1, np.array([float(i), 0.0, 0.0]), n, 0.0, label)
+            for i, (label, n) in enumerate(zip(site_labels, site_neighbours))
+        ]
         self.cell_lengths = np.array([7.0, 8.0, 9.0])
-        self.lattice = Lattice(self.mock_sites, self.cell_lengths)
+        self.lattice = Lattice(self.sites, self.cell_lengths)
 
     def test_lattice_is_initialised(self):
         np.testing.assert_array_equal(self.lattice.cell_lengths, self.cell_lengths)
-        self.assertEqual(self.lattice.sites, self.mock_sites)
+        self.assertEqual(self.lattice.sites, self.sites)
         self.assertEqual(self.lattice.number_of_sites, 5)
         self.assertEqual(self.lattice.site_labels, {"A", "B", "C"})
         self.assertEqual(self.lattice.site_populations, {"A": 2, "B": 2, "C": 1})
-        self.site_id.assert_has_calls([call(2), call(3), call(1), call(3), call(1), call(2), call(5), call(4)])
-        self.assertEqual(self.mock_sites[0].p_neighbours, [1, 2])
-        self.assertEqual(self.mock_sites[1].p_neighbours, [3, 4])
-        self.assertEqual(self.mock_sites[2].p_neighbours, [5, 6])
-        self.assertEqual(self.mock_sites[3].p_neighbours, [7])
-        self.assertEqual(self.mock_sites[4].p_neighbours, [8])
+        self.assertIsNone(self.lattice.event_catalogue)
+        self.assertEqual(self.lattice.verify_event_catalogue, False)
+        self.assertEqual(self.lattice.event_selection, "rate-tree")
+        self.assertEqual(self.sites[0].p_neighbours, [self.sites[1], self.sites[2]])
+        self.assertEqual(self.sites[1].p_neighbours, [self.sites[0], self.sites[2]])
+        self.assertEqual(self.sites[2].p_neighbours, [self.sites[0], self.sites[1]])
+        self.assertEqual(self.sites[3].p_neighbours, [self.sites[4]])
+        self.assertEqual(self.sites[4].p_neighbours, [self.sites[3]])
+
+    def test_site_arrays_are_initialised(self):
+        np.testing.assert_array_equal(self.lattice.neighbour_offsets, [0, 2, 4, 6, 7, 8])
+        np.testing.assert_array_equal(self.lattice.neighbour_indices, [1, 2, 0, 2, 0, 1, 4, 3])
+        self.assertEqual(self.lattice.label_names, ["A", "B", "C"])
+        np.testing.assert_array_equal(self.lattice.label_ids, [0, 1, 0, 1, 2])
+        np.testing.assert_array_equal(self.lattice.coordinates[:, 0], [0.0, 1.0, 2.0, 3.0, 4.0])
+        np.testing.assert_array_equal(self.lattice.site_energy, np.zeros(5))
+        np.testing.assert_array_equal(self.lattice.occupied, np.zeros(5))
+        np.testing.assert_array_equal(self.lattice.occupation, np.zeros(5))
+        self.assertEqual(self.lattice.site_atoms, [None] * 5)
+        np.testing.assert_array_equal(self.lattice.time_occupied, np.zeros(5))
+        for i, site in enumerate(self.sites):
+            self.assertIs(site.lattice, self.lattice)
+            self.assertEqual(site.lattice_index, i)
+
+    def test_sites_are_views_onto_site_arrays(self):
+        site = self.sites[3]
+        site.is_occupied = True
+        site.occupation = 7
+        site.energy = 0.3
+        site.time_occupied = 1.5
+        site.label = "D"
+        site.r[1] = 2.0
+        self.assertEqual(self.lattice.occupied[3], 1)
+        self.assertEqual(self.lattice.occupation[3], 7)
+        self.assertEqual(self.lattice.site_energy[3], 0.3)
+        self.assertEqual(self.lattice.time_occupied[3], 1.5)
+        self.assertEqual(self.lattice.label_names[self.lattice.label_ids[3]], "D")
+        self.assertEqual(self.lattice.coordinates[3, 1], 2.0)
+        site.r = np.array([1.0, 1.0, 1.0])
+        np.testing.assert_array_equal(self.lattice.coordinates[3], [1.0, 1.0, 1.0])
+
+    def test_label_id(self):
+        self.assertEqual(self.lattice.label_id("B"), 1)
+        self.assertEqual(self.lattice.label_id("X"), 3)
+        self.assertEqual(self.lattice.label_names, ["A", "B", "C", "X"])
+
+    def test_neighbours_of(self):
+        np.testing.assert_array_equal(self.lattice.neighbours_of(1), [0, 2])
+
+    def test_nn_occupation(self):
+        self.sites[1].is_occupied = True
+        self.sites[2].is_occupied = True
+        self.assertEqual(self.lattice.nn_occupation(0), 2)
+        self.assertEqual(self.lattice.nn_occupation(1), 1)
+        self.assertEqual(self.sites[0].nn_occupation(), 2)
+
+    def test_site_specific_nn_occupation(self):
+        self.sites[1].is_occupied = True
+        self.assertEqual(self.lattice.site_specific_nn_occupation(0), {"A": 0, "B": 1})
+        self.assertEqual(self.sites[0].site_specific_nn_occupation(), {"A": 0, "B": 1})
+
+    def test_count_occupied_neighbours(self):
+        self.lattice.occupied[[1, 3]] = 1
+        self.lattice.count_occupied_neighbours()
+        np.testing.assert_array_equal(self.lattice.nn_occupied, [1, 0, 1, 0, 1])
+        np.testing.assert_array_equal(
+            self.lattice.label_neighbours, [[1, 1, 0], [2, 0, 0], [1, 1, 0], [0, 0, 1], [0, 1, 0]]
+        )
+        np.testing.assert_array_equal(
+            self.lattice.label_nn_occupied, [[0, 1, 0], [0, 0, 0], [0, 1, 0], [0, 0, 0], [0, 1, 0]]
+        )
+
+    def test_set_occupied_updates_neighbour_counts(self):
+        self.lattice.set_occupied(1, True)
+        self.lattice.set_occupied(1, True)
+        self.assertEqual(self.lattice.occupied[1], 1)
+        np.testing.assert_array_equal(self.lattice.nn_occupied, [1, 0, 1, 0, 0])
+        np.testing.assert_array_equal(self.lattice.label_nn_occupied[:, 1], [1, 0, 1, 0, 0])
+        self.lattice.set_occupied(1, False)
+        np.testing.assert_array_equal(self.lattice.nn_occupied, np.zeros(5))
+        np.testing.assert_array_equal(self.lattice.label_nn_occupied, np.zeros((5, 3)))
+
+    def test_set_label_updates_neighbour_counts(self):
+        self.lattice.set_occupied(3, True)
+        self.lattice.set_label(3, "D")
+        self.assertEqual(self.lattice.label_names, ["A", "B", "C", "D"])
+        self.assertEqual(self.lattice.label_ids[3], 3)
+        np.testing.assert_array_equal(self.lattice.label_neighbours[4], [0, 0, 0, 1])
+        np.testing.assert_array_equal(self.lattice.label_nn_occupied[4], [0, 0, 0, 1])
+        self.assertEqual(self.lattice.site_specific_nn_occupation(4), {"D": 1})
 
     def test_enforce_periodice_boundary_consitions(self):
         site_coordinates = [np.array([-1.0, 11.0, 3.0]), np.array([2.0, -3.0, 12.0])]
@@ -53,7 +138,9 @@ class LatticeTestCase(unittest.TestCase):
         np.testing.assert_array_equal(self.lattice.sites[1].r, np.array([2.0, 7.0, 2.0]))
 
     def test_reset(self):
+        self.lattice.occupied_since[:] = 3.0
         self.lattice.reset()
+        np.testing.assert_array_equal(self.lattice.occupied_since, np.zeros(5))
         self.assertEqual(self.lattice.time, 0.0)
         self.assertEqual(self.lattice.sites[0].time_occupied, 0.0)
 
@@ -61,23 +148,98 @@ class LatticeTestCase(unittest.TestCase):
         for i, site in enumerate(self.lattice.sites):
             site.number = i
         self.lattice.initialise_site_lookup_table()
-        self.assertEqual(self.lattice.site_lookup[0], self.mock_sites[0])
+        self.assertEqual(self.lattice.site_lookup[0], self.sites[0])
 
     def test_site_with_id(self):
         self.lattice.site_lookup = ["foo", "bar"]
         self.assertEqual(self.lattice.site_with_id(1), "bar")
 
+    def test_site_with_id_initialises_site_lookup_table(self):
+        self.assertIsNone(self.lattice.site_lookup)
+        self.assertIs(self.lattice.site_with_id(4), self.sites[3])
+        self.assertEqual(len(self.lattice.site_lookup), 5)
+
+    def test_site_neighbours_are_read_from_the_lattice(self):
+        self.assertEqual(self.sites[0].neighbours, [2, 3])
+        self.assertEqual(self.sites[3].p_neighbours, [self.sites[4]])
+        with self.assertRaises(AttributeError):
+            self.sites[0].neighbours = [4]
+        with self.assertRaises(AttributeError):
+            self.sites[0].p_neighbours = []
+
+    def test_from_arrays(self):
+        lattice = Lattice.from_arrays(
+            numbers=[10, 20, 30, 40, 50],
+            coordinates=[[float(i), -1.0, 0.0] for i in range(5)],
+            neighbour_offsets=[0, 2, 4, 6, 7, 8],
+            neighbours=[20, 30, 10, 30, 10, 20, 50, 40],
+            labels=["A", "B", "A", "B", "C"],
+            cell_lengths=self.cell_lengths,
+            site_energy=[0.0, 0.5, 0.0, 0.5, 1.0],
+        )
+        for name in ["neighbour_offsets", "neighbour_indices", "label_ids", "bond_vectors", "label_neighbours"]:
+            np.testing.assert_array_equal(getattr(lattice, name), getattr(self.lattice, name))
+        np.testing.assert_array_equal(lattice.coordinates[:, 1], 7.0)
+        np.testing.assert_array_equal(lattice.site_energy, [0.0, 0.5, 0.0, 0.5, 1.0])
+        self.assertEqual(lattice.label_names, ["A", "B", "C"])
+        self.assertEqual(lattice.site_labels, {"A", "B", "C"})
+        self.assertEqual(lattice.site_populations, {"A": 2, "B": 2, "C": 1})
+        self.assertEqual([site.number for site in lattice.sites], [10, 20, 30, 40, 50])
+        self.assertEqual([site.label for site in lattice.sites], ["A", "B", "A", "B", "C"])
+        self.assertEqual(lattice.sites[1].neighbours, [10, 30])
+        self.assertEqual(lattice.sites[4].energy, 1.0)
+        self.assertEqual(lattice.occupied.sum(), 0)
+        lattice.sites[0].is_occupied = True
+        self.assertEqual(lattice.nn_occupied.tolist(), [0, 1, 1, 0, 0])
+
+    def test_from_topology(self):
+        self.lattice.set_site_energies({"B": 0.5})
+        source = LatticeTopology.from_lattice(self.lattice)
+        with (
+            patch("lattice_mc.lattice.site_indices") as mock_site_indices,
+            patch("lattice_mc.lattice.bond_vectors") as mock_bond_vectors,
+        ):
+            lattice = Lattice.from_topology(source)
+            shared = Lattice.from_topology(source, share_arrays=True)
+        mock_site_indices.assert_not_called()
+        mock_bond_vectors.assert_not_called()
+        for name in SharedLatticeTopology.fields:
+            np.testing.assert_array_equal(getattr(lattice, name), getattr(source, name))
+            self.assertFalse(np.shares_memory(getattr(lattice, name), getattr(source, name)))
+            self.assertTrue(np.shares_memory(getattr(shared, name), getattr(source, name)))
+        self.assertEqual(lattice.label_names, ["A", "B", "C"])
+        self.assertEqual(lattice.site_populations, self.lattice.site_populations)
+        self.assertEqual([site.label for site in lattice.sites], [site.label for site in self.sites])
+        np.testing.assert_array_equal(lattice.label_neighbours, self.lattice.label_neighbours)
+        self.assertEqual(lattice.occupied.sum(), 0)
+
+    def test_site_energies_shared_with_a_topology_are_copied_when_changed(self):
+        source = LatticeTopology.from_lattice(self.lattice)
+        lattice = Lattice.from_topology(source, share_arrays=True)
+        self.assertFalse(lattice.site_energy.flags.writeable)
+        lattice.set_site_energies({"B": 0.5})
+        lattice.sites[0].energy = 0.25
+        np.testing.assert_array_equal(lattice.site_energy, [0.25, 0.5, 0.0, 0.5, 0.0])
+        np.testing.assert_array_equal(source.site_energy, 0.0)
+        self.assertIs(lattice.writeable_site_energy(), lattice.site_energy)
+
+    def test_from_arrays_raises_ValueError_for_unknown_neighbours(self):
+        with self.assertRaises(ValueError):
+            Lattice.from_arrays([1, 2], np.zeros((2, 3)), [0, 1, 2], [2, 3], ["A", "A"], self.cell_lengths)
+        with self.assertRaises(ValueError):
+            Lattice.from_arrays([1, 1], np.zeros((2, 3)), [0, 1, 2], [1, 1], ["A", "A"], self.cell_lengths)
+
     def test_vacant_sites(self):
         occupied = [True, False, True, False, True]
         for o, site in zip(occupied, self.lattice.sites):
             site.is_occupied = o
-        self.assertEqual(list(self.lattice.vacant_sites()), self.mock_sites[1:5:2])
+        self.assertEqual(list(self.lattice.vacant_sites()), self.sites[1:5:2])
 
     def test_occupied_sites(self):
         occupied = [True, False, True, False, True]
         for o, site in zip(occupied, self.lattice.sites):
             site.is_occupied = o
-        self.assertEqual(list(self.lattice.occupied_sites()), self.mock_sites[0:5:2])
+        self.assertEqual(list(self.lattice.occupied_sites()), self.sites[0:5:2])
 
     def test_vacant_site_numbers(self):
         occupied = [True, False, True, False, True]
@@ -151,37 +313,94 @@ class LatticeTestCase(unittest.TestCase):
                 mock_site_with_id.assert_has_calls([call(2), call(3)])
 
     def test_update(self):
+        jump = Mock(spec=Jump)  # the jump selected for the update
+        jump.initial_site = self.sites[0]
+        jump.final_site = self.sites[1]
+        self.lattice.move_atom = Mock()
+        self.lattice.update(jump)
+        self.lattice.move_atom.assert_called_once_with(0, 1)
+
+    def test_move_atom(self):
         atom = Mock(spec=Atom)  # the jumping atom
         atom.number = 28
         atom.number_of_hops = 4
         atom.dr = np.array([1.0, 2.0, 3.0])
         atom.summed_dr2 = 1.3
-        jump = Mock(spec=Jump)  # the jump selected for the update
-        jump.initial_site = Mock(spec=Site)  # atom jumps from this site
-        jump.final_site = Mock(spec=Site)  # atom jumps to this site
-        jump.initial_site.atom = atom
-        jump.dr = Mock(return_value=np.array([2.0, 3.0, 4.0]))
-        self.lattice.cell_lengths = np.array([1.0, 2.0, 3.0])
-        self.lattice.update(jump)
-        jump.dr.assert_called_with(self.lattice.cell_lengths)
-        self.assertEqual(jump.final_site.occupation, atom.number)
-        self.assertEqual(jump.initial_site.occupation, 0)
-        self.assertEqual(jump.initial_site.atom, None)
-        self.assertEqual(jump.final_site.atom, atom)
-        self.assertEqual(jump.final_site.is_occupied, True)
-        self.assertEqual(jump.initial_site.is_occupied, False)
-        self.assertEqual(atom.site, jump.final_site)
+        initial_site, final_site = self.sites[0], self.sites[1]  # atom jumps from site 0 to site 1
+        initial_site.atom = atom
+        initial_site.occupation = atom.number
+        initial_site.is_occupied = True
+        self.lattice.bond_vectors[0] = [2.0, 3.0, 4.0]
+        self.lattice.bond_lengths_squared[0] = 29.0
+        self.lattice.move_atom(0, 1)
+        self.assertEqual(final_site.occupation, atom.number)
+        self.assertEqual(initial_site.occupation, 0)
+        self.assertEqual(initial_site.atom, None)
+        self.assertEqual(final_site.atom, atom)
+        self.assertEqual(final_site.is_occupied, True)
+        self.assertEqual(initial_site.is_occupied, False)
+        self.assertEqual(atom.site, final_site)
         self.assertEqual(atom.number_of_hops, 5)
         np.testing.assert_array_equal(atom.dr, np.array([3.0, 5.0, 7.0]))
         self.assertEqual(atom.summed_dr2, 30.3)
 
+    def test_bond_vectors(self):
+        np.testing.assert_array_equal(self.lattice.bond_vectors[:, 0], [1.0, 2.0, -1.0, 1.0, -2.0, -1.0, 1.0, -1.0])
+        np.testing.assert_array_equal(self.lattice.bond_vectors[:, 1:], np.zeros((8, 2)))
+        np.testing.assert_array_equal(self.lattice.bond_lengths_squared, [1.0, 4.0, 1.0, 1.0, 4.0, 1.0, 1.0, 1.0])
+
+    def test_compute_bond_vectors_uses_minimum_image(self):
+        self.lattice.coordinates[:3] = [[0.5, 1.0, 8.5], [6.5, 2.0, 0.5], [0.5, 1.0, 8.5]]
+        self.lattice.compute_bond_vectors()
+        np.testing.assert_array_equal(self.lattice.bond_vectors[0], [-1.0, 1.0, 1.0])
+        np.testing.assert_array_equal(self.lattice.bond_vectors[2], [1.0, -1.0, -1.0])
+        self.assertEqual(self.lattice.bond_lengths_squared[0], 3.0)
+
+    def test_bond_index(self):
+        self.assertEqual(self.lattice.bond_index(1, 2), 3)
+        self.assertEqual(self.lattice.bond_index(4, 3), 7)
+        with self.assertRaises(ValueError):
+            self.lattice.bond_index(0, 4)
+
+    def test_jump_relative_probability_with_lookup_table(self):
+        self.lattice.jump_lookup_table = Mock(jump_probability={"A": {"B": {1: {1: 0.3}}}})
+        self.sites[2].is_occupied = True
+        self.assertEqual(self.lattice.jump_relative_probability(0, 1), (0.3, ("A", "B", 1, 1)))
+
+    def test_jump_relative_probability(self):
+        self.lattice.params = PARAMS
+        self.lattice.set_nn_energy(0.1)
+        self.sites[0].is_occupied = True
+        self.sites[1].energy = -0.2
+        self.assertEqual(self.lattice.jump_relative_probability(0, 1), (1.0, None))
+        self.sites[1].energy = 0.2
+        p, rate_class = self.lattice.jump_relative_probability(0, 1)
+        self.assertAlmostEqual(p, math.exp(-0.2 / PARAMS.kT))
+        self.assertIsNone(rate_class)
+
+    def test_jump_relative_probability_matches_Jump(self):
+        self.lattice.params = PARAMS
+        self.lattice.set_nn_energy(0.05)
+        self.lattice.set_cn_energies(
+            {
+                "A": {"A": {0: 0.0, 1: 0.2, 2: 0.5}, "B": {0: 0.0, 1: 0.1}},
+                "B": {"A": {0: 0.0, 1: -0.1, 2: 0.3}, "C": {0: 0.0, 1: 0.4}},
+                "C": {"B": {0: 0.0, 1: 0.2}},
+            }
+        )
+        self.sites[0].is_occupied = True
+        self.sites[3].is_occupied = True
+        for i, j in [(0, 1), (0, 2), (3, 4)]:
+            expected = Jump(self.sites[i], self.sites[j], 0.05, self.lattice.cn_energies, params=PARAMS)
+            self.assertEqual(self.lattice.jump_relative_probability(i, j), (expected.relative_probability, None))
+
     def test_populate_sites_raises_ValueError_with_too_many_atoms(self):
         with self.assertRaises(ValueError):
             self.lattice.populate_sites(number_of_atoms=10)
 
     def test_populate_sites(self):
         number_of_atoms = 2
-        with patch("random.sample") as mock_random_sample:
+        with patch.object(self.lattice.rng, "sample") as mock_random_sample:
             with patch("lattice_mc.atom.Atom") as mock_Atom:
                 mock_sites = [Mock(spec=Site), Mock(spec=Site)]
                 mock_random_sample.return_value = mock_sites
@@ -192,7 +411,7 @@ class LatticeTestCase(unittest.TestCase):
                 self.assertEqual(self.lattice.number_of_occupied_sites, number_of_atoms)
 
     def test_populate_sites_with_selected_sites(self):
-        with patch("random.sample") as mock_random_sample:
+        with patch.object(self.lattice.rng, "sample") as mock_random_sample:
             with patch("lattice_mc.atom.Atom") as mock_Atom:
                 mock_sites = [Mock(spec=Site), Mock(spec=Site)]
                 mock_random_sample.return_value = mock_sites
@@ -201,23 +420,51 @@ class LatticeTestCase(unittest.TestCase):
                 for site in mock_random_sample.call_args[0][0]:
                     self.assertEqual(site.label, "A")
 
-    @patch("lattice_mc.transitions.Transitions")
-    def test_jump(self, mock_Transitions):
-        potential_jumps = [Mock(spec=Jump), Mock(spec=Jump)]
-        self.lattice.potential_jumps = Mock(return_value=potential_jumps)
+    def test_save_and_load(self):
+        self.lattice.set_site_energies({"B": 0.5})
+        with tempfile.TemporaryDirectory() as directory:
+            self.lattice.save(directory)
+            for share_arrays in [False, True]:
+                lattice = Lattice.load(directory, share_arrays=share_arrays)
+                self.assertEqual([s.number for s in lattice.sites], [1, 2, 3, 4, 5])
+                np.testing.assert_array_equal(lattice.neighbour_indices, self.lattice.neighbour_indices)
+                np.testing.assert_array_equal(lattice.site_energy, [0.0, 0.5, 0.0, 0.5, 0.0])
+                np.testing.assert_array_equal(lattice.cell_lengths, self.cell_lengths)
+                self.assertEqual(lattice.coordinates.flags.writeable, not share_arrays)
+            del lattice
+
+    def test_site_indices(self):
+        np.testing.assert_array_equal(site_indices(np.array([5, -2, 9]), np.array([9, 5, -2, 9])), [2, 0, 1, 2])
+        self.assertEqual(len(site_indices(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))), 0)
+        with self.assertRaises(ValueError):
+            site_indices(np.zeros(0, dtype=np.int64), np.array([1]))
+
+    def test_place_atoms(self):
+        atoms = self.lattice.populate_sites(2)
+        self.lattice.event_catalogue = Mock(spec=EventCatalogue)
+        self.lattice.place_atoms(atoms, np.array([3, 0]))
+        np.testing.assert_array_equal(self.lattice.occupied, [True, False, False, True, False])
+        np.testing.assert_array_equal(self.lattice.occupation, [atoms[1].number, 0, 0, atoms[0].number, 0])
+        self.assertEqual(self.lattice.site_atoms, [atoms[1], None, None, atoms[0], None])
+        self.assertIs(atoms[0].site, self.sites[3])
+        self.assertIs(atoms[1].site, self.sites[0])
+        np.testing.assert_array_equal(self.lattice.nn_occupied, [0, 1, 1, 0, 1])
+        self.assertEqual(self.lattice.number_of_occupied_sites, 2)
+        self.assertIsNone(self.lattice.event_catalogue)
+
+    def test_jump(self):
         self.lattice.params = PARAMS
-        selected_jump = Mock(spec=Jump)
-        mock_transitions = Mock(spec=Transitions)
-        mock_transitions.random = Mock(return_value=selected_jump)
-        mock_transitions.time_to_jump = Mock(return_value=5.0)
-        mock_Transitions.return_value = mock_transitions
+        mock_catalogue = MagicMock(spec=EventCatalogue)
+        mock_catalogue.__len__.return_value = 2
+        mock_catalogue.select = Mock(return_value=(3, 4))
+        mock_catalogue.time_to_jump = Mock(return_value=5.0)
+        self.lattice.event_catalogue = mock_catalogue
         self.lattice.time = 2.0
         self.lattice.update_site_occupation_times = Mock()
-        self.lattice.update = Mock()
+        self.lattice.move_atom = Mock()
         self.lattice.jump()
-        mock_Transitions.assert_called_with(potential_jumps, params=PARAMS)
-        self.lattice.update.assert_called_with(selected_jump)
-        self.lattice.update_site_occupation_times.assert_called_with(5.0)
+        self.lattice.move_atom.assert_called_with(3, 4)
+        self.lattice.update_site_occupation_times.assert_not_called()
         self.assertEqual(self.lattice.time, 2.0 + 5.0)
 
     def test_potential_jumps_raises_RuntimeError_if_params_not_set(self):
@@ -227,46 +474,115 @@ class LatticeTestCase(unittest.TestCase):
             self.lattice.potential_jumps()
 
     def test_jump_raises_BlockedLatticeError_if_no_possible_jumps(self):
-        potential_jumps = []
-        self.lattice.potential_jumps = Mock(return_value=potential_jumps)
+        self.lattice.event_catalogue = MagicMock(spec=EventCatalogue)
         with self.assertRaises(BlockedLatticeError):
             self.lattice.jump()
 
+    @patch("lattice_mc.event_catalogue.EventCatalogue")
+    def test_jump_builds_event_catalogue(self, mock_EventCatalogue):
+        mock_EventCatalogue.return_value = MagicMock(spec=EventCatalogue)
+        with self.assertRaises(BlockedLatticeError):
+            self.lattice.jump()
+        mock_EventCatalogue.assert_called_with(self.lattice)
+        self.assertIs(self.lattice.event_catalogue, mock_EventCatalogue.return_value)
+
+    def test_jump_verifies_event_catalogue(self):
+        self.lattice.event_catalogue = MagicMock(spec=EventCatalogue)
+        self.lattice.verify_event_catalogue = True
+        with self.assertRaises(BlockedLatticeError):
+            self.lattice.jump()
+        self.lattice.event_catalogue.verify.assert_called_once_with()
+
+    def test_setting_params_invalidates_event_catalogue(self):
+        self.lattice.event_catalogue = Mock(spec=EventCatalogue)
+        self.lattice.params = PARAMS
+        self.assertIsNone(self.lattice.event_catalogue)
+        self.lattice.event_catalogue = Mock(spec=EventCatalogue)
+        self.lattice.params = PARAMS
+        self.assertIsNotNone(self.lattice.event_catalogue)
+
+    def test_setting_jump_lookup_table_invalidates_event_catalogue(self):
+        self.lattice.event_catalogue = Mock(spec=EventCatalogue)
+        self.lattice.jump_lookup_table = "foo"
+        self.assertIsNone(self.lattice.event_catalogue)
+        self.assertEqual(self.lattice.jump_lookup_table, "foo")
+
+    def test_move_atom_updates_event_catalogue(self):
+        self.sites[0].atom = Mock(spec=Atom, number=3, dr=np.zeros(3), number_of_hops=0, summed_dr2=0.0)
+        self.sites[0].is_occupied = True
+        self.lattice.event_catalogue = Mock(spec=EventCatalogue)
+        self.lattice.move_atom(0, 1)
+        self.lattice.event_catalogue.update.assert_called_once_with(0, 1)
+
     def test_update_site_occupation_times(self):
-        occupied_sites = [Mock(spec=Site), Mock(spec=Site)]
+        occupied_sites = [self.sites[0], self.sites[3]]
+        for site in occupied_sites:
+            site.is_occupied = True
         occupied_sites[0].time_occupied = 2.0
         occupied_sites[1].time_occupied = 3.2
-        self.lattice.occupied_sites = Mock(return_value=occupied_sites)
+        self.sites[1].time_occupied = 1.0
         self.lattice.update_site_occupation_times(4.2)
         self.assertEqual(occupied_sites[0].time_occupied, 2.0 + 4.2)
         self.assertEqual(occupied_sites[1].time_occupied, 3.2 + 4.2)
+        self.assertEqual(self.sites[1].time_occupied, 1.0)
 
     def test_site_occupation_statistics(self):
-        self.lattice.site_labels = ["A", "B"]
-        sites = [Mock(spec=Site), Mock(spec=Site)]
-        sites[0].time_occupied = 2.0
-        sites[1].time_occupied = 3.2
-        sites[0].label = "A"
-        sites[1].label = "B"
-        self.lattice.sites = sites
+        self.sites[0].time_occupied = 2.0
+        self.sites[1].time_occupied = 3.2
+        self.lattice.time = 4.0
+        occupation_stats = self.lattice.site_occupation_statistics()
+        self.assertEqual(occupation_stats, {"A": 0.5, "B": 0.8, "C": 0.0})
+
+    def test_occupation_times_are_accumulated_lazily(self):
+        self.lattice.time = 1.0
+        self.sites[0].is_occupied = True
+        self.lattice.time = 3.5
+        self.assertEqual(self.lattice.time_occupied[0], 0.0)
+        self.assertEqual(self.sites[0].time_occupied, 2.5)
+        self.sites[0].is_occupied = False
+        self.assertEqual(self.lattice.time_occupied[0], 2.5)
+        self.lattice.time = 5.0
+        self.assertEqual(self.sites[0].time_occupied, 2.5)
+
+    def test_accumulate_occupation_times(self):
+        self.sites[0].is_occupied = True
+        self.sites[1].time_occupied = 1.0
+        self.lattice.time = 2.0
+        self.lattice.accumulate_occupation_times()
+        np.testing.assert_array_equal(self.lattice.time_occupied, [2.0, 1.0, 0.0, 0.0, 0.0])
+        np.testing.assert_array_equal(self.lattice.occupied_since, np.full(5, 2.0))
+
+    def test_site_occupation_statistics_includes_currently_occupied_sites(self):
+        self.sites[4].is_occupied = True
         self.lattice.time = 4.0
         occupation_stats = self.lattice.site_occupation_statistics()
-        self.assertEqual(occupation_stats, {"A": 0.5, "B": 0.8})
+        self.assertEqual(occupation_stats, {"A": 0.0, "B": 0.0, "C": 1.0})
+
+    def test_site_occupation_statistics_returns_None_at_time_zero(self):
+        self.assertIsNone(self.lattice.site_occupation_statistics())
 
     def test_set_site_energies(self):
-        site_energies = {"A": 0.2, "B": 0.4}
-        sites = [Mock(spec=Site), Mock(spec=Site)]
-        sites[0].label = "A"
-        sites[1].label = "B"
-        self.lattice.sites = sites
+        site_energies = {"A": 0.2, "B": 0.4, "X": 1.0}
         self.lattice.set_site_energies(site_energies)
-        self.assertEqual(sites[0].energy, 0.2)
-        self.assertEqual(sites[1].energy, 0.4)
+        self.assertEqual(self.sites[0].energy, 0.2)
+        self.assertEqual(self.sites[1].energy, 0.4)
+        np.testing.assert_array_equal(self.lattice.site_energy, [0.2, 0.4, 0.2, 0.4, 0.0])
+        self.assertEqual(self.lattice.site_energies, site_energies)
 
     def test_set_nn_energy(self):
         self.lattice.set_nn_energy("foo")
         self.assertEqual(self.lattice.nn_energy, "foo")
 
+    def test_set_event_selection(self):
+        self.lattice.event_catalogue = Mock(spec=EventCatalogue)
+        self.lattice.set_event_selection("rate-class")
+        self.assertEqual(self.lattice.event_selection, "rate-class")
+        self.assertIsNone(self.lattice.event_catalogue)
+
+    def test_set_event_selection_with_invalid_method(self):
+        with self.assertRaises(ValueError):
+            self.lattice.set_event_selection("foo")
+
     def test_set_cn_energies(self):
         cn_energies = {"A": 0.5, "B": 0.3}
         sites = [Mock(spec=Site), Mock(spec=Site)]
@@ -334,10 +650,10 @@ class LatticeTestCase(unittest.TestCase):
         self.lattice.sites = sites
         self.assertEqual(self.lattice.connected_site_pairs()["A"], ["A", "B", "C"])
 
-    @patch("random.sample")
-    def test_transmute_sites_selects_from_old_site_label(self, mock_random_sample):
+    def test_transmute_sites_selects_from_old_site_label(self):
         sites = [Mock(spec=Site), Mock(spec=Site)]
-        mock_random_sample.return_value = [sites[1]]
+        mock_random_sample = Mock(return_value=[sites[1]])
+        self.lattice.rng.sample = mock_random_sample
         sites[0].label = "A"
         sites[1].label = "B"
         self.lattice.sites = sites
@@ -350,39 +666,32 @@ class LatticeTestCase(unittest.TestCase):
 
     @patch("lattice_mc.cluster.Cluster")
     def test_connected_sites(self, mock_cluster):
-        sites = [Mock(spec=Site), Mock(spec=Site)]
-        sites[0].label = "A"
-        sites[1].label = "A"
-        self.lattice.site_labels = set([s.label for s in sites])
-        initial_clusters = [Mock(spec=Cluster), Mock(spec=Cluster)]
-        initial_clusters[0].sites = sites[0]
-        initial_clusters[1].sites = sites[1]
-        initial_clusters[0].neighbours = sites[0]
-        initial_clusters[1].neighbours = sites[1]
-        merged_cluster = Mock(spec=Cluster)
-        merged_cluster.neighbours = ()
-        mock_cluster.side_effect = initial_clusters
+        sites = [Mock(spec=Site), Mock(spec=Site), Mock(spec=Site)]
+        sites[0].p_neighbours = [sites[2]]
+        sites[1].p_neighbours = []
+        sites[2].p_neighbours = [sites[0]]
+        clusters = [Mock(spec=Cluster), Mock(spec=Cluster)]
+        mock_cluster.side_effect = clusters
         self.lattice.sites = sites
-        initial_clusters[0].is_neighbouring.return_value = True
-        initial_clusters[0].merge.return_value = merged_cluster
-        self.assertEqual(self.lattice.connected_sites(), [merged_cluster])
+        self.assertEqual(self.lattice.connected_sites(), clusters)
+        mock_cluster.assert_has_calls([call([sites[0], sites[2]]), call([sites[1]])])
 
     @patch("lattice_mc.cluster.Cluster")
     def test_connected_sites_with_site_labels(self, mock_cluster):
         sites = [Mock(spec=Site), Mock(spec=Site)]
         sites[0].label = "A"
         sites[1].label = "B"
+        sites[0].p_neighbours = [sites[1]]
         self.lattice.site_labels = set([s.label for s in sites])
         initial_clusters = [Mock(spec=Cluster)]
-        initial_clusters[0].sites = sites[0]
-        initial_clusters[0].neighbours = ()
         mock_cluster.side_effect = initial_clusters
         self.lattice.sites = sites
         self.lattice.select_sites = Mock(return_value=[sites[0]])
-        initial_clusters[0].is_neighbouring.return_value = False
         site_labels = "B"
         self.assertEqual(self.lattice.connected_sites(site_labels), initial_clusters)
         self.lattice.select_sites.assert_called_with(site_labels)
+        mock_cluster.assert_called_once_with([sites[0]])
+        initial_clusters[0].remove_sites_from_neighbours.assert_called_once_with({"A"})
 
     def test_select_sites(self):
         sites = [Mock(spec=Site), Mock(spec=Site), Mock(spec=Site)]
@@ -398,8 +707,8 @@ class LatticeTestCase(unittest.TestCase):
     def test_detached_sites(self):
         sites = [Mock(spec=Site), Mock(spec=Site)]
         clusters = [Mock(spec=Cluster), Mock(spec=Cluster)]
-        clusters[0].is_periodically_contiguous.return_value = (True, True, True)
-        clusters[1].is_periodically_contiguous.return_value = (False, False, False)
+        clusters[0].is_percolating.return_value = (False, True, False)
+        clusters[1].is_percolating.return_value = (False, False, False)
         clusters[0].sites = set([sites[0]])
         clusters[1].sites = set([sites[1]])
         sites[0].label = "A"
@@ -408,40 +717,17 @@ class LatticeTestCase(unittest.TestCase):
         self.lattice.connected_sites = Mock(return_value=clusters)
         self.lattice.sites = sites
         self.assertEqual(self.lattice.detached_sites(), [sites[1]])
+        clusters[0].is_percolating.assert_called_with(self.lattice.cell_lengths)
 
-    @patch("lattice_mc.lattice.Lattice.site_with_id")
-    @patch("lattice_mc.lattice.Lattice.initialise_site_lookup_table")
-    @patch("lattice_mc.lattice.Lattice.enforce_periodic_boundary_conditions")
     @patch("lattice_mc.lattice.Lattice.potential_jumps")
-    def test_is_blocked_returns_true(self, p_jumps, pbc, islt, site_id):
+    def test_is_blocked_returns_true(self, p_jumps):
         p_jumps.return_value = []
-        site_id.side_effect = (1, 2)
-        site_labels = ["A", "A"]
-        site_neighbours = [[], []]
-        mock_sites = [Mock(spec=Site, label=label, neighbours=n) for label, n in zip(site_labels, site_neighbours)]
-        cell_lengths = np.array([7.0, 8.0, 9.0])
-        lattice = Lattice(mock_sites, cell_lengths)
-        lattice.sites[0].is_occupied = True
-        lattice.sites[1].is_occupied = True
-        lattice.number_of_occupied_sites = 1
-        self.assertEqual(lattice.is_blocked(), True)
+        self.assertEqual(self.lattice.is_blocked(), True)
 
-    @patch("lattice_mc.lattice.Lattice.site_with_id")
-    @patch("lattice_mc.lattice.Lattice.initialise_site_lookup_table")
-    @patch("lattice_mc.lattice.Lattice.enforce_periodic_boundary_conditions")
     @patch("lattice_mc.lattice.Lattice.potential_jumps")
-    def test_is_blocked_returns_false(self, p_jumps, pbc, islt, site_id):
+    def test_is_blocked_returns_false(self, p_jumps):
         p_jumps.return_value = [Mock(spec=Jump)]
-        site_id.side_effect = (1, 2)
-        site_labels = ["A", "A"]
-        site_neighbours = [[2], [1]]
-        mock_sites = [Mock(spec=Site, label=label, neighbours=n) for label, n in zip(site_labels, site_neighbours)]
-        cell_lengths = np.array([7.0, 8.0, 9.0])
-        lattice = Lattice(mock_sites, cell_lengths)
-        lattice.sites[0].is_occupied = True
-        lattice.sites[1].is_occupied = True
-        lattice.number_of_occupied_sites = 1
-        self.assertEqual(lattice.is_blocked(), False)
+        self.assertEqual(self.lattice.is_blocked(), False)
 
 
 if __name__ == "__main__":
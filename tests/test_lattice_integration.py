@@ -1,26 +1,26 @@
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 
 import numpy as np
 
+from lattice_mc import init_lattice
 from lattice_mc.lattice import Lattice
 from lattice_mc.lattice_site import Site
+from lattice_mc.simulation import SimulationParameters
 
 
 class LatticeIntegrationTestCase(unittest.TestCase):
     """Tests for integration of Lattice class with the rest of the code"""
 
-    @patch("lattice_mc.lattice.Lattice.site_with_id")
-    @patch("lattice_mc.lattice.Lattice.initialise_site_lookup_table")
-    @patch("lattice_mc.lattice.Lattice.enforce_periodic_boundary_conditions")
-    def setUp(self, pbc, islt, site_id):
-        site_id.side_effect = (1, 2, 3, 4, 5, 6, 7, 8)
-        self.site_id = site_id
+    def setUp(self):
         site_labels = ["A", "A", "A", "A", "A"]
         site_neighbours = [[2, 3], [1, 3], [1, 2], [5], [4]]
-        self.mock_sites = [Mock(spec=Site, label=label, neighbours=n) for label, n in zip(site_labels, site_neighbours)]
+        self.sites = [
+            Site(i + 1, np.array([float(i), 0.0, 0.0]), n, 0.0, label)
+            for i, (label, n) in enumerate(zip(site_labels, site_neighbours))
+        ]
         self.cell_lengths = np.array([7.0, 8.0, 9.0])
-        self.lattice = Lattice(self.mock_sites, self.cell_lengths)
+        self.lattice = Lattice(self.sites, self.cell_lengths)
 
     def test_connected_sites(self):
         sites = [Mock(spec=Site), Mock(spec=Site)]
@@ -75,6 +75,46 @@ class LatticeIntegrationTestCase(unittest.TestCase):
                 self.assertEqual(sites[4] in c.sites, True)
                 self.assertEqual(c.size(), 2)
 
+    def test_connected_sites_in_a_lattice(self):
+        clusters = self.lattice.connected_sites()
+        self.assertEqual([c.sites for c in clusters], [set(self.sites[:3]), set(self.sites[3:])])
+        self.assertEqual([c.neighbours for c in clusters], [set(), set()])
+
+    def test_connected_sites_with_site_labels_in_a_lattice(self):
+        lattice = init_lattice.square_lattice(4, 1, 1.0)
+        lattice.sites[1].label = "B"
+        lattice.site_labels = {"L", "B"}
+        clusters = lattice.connected_sites("L")
+        self.assertEqual([c.sites for c in clusters], [set(lattice.sites[2:]) | {lattice.sites[0]}])
+        self.assertEqual(clusters[0].neighbours, set())
+
+    def test_detached_sites_in_a_lattice(self):
+        lattice = init_lattice.square_lattice(4, 4, 1.0)
+        for site in lattice.sites:
+            if site.r[0] == 0.0:
+                site.label = "B"
+        lattice.site_labels = {"L", "B"}
+        self.assertEqual(lattice.detached_sites("L"), [])
+        self.assertEqual(lattice.connected_sites("L")[0].windings(lattice.cell_lengths), [(0, 1, 0)])
+        for site in lattice.sites:
+            if site.r[1] == 0.0:
+                site.label = "B"
+        self.assertEqual(set(lattice.detached_sites("L")), set(lattice.select_sites("L")))
+        self.assertEqual(len(lattice.detached_sites("L")), 9)
+
+    def test_maintained_neighbour_counts_match_a_recount(self):
+        lattice = init_lattice.square_lattice(4, 4, 1.0)
+        lattice.transmute_sites("L", "M", 5)
+        lattice.populate_sites(6)
+        lattice.params = SimulationParameters(temperature=298.0, rate_prefactor=1e13)
+        for _ in range(50):
+            lattice.jump()
+        maintained = (lattice.nn_occupied.copy(), lattice.label_neighbours.copy(), lattice.label_nn_occupied.copy())
+        lattice.count_occupied_neighbours()
+        np.testing.assert_array_equal(maintained[0], lattice.nn_occupied)
+        np.testing.assert_array_equal(maintained[1], lattice.label_neighbours)
+        np.testing.assert_array_equal(maintained[2], lattice.label_nn_occupied)
+
 
 if __name__ == "__main__":
     unittest.main()
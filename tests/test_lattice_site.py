@@ -1,7 +1,9 @@
 import unittest
 from unittest.mock import Mock
 
-from lattice_mc.lattice_site import Site
+import numpy as np
+
+from lattice_mc.lattice_site import Site, SiteViews
 
 
 class SiteTestCase(unittest.TestCase):
@@ -24,6 +26,33 @@ class SiteTestCase(unittest.TestCase):
             Mock(spec=Site, is_occupied=False, label="B"),
         ]
 
+    def test_views(self):
+        lattice = Mock(number_of_sites=3, numbers=np.array([4, 5, 6]))
+        first_index = Site.index
+        sites = Site.views(lattice)
+        self.assertEqual([site.number for site in sites], [4, 5, 6])
+        self.assertEqual([site.lattice_index for site in sites], [0, 1, 2])
+        self.assertEqual([site.index for site in sites], [first_index, first_index + 1, first_index + 2])
+        self.assertEqual(Site.index, first_index + 3)
+        self.assertIs(sites[2].lattice, lattice)
+        self.assertIsNone(sites[0].cn_occupation_energies)
+
+    def test_site_views_are_created_when_first_used(self):
+        lattice = Mock(number_of_sites=3, numbers=np.array([4, 5, 6]))
+        first_index = Site.index
+        sites = SiteViews(lattice)
+        self.assertEqual(Site.index, first_index + 3)
+        self.assertEqual(len(sites), 3)
+        self.assertEqual(sites.sites, [None, None, None])
+        self.assertEqual((sites[-1].number, sites[-1].lattice_index, sites[-1].index), (6, 2, first_index + 2))
+        self.assertIs(sites[2], sites[-1])
+        self.assertEqual(sites.sites[:2], [None, None])
+        self.assertEqual([site.number for site in sites[:2]], [4, 5])
+        self.assertEqual([site.number for site in sites], [4, 5, 6])
+        self.assertIs(sites[0].lattice, lattice)
+        with self.assertRaises(IndexError):
+            sites[3]
+
     def test_site_is_initialised(self):
         self.assertEqual(self.site.number, self.number)
         self.assertEqual(self.site.index, Site.index - 1)
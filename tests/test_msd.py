@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+import lattice_mc
+from lattice_mc import init_lattice
+from lattice_mc.msd import MSDAccumulator
+from lattice_mc.species import Species
+from lattice_mc.trajectory import TrajectoryReader
+
+
+def random_walk(n_samples=300, n_atoms=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(size=(n_samples, n_atoms, 3)), axis=0)
+
+
+def brute_force_msd(positions, lag):
+    dr = positions[lag:] - positions[:-lag]
+    return np.mean(np.sum(dr * dr, axis=2)), np.mean(np.sum(np.square(dr.sum(axis=1)), axis=1))
+
+
+class MSDAccumulatorTestCase(unittest.TestCase):
+    """Tests for MSDAccumulator class"""
+
+    def setUp(self):
+        self.species = Mock(spec=Species)
+
+    def test_accumulator_raises_ValueError_for_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            MSDAccumulator(self.species, 0.0)
+        with self.assertRaises(ValueError):
+            MSDAccumulator(self.species, 1.0, coarsening=1)
+        with self.assertRaises(ValueError):
+            MSDAccumulator(self.species, 1.0, points_per_level=4, coarsening=4)
+
+    def test_curves_are_empty_before_sampling(self):
+        curves = MSDAccumulator(self.species, 1.0).curves()
+        self.assertEqual(len(curves.lag_time), 0)
+        self.assertEqual(len(curves.tracer), 0)
+
+    def test_level_zero_averages_over_every_origin(self):
+        positions = random_walk()
+        accumulator = MSDAccumulator(self.species, 0.5, points_per_level=8, coarsening=2)
+        for x in positions:
+            accumulator.sample(x)
+        curves = accumulator.curves()
+        np.testing.assert_array_equal(curves.lag_time[:7], 0.5 * np.arange(1, 8))
+        for lag in range(1, 8):
+            tracer, collective = brute_force_msd(positions, lag)
+            self.assertAlmostEqual(curves.tracer[lag - 1], tracer)
+            self.assertAlmostEqual(curves.collective[lag - 1], collective)
+            self.assertEqual(curves.number_of_origins[lag - 1], 300 - lag)
+
+    def test_higher_levels_use_coarsened_samples(self):
+        positions = random_walk(n_samples=257)
+        accumulator = MSDAccumulator(self.species, 1.0, points_per_level=8, coarsening=2, n_levels=3)
+        for x in positions:
+            accumulator.sample(x)
+        self.assertEqual(accumulator.level_samples, [257, 129, 65])
+        curves = accumulator.curves()
+        np.testing.assert_array_equal(curves.lag_time, list(range(1, 8)) + [8, 10, 12, 14] + [16, 20, 24, 28])
+        coarse = positions[::4]
+        for j in range(4, 8):
+            tracer, collective = brute_force_msd(coarse, j)
+            self.assertAlmostEqual(curves.tracer[7 + j], tracer)
+            self.assertAlmostEqual(curves.collective[7 + j], collective)
+            self.assertEqual(curves.number_of_origins[7 + j], 65 - j)
+
+    def test_advance_samples_before_each_time(self):
+        self.species.atom_dr = np.zeros((2, 3))
+        accumulator = MSDAccumulator(self.species, 1.0, start_time=0.5)
+        accumulator.advance(0.5)
+        self.assertEqual(accumulator.number_of_samples, 0)
+        accumulator.advance(2.5)
+        self.assertEqual(accumulator.number_of_samples, 2)
+        self.assertEqual(accumulator.next_sample_time, 2.5)
+
+    def test_advance_events_matches_advance(self):
+        rng = np.random.default_rng(4)
+        atoms = rng.integers(0, 3, 40)
+        displacements = rng.normal(size=(40, 3))
+        times = np.cumsum(rng.random(40))
+        self.species.atom_dr = np.zeros((3, 3))
+        expected = MSDAccumulator(self.species, 0.3)
+        for k, dr, time in zip(atoms, displacements, times):
+            expected.advance(time)
+            self.species.atom_dr[k] += dr
+        accumulator = MSDAccumulator(self.species, 0.3)
+        accumulator.advance_events(np.zeros((3, 3)), atoms[:25], displacements[:25], times[:25])
+        accumulator.advance_events(np.zeros((3, 3)), atoms[:0], displacements[:0], times[:0])
+        start = np.zeros((3, 3))
+        np.add.at(start, atoms[:25], displacements[:25])
+        accumulator.advance_events(start, atoms[25:], displacements[25:], times[25:])
+        self.assertEqual(accumulator.number_of_samples, expected.number_of_samples)
+        np.testing.assert_array_equal(accumulator.tracer_sum, expected.tracer_sum)
+        np.testing.assert_array_equal(accumulator.collective_sum, expected.collective_sum)
+
+    def test_state_continues_sampling(self):
+        positions = random_walk(n_samples=100, n_atoms=3)
+        self.species.atom_dr = np.zeros((3, 3))
+        expected = MSDAccumulator(self.species, 1.0, points_per_level=4)
+        for dr in positions:
+            expected.sample(dr)
+        accumulator = MSDAccumulator(self.species, 1.0, points_per_level=4)
+        for dr in positions[:37]:
+            accumulator.sample(dr)
+        resumed = MSDAccumulator(self.species, 1.0, points_per_level=4)
+        resumed.state = accumulator.state
+        for dr in positions[37:]:
+            resumed.sample(dr)
+        self.assertEqual(resumed.number_of_samples, expected.number_of_samples)
+        np.testing.assert_array_equal(resumed.tracer_sum, expected.tracer_sum)
+        np.testing.assert_array_equal(resumed.collective_sum, expected.collective_sum)
+        np.testing.assert_array_equal(resumed.counts, expected.counts)
+
+    def test_state_raises_ValueError_for_mismatched_accumulator(self):
+        self.species.atom_dr = np.zeros((3, 3))
+        state = MSDAccumulator(self.species, 1.0).state
+        for accumulator in [
+            MSDAccumulator(self.species, 2.0),
+            MSDAccumulator(self.species, 1.0, points_per_level=8),
+            MSDAccumulator(self.species, 1.0, n_levels=10),
+        ]:
+            with self.assertRaises(ValueError):
+                accumulator.state = state
+        self.species.atom_dr = np.zeros((4, 3))
+        with self.assertRaises(ValueError):
+            MSDAccumulator(self.species, 1.0).state = state
+
+
+class MSDSimulationTestCase(unittest.TestCase):
+    """Check MSDs sampled during simulation runs against a replay of the recorded trajectory"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "trajectory.trj")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_simulation_msd_matches_trajectory(self):
+        for engine in ["python", "kernel"]:
+            params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=7)
+            s = lattice_mc.Simulation(params)
+            s.lattice = init_lattice.cubic_lattice(4, 4, 4, 1.0)
+            s.set_nn_energy(0.05)
+            s.set_number_of_atoms(20)
+            s.set_number_of_equilibration_jumps(20)
+            s.set_number_of_jumps(2000)
+            s.run(engine=engine, trajectory_file=self.filename, msd_interval=2e-13)
+            self.assertIsNone(s.lattice.msd)
+            with TrajectoryReader(self.filename) as reader:
+                events = np.concatenate(list(reader.events()))
+            sample_times = 2e-13 * np.arange(s.msd.number_of_samples)
+            n_events = np.searchsorted(events["time"], sample_times, side="right")
+            displacement = s.lattice.coordinates[events["final_site"]] - s.lattice.coordinates[events["initial_site"]]
+            displacement -= s.lattice.cell_lengths * np.round(displacement / s.lattice.cell_lengths)
+            positions = np.zeros((len(sample_times), 20, 3))
+            dr = np.zeros((20, 3))
+            done = 0
+            for n, k in enumerate(n_events):
+                np.add.at(dr, events["atom"][done:k], displacement[done:k])
+                done = k
+                positions[n] = dr
+            curves = s.msd.curves()
+            for lag in range(1, 16):
+                tracer, collective = brute_force_msd(positions, lag)
+                self.assertAlmostEqual(curves.tracer[lag - 1], tracer)
+                self.assertAlmostEqual(curves.collective[lag - 1], collective)
+
+
+if __name__ == "__main__":
+    unittest.main()
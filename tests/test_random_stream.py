@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from lattice_mc.random_stream import RandomStream
+
+
+class RandomStreamTestCase(unittest.TestCase):
+    """Tests for RandomStream class"""
+
+    def test_random_stream_is_initialised(self):
+        stream = RandomStream(seed=3, block_size=8)
+        self.assertIsInstance(stream.generator, np.random.Generator)
+        self.assertEqual(stream.block_size, 8)
+        self.assertEqual(len(stream.block), 0)
+        self.assertEqual(stream.position, 0)
+
+    def test_random_stream_raises_ValueError_for_invalid_block_size(self):
+        with self.assertRaises(ValueError):
+            RandomStream(block_size=0)
+
+    def test_random_draws_from_blocks(self):
+        stream = RandomStream(seed=3, block_size=4)
+        values = [stream.random() for _ in range(10)]
+        expected = np.random.default_rng(3)
+        np.testing.assert_array_equal(values, np.concatenate([expected.random(4) for _ in range(3)])[:10])
+        self.assertEqual(stream.position, 2)
+
+    def test_random_is_reproducible(self):
+        self.assertEqual(
+            [RandomStream(seed=5).random() for _ in range(3)], [RandomStream(seed=5).random() for _ in range(3)]
+        )
+
+    def test_peek_and_advance(self):
+        stream = RandomStream(seed=3, block_size=4)
+        stream.random()
+        peeked = stream.peek(6).copy()
+        self.assertEqual(stream.position, 0)
+        np.testing.assert_array_equal(stream.peek(6), peeked)
+        stream.advance(6)
+        expected = RandomStream(seed=3, block_size=4)
+        self.assertEqual([expected.random() for _ in range(7)][1:], peeked.tolist())
+        self.assertEqual(stream.random(), expected.random())
+
+    def test_sample(self):
+        stream = RandomStream(seed=3)
+        population = ["a", "b", "c", "d", "e"]
+        sample = stream.sample(population, 3)
+        self.assertEqual(len(sample), 3)
+        self.assertEqual(len(set(sample)), 3)
+        self.assertTrue(set(sample) <= set(population))
+        self.assertEqual(RandomStream(seed=3).sample(population, 3), sample)
+
+    def test_sample_raises_ValueError_if_sample_is_larger_than_population(self):
+        with self.assertRaises(ValueError):
+            RandomStream(seed=3).sample([1, 2], 3)
+
+    def test_spawn(self):
+        stream = RandomStream(seed=3, block_size=16)
+        children = stream.spawn(2)
+        self.assertEqual(len(children), 2)
+        self.assertEqual(children[0].block_size, 16)
+        self.assertNotEqual(children[0].random(), children[1].random())
+        self.assertEqual(RandomStream(seed=3).spawn(2)[1].random(), RandomStream(seed=3).spawn(2)[1].random())
+
+    def test_state_can_be_saved_and_restored(self):
+        stream = RandomStream(seed=3, block_size=4)
+        for _ in range(3):
+            stream.random()
+        state = stream.state
+        expected = [stream.random() for _ in range(6)]
+        restored = RandomStream(block_size=4)
+        restored.state = state
+        self.assertEqual([restored.random() for _ in range(6)], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from lattice_mc.rate_classes import RateClassSelector
+
+
+class RateClassSelectorTestCase(unittest.TestCase):
+    """Tests for RateClassSelector class"""
+
+    def setUp(self):
+        self.selector = RateClassSelector()
+        for index, (rate, key) in enumerate([(0.5, "a"), (0.5, "a"), (2.0, "b"), (0.5, "a")]):
+            self.selector.update(index, rate, key)
+
+    def test_rate_class_selector_is_initialised(self):
+        selector = RateClassSelector()
+        self.assertEqual(selector.buckets, {})
+        self.assertEqual(selector.class_rates, {})
+        self.assertEqual(selector.positions, {})
+        self.assertEqual(selector.total, 0.0)
+
+    def test_update(self):
+        self.assertEqual(self.selector.buckets, {"a": [0, 1, 3], "b": [2]})
+        self.assertEqual(self.selector.class_rates, {"a": 0.5, "b": 2.0})
+        self.assertEqual(len(self.selector), 4)
+        self.assertEqual(self.selector.total, 3.5)
+        self.assertEqual(self.selector[2], 2.0)
+        self.assertEqual(self.selector[7], 0.0)
+
+    def test_update_moves_event_between_classes(self):
+        self.selector.update(0, 2.0, "b")
+        self.assertEqual(self.selector.buckets, {"a": [3, 1], "b": [2, 0]})
+        self.assertEqual(self.selector.positions[3], ("a", 0))
+        self.assertEqual(self.selector.positions[0], ("b", 1))
+        self.assertEqual(self.selector.total, 5.0)
+
+    def test_update_without_key_classes_by_rate(self):
+        selector = RateClassSelector()
+        selector.update(0, 0.25)
+        selector.update(1, 0.25)
+        self.assertEqual(selector.buckets, {0.25: [0, 1]})
+
+    def test_update_with_zero_rate_removes_event(self):
+        self.selector.update(2, 0.0, "b")
+        self.assertEqual(self.selector.buckets, {"a": [0, 1, 3]})
+        self.assertEqual(self.selector.class_rates, {"a": 0.5})
+        self.assertEqual(len(self.selector), 3)
+
+    def test_remove_last_event_in_class(self):
+        self.selector.remove(3)
+        self.assertEqual(self.selector.buckets["a"], [0, 1])
+        self.selector.remove(3)
+        self.assertEqual(self.selector.buckets["a"], [0, 1])
+
+    def test_select(self):
+        # class "a" covers [0, 1.5) of the total rate, and class "b" covers [1.5, 3.5)
+        self.assertEqual(self.selector.select(0.0), 0)
+        self.assertEqual(self.selector.select(0.6 / 3.5), 1)
+        self.assertEqual(self.selector.select(1.2 / 3.5), 3)
+        self.assertEqual(self.selector.select(2.0 / 3.5), 2)
+        self.assertEqual(self.selector.select(1.0), 2)
+
+    def test_select_raises_ValueError_with_no_events(self):
+        with self.assertRaises(ValueError):
+            RateClassSelector().select(0.5)
+
+    def test_select_matches_rates(self):
+        rng = np.random.default_rng(3)
+        counts = np.bincount([self.selector.select(u) for u in rng.random(20000)], minlength=4)
+        np.testing.assert_allclose(counts / 20000, np.array([0.5, 0.5, 2.0, 0.5]) / 3.5, atol=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from lattice_mc.rate_tree import RateTree
+
+
+class RateTreeTestCase(unittest.TestCase):
+    """Tests for RateTree class"""
+
+    def setUp(self):
+        self.rates = np.array([0.1, 0.2, 0.3, 0.4, 0.5])
+        self.tree = RateTree(self.rates)
+
+    def test_rate_tree_is_initialised(self):
+        self.assertEqual(self.tree.capacity, 8)
+        self.assertEqual(len(self.tree), 8)
+        np.testing.assert_array_equal(self.tree.rates, [0.1, 0.2, 0.3, 0.4, 0.5, 0.0, 0.0, 0.0])
+        self.assertAlmostEqual(self.tree.total, 1.5)
+
+    def test_empty_rate_tree(self):
+        tree = RateTree()
+        self.assertEqual(tree.capacity, 1)
+        self.assertEqual(tree.total, 0.0)
+
+    def test_getitem(self):
+        self.assertEqual(self.tree[2], 0.3)
+
+    def test_update(self):
+        self.tree.update(1, 1.2)
+        self.assertEqual(self.tree[1], 1.2)
+        self.assertAlmostEqual(self.tree.total, 2.5)
+
+    def test_update_grows_tree(self):
+        self.tree.update(11, 2.0)
+        self.assertEqual(self.tree.capacity, 16)
+        self.assertEqual(self.tree[11], 2.0)
+        self.assertEqual(self.tree[4], 0.5)
+        self.assertAlmostEqual(self.tree.total, 3.5)
+
+    def test_select(self):
+        cumulative_rates = np.cumsum(self.rates) / np.sum(self.rates)
+        for u in [0.0, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.999]:
+            self.assertEqual(self.tree.select(u), np.searchsorted(cumulative_rates, u, side="right"))
+
+    def test_select_skips_zero_rates(self):
+        tree = RateTree([0.0, 1.0, 0.0, 0.0, 2.0, 0.0])
+        self.assertEqual(tree.select(0.0), 1)
+        self.assertEqual(tree.select(0.9999999999999999), 4)
+        # a target pushed past the total by rounding must not select an empty slot
+        self.assertEqual(tree.select(1.0), 4)
+
+    def test_select_raises_ValueError_with_no_rates(self):
+        with self.assertRaises(ValueError):
+            RateTree([0.0, 0.0]).select(0.5)
+
+    def test_select_matches_rates(self):
+        rng = np.random.default_rng(12)
+        rates = rng.random(37)
+        tree = RateTree(rates)
+        counts = np.bincount([tree.select(u) for u in rng.random(20000)], minlength=37)
+        np.testing.assert_allclose(counts / 20000, rates / rates.sum(), atol=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import unittest
+
+import numpy as np
+
+import lattice_mc
+from lattice_mc import replicas
+from lattice_mc.error import BlockedLatticeError
+
+
+def cubic_lattice(nn_energy=0.1, lookup_table=False, seed=7, shape=(4, 4, 4)):
+    params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=seed)
+    s = lattice_mc.Simulation(params)
+    s.lattice = lattice_mc.init_lattice.cubic_lattice(*shape, 1.0)
+    s.set_nn_energy(nn_energy)
+    if lookup_table:
+        s.setup_lookup_table()
+    s.lattice.params = params
+    return s.lattice
+
+
+class ReplicasFunctionsTestCase(unittest.TestCase):
+    """Tests for replicas module functions"""
+
+    def test_padded_table(self):
+        offsets = np.array([0, 2, 2, 5])
+        values = np.array([4, 5, 6, 7, 8])
+        np.testing.assert_array_equal(replicas.padded_table(offsets, values, -1), [[4, 5, -1], [-1, -1, -1], [6, 7, 8]])
+
+
+class ReplicaEnsembleTestCase(unittest.TestCase):
+    """Tests for ReplicaEnsemble class"""
+
+    def assert_consistent(self, ensemble):
+        lattice = ensemble.lattice
+        r = np.arange(ensemble.n_replicas)
+        nn_occupied = ensemble.occupied[:, ensemble.neighbour_table].sum(axis=2)
+        np.testing.assert_array_equal(ensemble.nn_occupied[:, :-1], nn_occupied)
+        all_bonds = np.broadcast_to(np.arange(ensemble.n_bonds), (ensemble.n_replicas, ensemble.n_bonds))
+        np.testing.assert_allclose(ensemble.rates[:, : ensemble.n_bonds], ensemble.bond_rates(r, all_bonds))
+        np.testing.assert_array_equal(ensemble.rates[:, ensemble.n_bonds :], 0.0)
+        np.testing.assert_allclose(
+            ensemble.block_rates,
+            ensemble.rates.reshape(ensemble.n_replicas, ensemble.n_blocks, ensemble.block_size).sum(axis=2),
+            atol=1e-12,
+        )
+        np.testing.assert_array_equal(ensemble.occupied[r[:, np.newaxis], ensemble.atom_site], 1)
+        np.testing.assert_array_equal(ensemble.occupied[:, :-1].sum(axis=1), ensemble.number_of_atoms)
+        np.testing.assert_array_equal(
+            ensemble.site_atom[r[:, np.newaxis], ensemble.atom_site],
+            np.tile(np.arange(ensemble.number_of_atoms), (ensemble.n_replicas, 1)),
+        )
+        self.assertEqual(lattice.occupied.sum(), 0)
+
+    def test_ensemble_is_initialised(self):
+        lattice = cubic_lattice()
+        ensemble = replicas.ReplicaEnsemble(lattice, 3, 16)
+        self.assertEqual(ensemble.occupied.shape, (3, 65))
+        self.assertEqual(ensemble.atom_site.shape, (3, 16))
+        self.assertTrue(ensemble.unique_neighbours)
+        self.assertGreater(ensemble.n_blocks * ensemble.block_size, ensemble.n_bonds)
+        self.assert_consistent(ensemble)
+
+    def test_ensemble_populates_selected_sites(self):
+        lattice = cubic_lattice()
+        lattice.transmute_sites("L", "X", 32)
+        ensemble = replicas.ReplicaEnsemble(lattice, 2, 16, selected_sites=["X"])
+        for sites in ensemble.atom_site.tolist():
+            self.assertEqual({lattice.sites[i].label for i in sites}, {"X"})
+
+    def test_ensemble_raises_ValueError_for_too_many_atoms(self):
+        with self.assertRaises(ValueError):
+            replicas.ReplicaEnsemble(cubic_lattice(), 2, 65)
+
+    def test_ensemble_raises_ValueError_for_cn_energies(self):
+        lattice = cubic_lattice()
+        lattice.set_cn_energies({"L": {"L": {0: 0.0, 1: -0.1}}})
+        with self.assertRaises(ValueError):
+            replicas.ReplicaEnsemble(lattice, 2, 16)
+
+    def test_ensemble_raises_ValueError_for_no_replicas(self):
+        with self.assertRaises(ValueError):
+            replicas.ReplicaEnsemble(cubic_lattice(), 0, 16)
+
+    def test_ensemble_raises_RuntimeError_without_params(self):
+        lattice = cubic_lattice()
+        lattice.params = None
+        with self.assertRaises(RuntimeError):
+            replicas.ReplicaEnsemble(lattice, 2, 16)
+
+    def test_bond_rates_match_lattice(self):
+        for lookup_table in (False, True):
+            lattice = cubic_lattice(lookup_table=lookup_table)
+            lattice.set_site_energies({"L": 0.0})
+            ensemble = replicas.ReplicaEnsemble(lattice, 1, 16)
+            for i in ensemble.atom_site[0].tolist():
+                lattice.sites[i].is_occupied = True
+            for j in lattice.potential_jumps():
+                b = lattice.bond_index(j.initial_site.lattice_index, j.final_site.lattice_index)
+                self.assertAlmostEqual(ensemble.rates[0, b], j.relative_probability)
+
+    def test_select(self):
+        rates = np.array([[1.0, 0.0, 2.0, 0.0], [0.0, 1.0, 1.0, 0.0]])
+        np.testing.assert_array_equal(replicas.ReplicaEnsemble.select(rates, np.array([0.5, 1.5])), [0, 2])
+        np.testing.assert_array_equal(replicas.ReplicaEnsemble.select(rates, np.array([1.0, 0.0])), [2, 1])
+        # targets beyond the total rate select the last non-zero entry
+        np.testing.assert_array_equal(replicas.ReplicaEnsemble.select(rates, np.array([3.0, 2.0])), [2, 2])
+
+    def test_unique_rows(self):
+        table = np.array([[3, 1, 3, 9], [2, 2, 2, 2]])
+        np.testing.assert_array_equal(replicas.ReplicaEnsemble.unique_rows(table, 9), [[1, 3, 9], [2, 9, 9]])
+
+    def test_run_keeps_replicas_consistent(self):
+        for lookup_table in (False, True):
+            ensemble = replicas.ReplicaEnsemble(cubic_lattice(lookup_table=lookup_table), 3, 16)
+            self.assertEqual(ensemble.run(n_jumps=300, resum_interval=1000), 300)
+            np.testing.assert_array_equal(ensemble.atom_number_of_hops.sum(axis=1), 300)
+            self.assertTrue(np.all(ensemble.time > 0.0))
+            self.assert_consistent(ensemble)
+
+    def test_run_keeps_replicas_consistent_for_repeated_neighbours(self):
+        ensemble = replicas.ReplicaEnsemble(cubic_lattice(nn_energy=0.05, shape=(2, 4, 4)), 3, 8)
+        self.assertFalse(ensemble.unique_neighbours)
+        ensemble.run(n_jumps=1000, resum_interval=10000)
+        self.assert_consistent(ensemble)
+
+    def test_run_for_time(self):
+        ensemble = replicas.ReplicaEnsemble(cubic_lattice(), 3, 16)
+        iterations = ensemble.run(for_time=1e-10)
+        self.assertTrue(np.all(ensemble.time >= 1e-10))
+        self.assertEqual(ensemble.atom_number_of_hops.sum(axis=1).max(), iterations)
+
+    def test_run_raises_ValueError_without_limits(self):
+        with self.assertRaises(ValueError):
+            replicas.ReplicaEnsemble(cubic_lattice(), 2, 16).run()
+
+    def test_run_raises_BlockedLatticeError(self):
+        with self.assertRaises(BlockedLatticeError):
+            replicas.ReplicaEnsemble(cubic_lattice(), 2, 64).run(n_jumps=1)
+
+    def test_reset(self):
+        ensemble = replicas.ReplicaEnsemble(cubic_lattice(), 2, 16)
+        ensemble.run(n_jumps=10)
+        ensemble.reset()
+        np.testing.assert_array_equal(ensemble.time, 0.0)
+        np.testing.assert_array_equal(ensemble.atom_dr, 0.0)
+        np.testing.assert_array_equal(ensemble.atom_number_of_hops, 0)
+        np.testing.assert_array_equal(ensemble.atom_summed_dr2, 0.0)
+        np.testing.assert_array_equal(ensemble.time_occupied, 0.0)
+
+    def test_results(self):
+        ensemble = replicas.ReplicaEnsemble(cubic_lattice(), 2, 2)
+        ensemble.atom_dr[:] = [[[1.0, 0.0, 0.0], [1.0, 0.0, 0.0]], [[1.0, 0.0, 0.0], [-1.0, 0.0, 0.0]]]
+        ensemble.atom_summed_dr2[:] = 1.0
+        ensemble.time[:] = [1.0, 2.0]
+        np.testing.assert_array_equal(ensemble.sum_dr_squared, [2.0, 2.0])
+        np.testing.assert_array_equal(ensemble.collective_dr_squared, [4.0, 0.0])
+        np.testing.assert_array_equal(ensemble.tracer_correlation, [1.0, 1.0])
+        np.testing.assert_array_equal(ensemble.collective_correlation, [2.0, 0.0])
+        np.testing.assert_allclose(ensemble.tracer_diffusion_coefficient, [2.0 / 12.0, 2.0 / 24.0])
+        np.testing.assert_allclose(ensemble.collective_diffusion_coefficient, [4.0 / 6.0, 0.0])
+        np.testing.assert_allclose(ensemble.collective_diffusion_coefficient_per_atom, [4.0 / 12.0, 0.0])
+
+    def test_average_site_occupations(self):
+        lattice = cubic_lattice()
+        lattice.transmute_sites("L", "X", 32)
+        ensemble = replicas.ReplicaEnsemble(lattice, 2, 16)
+        ensemble.run(n_jumps=200)
+        occupations = ensemble.average_site_occupations
+        self.assertEqual(len(occupations), 2)
+        for occupation in occupations:
+            self.assertEqual(set(occupation), {"L", "X"})
+            self.assertAlmostEqual(occupation["L"] + occupation["X"], 16.0)
+
+    def test_replicas_agree_with_python_engine(self):
+        ensemble = replicas.ReplicaEnsemble(cubic_lattice(nn_energy=0.0), 8, 32)
+        ensemble.run(n_jumps=2000)
+        correlations = []
+        for seed in range(4):
+            params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=seed)
+            s = lattice_mc.Simulation(params)
+            s.lattice = lattice_mc.init_lattice.cubic_lattice(4, 4, 4, 1.0)
+            s.set_number_of_atoms(32)
+            s.set_number_of_jumps(2000)
+            s.run()
+            correlations.append(s.tracer_correlation)
+        self.assertAlmostEqual(ensemble.tracer_correlation.mean(), np.mean(correlations), delta=0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,11 @@
 import unittest
-from unittest.mock import Mock, PropertyMock, patch
+from unittest.mock import Mock, PropertyMock, call, patch
 
 import numpy as np
 
 from lattice_mc.atom import Atom
 from lattice_mc.lattice import Lattice
+from lattice_mc.random_stream import RandomStream
 from lattice_mc.simulation import Simulation, SimulationParameters
 from lattice_mc.species import Species
 
@@ -24,6 +25,23 @@ class SimulationTestCase(unittest.TestCase):
         self.assertEqual(simulation.for_time, None)
         self.assertEqual(simulation.number_of_atoms, None)
         self.assertEqual(simulation.has_run, False)
+        self.assertIsInstance(simulation.rng, RandomStream)
+
+    def test_simulation_rng_is_seeded_from_params(self):
+        params = SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=11)
+        self.assertEqual(Simulation(params).rng.random(), RandomStream(11).random())
+
+    def test_setting_lattice_shares_rng(self):
+        simulation = Simulation(PARAMS)
+        simulation.lattice = Mock(spec=Lattice)
+        self.assertIs(simulation.lattice.rng, simulation.rng)
+
+    def test_seed(self):
+        simulation = Simulation(PARAMS)
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.seed(11)
+        self.assertIs(simulation.lattice.rng, simulation.rng)
+        self.assertEqual(simulation.rng.random(), RandomStream(11).random())
 
     def test_reset(self):
         simulation = Simulation(PARAMS)
@@ -56,6 +74,7 @@ class SimulationTestCase(unittest.TestCase):
             mock_Species.return_value = "some atoms"
             simulation.set_number_of_atoms(3, selected_sites=["A"])
             self.assertEqual(simulation.lattice.populate_sites.call_args[1]["selected_sites"], ["A"])
+            self.assertEqual(simulation.selected_sites, ["A"])
 
     def test_set_number_of_jumps(self):
         simulation = Simulation(PARAMS)
@@ -69,11 +88,13 @@ class SimulationTestCase(unittest.TestCase):
 
     def test_define_lattice_from_file(self):
         with patch("lattice_mc.init_lattice.lattice_from_sites_file") as mock_lattice_from_file:
-            mock_lattice_from_file.return_value = "foo"
+            mock_lattice = Mock(spec=Lattice)
+            mock_lattice_from_file.return_value = mock_lattice
             simulation = Simulation(PARAMS)
             cell_lengths = np.array([1.0, 2.0, 3.0])
             simulation.define_lattice_from_file("filename", cell_lengths)
-            self.assertEqual(simulation.lattice, "foo")
+            self.assertIs(simulation.lattice, mock_lattice)
+            self.assertIs(mock_lattice.rng, simulation.rng)
             mock_lattice_from_file.assert_called_with("filename", cell_lengths=cell_lengths)
 
     def test_set_nn_energy(self):
@@ -97,6 +118,12 @@ class SimulationTestCase(unittest.TestCase):
         simulation.set_site_energies("foo")
         simulation.lattice.set_site_energies.assert_called_with("foo")
 
+    def test_set_event_selection(self):
+        simulation = Simulation(PARAMS)
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.set_event_selection("rate-class")
+        simulation.lattice.set_event_selection.assert_called_with("rate-class")
+
     def test_is_initialised_fails_with_no_lattice(self):
         simulation = Simulation(PARAMS)
         simulation.atoms = "foo"
@@ -109,7 +136,7 @@ class SimulationTestCase(unittest.TestCase):
         simulation = Simulation(PARAMS)
         simulation.atoms = None
         simulation.number_of_jumps = "bar"
-        simulation.lattice = "foo"
+        simulation.lattice = Mock(spec=Lattice)
         with self.assertRaises(AttributeError):
             simulation.is_initialised()
 
@@ -117,7 +144,7 @@ class SimulationTestCase(unittest.TestCase):
         simulation = Simulation(PARAMS)
         simulation.atoms = "bar"
         simulation.number_of_jumps = None
-        simulation.lattice = "foo"
+        simulation.lattice = Mock(spec=Lattice)
         with self.assertRaises(AttributeError):
             simulation.is_initialised()
 
@@ -137,6 +164,16 @@ class SimulationTestCase(unittest.TestCase):
         simulation.run()
         self.assertEqual(simulation.lattice.jump.call_count, 10)
 
+    def test_run_with_seed(self):
+        simulation = Simulation(PARAMS)
+        simulation.is_initialised = Mock(return_value=(True, None))
+        simulation.atoms = "a"
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.number_of_jumps = 1
+        simulation.run(seed=11)
+        self.assertIs(simulation.lattice.rng, simulation.rng)
+        self.assertEqual(simulation.rng.random(), RandomStream(11).random())
+
     def test_run_for_time(self):
         simulation = Simulation(PARAMS)
         simulation.is_initialised = Mock(return_value=(True, None))
@@ -165,6 +202,131 @@ class SimulationTestCase(unittest.TestCase):
         self.assertEqual(simulation.lattice.jump.call_count, 20 + 30)
         self.assertEqual(simulation.reset.call_count, 1)
 
+    def test_run_with_checkpoints(self):
+        simulation = Simulation(PARAMS)
+        simulation.is_initialised = Mock(return_value=(True, None))
+        simulation.atoms = "a"
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.lattice.jump = Mock()
+        simulation.reset = Mock()
+        simulation.save_checkpoint = Mock()
+        simulation.number_of_equilibration_jumps = 20
+        simulation.number_of_jumps = 30
+        simulation.run(checkpoint_file="foo.npz", checkpoint_interval=12)
+        self.assertEqual(simulation.lattice.jump.call_count, 20 + 30)
+        self.assertEqual(simulation.save_checkpoint.call_args_list, [call("foo.npz")] * 5)
+        self.assertEqual((simulation.equilibration_jumps_completed, simulation.jumps_completed), (20, 30))
+        simulation.run()
+        self.assertEqual(simulation.lattice.jump.call_count, 2 * (20 + 30))
+        self.assertEqual(simulation.reset.call_count, 2)
+
+    def test_run_resumes_after_load_checkpoint(self):
+        simulation = Simulation(PARAMS)
+        simulation.is_initialised = Mock(return_value=(True, None))
+        simulation.atoms = "a"
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.lattice.jump = Mock()
+        simulation.reset = Mock()
+        simulation.number_of_equilibration_jumps = 20
+        simulation.number_of_jumps = 30
+
+        def fake_restore(s):
+            s.equilibration_jumps_completed = 20
+            s.jumps_completed = 10
+            s.resuming = True
+
+        with patch("lattice_mc.checkpoint.Checkpoint.load") as mock_load:
+            mock_load.return_value.restore = fake_restore
+            simulation.load_checkpoint("foo.npz")
+        mock_load.assert_called_once_with("foo.npz")
+        simulation.run()
+        self.assertEqual(simulation.lattice.jump.call_count, 20)
+        self.assertEqual(simulation.reset.call_count, 0)
+        self.assertFalse(simulation.resuming)
+
+    def test_run_closes_trajectory_writer(self):
+        simulation = Simulation(PARAMS)
+        simulation.is_initialised = Mock(return_value=(True, None))
+        simulation.atoms = Mock(spec=Species)
+        simulation.atoms.atoms = []
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.lattice.time = 0.0
+        simulation.lattice.jump = Mock(side_effect=RuntimeError("test"))
+        simulation.number_of_jumps = 10
+        with patch("lattice_mc.trajectory.TrajectoryWriter") as mock_writer:
+            with self.assertRaises(RuntimeError):
+                simulation.run(trajectory_file="foo.trj")
+        mock_writer.assert_called_once_with("foo.trj", resume_at=None)
+        self.assertEqual(mock_writer.return_value.write_keyframe.call_count, 1)
+        mock_writer.return_value.close.assert_called_once_with()
+        self.assertIsNone(simulation.lattice.trajectory)
+
+    def test_save_checkpoint(self):
+        simulation = Simulation(PARAMS)
+        with patch("lattice_mc.checkpoint.Checkpoint.from_simulation") as mock_from_simulation:
+            simulation.save_checkpoint("foo.npz")
+        mock_from_simulation.assert_called_once_with(simulation)
+        mock_from_simulation.return_value.save.assert_called_once_with("foo.npz")
+
+    def test_run_raises_ValueError_for_invalid_engine(self):
+        simulation = Simulation(PARAMS)
+        with self.assertRaises(ValueError):
+            simulation.run(engine="foo")
+
+    def test_run_with_kernel_engine(self):
+        simulation = Simulation(PARAMS)
+        simulation.is_initialised = Mock(return_value=(True, None))
+        simulation.atoms = "a"
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.reset = Mock()
+        simulation.number_of_equilibration_jumps = 20
+        simulation.number_of_jumps = 30
+        with patch("lattice_mc.kernel.KMCKernel") as mock_kernel:
+            simulation.run(engine="kernel")
+        mock_kernel.assert_called_once_with(simulation.lattice, "a")
+        self.assertEqual(mock_kernel.return_value.run.call_args_list, [call(n_jumps=20), call(n_jumps=30)])
+        self.assertEqual(simulation.reset.call_count, 1)
+        self.assertEqual(simulation.lattice.jump.call_count, 0)
+        self.assertTrue(simulation.has_run)
+
+    def test_run_for_time_with_kernel_engine(self):
+        simulation = Simulation(PARAMS)
+        simulation.is_initialised = Mock(return_value=(True, None))
+        simulation.atoms = "a"
+        simulation.lattice = Mock(spec=Lattice)
+        with patch("lattice_mc.kernel.KMCKernel") as mock_kernel:
+            mock_kernel.return_value.run.return_value = 12
+            simulation.run(for_time=10.0, engine="kernel")
+        mock_kernel.return_value.run.assert_called_once_with(for_time=10.0)
+        self.assertEqual(simulation.number_of_jumps, 12)
+
+    def test_run_replicas(self):
+        simulation = Simulation(PARAMS)
+        simulation.is_initialised = Mock(return_value=(True, None))
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.number_of_atoms = 8
+        simulation.selected_sites = ["A"]
+        simulation.number_of_equilibration_jumps = 20
+        simulation.number_of_jumps = 30
+        with patch("lattice_mc.replicas.ReplicaEnsemble") as mock_ensemble:
+            ensemble = simulation.run_replicas(4, seed=3)
+        mock_ensemble.assert_called_once_with(simulation.lattice, 4, 8, selected_sites=["A"])
+        self.assertIs(ensemble, mock_ensemble.return_value)
+        self.assertEqual(ensemble.run.call_args_list, [call(n_jumps=20), call(n_jumps=30)])
+        ensemble.reset.assert_called_once_with()
+        self.assertIs(simulation.lattice.rng, simulation.rng)
+        self.assertEqual(simulation.lattice.params, PARAMS)
+
+    def test_run_replicas_for_time(self):
+        simulation = Simulation(PARAMS)
+        simulation.is_initialised = Mock(return_value=(True, None))
+        simulation.lattice = Mock(spec=Lattice)
+        simulation.number_of_atoms = 8
+        with patch("lattice_mc.replicas.ReplicaEnsemble") as mock_ensemble:
+            simulation.run_replicas(4, for_time=10.0)
+        mock_ensemble.return_value.run.assert_called_once_with(for_time=10.0)
+        mock_ensemble.return_value.reset.assert_not_called()
+
 
 class SimulationResultsTestCase(unittest.TestCase):
     def setUp(self):
@@ -256,6 +418,10 @@ class SimulationNoResultsTestCase(unittest.TestCase):
         s = Simulation(PARAMS)
         self.assertEqual(s.collective_diffusion_coefficient_per_atom, None)
 
+    def test_standard_errors(self):
+        s = Simulation(PARAMS)
+        self.assertEqual(s.standard_errors, None)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,189 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from lattice_mc.sites_file import (
+    CACHE_DIRECTORY,
+    SitesFileParser,
+    cache_key,
+    count_tokens,
+    read_cached_sites_file,
+    read_sites_file,
+)
+from lattice_mc.topology import LatticeTopology
+
+SITES = """3
+
+site: 1
+centre: 0.0 0.0 0.0
+neighbours: 2 3
+label: A
+
+site: 2
+centre: 1.0 0.0 0.0
+neighbours: 1
+label: B
+energy: -0.5
+
+site: 3
+centre: -1.0 0.0 0.0
+neighbours: 1
+label: A
+"""
+
+REORDERED_SITES = """3
+
+label: A
+neighbors: 2 3
+center: 0.0 0.0 0.0
+site: 1
+
+  energy: -0.5
+  site: 2
+  vertices: 7 8 9
+  neighbours:   1
+  label:  B
+  centre: 1.0 0.0 0.0
+
+
+
+site: 3
+centre: -1.0 0e0 0.0
+neighbours: 1
+label: A"""
+
+
+class SitesFileTestCase(unittest.TestCase):
+    """Tests for reading sites files"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, contents):
+        filename = os.path.join(self.directory.name, "sites.dat")
+        with open(filename, "w") as f:
+            f.write(contents)
+        return filename
+
+    def assertTopologiesEqual(self, first, second):
+        for name in ["numbers", "coordinates", "neighbour_offsets", "neighbour_indices", "label_ids", "site_energy"]:
+            np.testing.assert_array_equal(getattr(first, name), getattr(second, name))
+        self.assertEqual(first.label_names, second.label_names)
+
+    def test_read_sites_file(self):
+        topology = read_sites_file(self.write(SITES), [4.0, 4.0, 4.0])
+        np.testing.assert_array_equal(topology.numbers, [1, 2, 3])
+        np.testing.assert_array_equal(topology.coordinates, [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [3.0, 0.0, 0.0]])
+        np.testing.assert_array_equal(topology.neighbour_offsets, [0, 2, 3, 4])
+        np.testing.assert_array_equal(topology.neighbour_indices, [1, 2, 0, 0])
+        np.testing.assert_array_equal(topology.bond_vectors[:, 0], [1.0, -1.0, -1.0, 1.0])
+        self.assertEqual(topology.label_names, ("A", "B"))
+        np.testing.assert_array_equal(topology.label_ids, [0, 1, 0])
+        np.testing.assert_array_equal(topology.site_energy, [0.0, -0.5, 0.0])
+
+    def test_line_order_spelling_and_whitespace_are_not_meaningful(self):
+        expected = read_sites_file(self.write(SITES), [4.0, 4.0, 4.0])
+        self.assertTopologiesEqual(read_sites_file(self.write(REORDERED_SITES), [4.0, 4.0, 4.0]), expected)
+
+    def test_read_sites_file_in_small_chunks(self):
+        filename = os.path.join(os.path.dirname(__file__), "..", "examples", "llzo_lattice_site_list.dat")
+        expected = read_sites_file(filename, [24.5343, 24.5343, 24.5343])
+        self.assertEqual(expected.number_of_sites, 576)
+        self.assertEqual(expected.numbers[0], 5)
+        np.testing.assert_array_equal(expected.numbers[expected.neighbour_indices[:4]], [-2, -3, -4, -309])
+        self.assertTopologiesEqual(read_sites_file(filename, [24.5343, 24.5343, 24.5343], chunk_size=100), expected)
+        filename = self.write(SITES)
+        expected = read_sites_file(filename, [4.0, 4.0, 4.0])
+        self.assertTopologiesEqual(read_sites_file(filename, [4.0, 4.0, 4.0], chunk_size=7), expected)
+
+    def test_read_sites_file_raises_ValueError_for_invalid_files(self):
+        invalid = {
+            "missing label": SITES.replace("label: B\n", ""),
+            "repeated label": SITES.replace("label: B\n", "label: B\nlabel: C\n"),
+            "missing site": SITES.replace("site: 2\n", ""),
+            "repeated site line": SITES.replace("site: 2\n", "site: 2\nsite: 4\n"),
+            "invalid site": SITES.replace("site: 2\n", "site: 2 4\n"),
+            "invalid centre": SITES.replace("centre: 1.0 0.0 0.0", "centre: 1.0 0.0"),
+            "unparseable centre": SITES.replace("centre: 1.0 0.0 0.0", "centre: 1.0 0.0 x"),
+            "invalid label": SITES.replace("label: B", "label: B C"),
+            "repeated energy": SITES.replace("energy: -0.5", "energy: -0.5\nenergy: 1.0"),
+            "too few sites": SITES.replace("3\n", "4\n", 1),
+            "too many sites": SITES.replace("3\n", "2\n", 1),
+            "repeated site number": SITES.replace("site: 3", "site: 2"),
+            "unknown neighbour": SITES.replace("neighbours: 2 3", "neighbours: 2 4"),
+        }
+        for description, contents in invalid.items():
+            with self.subTest(description), self.assertRaises(ValueError):
+                read_sites_file(self.write(contents), [4.0, 4.0, 4.0])
+
+    def test_empty_sites_file(self):
+        topology = read_sites_file(self.write("0\n"), [4.0, 4.0, 4.0])
+        self.assertEqual(topology.number_of_sites, 0)
+        self.assertEqual(len(topology.neighbour_indices), 0)
+
+    def test_cache_key(self):
+        filename = self.write(SITES)
+        key = cache_key(filename, [4.0, 4.0, 4.0])
+        self.assertEqual(cache_key(filename, [4.0, 4.0, 4.0], chunk_size=5), key)
+        self.assertNotEqual(cache_key(filename, [4.0, 4.0, 5.0]), key)
+        self.assertNotEqual(cache_key(self.write(SITES.replace("-0.5", "-0.6")), [4.0, 4.0, 4.0]), key)
+
+    def test_read_cached_sites_file(self):
+        filename = self.write(SITES)
+        expected = read_sites_file(filename, [4.0, 4.0, 4.0])
+        with patch("lattice_mc.sites_file.read_sites_file", wraps=read_sites_file) as mock_read:
+            first = read_cached_sites_file(filename, [4.0, 4.0, 4.0])
+            second = read_cached_sites_file(filename, [4.0, 4.0, 4.0])
+        self.assertEqual(mock_read.call_count, 1)
+        self.assertEqual(
+            os.listdir(os.path.join(self.directory.name, CACHE_DIRECTORY)), [cache_key(filename, [4.0] * 3)]
+        )
+        self.assertTopologiesEqual(first, expected)
+        self.assertTopologiesEqual(second, expected)
+        self.assertIsInstance(second.coordinates, np.memmap)
+        del second
+
+    def test_read_cached_sites_file_rereads_invalid_cache(self):
+        filename = self.write(SITES)
+        directory = os.path.join(self.directory.name, CACHE_DIRECTORY, cache_key(filename, [4.0, 4.0, 4.0]))
+        os.makedirs(directory)
+        with open(os.path.join(directory, "metadata.json"), "w") as f:
+            f.write("{")
+        self.assertTopologiesEqual(
+            read_cached_sites_file(filename, [4.0, 4.0, 4.0]), read_sites_file(filename, [4.0, 4.0, 4.0])
+        )
+        self.assertEqual(LatticeTopology.load(directory, mmap=False).number_of_sites, 3)
+
+    def test_read_cached_sites_file_without_a_writeable_cache(self):
+        filename = self.write(SITES)
+        with patch.object(LatticeTopology, "save", side_effect=PermissionError):
+            topology = read_cached_sites_file(filename, [4.0, 4.0, 4.0])
+        self.assertTopologiesEqual(topology, read_sites_file(filename, [4.0, 4.0, 4.0]))
+
+
+class SitesFileParserTestCase(unittest.TestCase):
+    """Tests for SitesFileParser class"""
+
+    def test_parse_accumulates_chunks(self):
+        parser = SitesFileParser(3)
+        blocks = SITES.split("\n\n")[1:]
+        parser.parse("\n\n".join(blocks[:2]).encode())
+        self.assertEqual(parser.count, 2)
+        parser.parse(b"\n" + blocks[2].encode())
+        self.assertEqual(parser.count, 3)
+        np.testing.assert_array_equal(parser.neighbour_counts, [2, 1, 1])
+        self.assertEqual(parser.labels, {"A": 0, "B": 1})
+
+    def test_count_tokens(self):
+        values = np.frombuffer(b" 1 2\n\n3  \n  4 5 6\n", dtype=np.uint8)
+        np.testing.assert_array_equal(count_tokens(values, 4), [2, 0, 1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
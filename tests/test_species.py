@@ -4,62 +4,86 @@ from unittest.mock import Mock
 import numpy as np
 
 from lattice_mc.atom import Atom
+from lattice_mc.lattice_site import Site
 from lattice_mc.species import Species
 
 
+def atom_on_mock_site(number=1, label="L"):
+    site = Mock(spec=Site)
+    site.occupation = 0
+    site.number = number
+    site.label = label
+    return Atom(site)
+
+
 class SpeciesTestCase(unittest.TestCase):
     """Test for Species class"""
 
+    def setUp(self):
+        self.atoms = [atom_on_mock_site(number=3) for _ in range(3)]
+
     def test_species_is_initialised(self):
-        mock = Mock(spec=Atom)
-        atoms = [mock] * 3
-        species = Species(atoms)
-        self.assertEqual(species.atoms, atoms)
+        self.atoms[1].dr = np.array([1.0, 2.0, 3.0])
+        self.atoms[1].number_of_hops = 4
+        self.atoms[1].summed_dr2 = 5.0
+        species = Species(self.atoms)
+        self.assertEqual(species.atoms, self.atoms)
+        np.testing.assert_array_equal(species.atom_dr, [[0.0, 0.0, 0.0], [1.0, 2.0, 3.0], [0.0, 0.0, 0.0]])
+        np.testing.assert_array_equal(species.atom_number_of_hops, [0, 4, 0])
+        np.testing.assert_array_equal(species.atom_summed_dr2, [0.0, 5.0, 0.0])
+        for i, atom in enumerate(self.atoms):
+            self.assertIs(atom.species, species)
+            self.assertEqual(atom.species_index, i)
+
+    def test_atoms_are_views_onto_species_arrays(self):
+        species = Species(self.atoms)
+        atom = self.atoms[2]
+        atom.dr += np.array([1.0, 0.0, -1.0])
+        atom.number_of_hops += 2
+        atom.summed_dr2 += 1.5
+        np.testing.assert_array_equal(species.atom_dr[2], [1.0, 0.0, -1.0])
+        self.assertEqual(species.atom_number_of_hops[2], 2)
+        self.assertEqual(species.atom_summed_dr2[2], 1.5)
+        atom.reset()
+        np.testing.assert_array_equal(species.atom_dr[2], [0.0, 0.0, 0.0])
+        self.assertEqual(species.atom_number_of_hops[2], 0)
+        self.assertEqual(species.atom_summed_dr2[2], 0.0)
 
     def test_sites_occupied(self):
-        mock = Mock(spec=Atom)
-        mock.site.number = 3
-        atoms = [mock] * 3
-        species = Species(atoms)
+        species = Species(self.atoms)
         self.assertEqual(species.sites_occupied(), [3, 3, 3])
 
     def test_sum_dr_squared(self):
-        mock = Mock(spec=Atom)
-        mock.dr_squared.return_value = 2.0
-        atoms = [mock] * 3
-        species = Species(atoms)
+        species = Species(self.atoms)
+        species.atom_dr[:] = [1.0, 1.0, 0.0]
         self.assertEqual(species.sum_dr_squared(), 6.0)
 
     def test_collective_dr_squared(self):
-        mock = Mock(spec=Atom)
-        mock.dr = np.array([2.0, 1.0, 1.0])
-        atoms = [mock] * 3
-        species = Species(atoms)
+        species = Species(self.atoms)
+        species.atom_dr[:] = [2.0, 1.0, 1.0]
         self.assertEqual(species.collective_dr_squared(), 54.0)  # (2+2+2)**2 + (1+1+1)**2 + (1+1+1)**2
 
+    def test_collective_dr_squared_raises_ValueError_for_empty_species(self):
+        with self.assertRaises(ValueError):
+            Species([]).collective_dr_squared()
+
     def test_occupation(self):
-        mock = Mock(spec=Atom)
-        mock.site.label = "L"
-        atoms = [mock] * 3
-        species = Species(atoms)
+        species = Species(self.atoms)
         self.assertEqual(species.occupations("L"), 3)
 
     def test_summed_dr2(self):
-        mock = Mock(spec=Atom)
-        mock.summed_dr2 = 5.0
-        n_atoms = 3
-        atoms = [mock] * n_atoms
-        species = Species(atoms)
-        self.assertEqual(species.summed_dr2(), mock.summed_dr2 * n_atoms)
+        species = Species(self.atoms)
+        species.atom_summed_dr2[:] = 5.0
+        self.assertEqual(species.summed_dr2(), 15.0)
 
     def test_tracer_correlation(self):
-        species = Species(atoms=[1, 2, 3])
+        species = Species(self.atoms)
         species.sum_dr_squared = Mock(return_value=10.0)
         species.summed_dr2 = Mock(return_value=5.0)
         self.assertEqual(species.tracer_correlation(), 2.0)
 
     def test_collective_correlation(self):
-        species = Species(atoms=[1, 2, 3])
+        species = Species(self.atoms)
         species.collective_dr_squared = Mock(return_value=10.0)
         species.summed_dr2 = Mock(return_value=5.0)
         self.assertEqual(species.collective_correlation(), 2.0)
@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from lattice_mc import init_lattice, sweep
+from lattice_mc.topology import LatticeTopology
+
+
+class SweepTestCase(unittest.TestCase):
+    """Tests for the parameter sweep functions"""
+
+    def setUp(self):
+        lattice = init_lattice.cubic_lattice(4, 4, 4, 1.0)
+        lattice.transmute_sites("L", "X", 16)
+        self.topology = LatticeTopology.from_lattice(lattice)
+        self.settings = sweep.SweepSettings(rate_prefactor=1e13, number_of_jumps=50)
+
+    def test_sweep_settings_raises_ValueError_without_jumps_or_time(self):
+        with self.assertRaises(ValueError):
+            sweep.SweepSettings(rate_prefactor=1e13)
+
+    def test_sweep_points(self):
+        points = sweep.sweep_points(
+            self.topology, self.settings, [300.0, 600.0], [0.25, 0.5], nn_energies=[0.0, 0.1], n_runs=2, seed=3
+        )
+        self.assertEqual(len(points), 16)
+        self.assertEqual([p.index for p in points], list(range(16)))
+        self.assertEqual(
+            (points[0].temperature, points[0].concentration, points[0].nn_energy, points[0].replica),
+            (300.0, 0.25, 0.0, 0),
+        )
+        self.assertEqual(points[1].replica, 1)
+        self.assertEqual(points[15].temperature, 600.0)
+        self.assertEqual({p.number_of_atoms for p in points}, {16, 32})
+        states = {tuple(p.seed.generate_state(2)) for p in points}
+        self.assertEqual(len(states), 16)
+        again = sweep.sweep_points(
+            self.topology, self.settings, [300.0, 600.0], [0.25, 0.5], nn_energies=[0.0, 0.1], n_runs=2, seed=3
+        )
+        self.assertEqual(
+            [tuple(p.seed.generate_state(2)) for p in again], [tuple(p.seed.generate_state(2)) for p in points]
+        )
+
+    def test_sweep_points_with_selected_sites(self):
+        settings = sweep.SweepSettings(rate_prefactor=1e13, number_of_jumps=50, selected_sites=("X",))
+        points = sweep.sweep_points(self.topology, settings, [300.0], [0.5])
+        self.assertEqual(points[0].number_of_atoms, 8)
+
+    def test_sweep_points_raises_ValueError_for_invalid_concentration(self):
+        for concentration in [0.0, 1.5]:
+            with self.assertRaises(ValueError):
+                sweep.sweep_points(self.topology, self.settings, [300.0], [concentration])
+
+    def test_run_point(self):
+        settings = sweep.SweepSettings(
+            rate_prefactor=1e13, number_of_jumps=50, number_of_equilibration_jumps=10, lookup_table=True
+        )
+        sweep.initialise_worker(self.topology, settings)
+        point = sweep.sweep_points(
+            self.topology, settings, [300.0], [0.25], site_energies=[{"L": 0.0, "X": 0.1}], seed=1
+        )[0]
+        row = sweep.run_point(point)
+        self.assertEqual(row["temperature"], 300.0)
+        self.assertEqual(row["number_of_atoms"], 16)
+        self.assertEqual(row["site_energy_X"], 0.1)
+        self.assertEqual(row["number_of_jumps"], 50)
+        self.assertGreater(row["time"], 0.0)
+        self.assertAlmostEqual(row["occupation_L"] + row["occupation_X"], 16.0)
+        for key in [
+            "tracer_correlation",
+            "tracer_diffusion_coefficient",
+            "collective_correlation",
+            "collective_diffusion_coefficient",
+            "collective_diffusion_coefficient_per_atom",
+        ]:
+            self.assertIn(key, row)
+        self.assertEqual(sweep.run_point(point), row)
+
+    def test_run_point_for_time(self):
+        settings = sweep.SweepSettings(rate_prefactor=1e13, for_time=1e-11)
+        sweep.initialise_worker(self.topology, settings)
+        row = sweep.run_point(sweep.sweep_points(self.topology, settings, [300.0], [0.25], seed=1)[0])
+        self.assertGreaterEqual(row["time"], 1e-11)
+
+    def test_run_sweep(self):
+        progress = Mock()
+        results = sweep.run_sweep(
+            init_lattice.cubic_lattice(4, 4, 4, 1.0),
+            self.settings,
+            [300.0, 600.0],
+            [0.25],
+            nn_energies=[0.0, 0.1],
+            seed=5,
+            max_workers=2,
+            progress=progress,
+        )
+        self.assertEqual(len(results), 4)
+        self.assertEqual(list(results["temperature"]), [300.0, 300.0, 600.0, 600.0])
+        self.assertEqual(list(results["nn_energy"]), [0.0, 0.1, 0.0, 0.1])
+        self.assertTrue(np.all(results["number_of_jumps"] == 50))
+        self.assertEqual(progress.call_count, 4)
+        self.assertEqual(progress.call_args[0], (4, 4))
+        serial = sweep.run_sweep(
+            init_lattice.cubic_lattice(4, 4, 4, 1.0),
+            self.settings,
+            [300.0, 600.0],
+            [0.25],
+            nn_energies=[0.0, 0.1],
+            seed=5,
+            max_workers=1,
+        )
+        self.assertTrue(results.equals(serial))
+
+
+if __name__ == "__main__":
+    unittest.main()
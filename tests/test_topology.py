@@ -0,0 +1,180 @@
+import gc
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from lattice_mc import init_lattice
+from lattice_mc.topology import LatticeTopology, SharedLatticeTopology
+
+
+class LatticeTopologyTestCase(unittest.TestCase):
+    """Tests for LatticeTopology class"""
+
+    def setUp(self):
+        self.lattice = init_lattice.cubic_lattice(3, 3, 3, 1.5)
+        self.lattice.transmute_sites("L", "X", 5)
+        self.lattice.set_site_energies({"X": 0.2})
+
+    def test_from_lattice(self):
+        topology = LatticeTopology.from_lattice(self.lattice)
+        self.assertEqual(topology.number_of_sites, 27)
+        np.testing.assert_array_equal(topology.numbers, [site.number for site in self.lattice.sites])
+        np.testing.assert_array_equal(topology.coordinates, self.lattice.coordinates)
+        np.testing.assert_array_equal(topology.neighbour_offsets, self.lattice.neighbour_offsets)
+        np.testing.assert_array_equal(topology.neighbour_indices, self.lattice.neighbour_indices)
+        np.testing.assert_array_equal(topology.bond_vectors, self.lattice.bond_vectors)
+        np.testing.assert_array_equal(topology.bond_lengths_squared, self.lattice.bond_lengths_squared)
+        self.assertEqual(topology.label_names, ("L", "X"))
+        np.testing.assert_array_equal(topology.label_ids, self.lattice.label_ids)
+        np.testing.assert_array_equal(topology.site_energy, self.lattice.site_energy)
+        np.testing.assert_array_equal(topology.cell_lengths, [4.5, 4.5, 4.5])
+        self.assertIsNot(topology.coordinates, self.lattice.coordinates)
+
+    def test_to_lattice(self):
+        self.lattice.sites[0].is_occupied = True
+        lattice = LatticeTopology.from_lattice(self.lattice).to_lattice()
+        self.assertEqual([s.number for s in lattice.sites], [s.number for s in self.lattice.sites])
+        self.assertEqual([s.label for s in lattice.sites], [s.label for s in self.lattice.sites])
+        self.assertEqual([s.neighbours for s in lattice.sites], [list(s.neighbours) for s in self.lattice.sites])
+        np.testing.assert_array_equal(lattice.coordinates, self.lattice.coordinates)
+        np.testing.assert_array_equal(lattice.site_energy, self.lattice.site_energy)
+        np.testing.assert_array_equal(lattice.bond_vectors, self.lattice.bond_vectors)
+        np.testing.assert_array_equal(lattice.cell_lengths, self.lattice.cell_lengths)
+        self.assertEqual(lattice.occupied.sum(), 0)
+
+    def test_topology_can_be_pickled(self):
+        topology = LatticeTopology.from_lattice(self.lattice)
+        restored = pickle.loads(pickle.dumps(topology))
+        np.testing.assert_array_equal(restored.neighbour_indices, topology.neighbour_indices)
+        self.assertEqual(restored.label_names, topology.label_names)
+
+    def test_to_lattice_with_shared_arrays(self):
+        topology = LatticeTopology.from_lattice(self.lattice)
+        lattice = topology.to_lattice(share_arrays=True)
+        for name in ["coordinates", "neighbour_offsets", "neighbour_indices", "bond_vectors", "label_ids"]:
+            self.assertIs(getattr(lattice, name), getattr(topology, name))
+        self.assertIs(lattice.cell_lengths, topology.cell_lengths)
+        self.assertTrue(np.shares_memory(lattice.site_energy, topology.site_energy))
+        self.assertFalse(lattice.site_energy.flags.writeable)
+
+    def test_save_and_load(self):
+        topology = LatticeTopology.from_lattice(self.lattice)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "topology")
+            topology.save(path)
+            topology.save(path)
+            self.assertEqual(sorted(os.listdir(directory)), ["topology"])
+            for mmap in [True, False]:
+                loaded = LatticeTopology.load(path, mmap=mmap)
+                self.assertEqual(loaded.label_names, ("L", "X"))
+                for name in SharedLatticeTopology.fields:
+                    np.testing.assert_array_equal(getattr(loaded, name), getattr(topology, name))
+                self.assertEqual(isinstance(loaded.coordinates, np.memmap), mmap)
+                self.assertEqual(loaded.coordinates.flags.writeable, not mmap)
+            del loaded
+
+    def test_save_raises_FileExistsError_for_other_directories(self):
+        topology = LatticeTopology.from_lattice(self.lattice)
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "keep.txt"), "w") as f:
+                f.write("keep")
+            with open(os.path.join(directory, "metadata.json"), "w") as f:
+                json.dump({"format": "other"}, f)
+            with self.assertRaises(FileExistsError):
+                topology.save(directory)
+            with self.assertRaises(FileExistsError):
+                self.lattice.save(directory)
+            with self.assertRaises(FileExistsError):
+                topology.save(os.path.join(directory, "keep.txt"))
+            self.assertEqual(sorted(os.listdir(directory)), ["keep.txt", "metadata.json"])
+            with open(os.path.join(directory, "keep.txt")) as f:
+                self.assertEqual(f.read(), "keep")
+
+    def test_save_into_an_empty_directory(self):
+        topology = LatticeTopology.from_lattice(self.lattice)
+        with tempfile.TemporaryDirectory() as directory:
+            topology.save(directory)
+            self.assertEqual(LatticeTopology.load(directory, mmap=False).label_names, ("L", "X"))
+
+    def test_interrupted_save_leaves_no_files(self):
+        topology = LatticeTopology.from_lattice(self.lattice)
+        with tempfile.TemporaryDirectory() as directory:
+            with patch("numpy.save", side_effect=KeyboardInterrupt), self.assertRaises(KeyboardInterrupt):
+                topology.save(os.path.join(directory, "topology"))
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_load_raises_ValueError_for_other_versions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            LatticeTopology.from_lattice(self.lattice).save(directory)
+            with open(os.path.join(directory, "metadata.json")) as f:
+                metadata = json.load(f)
+            metadata["version"] += 1
+            with open(os.path.join(directory, "metadata.json"), "w") as f:
+                json.dump(metadata, f)
+            with self.assertRaises(ValueError):
+                LatticeTopology.load(directory)
+
+
+class SharedLatticeTopologyTestCase(unittest.TestCase):
+    """Tests for SharedLatticeTopology class"""
+
+    def setUp(self):
+        lattice = init_lattice.cubic_lattice(3, 3, 3, 1.5)
+        lattice.transmute_sites("L", "X", 5)
+        self.topology = LatticeTopology.from_lattice(lattice)
+
+    def test_shared_topology_holds_read_only_copies(self):
+        with SharedLatticeTopology(self.topology) as shared:
+            for name in SharedLatticeTopology.fields:
+                array = getattr(shared.topology, name)
+                np.testing.assert_array_equal(array, getattr(self.topology, name))
+                self.assertFalse(array.flags.writeable)
+            self.assertEqual(shared.topology.label_names, ("L", "X"))
+            del array
+
+    def test_unpickled_shared_topology_attaches_to_the_same_memory(self):
+        with SharedLatticeTopology(self.topology) as shared:
+            pickled = pickle.dumps(shared)
+            self.assertLess(len(pickled), 1000)
+            with pickle.loads(pickled) as attached:
+                self.assertFalse(attached.owner)
+                self.assertEqual(attached.shared_memory.name, shared.shared_memory.name)
+                np.testing.assert_array_equal(attached.topology.neighbour_indices, self.topology.neighbour_indices)
+                shared.views()["site_energy"][0] = 0.5
+                self.assertEqual(attached.topology.site_energy[0], 0.5)
+
+    def test_to_lattice_uses_shared_arrays(self):
+        with SharedLatticeTopology(self.topology) as shared:
+            lattice = shared.to_lattice()
+            self.assertIs(lattice.coordinates, shared.topology.coordinates)
+            self.assertIs(lattice.neighbour_indices, shared.topology.neighbour_indices)
+            self.assertIs(lattice.bond_vectors, shared.topology.bond_vectors)
+            self.assertIs(lattice.label_ids, shared.topology.label_ids)
+            self.assertIs(lattice.cell_lengths, shared.topology.cell_lengths)
+            self.assertTrue(np.shares_memory(lattice.site_energy, shared.topology.site_energy))
+            lattice.set_site_energies({"X": 0.5})
+            self.assertFalse(np.shares_memory(lattice.site_energy, shared.topology.site_energy))
+            np.testing.assert_array_equal(shared.topology.site_energy, 0.0)
+            self.assertEqual([s.label for s in lattice.sites].count("X"), 5)
+            lattice.sites[0].is_occupied = True
+            self.assertEqual(lattice.nn_occupied.sum(), 6)
+            with self.assertRaises(BufferError):
+                shared.close()
+            del lattice
+            gc.collect()
+
+    def test_to_lattice_raises_RuntimeError_when_closed(self):
+        shared = SharedLatticeTopology(self.topology)
+        shared.close()
+        shared.unlink()
+        with self.assertRaises(RuntimeError):
+            shared.to_lattice()
+
+
+if __name__ == "__main__":
+    unittest.main()
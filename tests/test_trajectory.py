@@ -0,0 +1,356 @@
+import os
+import tempfile
+import unittest
+import zlib
+
+import numpy as np
+
+import lattice_mc
+from lattice_mc import init_lattice, trajectory
+from lattice_mc.trajectory import TrajectoryReader, TrajectoryWriter, apply_jumps
+
+
+def read_blocks(filename):
+    with open(filename, "rb") as f:
+        data = f.read()
+    assert data[: len(trajectory.MAGIC)] == trajectory.MAGIC
+    position = len(trajectory.MAGIC)
+    blocks = []
+    while position < len(data):
+        kind, index, count, time, nbytes = trajectory.BLOCK_HEADER.unpack_from(data, position)
+        position += trajectory.BLOCK_HEADER.size
+        blocks.append((kind, index, count, time, zlib.decompress(data[position : position + nbytes])))
+        position += nbytes
+    return blocks
+
+
+def simulation(n_atoms=20, seed=5):
+    params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=seed)
+    s = lattice_mc.Simulation(params)
+    s.lattice = init_lattice.cubic_lattice(4, 4, 4, 1.0)
+    s.set_nn_energy(0.1)
+    s.set_number_of_atoms(n_atoms)
+    s.set_number_of_equilibration_jumps(10)
+    return s
+
+
+def event_columns(payload, count):
+    return (
+        np.frombuffer(payload, dtype=np.int32, count=count, offset=0),
+        np.frombuffer(payload, dtype=np.int32, count=count, offset=4 * count),
+        np.frombuffer(payload, dtype=np.int32, count=count, offset=8 * count),
+        np.frombuffer(payload, dtype=np.float64, count=count, offset=12 * count),
+    )
+
+
+class TrajectoryWriterTestCase(unittest.TestCase):
+    """Tests for TrajectoryWriter class"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "trajectory.trj")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_writer_raises_ValueError_for_invalid_buffer_size(self):
+        with self.assertRaises(ValueError):
+            TrajectoryWriter(self.filename, buffer_size=0)
+
+    def test_record_writes_full_buffers(self):
+        with TrajectoryWriter(self.filename, buffer_size=4) as writer:
+            writer.write_keyframe(np.array([3, 5]), 1.0)
+            for n in range(10):
+                writer.record(n % 2, n, n + 1, 0.5)
+                self.assertEqual(writer.buffered, (n + 1) % 4)
+            self.assertEqual(writer.number_of_events, 8)
+            self.assertEqual(writer.time, 6.0)
+        self.assertTrue(writer.file.closed)
+        blocks = read_blocks(self.filename)
+        self.assertEqual(
+            [block[:4] for block in blocks],
+            [
+                (trajectory.KEYFRAME, 0, 2, 1.0),
+                (trajectory.EVENTS, 0, 4, 1.0),
+                (trajectory.EVENTS, 4, 4, 3.0),
+                (trajectory.EVENTS, 8, 2, 5.0),
+            ],
+        )
+        np.testing.assert_array_equal(np.frombuffer(blocks[0][4], dtype=np.int64), [3, 5])
+        atoms, initial_sites, final_sites, dt = event_columns(blocks[2][4], 4)
+        np.testing.assert_array_equal(atoms, [0, 1, 0, 1])
+        np.testing.assert_array_equal(initial_sites, [4, 5, 6, 7])
+        np.testing.assert_array_equal(final_sites, [5, 6, 7, 8])
+        np.testing.assert_array_equal(dt, 0.5)
+
+    def test_record_many_matches_record(self):
+        rng = np.random.default_rng(1)
+        atoms = rng.integers(0, 5, 23)
+        initial_sites = rng.integers(0, 50, 23)
+        final_sites = rng.integers(0, 50, 23)
+        dt = rng.random(23)
+        other = os.path.join(self.directory.name, "other.trj")
+        with TrajectoryWriter(self.filename, buffer_size=5) as writer:
+            writer.record(1, 2, 3, 0.25)
+            writer.record_many(atoms, initial_sites, final_sites, dt)
+        with TrajectoryWriter(other, buffer_size=5) as expected:
+            for event in [(1, 2, 3, 0.25)] + list(zip(atoms, initial_sites, final_sites, dt)):
+                expected.record(*event)
+        self.assertEqual(writer.time, expected.time)
+        self.assertEqual(writer.number_of_events, 24)
+        with open(self.filename, "rb") as f, open(other, "rb") as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_close_can_be_called_twice(self):
+        writer = TrajectoryWriter(self.filename)
+        writer.record(0, 1, 2, 0.1)
+        writer.close()
+        writer.close()
+        self.assertEqual(len(read_blocks(self.filename)), 1)
+
+    def test_resume_at_position(self):
+        with TrajectoryWriter(self.filename, buffer_size=4) as writer:
+            writer.write_keyframe(np.array([3, 5]), 1.0)
+            for n in range(6):
+                writer.record(n % 2, n, n + 1, 0.5)
+            position = writer.position()
+            self.assertEqual(position[1], 6)
+            self.assertEqual(writer.buffered, 0)
+            # events after the saved position are discarded when the trajectory is continued
+            for n in range(3):
+                writer.record(0, 9, 10, 0.5)
+        with TrajectoryWriter(self.filename, buffer_size=4, resume_at=position) as writer:
+            self.assertEqual(writer.number_of_events, 6)
+            writer.write_keyframe(np.array([4, 6]), 4.0)
+            writer.record(1, 6, 7, 0.5)
+        self.assertEqual(
+            [block[:4] for block in read_blocks(self.filename)],
+            [
+                (trajectory.KEYFRAME, 0, 2, 1.0),
+                (trajectory.EVENTS, 0, 4, 1.0),
+                (trajectory.EVENTS, 4, 2, 3.0),
+                (trajectory.KEYFRAME, 6, 2, 4.0),
+                (trajectory.EVENTS, 6, 1, 4.0),
+            ],
+        )
+
+    def test_resume_at_raises_ValueError_for_invalid_files(self):
+        with TrajectoryWriter(self.filename) as writer:
+            writer.record(0, 1, 2, 0.1)
+            offset, count = writer.position()
+        with self.assertRaises(ValueError):
+            TrajectoryWriter(self.filename, resume_at=(offset + 1, count))
+        with open(self.filename, "wb") as f:
+            f.write(b"not a trajectory")
+        with self.assertRaises(ValueError):
+            TrajectoryWriter(self.filename, resume_at=(8, 0))
+
+    def test_resumed_simulation_continues_trajectory(self):
+        checkpoint_file = os.path.join(self.directory.name, "checkpoint.npz")
+        expected_file = os.path.join(self.directory.name, "expected.trj")
+        uninterrupted = simulation()
+        uninterrupted.set_number_of_jumps(300)
+        uninterrupted.run(trajectory_file=expected_file)
+        interrupted = simulation()
+        interrupted.set_number_of_jumps(120)
+        interrupted.run(trajectory_file=self.filename, checkpoint_file=checkpoint_file, checkpoint_interval=50)
+        # events recorded after the last checkpoint, before the run was pre-empted
+        with open(self.filename, "ab") as f:
+            f.write(b"partial block")
+        resumed = simulation()
+        resumed.set_number_of_jumps(300)
+        resumed.load_checkpoint(checkpoint_file)
+        resumed.run(trajectory_file=self.filename)
+        with TrajectoryReader(self.filename) as reader, TrajectoryReader(expected_file) as expected:
+            self.assertEqual(len(reader), 300)
+            events = np.concatenate(list(reader.events()))
+            np.testing.assert_array_equal(events, np.concatenate(list(expected.events())))
+            self.assertEqual(reader.atom_sites(300).tolist(), expected.atom_sites(300).tolist())
+        # a new run replaces the trajectory
+        resumed.run(trajectory_file=self.filename)
+        with TrajectoryReader(self.filename) as reader:
+            self.assertEqual(len(reader), 300)
+            self.assertEqual(reader.keyframes["index"].tolist(), [0])
+
+    def test_simulation_records_trajectory(self):
+        for engine in ["python", "kernel"]:
+            params = lattice_mc.SimulationParameters(temperature=298.0, rate_prefactor=1e13, seed=5)
+            s = lattice_mc.Simulation(params)
+            s.lattice = init_lattice.cubic_lattice(4, 4, 4, 1.0)
+            s.set_nn_energy(0.1)
+            s.set_number_of_atoms(20)
+            s.set_number_of_equilibration_jumps(10)
+            s.set_number_of_jumps(150)
+            s.run(engine=engine, trajectory_file=self.filename)
+            self.assertIsNone(s.lattice.trajectory)
+            blocks = read_blocks(self.filename)
+            self.assertEqual(blocks[0][:4], (trajectory.KEYFRAME, 0, 20, 0.0))
+            atom_site = np.frombuffer(blocks[0][4], dtype=np.int64).copy()
+            self.assertEqual(blocks[1][:3], (trajectory.EVENTS, 0, 150))
+            time = 0.0
+            for atom, initial_site, final_site, dt in zip(*event_columns(blocks[1][4], 150)):
+                self.assertEqual(atom_site[atom], initial_site)
+                atom_site[atom] = final_site
+                time += dt
+            self.assertEqual(atom_site.tolist(), [atom.site.lattice_index for atom in s.atoms.atoms])
+            self.assertEqual(time, s.lattice.time)
+
+    def test_keyframes_are_written_at_intervals(self):
+        with TrajectoryWriter(self.filename, buffer_size=4, keyframe_interval=6) as writer:
+            for n in range(10):
+                writer.record(n % 2, n, n + 1, 0.5)
+            writer.write_keyframe(np.array([0, 1]), 0.0)
+            for n in range(10):
+                writer.record(n % 2, n, n + 1, 0.5)
+            writer.record(0, 10, 11, 0.5)
+        blocks = read_blocks(self.filename)
+        self.assertEqual(
+            [block[:4] for block in blocks],
+            [
+                (trajectory.EVENTS, 0, 4, 0.0),
+                (trajectory.EVENTS, 4, 4, 2.0),
+                (trajectory.EVENTS, 8, 2, 4.0),
+                (trajectory.KEYFRAME, 10, 2, 0.0),
+                (trajectory.EVENTS, 10, 4, 0.0),
+                (trajectory.EVENTS, 14, 4, 2.0),
+                (trajectory.KEYFRAME, 18, 2, 4.0),
+                (trajectory.EVENTS, 18, 3, 4.0),
+            ],
+        )
+        np.testing.assert_array_equal(np.frombuffer(blocks[6][4], dtype=np.int64), [7, 8])
+
+
+class TrajectoryReaderTestCase(unittest.TestCase):
+    """Tests for TrajectoryReader class"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "trajectory.trj")
+        rng = np.random.default_rng(2)
+        self.atoms = rng.integers(0, 5, 30)
+        self.initial_sites = rng.integers(0, 50, 30)
+        self.final_sites = rng.integers(0, 50, 30)
+        self.dt = rng.random(30)
+        with TrajectoryWriter(self.filename, buffer_size=8) as writer:
+            writer.write_keyframe(np.arange(5), 1.0)
+            writer.record_many(self.atoms, self.initial_sites, self.final_sites, self.dt)
+        self.times = np.cumsum(np.concatenate([[1.0], self.dt]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reader_indexes_blocks(self):
+        with TrajectoryReader(self.filename) as reader:
+            self.assertEqual(len(reader), 30)
+            np.testing.assert_array_equal(reader.blocks["index"], [0, 8, 16, 24])
+            np.testing.assert_array_equal(reader.blocks["count"], [8, 8, 8, 6])
+            np.testing.assert_array_equal(reader.blocks["time"], self.times[[0, 8, 16, 24]])
+            np.testing.assert_array_equal(reader.keyframes["index"], [0])
+        self.assertTrue(reader.file.closed)
+
+    def test_reader_raises_ValueError_for_other_files(self):
+        with open(self.filename, "wb") as f:
+            f.write(b"not a trajectory")
+        with self.assertRaises(ValueError):
+            TrajectoryReader(self.filename)
+
+    def test_reader_ignores_incomplete_block(self):
+        with open(self.filename, "r+b") as f:
+            f.truncate(os.path.getsize(self.filename) - 3)
+        with TrajectoryReader(self.filename) as reader:
+            self.assertEqual(len(reader), 24)
+
+    def test_events(self):
+        with TrajectoryReader(self.filename) as reader:
+            events = list(reader.events(5, 19))
+            self.assertEqual([len(e) for e in events], [3, 8, 3])
+            events = np.concatenate(events)
+            np.testing.assert_array_equal(events["atom"], self.atoms[5:19])
+            np.testing.assert_array_equal(events["initial_site"], self.initial_sites[5:19])
+            np.testing.assert_array_equal(events["final_site"], self.final_sites[5:19])
+            np.testing.assert_array_equal(events["dt"], self.dt[5:19])
+            np.testing.assert_array_equal(events["time"], self.times[6:20])
+            self.assertEqual(list(reader.events(7, 7)), [])
+            self.assertEqual(
+                list(reader), list(zip(self.atoms, self.initial_sites, self.final_sites, self.dt, self.times[1:]))
+            )
+            with self.assertRaises(ValueError):
+                next(reader.events(0, 31))
+
+    def test_index_at_time_and_time_at(self):
+        with TrajectoryReader(self.filename) as reader:
+            self.assertEqual(reader.index_at_time(0.5), 0)
+            self.assertEqual(reader.index_at_time(self.times[-1] + 1.0), 30)
+            for index in range(31):
+                self.assertEqual(reader.time_at(index), self.times[index])
+                self.assertEqual(reader.index_at_time(self.times[index]), index)
+                if index:
+                    self.assertEqual(reader.index_at_time(self.times[index] - 1e-9), index - 1)
+
+    def test_time_at_without_events(self):
+        with TrajectoryWriter(self.filename) as writer:
+            writer.write_keyframe(np.arange(5), 2.0)
+        with TrajectoryReader(self.filename) as reader:
+            self.assertEqual(reader.time_at(0), 2.0)
+        with TrajectoryWriter(self.filename):
+            pass
+        with TrajectoryReader(self.filename) as reader:
+            self.assertEqual(reader.time_at(0), 0.0)
+            with self.assertRaises(ValueError):
+                reader.atom_sites(0)
+
+    def test_atom_sites(self):
+        with TrajectoryReader(self.filename) as reader:
+            atom_site = np.arange(5)
+            for index in range(31):
+                np.testing.assert_array_equal(reader.atom_sites(index), atom_site)
+                if index < 30:
+                    atom_site[self.atoms[index]] = self.final_sites[index]
+
+    def test_restore_matches_simulation(self):
+        s = simulation()
+        s.set_number_of_jumps(300)
+        s.run(trajectory_file=self.filename)
+        with TrajectoryReader(self.filename) as reader:
+            other = simulation()
+            reader.restore(other.lattice, other.atoms, 300)
+            self.assertEqual(other.lattice.time, s.lattice.time)
+            np.testing.assert_array_equal(other.lattice.occupied, s.lattice.occupied)
+            np.testing.assert_array_equal(other.lattice.nn_occupied, s.lattice.nn_occupied)
+            self.assertEqual(other.atoms.sites_occupied(), s.atoms.sites_occupied())
+            np.testing.assert_array_equal(other.lattice.occupied_since, s.lattice.time)
+            with self.assertRaises(ValueError):
+                reader.restore(other.lattice, simulation(n_atoms=10).atoms, 300)
+
+    def test_atom_sites_replay_from_nearest_keyframe(self):
+        s = simulation()
+        s.set_number_of_jumps(500)
+        s.lattice.params = s.params
+        s.lattice.trajectory = TrajectoryWriter(self.filename, buffer_size=16, keyframe_interval=64)
+        s.lattice.trajectory.write_keyframe(np.array([atom.site.lattice_index for atom in s.atoms.atoms]), 0.0)
+        for _ in range(500):
+            s.lattice.jump()
+        s.lattice.trajectory.close()
+        with TrajectoryReader(self.filename) as reader:
+            np.testing.assert_array_equal(reader.keyframes["index"], range(0, 500, 64))
+            atom_site = reader.atom_sites(0)
+            for index in range(501):
+                np.testing.assert_array_equal(reader.atom_sites(index), atom_site)
+                if index < 500:
+                    event = next(reader.events(index, index + 1))
+                    self.assertEqual(atom_site[event["atom"][0]], event["initial_site"][0])
+                    atom_site[event["atom"][0]] = event["final_site"][0]
+            self.assertEqual(atom_site.tolist(), [atom.site.lattice_index for atom in s.atoms.atoms])
+
+
+class TrajectoryFunctionsTestCase(unittest.TestCase):
+    """Tests for trajectory module functions"""
+
+    def test_apply_jumps(self):
+        atom_site = np.array([0, 1, 2])
+        apply_jumps(atom_site, np.array([0, 2, 0, 0]), np.array([5, 6, 7, 8]))
+        np.testing.assert_array_equal(atom_site, [8, 1, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ from unittest.mock import Mock, patch
 import numpy as np
 
 from lattice_mc.jump import Jump
+from lattice_mc.random_stream import RandomStream
 from lattice_mc.simulation import SimulationParameters
 from lattice_mc.transitions import Transitions
 
@@ -25,7 +26,11 @@ class TransitionsTestCase(unittest.TestCase):
         self.transitions.p = np.array([0.1, 0.2, 0.3, 0.4])
         np.testing.assert_allclose(self.transitions.cumulative_probabilities(), np.array([0.1, 0.3, 0.6, 1.0]))
 
-    @patch("random.random")
+    def test_transitions_uses_rng(self):
+        rng = RandomStream(seed=1)
+        self.assertIs(Transitions(self.jumps, params=PARAMS, rng=rng).rng, rng)
+
+    @patch.object(RandomStream, "random")
     def test_random(self, mock_random):
         self.cumulative_probabilities = Mock(return_value=np.array([0.1, 0.3, 0.6, 1.0]))
         mock_random.return_value = 0.05
@@ -33,7 +38,7 @@ class TransitionsTestCase(unittest.TestCase):
         mock_random.return_value = 0.3
         self.assertIs(self.transitions.random(), self.jumps[1])
 
-    @patch("random.random")
+    @patch.object(RandomStream, "random")
     def test_time_to_jump(self, mock_random):
         self.transitions.p = np.array([0.1, 0.2, 0.3, 0.4])
         mock_random.return_value = 0.15